@@ -3,3 +3,11 @@ from django.apps import AppConfig
 
 class AccountsConfig(AppConfig):
     name = 'accounts'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+        from .authentication import forget_user_state
+        from .models import User
+
+        post_save.connect(forget_user_state, sender=User)
+        post_delete.connect(forget_user_state, sender=User)
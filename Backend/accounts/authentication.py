@@ -0,0 +1,139 @@
+"""
+Stateless JWT authentication.
+
+simplejwt's `JWTAuthentication` loads the user row on every request, although
+permissions only need the role, which `CustomTokenObtainPairSerializer` already puts
+in the token. `StatelessJWTAuthentication` builds the user from the token's claims
+instead: a `User` with only id, email, role and is_active loaded and every other
+field deferred (read from the database on first access), so it still works as a
+foreign key value, in querysets and in permission checks.
+
+Role changes and deactivations still apply before the token expires: each user's
+current role and active flag are re-read at most every STATELESS_AUTH_RECHECK
+seconds and kept in the in-process `auth` cache, and saving or deleting a user drops
+their entry (in this process; other workers notice within the recheck interval).
+Opt in with JWT_STATELESS=1, see REST_FRAMEWORK in settings.
+
+JWTAuthentication, StatelessJWTAuthentication and aauthenticate are timed as the
+`auth` phase of profiled requests (see core.instrumentation).
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt import authentication as jwt_authentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from core import instrumentation
+
+User = get_user_model()
+
+CACHE_ALIAS = 'auth'
+# Tokens carry the role lowercased
+ROLES = {role.lower(): role for role, _label in User.ROLE_CHOICES}
+MISSING = 'missing'
+
+
+def _state_key(user_id):
+    return f'user-state:{user_id}'
+
+
+def user_state(user_id):
+    """ (role, is_active) of the user, or MISSING if it was deleted; cached briefly. """
+    cache = caches[CACHE_ALIAS]
+    key = _state_key(user_id)
+    state = cache.get(key)
+    if state is None:
+        state = User.objects.filter(pk=user_id).values_list('role', 'is_active').first() or MISSING
+        cache.set(key, state, timeout=settings.STATELESS_AUTH_RECHECK)
+    return state
+
+
+async def auser_state(user_id):
+    cache = caches[CACHE_ALIAS]
+    key = _state_key(user_id)
+    state = cache.get(key)  # in-process: no need for the async cache API
+    if state is None:
+        state = await User.objects.filter(pk=user_id).values_list('role', 'is_active').afirst() or MISSING
+        cache.set(key, state, timeout=settings.STATELESS_AUTH_RECHECK)
+    return state
+
+
+def forget_user_state(sender, instance, **kwargs):
+    """ post_save / post_delete receiver for the user model. """
+    caches[CACHE_ALIAS].delete(_state_key(instance.pk))
+
+
+def _claims(validated_token):
+    """ (user id, email) from a token issued by CustomTokenObtainPairSerializer, else None. """
+    role, email = ROLES.get(validated_token.get('role')), validated_token.get('email')
+    if role is None or email is None or api_settings.CHECK_REVOKE_TOKEN:
+        # Not issued by CustomTokenObtainPairSerializer, or the password hash is needed
+        return None
+    try:
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+    except KeyError as e:
+        raise InvalidToken(_("Token contained no recognizable user identification")) from e
+    return user_id, email
+
+
+def _user_from_claims(user_id, email, state):
+    if state == MISSING:
+        raise AuthenticationFailed(_("User not found"), code="user_not_found")
+    role, is_active = state
+    if api_settings.CHECK_USER_IS_ACTIVE and not is_active:
+        raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+    return User.from_db(
+        User.objects.db, [api_settings.USER_ID_FIELD, 'email', 'role', 'is_active'],
+        [user_id, email, role, is_active],
+    )
+
+
+class JWTAuthentication(jwt_authentication.JWTAuthentication):
+
+    def authenticate(self, request):
+        with instrumentation.phase('auth'):
+            return super().authenticate(request)
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+
+    def get_user(self, validated_token):
+        claims = _claims(validated_token)
+        if claims is None:
+            return super().get_user(validated_token)
+        user_id, email = claims
+        return _user_from_claims(user_id, email, user_state(user_id))
+
+
+async def aauthenticate(request):
+    """
+    Authenticates a JWT request for async views (see core.async_views) the way the
+    configured authentication class does: from the claims with JWT_STATELESS,
+    otherwise by loading the user. Returns (user, validated token) like
+    BaseAuthentication.authenticate, or None without credentials.
+    """
+    with instrumentation.phase('auth'):
+        authenticator = JWTAuthentication()
+        header = authenticator.get_header(request)
+        raw_token = authenticator.get_raw_token(header) if header is not None else None
+        if raw_token is None:
+            return None
+        validated_token = authenticator.get_validated_token(raw_token)
+
+        claims = _claims(validated_token) if settings.JWT_STATELESS else None
+        if claims is not None:
+            user_id, email = claims
+            return _user_from_claims(user_id, email, await auser_state(user_id)), validated_token
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+            user = await User.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+        except User.DoesNotExist as e:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found") from e
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return user, validated_token
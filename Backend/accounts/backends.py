@@ -0,0 +1,33 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+from . import hashing
+
+UserModel = get_user_model()
+
+
+class PooledHashingBackend(ModelBackend):
+    """
+    ModelBackend with the password hashing done on the bounded hashing pool (see
+    accounts.hashing). A password stored with an older hasher or cost setting is
+    rehashed with the preferred one after a successful login, so changing
+    PASSWORD_HASHER migrates accounts as their owners sign in.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Hash anyway, so unknown accounts can't be told apart by response time
+            hashing.make_password(password)
+            return None
+        if not (hashing.check_password(password, user.password) and self.user_can_authenticate(user)):
+            return None
+        if hashing.needs_rehash(user.password):
+            user.password = hashing.make_password(password)
+            user.save(update_fields=['password'])
+        return user
@@ -0,0 +1,67 @@
+"""
+Password hashing on a bounded thread pool.
+
+Hashing a password (PBKDF2, scrypt, Argon2) is deliberately slow, and a burst of
+logins or registrations would otherwise keep every worker thread hashing at once.
+`run` executes the hash on a pool of PASSWORD_HASH_WORKERS threads instead, and the
+request thread just waits for it (the hash functions release the GIL), so at most
+that many hashes compete for CPU with the worker's other requests. At most
+PASSWORD_HASH_QUEUE more requests may wait for a hashing thread; beyond that the
+request is turned away with 503 instead of piling up.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from rest_framework.exceptions import APIException
+
+_lock = threading.Lock()
+_executor = None
+_slots = None
+
+
+class HashingBusy(APIException):
+    status_code = 503
+    default_detail = "Too many sign-ins in progress, try again shortly."
+    default_code = 'hashing_busy'
+
+
+def _pool():
+    global _executor, _slots
+    with _lock:
+        if _executor is None:
+            workers = settings.PASSWORD_HASH_WORKERS
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+            _slots = threading.BoundedSemaphore(workers + settings.PASSWORD_HASH_QUEUE)
+    return _executor, _slots
+
+
+def run(function, *args):
+    """ Runs `function(*args)` on the hashing pool and returns its result. """
+    executor, slots = _pool()
+    if not slots.acquire(blocking=False):
+        raise HashingBusy()
+    try:
+        return executor.submit(function, *args).result()
+    finally:
+        slots.release()
+
+
+def make_password(password):
+    return run(hashers.make_password, password)
+
+
+def check_password(password, encoded):
+    """ Verifies without the rehash callback: see `needs_rehash`. """
+    return run(hashers.check_password, password, encoded)
+
+
+def needs_rehash(encoded):
+    """ True when `encoded` isn't hashed the way PASSWORD_HASHERS currently prefers. """
+    try:
+        hasher = hashers.identify_hasher(encoded)
+    except ValueError:
+        return False
+    preferred = hashers.get_hasher('default')
+    return hasher.algorithm != preferred.algorithm or preferred.must_update(encoded)
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from . import hashing
 
 User = get_user_model()
 
@@ -27,9 +28,11 @@ class RegisterSerializer(serializers.ModelSerializer):
         fields = ('email', 'password', 'role')
     
     def create(self, validated_data):
-        user = User.objects.create_user(
-            email=validated_data['email'],
-            password=validated_data['password'],
+        # As create_user, with the password hashed on the bounded hashing pool
+        user = User(
+            email=User.objects.normalize_email(validated_data['email']),
+            password=hashing.make_password(validated_data['password']),
             role=validated_data.get('role', 'Customer')
         )
+        user.save()
         return user
@@ -1,3 +1,100 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework.throttling import SimpleRateThrottle
+from rest_framework.views import APIView
+
+from .authentication import StatelessJWTAuthentication
+from .models import User
+from .serializers import CustomTokenObtainPairSerializer
+
+MD5 = 'django.contrib.auth.hashers.MD5PasswordHasher'
+SCRYPT = 'django.contrib.auth.hashers.ScryptPasswordHasher'
+
+
+class StatelessJWTAuthenticationTests(TestCase):
+
+    def setUp(self):
+        caches['auth'].clear()
+        self.user = User.objects.create_user(email='authority@example.com', password='pass12345', role='Authority')
+        self.client = APIClient()
+        token = CustomTokenObtainPairSerializer.get_token(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        patcher = mock.patch.object(APIView, 'authentication_classes', [StatelessJWTAuthentication])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_user_is_built_from_the_token(self):
+        self.assertEqual(self.client.get('/api/orders/').status_code, 200)
+        # Once the role check is cached only the (empty) lists are counted, no user query
+        with self.assertNumQueries(2):
+            self.assertEqual(self.client.get('/api/orders/').status_code, 200)
+            self.assertEqual(self.client.get('/api/compliance/pending/').status_code, 200)
+
+    def test_profile_loads_deferred_fields(self):
+        response = self.client.get('/api/accounts/profile/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['email'], response.data['role']), ('authority@example.com', 'Authority'))
+        self.assertIsNotNone(response.data['date_joined'])
+
+    def test_role_change_and_deactivation_apply_immediately(self):
+        self.assertEqual(self.client.get('/api/compliance/pending/').status_code, 200)
+        self.user.role = 'Customer'
+        self.user.save()
+        self.assertEqual(self.client.get('/api/compliance/pending/').status_code, 403)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/api/orders/').status_code, 401)
+
+
+class LoginTests(TestCase):
+
+    def setUp(self):
+        caches['default'].clear()
+        with override_settings(PASSWORD_HASHERS=[MD5]):
+            self.user = User.objects.create_user(email='customer@example.com', password='pass12345')
+
+    def login(self, password='pass12345', email='customer@example.com', **extra):
+        return self.client.post('/api/accounts/login/', {'email': email, 'password': password}, **extra)
+
+    @override_settings(PASSWORD_HASHERS=[SCRYPT, MD5])
+    def test_login_rehashes_with_the_preferred_hasher(self):
+        self.assertEqual(self.login(password='wrong').status_code, 401)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('md5$'))
+
+        self.assertEqual(self.login().status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('scrypt$'))
+        self.assertEqual(self.login().status_code, 200)
+
+    @override_settings(PASSWORD_HASHERS=[MD5])
+    def test_register_hashes_with_the_preferred_hasher(self):
+        response = self.client.post('/api/accounts/register/', {'email': 'New@Example.com', 'password': 'pass12345'})
+        self.assertEqual(response.status_code, 201, response.data)
+        user = User.objects.get(email='New@example.com')
+        self.assertTrue(user.password.startswith('md5$') and user.check_password('pass12345'))
+
+    @override_settings(PASSWORD_HASHERS=[MD5])
+    @mock.patch.object(SimpleRateThrottle, 'THROTTLE_RATES', {'login_ip': '6/min', 'login_account': '2/min'})
+    def test_attempts_are_limited_per_account_and_per_address(self):
+        self.assertEqual([self.login(password='wrong').status_code for _ in range(3)], [401, 401, 429])
+        with mock.patch('accounts.hashing.run') as run:
+            self.assertEqual(self.login().status_code, 429)
+            run.assert_not_called()
+        # A forged X-Forwarded-For doesn't buy a fresh address limit
+        self.assertEqual([
+            self.login(email=f'other{i}@example.com', HTTP_X_FORWARDED_FOR=f'10.0.0.{i}').status_code for i in range(3)
+        ], [401, 401, 429])
+
+    @override_settings(PASSWORD_HASHERS=[MD5])
+    @mock.patch.object(SimpleRateThrottle, 'THROTTLE_RATES', {'login_ip': '2/min', 'login_account': '5/min',
+                                                              'register_ip': '2/min'})
+    def test_sign_ups_and_sign_ins_are_limited_apart(self):
+        def register(i):
+            data = {'email': f'new{i}@example.com', 'password': 'pass12345'}
+            return self.client.post('/api/accounts/register/', data)
+        self.assertEqual([register(i).status_code for i in range(3)], [201, 201, 429])
+        self.assertEqual([self.login().status_code for _ in range(3)], [200, 200, 429])
@@ -0,0 +1,33 @@
+"""
+Sign-in and registration rate limits, checked before any password is hashed.
+
+Counters live in the local `default` cache, so each worker process sheds a
+credential-stuffing burst on its own without a round trip to a shared store.
+Rates are the `login_ip`, `login_account` and `register_ip` entries of
+DEFAULT_THROTTLE_RATES.
+"""
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class LoginIPThrottle(SimpleRateThrottle):
+    """ Attempts per client address (REMOTE_ADDR, or X-Forwarded-For past NUM_PROXIES proxies) """
+    scope = 'login_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class RegisterIPThrottle(LoginIPThrottle):
+    """ Sign-ups per client address, counted apart from its sign-in attempts """
+    scope = 'register_ip'
+
+
+class LoginAccountThrottle(SimpleRateThrottle):
+    """ Attempts per account, whichever addresses they come from """
+    scope = 'login_account'
+
+    def get_cache_key(self, request, view):
+        email = request.data.get('email') if hasattr(request.data, 'get') else None
+        if not isinstance(email, str) or not email:
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': email.strip().lower()}
@@ -2,6 +2,7 @@ from rest_framework import generics, permissions
 from django.contrib.auth import get_user_model
 from rest_framework_simplejwt.views import TokenObtainPairView
 from .serializers import RegisterSerializer, UserSerializer, CustomTokenObtainPairSerializer
+from .throttling import LoginAccountThrottle, LoginIPThrottle, RegisterIPThrottle
 
 User = get_user_model()
 
@@ -9,9 +10,12 @@ class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
     permission_classes = (permissions.AllowAny,)
     serializer_class = RegisterSerializer
+    throttle_classes = (RegisterIPThrottle,)
 
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
+    # Checked before the password is hashed
+    throttle_classes = (LoginIPThrottle, LoginAccountThrottle)
 
 
 class ProfileView(generics.RetrieveAPIView):
@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+
+
+class AnalyticsConfig(AppConfig):
+    name = 'analytics'
+
+    def ready(self):
+        from django.db.models.signals import post_save, pre_delete
+        from orders.models import Order
+        from .rollups import move_on_save, subtract_on_delete
+
+        post_save.connect(move_on_save, sender=Order)
+        pre_delete.connect(subtract_on_delete, sender=Order)
@@ -0,0 +1,26 @@
+import time
+from datetime import datetime
+from django.core.management.base import BaseCommand
+from analytics.rollups import BATCH_SIZE, rebuild
+
+
+def day(value):
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes the hourly, daily, per-product and per-category sales rollups from the orders, for every "
+        "order or those placed since the start of the month of --since."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', type=day, help="YYYY-MM-DD; rebuilds from the first day of its month.")
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        written = rebuild(since=options['since'], batch_size=options['batch_size'])
+        for model, rows in written.items():
+            self.stdout.write(f"{model._meta.label}: {rows} rows")
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt the sales rollups in {time.perf_counter() - started:.1f}s."))
@@ -0,0 +1,88 @@
+"""
+Fills the new rollup tables from the orders placed so far, and marks them counted.
+
+This is what analytics.rollups.rebuild computed at this point, frozen: the totals
+are grouped in the database by hour, day or month of the current time zone, and
+written with bulk INSERTs.
+"""
+from collections import defaultdict
+
+from django.db import migrations
+from django.db.models import Count, DateField, DecimalField, F, OuterRef, Subquery, Sum
+from django.db.models.functions import TruncDate, TruncHour, TruncMonth
+from django.utils import timezone
+
+BATCH_SIZE = 1000
+REVENUE = DecimalField(max_digits=16, decimal_places=2)
+
+
+def backfill(apps, schema_editor):
+    using = schema_editor.connection.alias
+    Order = apps.get_model('orders', 'Order')
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    Product = apps.get_model('products', 'Product')
+    orders = Order.objects.using(using).order_by()
+    items = OrderItem.objects.using(using).order_by()
+
+    # Items from before category snapshots count under their product's category
+    items.filter(category__isnull=True).exclude(product__category=None).update(
+        category=Subquery(Product.objects.filter(pk=OuterRef('product')).values('category')[:1]),
+    )
+
+    units = {
+        (row['hour'], row['order_status']): row['units']
+        for row in items.values(hour=TruncHour('order__created_at'), order_status=F('order__status')).annotate(
+            units=Sum('quantity'))
+    }
+    hourly, daily = [], defaultdict(lambda: [0, 0, 0])
+    HourlySales = apps.get_model('analytics', 'HourlySales')
+    for row in orders.values('status', hour=TruncHour('created_at')).annotate(
+            placed=Count('pk'), revenue=Sum('total_amount')).iterator(chunk_size=BATCH_SIZE):
+        totals = row['placed'], units.get((row['hour'], row['status']), 0), row['revenue']
+        hourly.append(HourlySales(hour=row['hour'], status=row['status'], orders=totals[0], units=totals[1],
+                                  revenue=totals[2]))
+        day = daily[timezone.localtime(row['hour']).date(), row['status']]
+        for index, value in enumerate(totals):
+            day[index] += value
+    HourlySales.objects.using(using).bulk_create(hourly, batch_size=BATCH_SIZE)
+    DailySales = apps.get_model('analytics', 'DailySales')
+    DailySales.objects.using(using).bulk_create([
+        DailySales(day=day, status=status, orders=placed, units=sold, revenue=revenue)
+        for (day, status), (placed, sold, revenue) in daily.items()
+    ], batch_size=BATCH_SIZE)
+
+    periods = {
+        'day': TruncDate('order__created_at'),
+        'month': TruncMonth('order__created_at', output_field=DateField()),
+    }
+    for model_name, key in (('ProductSales', 'product'), ('CategorySales', 'category')):
+        model = apps.get_model('analytics', model_name)
+        for period, start in periods.items():
+            rows = items.exclude(**{key: None}).values(key, start=start).annotate(
+                placed=Count('order', distinct=True), sold=Sum('quantity'),
+                revenue=Sum(F('quantity') * F('price_at_purchase'), output_field=REVENUE),
+            )
+            batch = []
+            for row in rows.iterator(chunk_size=BATCH_SIZE):
+                batch.append(model(**{f'{key}_id': row[key]}, period=period, day=row['start'], orders=row['placed'],
+                                   units=row['sold'], revenue=row['revenue']))
+                if len(batch) == BATCH_SIZE:
+                    model.objects.using(using).bulk_create(batch)
+                    batch = []
+            model.objects.using(using).bulk_create(batch)
+
+    orders.filter(rolled_up=False).update(rolled_up=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0001_sales_rollups'),
+        ('orders', '0005_sales_rollup_snapshots'),
+        # The orders merged from the legacy api tables are counted too
+        ('api', '0002_merge_legacy_catalog'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0002_backfill_sales_rollups'),
+        ('products', '0009_verified_active_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='categorysales',
+            name='category',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='products.category'),
+        ),
+        migrations.AlterField(
+            model_name='productsales',
+            name='product',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='products.product'),
+        ),
+    ]
@@ -0,0 +1,70 @@
+from django.db import models
+from orders.models import Order
+from products.models import Category, Product
+
+
+class SalesTotals(models.Model):
+    orders = models.IntegerField(default=0)
+    units = models.BigIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+
+    class Meta:
+        abstract = True
+
+
+class HourlySales(SalesTotals):
+    """ The orders placed in an hour, by their current status """
+    hour = models.DateTimeField()
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['hour', 'status'], name='hourly_sales_hour_status_uniq'),
+        ]
+
+
+class DailySales(SalesTotals):
+    """ The orders placed in a day, by their current status """
+    day = models.DateField()
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'status'], name='daily_sales_day_status_uniq'),
+        ]
+
+
+class PeriodSales(SalesTotals):
+    """ Kept per day and per month, so that long ranges read one row per month """
+    PERIOD_CHOICES = (
+        ('day', 'Day'),
+        ('month', 'Month'),
+    )
+
+    period = models.CharField(max_length=5, choices=PERIOD_CHOICES)
+    # The first day of the period
+    day = models.DateField()
+
+    class Meta:
+        abstract = True
+
+
+class ProductSales(PeriodSales):
+    """ What was ordered of a product in a day or month """
+    # Sales history outlives the product: the id is kept, unconstrained
+    product = models.ForeignKey(Product, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['period', 'day', 'product'], name='product_sales_period_product_uniq'),
+        ]
+
+
+class CategorySales(PeriodSales):
+    """ What was ordered of a category's products in a day or month """
+    category = models.ForeignKey(Category, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['period', 'day', 'category'], name='category_sales_period_category_uniq'),
+        ]
@@ -0,0 +1,72 @@
+"""
+Date-range sales reports read from the rollup tables (see analytics.rollups) only.
+
+A year is 365 daily rows per status, and for the top sellers one row per product
+and month plus the days of any partial month at either end, however many orders
+it holds.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import F, Q, Sum
+
+from orders.models import Order
+from products.models import Category, Product
+from .models import CategorySales, DailySales, HourlySales, ProductSales
+from .rollups import start_of
+
+SUMS = {'placed': Sum('orders'), 'sold': Sum('units'), 'sales': Sum('revenue')}
+CENT = Decimal('0.01')
+
+
+def totals(row):
+    return {
+        'orders': row.get('placed') or 0, 'units': row.get('sold') or 0,
+        'revenue': str(Decimal(row.get('sales') or 0).quantize(CENT)),
+    }
+
+
+def period_filter(start, end):
+    """ [start, end] over `PeriodSales` rows: the whole months in it by month, the days around them by day. """
+    first = start if start.day == 1 else (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    stop = (end + timedelta(days=1)).replace(day=1)
+    if first >= stop:
+        return Q(period='day', day__gte=start, day__lte=end)
+    return (
+        Q(period='month', day__gte=first, day__lt=stop)
+        | Q(period='day', day__gte=start, day__lt=first)
+        | Q(period='day', day__gte=stop, day__lte=end)
+    )
+
+
+def top_sellers(rollups, field, model, limit):
+    rows = list(rollups.values(field).annotate(**SUMS).order_by('-sales', field)[:limit])
+    names = dict(model.objects.filter(pk__in=[row[field] for row in rows]).values_list('pk', 'name'))
+    return [{'id': row[field], 'name': names.get(row[field], ''), **totals(row)} for row in rows]
+
+
+def sales_report(start, end, granularity='day', top=10):
+    """
+    Totals, status breakdown, a per-day or per-hour series and the best-selling
+    products and categories by revenue, for the orders placed from `start` to `end`
+    (dates, both included). Periods without orders are left out of the series.
+    """
+    days = DailySales.objects.filter(day__gte=start, day__lte=end)
+    if granularity == 'day':
+        series = days.values(period=F('day'))
+    else:
+        hours = HourlySales.objects.filter(hour__gte=start_of(start), hour__lt=start_of(end + timedelta(days=1)))
+        series = hours.values(period=F('hour'))
+    periods = period_filter(start, end)
+
+    rows = {status: {} for status, _label in Order.STATUS_CHOICES}
+    rows.update((row['status'], row) for row in days.values('status').annotate(**SUMS).order_by())
+    overall = {name: sum(row.get(name) or 0 for row in rows.values()) for name in SUMS}
+    return {
+        'start': start, 'end': end, 'granularity': granularity,
+        'totals': totals(overall),
+        'by_status': {status: totals(row) for status, row in rows.items()},
+        'series': [{'period': row['period'], **totals(row)} for row in series.annotate(**SUMS).order_by('period')],
+        'top_products': top_sellers(ProductSales.objects.filter(periods), 'product', Product, top),
+        'top_categories': top_sellers(CategorySales.objects.filter(periods), 'category', Category, top),
+    }
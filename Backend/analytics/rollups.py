@@ -0,0 +1,261 @@
+"""
+Pre-aggregated sales, so the analytics endpoint never scans orders.
+
+The rollup tables keep running totals (orders, units, revenue): `HourlySales` and
+`DailySales` per order status, `ProductSales` and `CategorySales` per product /
+category and day or month. `place_order` adds each order once its transaction
+commits (`order_deltas` + `apply_deltas` through `transaction.on_commit`): one
+`INSERT ... ON CONFLICT DO UPDATE` per table adds to the existing rows instead of
+reading them first (backends without it update row by row). The status rows every
+checkout of the hour writes are updated last, so their row locks are held briefly.
+A failed write is logged and leaves the order standing.
+
+`Order.rolled_up` marks the orders counted: a status change moves one of them
+between status rows and a delete subtracts it (Order signals), while other orders
+are left alone. Product and category totals count what was ordered, under the
+category snapshotted on the order item, whatever happened to the order afterwards.
+Their rows outlive a deleted product or category (reports show them unnamed) until
+a rebuild, which only counts the products and categories the items still reference.
+
+Writes that bypass these (bulk inserts, `QuerySet.update` of the status, orders
+created outside `place_order`) leave the rollups behind; `rebuild` recomputes them
+from the orders, a month at a time, replaces the rows and marks the orders counted.
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from functools import cache, partial
+
+from django.apps import apps as global_apps
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import F, Max, Min, OuterRef, Subquery
+from django.utils import timezone
+
+from orders.models import OrderItem
+from .models import CategorySales, DailySales, HourlySales, ProductSales
+
+# In the order they are written in: the contended status rows last
+ROLLUPS = (ProductSales, CategorySales, DailySales, HourlySales)
+KEYS = {
+    HourlySales: ('hour', 'status'),
+    DailySales: ('day', 'status'),
+    ProductSales: ('period', 'day', 'product'),
+    CategorySales: ('period', 'day', 'category'),
+}
+TOTALS = ('orders', 'units', 'revenue')
+PERIODS = ('day', 'month')
+BATCH_SIZE = 1000
+
+logger = logging.getLogger(__name__)
+
+
+def hour_of(moment):
+    """ The start of `moment`'s hour in the current time zone. """
+    return timezone.localtime(moment).replace(minute=0, second=0, microsecond=0)
+
+
+def start_of(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def new_deltas():
+    """ {model: {key: [orders, units, revenue]}} """
+    return defaultdict(lambda: defaultdict(lambda: [0, 0, Decimal(0)]))
+
+
+def _add(totals, orders, units, revenue):
+    totals[0] += orders
+    totals[1] += units
+    totals[2] += revenue
+
+
+def status_deltas(deltas, hour, status, units, total_amount, sign=1):
+    """ Adds an order placed in `hour` (see `hour_of`) to the status rollups, or subtracts it. """
+    _add(deltas[HourlySales][hour, status], sign, sign * units, sign * total_amount)
+    _add(deltas[DailySales][hour.date(), status], sign, sign * units, sign * total_amount)
+    return deltas
+
+
+def order_deltas(deltas, placed_at, status, total_amount, lines, sign=1):
+    """
+    Adds one order to `deltas`, or subtracts it with sign=-1. `lines` are
+    (product_id, category_id, quantity, price) tuples.
+    """
+    hour = hour_of(placed_at)
+    status_deltas(deltas, hour, status, sum(line[2] for line in lines), total_amount, sign)
+    day = hour.date()
+    starts = {'day': day, 'month': day.replace(day=1)}
+    for model, position in ((ProductSales, 0), (CategorySales, 1)):
+        ordered = defaultdict(lambda: [0, Decimal(0)])
+        for line in lines:
+            if line[position] is not None:
+                ordered[line[position]][0] += line[2]
+                ordered[line[position]][1] += line[2] * line[3]
+        for key, (units, revenue) in ordered.items():
+            for period in PERIODS:
+                _add(deltas[model][period, starts[period], key], sign, sign * units, sign * revenue)
+    return deltas
+
+
+def upsert(model, rows, keys=None):
+    """
+    Adds {key: [orders, units, revenue]} to `model`'s rows with INSERT ... ON CONFLICT DO
+    UPDATE, as many rows per statement as the backend takes. `keys` are the key fields
+    (`KEYS[model]` by default). Returns the rows sent.
+    """
+    keys = keys or KEYS[model]
+    rows = sorted((key, totals) for key, totals in rows.items() if any(totals))
+    using = router.db_for_write(model)
+    connection = connections[using]
+    if not connection.features.supports_update_conflicts_with_target:
+        _add_row_by_row(model, keys, rows, using)
+        return len(rows)
+    fields = [model._meta.get_field(name) for name in (*keys, *TOTALS)]
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    columns = [quote(field.column) for field in fields]
+    conflict = (
+        f"ON CONFLICT ({', '.join(columns[:len(keys)])}) DO UPDATE SET "
+        + ', '.join(f"{column} = {table}.{column} + EXCLUDED.{column}" for column in columns[len(keys):])
+    )
+    # Keys repeat across rows (the same hour, day, product); totals are plain numbers
+    prepare = cache(lambda field, value: field.get_db_prep_save(value, connection))
+    row = '(%s)' % ', '.join(['%s'] * len(columns))
+    size = max(1, connection.ops.bulk_batch_size(fields, rows))
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), size):
+            batch = rows[start:start + size]
+            params = []
+            for key, values in batch:
+                params.extend(prepare(field, value) for field, value in zip(fields, key))
+                params.extend(values)
+            cursor.execute(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES {', '.join([row] * len(batch))} {conflict}", params,
+            )
+    return len(rows)
+
+
+def _add_row_by_row(model, keys, rows, using):
+    attnames = [model._meta.get_field(name).attname for name in keys]
+    table = model.objects.using(using)
+    for key, totals in rows:
+        lookup = dict(zip(attnames, key))
+        increments = {name: F(name) + value for name, value in zip(TOTALS, totals)}
+        if table.filter(**lookup).update(**increments):
+            continue
+        try:
+            with transaction.atomic(using=using):
+                table.create(**lookup, **dict(zip(TOTALS, totals)))
+        except IntegrityError:
+            # Inserted meanwhile by a concurrent checkout
+            table.filter(**lookup).update(**increments)
+
+
+def apply_deltas(deltas):
+    with transaction.atomic(using=router.db_for_write(HourlySales)):
+        for model in ROLLUPS:
+            if deltas.get(model):
+                upsert(model, deltas[model])
+
+
+def _apply_committed(deltas):
+    try:
+        apply_deltas(deltas)
+    except Exception:
+        # The order stands; the rollups lag behind until rebuild_sales_rollups runs
+        logger.exception("Could not update the sales rollups, rebuild them with rebuild_sales_rollups")
+
+
+def apply_on_commit(deltas):
+    transaction.on_commit(partial(_apply_committed, deltas))
+
+
+def move_on_save(sender, instance, created, raw=False, **kwargs):
+    before = instance._rolled_up
+    if raw or created or before is None or before == instance.status:
+        return
+    units = (instance.summary or {}).get('total_quantity')
+    if units is None:
+        units = sum(instance.items.values_list('quantity', flat=True))
+    hour = hour_of(instance.created_at)
+    deltas = status_deltas(new_deltas(), hour, before, units, instance.total_amount, sign=-1)
+    apply_on_commit(status_deltas(deltas, hour, instance.status, units, instance.total_amount))
+    instance._rolled_up = instance.status
+
+
+def subtract_on_delete(sender, instance, **kwargs):
+    """ pre_delete: the items are still there to say what was counted. """
+    if instance._rolled_up is None:
+        return
+    lines = list(OrderItem.objects.filter(order=instance).values_list(
+        'product_id', 'category_id', 'quantity', 'price_at_purchase',
+    ))
+    apply_on_commit(order_deltas(
+        new_deltas(), instance.created_at, instance._rolled_up, instance.total_amount, lines, sign=-1,
+    ))
+    instance._rolled_up = None
+
+
+def months(first, last):
+    """ (first day, first day of the next) of each month from `first`'s to `last`'s. """
+    month = first.replace(day=1)
+    while month <= last:
+        following = (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+        yield month, following
+        month = following
+
+
+def rebuild(since=None, batch_size=BATCH_SIZE, apps=global_apps):
+    """
+    Recomputes the rollups of the orders placed from the start of the month of the date
+    `since` (all of them by default; monthly rows can't be split), replacing the rows
+    for that range. Orders and their items are read a month at a time and added up
+    with `order_deltas`, as checkouts are, so memory is bounded by one month's rollup
+    rows. Items without a category snapshot get their product's current category.
+    Returns {model: rows written}. Orders placed while it runs may be missed or
+    counted twice; rebuilding their month again settles them.
+    """
+    order_model, item_model = apps.get_model('orders', 'Order'), apps.get_model('orders', 'OrderItem')
+    product_model = apps.get_model('products', 'Product')
+    tables = {model: apps.get_model(model._meta.label) for model in ROLLUPS}
+    orders = order_model.objects.order_by()
+    if since is not None:
+        since = since.replace(day=1)
+        orders = orders.filter(created_at__gte=start_of(since))
+    placed = orders.aggregate(first=Min('created_at'), last=Max('created_at'))
+
+    written = dict.fromkeys(ROLLUPS, 0)
+    with transaction.atomic(using=router.db_for_write(tables[HourlySales])):
+        for model, table in tables.items():
+            if since is None:
+                table.objects.all().delete()
+            elif model is HourlySales:
+                table.objects.filter(hour__gte=start_of(since)).delete()
+            else:
+                table.objects.filter(day__gte=since).delete()
+        if placed['first'] is None:
+            return written
+
+        for month, following in months(timezone.localdate(placed['first']), timezone.localdate(placed['last'])):
+            placed_in = {'created_at__gte': start_of(month), 'created_at__lt': start_of(following)}
+            items = item_model.objects.filter(**{f'order__{lookup}': value for lookup, value in placed_in.items()})
+            items.filter(category__isnull=True).exclude(product__category=None).update(
+                category=Subquery(product_model.objects.filter(pk=OuterRef('product')).values('category')[:1]),
+            )
+            by_order = {
+                pk: (created_at, status, total_amount, [])
+                for pk, created_at, status, total_amount in orders.filter(**placed_in).values_list(
+                    'pk', 'created_at', 'status', 'total_amount').iterator(chunk_size=batch_size)
+            }
+            for order_id, *line in items.values_list(
+                    'order_id', 'product_id', 'category_id', 'quantity', 'price_at_purchase',
+            ).iterator(chunk_size=batch_size):
+                by_order[order_id][3].append(line)
+            deltas = new_deltas()
+            for created_at, status, total_amount, lines in by_order.values():
+                order_deltas(deltas, created_at, status, total_amount, lines)
+            for model, table in tables.items():
+                written[model] += upsert(table, deltas[model], KEYS[model])
+            orders.filter(**placed_in, rolled_up=False).update(rolled_up=True)
+    return written
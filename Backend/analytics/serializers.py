@@ -0,0 +1,20 @@
+from datetime import timedelta
+from django.utils import timezone
+from rest_framework import serializers
+
+DEFAULT_DAYS = 30
+
+
+class SalesQuerySerializer(serializers.Serializer):
+    """ The query string of the analytics endpoint; the range defaults to the last 30 days. """
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    granularity = serializers.ChoiceField(choices=['day', 'hour'], default='day')
+    top = serializers.IntegerField(min_value=1, max_value=100, default=10)
+
+    def validate(self, attrs):
+        attrs.setdefault('end', timezone.localdate())
+        attrs.setdefault('start', attrs['end'] - timedelta(days=DEFAULT_DAYS - 1))
+        if attrs['start'] > attrs['end']:
+            raise serializers.ValidationError({'start': "Must not be after end."})
+        return attrs
@@ -0,0 +1,248 @@
+from collections import Counter
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from accounts.models import User
+from core.query_plans import QueryPlanTestMixin, analyze
+from orders.models import Order
+from orders.services import place_order
+from products.models import Category, Product
+from .models import CategorySales, DailySales, HourlySales, ProductSales
+from .rollups import KEYS, ROLLUPS, TOTALS, rebuild
+
+
+def rollups():
+    """ The rollup rows that hold anything, by model. """
+    return {
+        model: sorted(model.objects.exclude(orders=0, units=0, revenue=0).values_list(*KEYS[model], *TOTALS))
+        for model in ROLLUPS
+    }
+
+
+class SalesRollupTests(TestCase):
+    def setUp(self):
+        self.customer = User.objects.create_user(email='buyer@example.com', password='pass12345')
+        self.admin = User.objects.create_user(email='admin@example.com', password='pass12345', role='Admin')
+        gloves, masks = Category.objects.for_name("Gloves"), Category.objects.for_name("Masks")
+        self.glove, self.mask, self.loose = Product.objects.bulk_create([
+            Product(name="Glove", category=gloves, description="", price='10.00', stock=100),
+            Product(name="Mask", category=masks, description="", price='2.50', stock=100),
+            Product(name="Loose", category=None, description="", price='1.00', stock=100),
+        ])
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def place(self, *lines, user=None):
+        items = [{'product_id': product.pk, 'quantity': quantity} for product, quantity in lines]
+        with self.captureOnCommitCallbacks(execute=True):
+            if user is None:
+                return place_order(None, items, customer_name="Guest", email="guest@example.com")
+            return place_order(user, items)
+
+    def report(self, **params):
+        response = self.client.get('/api/analytics/', params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def test_placed_orders_are_rolled_up_as_a_rebuild_would(self):
+        self.place((self.glove, 2), (self.mask, 1), (self.glove, 1), user=self.customer)
+        self.place((self.mask, 4), (self.loose, 3))
+        incremental = rollups()
+        hour = timezone.now().replace(minute=0, second=0, microsecond=0)
+        self.assertEqual(incremental[HourlySales], [(hour, 'Pending', 2, 11, Decimal('45.50'))])
+
+        rebuild()
+        self.assertEqual(rollups(), incremental)
+
+    def test_status_changes_and_deletes_follow_the_order(self):
+        first = self.place((self.glove, 1), user=self.customer)
+        self.place((self.mask, 2), user=self.customer)
+        order = Order.objects.get(pk=first.pk)
+        order.status = 'Delivered'
+        with self.captureOnCommitCallbacks(execute=True):
+            order.save()
+        by_status = self.report()['by_status']
+        self.assertEqual((by_status['Delivered']['orders'], by_status['Pending']['revenue']), (1, '5.00'))
+        moved = rollups()
+        rebuild()
+        self.assertEqual(rollups(), moved)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Order.objects.filter(pk=first.pk).delete()
+        deleted = rollups()
+        rebuild()
+        self.assertEqual(rollups(), deleted)
+        self.assertEqual(self.report()['totals'], {'orders': 1, 'units': 2, 'revenue': '5.00'})
+
+    def test_orders_the_rollups_never_counted_are_left_alone(self):
+        self.place((self.glove, 1), user=self.customer)
+        counted = rollups()
+        stray = Order.objects.create(user=self.customer, total_amount='10.00')
+        order = Order.objects.get(pk=stray.pk)
+        order.status = 'Shipped'
+        with self.captureOnCommitCallbacks(execute=True):
+            order.save()
+            order.delete()
+        self.assertEqual(rollups(), counted)
+
+    def test_delete_subtracts_the_category_counted(self):
+        order = self.place((self.glove, 2), user=self.customer)
+        self.glove.category = Category.objects.for_name("Masks")
+        self.glove.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            Order.objects.get(pk=order.pk).delete()
+        self.assertEqual(rollups(), {model: [] for model in ROLLUPS})
+
+    def test_sales_outlive_deleted_products_and_categories(self):
+        self.place((self.glove, 2), user=self.customer)
+        counted = rollups()
+        Product.objects.filter(pk=self.glove.pk).delete()
+        Category.objects.filter(name="Gloves").delete()
+        self.assertEqual(rollups(), counted)
+        self.assertEqual(self.report()['top_products'][0], {
+            'id': self.glove.pk, 'name': '', 'orders': 1, 'units': 2, 'revenue': '20.00',
+        })
+
+    def test_backends_without_on_conflict_add_row_by_row(self):
+        self.place((self.glove, 1), user=self.customer)
+        with mock.patch.object(connection.features, 'supports_update_conflicts_with_target', False):
+            self.place((self.glove, 2), (self.mask, 1), user=self.customer)
+        incremental = rollups()
+        rebuild()
+        self.assertEqual(rollups(), incremental)
+
+    def test_report(self):
+        self.place((self.glove, 3), (self.mask, 2), user=self.customer)
+        self.place((self.mask, 1))
+        today = timezone.localdate()
+        report = self.report(start=today - timedelta(days=6), end=today, top=1)
+        self.assertEqual(report['totals'], {'orders': 2, 'units': 6, 'revenue': '37.50'})
+        self.assertEqual(report['by_status']['Cancelled'], {'orders': 0, 'units': 0, 'revenue': '0.00'})
+        self.assertEqual(report['series'], [{'period': today, 'orders': 2, 'units': 6, 'revenue': '37.50'}])
+        self.assertEqual(report['top_products'], [
+            {'id': self.glove.pk, 'name': "Glove", 'orders': 1, 'units': 3, 'revenue': '30.00'},
+        ])
+        self.assertEqual(report['top_categories'][0]['name'], "Gloves")
+        self.assertEqual(len(self.report(granularity='hour')['series']), 1)
+        tomorrow = today + timedelta(days=1)
+        self.assertEqual(self.report(start=tomorrow, end=tomorrow)['totals']['orders'], 0)
+
+    def test_report_is_for_admins_with_a_valid_range(self):
+        reversed_range = {'start': '2026-02-01', 'end': '2026-01-01'}
+        self.assertEqual(self.client.get('/api/analytics/', reversed_range).status_code, 400)
+        self.assertEqual(self.client.get('/api/analytics/', {'granularity': 'week'}).status_code, 400)
+        self.client.force_authenticate(self.customer)
+        self.assertEqual(self.client.get('/api/analytics/').status_code, 403)
+
+    def test_rebuild_command_replaces_a_range(self):
+        order = self.place((self.glove, 1), user=self.customer)
+        # Into an earlier month, bypassing the rollups
+        Order.objects.filter(pk=order.pk).update(created_at=order.created_at - timedelta(days=40))
+        today = timezone.localdate()
+        since = {'start': today - timedelta(days=60), 'end': today}
+
+        call_command('rebuild_sales_rollups', '--since', today.isoformat(), stdout=StringIO())
+        self.assertEqual(self.report(**since)['totals']['orders'], 0)
+
+        output = StringIO()
+        call_command('rebuild_sales_rollups', stdout=output)
+        self.assertIn("analytics.HourlySales: 1 rows", output.getvalue())
+        self.assertIn("analytics.ProductSales: 2 rows", output.getvalue())
+        report = self.report(**since)
+        self.assertEqual((report['totals']['orders'], report['top_products'][0]['units']), (1, 1))
+
+
+class SalesReportQueryPlanTests(QueryPlanTestMixin, TestCase):
+    """ A report reads its date range of the rollups through their unique indexes. """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(email='admin@example.com', password='pass12345', role='Admin')
+        categories = [Category.objects.for_name(f"Category {i}") for i in range(5)]
+        products = Product.objects.bulk_create([
+            Product(name=f"Product {i}", category=categories[i % 5], description="", price='1.00', stock=1)
+            for i in range(200)
+        ])[:20]
+        now = timezone.now().replace(minute=0, second=0, microsecond=0)
+        totals = {'orders': 1, 'units': 1, 'revenue': 1}
+        HourlySales.objects.bulk_create([
+            HourlySales(hour=now - timedelta(hours=i), status='Delivered', **totals) for i in range(400 * 24)
+        ], batch_size=1000)
+        days = [timezone.localdate() - timedelta(days=i) for i in range(400)]
+        DailySales.objects.bulk_create([DailySales(day=day, status='Delivered', **totals) for day in days])
+        # Each day counts once, also within its month's row
+        periods = [('day', day, 1) for day in days] + [
+            ('month', month, count) for month, count in Counter(day.replace(day=1) for day in days).items()
+        ]
+        ProductSales.objects.bulk_create([
+            ProductSales(period=period, day=day, product=product, orders=count, units=count, revenue=count)
+            for period, day, count in periods for product in products
+        ], batch_size=1000)
+        CategorySales.objects.bulk_create([
+            CategorySales(period=period, day=day, category=category, orders=count, units=count, revenue=count)
+            for period, day, count in periods for category in categories
+        ], batch_size=1000)
+        analyze()
+
+    def test_report_uses_indexes(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        response = self.assertNoFullScans(client.get, '/api/analytics/', {'granularity': 'hour'})
+        self.assertEqual(response.data['totals']['orders'], 30)
+        self.assertEqual(len(response.data['series']), 29 * 24 + timezone.now().hour + 1)
+
+        today = timezone.localdate()
+        year = {'start': today - timedelta(days=364), 'end': today, 'top': 3}
+        response = self.assertNoFullScans(client.get, '/api/analytics/', year)
+        self.assertEqual(len(response.data['series']), 365)
+        self.assertEqual(response.data['top_products'][0]['orders'], 365)
+
+
+class BackfillSalesRollupsMigrationTests(TransactionTestCase):
+    before = [('analytics', '0001_sales_rollups'), ('orders', '0005_sales_rollup_snapshots')]
+    after = [('analytics', '0002_backfill_sales_rollups')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_backfill_matches_a_rebuild(self):
+        apps = self.migrate(self.before)
+        gloves = apps.get_model('products', 'Category').objects.create(name="Gloves", slug="gloves")
+        Product = apps.get_model('products', 'Product')
+        glove = Product.objects.create(name="Glove", category=gloves, description="", price='10.00', stock=5)
+        loose = Product.objects.create(name="Loose", description="", price='1.50', stock=5)
+        Order, OrderItem = apps.get_model('orders', 'Order'), apps.get_model('orders', 'OrderItem')
+        now = timezone.now()
+        # Days ago, status, lines of (product, quantity, category snapshot)
+        for days, status, lines in ((0, 'Pending', [(glove, 2, gloves), (loose, 1, None), (glove, 1, gloves)]),
+                                    (0, 'Pending', [(glove, 1, None)]),
+                                    (40, 'Delivered', [(glove, 3, gloves)]),
+                                    (40, 'Cancelled', [])):
+            order = Order.objects.create(customer_name="Guest", total_amount='31.50', status=status)
+            Order.objects.filter(pk=order.pk).update(created_at=now - timedelta(days=days))
+            OrderItem.objects.bulk_create([
+                OrderItem(order=order, product=product, category=category, product_name=product.name,
+                          quantity=quantity, price_at_purchase=product.price)
+                for product, quantity, category in lines
+            ])
+
+        self.migrate(self.after)
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+        backfilled = rollups()
+        self.assertTrue(all(backfilled.values()))
+        self.assertFalse(Order.objects.filter(rolled_up=False).exists())
+        rebuild()
+        self.assertEqual(rollups(), backfilled)
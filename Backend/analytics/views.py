@@ -0,0 +1,19 @@
+from rest_framework import generics
+from rest_framework.response import Response
+from compliance.permissions import IsAdminUser
+from .reports import sales_report
+from .serializers import SalesQuerySerializer
+
+
+class SalesAnalyticsView(generics.GenericAPIView):
+    """
+    Admin only: revenue, orders and units for a date range, by status, per day or hour,
+    and the top products and categories, answered from the sales rollups.
+    """
+    serializer_class = SalesQuerySerializer
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        query = self.get_serializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        return Response(sales_report(**query.validated_data))
@@ -1,26 +1,5 @@
 from django.contrib import admin
-from .models import Category, Product, Order, OrderItem, ContactMessage
-
-@admin.register(Category)
-class CategoryAdmin(admin.ModelAdmin):
-    list_display = ('name', 'slug', 'created_at')
-    prepopulated_fields = {'slug': ('name',)}
-
-@admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
-    list_display = ('name', 'category', 'price', 'stock_quantity', 'is_active')
-    list_filter = ('category', 'is_active')
-    search_fields = ('name', 'description')
-
-class OrderItemInline(admin.TabularInline):
-    model = OrderItem
-    extra = 0
-
-@admin.register(Order)
-class OrderAdmin(admin.ModelAdmin):
-    list_display = ('id', 'customer_name', 'email', 'total_amount', 'status', 'created_at')
-    list_filter = ('status', 'created_at')
-    inlines = [OrderItemInline]
+from .models import ContactMessage
 
 @admin.register(ContactMessage)
 class ContactMessageAdmin(admin.ModelAdmin):
@@ -0,0 +1,209 @@
+"""
+Merges the api app's catalog and guest orders into the products and orders apps.
+
+The api app used to keep its own Category, Product, Order and OrderItem tables next
+to `products.Product` and `orders.Order`, so the same catalog was stored twice. The
+rows are moved over `BATCH_SIZE` at a time in primary key order, each batch written
+with bulk INSERTs:
+
+* categories are matched by name, otherwise created;
+* a legacy product with the same name and category as an existing product is merged
+  into it: the existing row keeps its price, stock and SKU and gains the legacy image
+  URL. Other legacy products are copied with their stock, active flag and timestamps;
+* guest orders become orders without a user, keeping their contact details, lines
+  and dates, with the usual summary snapshot.
+
+Only historical models and the code below are used, so later changes to the apps
+don't change what this migration does.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import migrations
+from django.utils.text import slugify
+
+BATCH_SIZE = 2000
+# The FTS5 sync triggers of products.search as of products.0004
+SQLITE_TRIGGERS = (
+    """CREATE TRIGGER IF NOT EXISTS products_product_fts_ai AFTER INSERT ON products_product BEGIN
+        INSERT INTO products_product_fts(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_product_fts_ad AFTER DELETE ON products_product BEGIN
+        INSERT INTO products_product_fts(products_product_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_product_fts_au AFTER UPDATE OF name, description ON products_product
+    BEGIN
+        INSERT INTO products_product_fts(products_product_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO products_product_fts(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END""",
+)
+# The legacy order status as (status, payment_status)
+STATUSES = {
+    'Pending': ('Pending', 'Pending'),
+    'Paid': ('Processing', 'Paid'),
+    'Shipped': ('Shipped', 'Paid'),
+    'Cancelled': ('Cancelled', 'Pending'),
+}
+
+
+def chunks(queryset, batch_size):
+    """ Rows of `queryset` in primary key order, seeking past the last one per batch. """
+    last = None
+    while True:
+        page = queryset.order_by('pk')
+        if last is not None:
+            page = page.filter(pk__gt=last)
+        batch = list(page[:batch_size])
+        if not batch:
+            return
+        yield batch
+        last = batch[-1].pk
+
+
+def category_ids(category, names):
+    """ {name: id} for `names`, creating the missing categories with unique slugs. """
+    found = dict(category.objects.filter(name__in=names).values_list('name', 'id'))
+    taken = set(category.objects.values_list('slug', flat=True))
+    created = []
+    for name in sorted(set(names) - found.keys()):
+        base = slugify(name)[:240] or 'category'
+        slug, suffix = base, 1
+        while slug in taken:
+            suffix += 1
+            slug = f'{base}-{suffix}'
+        taken.add(slug)
+        created.append(category(name=name, slug=slug))
+    category.objects.bulk_create(created)
+    found.update(category.objects.filter(name__in=[new.name for new in created]).values_list('name', 'id'))
+    return found
+
+
+def merge_categories(legacy_category, category):
+    """ {legacy category id: category id}. Categories are few: read them in one go. """
+    legacy = dict(legacy_category.objects.values_list('id', 'name'))
+    ids = category_ids(category, set(legacy.values()))
+    return {legacy_id: ids[name] for legacy_id, name in legacy.items()}
+
+
+def order_summary(items, places):
+    """ The order summary snapshot as orders.OrderItemSerializer rendered it at this point. """
+    exponent = Decimal(1).scaleb(-places)
+    lines = [{
+        'id': item.pk, 'product': item.product_id, 'product_name': item.product_name, 'quantity': item.quantity,
+        'price_at_purchase': f'{Decimal(item.price_at_purchase).quantize(exponent):f}',
+    } for item in items]
+    return {'item_count': len(lines), 'total_quantity': sum(line['quantity'] for line in lines), 'lines': lines}
+
+
+def merge_products(legacy_product, product, category_map, batch_size):
+    """ Returns {legacy product id: product id}. """
+    product_map = {}
+    for batch in chunks(legacy_product.objects.all(), batch_size):
+        keys = {legacy.pk: (legacy.name, category_map[legacy.category_id]) for legacy in batch}
+        matches = {}
+        for match in product.objects.filter(name__in={name for name, _ in keys.values()}).order_by('pk'):
+            matches.setdefault((match.name, match.category_id), match)
+
+        created, images = {}, {}
+        for legacy in batch:
+            key = keys[legacy.pk]
+            match = matches.get(key)
+            if match is not None and match.pk is not None:
+                if legacy.image_url and not match.image_url:
+                    match.image_url = images[match.pk] = legacy.image_url
+                continue
+            if match is None:
+                # Duplicates within the legacy table merge into the first copy
+                matches[key] = created[key] = product(
+                    name=legacy.name, category_id=key[1], description=legacy.description, price=legacy.price,
+                    stock=legacy.stock_quantity, image_url=legacy.image_url, is_active=legacy.is_active,
+                )
+                created[key]._legacy = legacy
+
+        product.objects.bulk_create(created.values())
+        for new in created.values():
+            # auto_now_add / auto_now stamped the copies with the current time
+            new.created_at, new.updated_at = new._legacy.created_at, new._legacy.updated_at
+        product.objects.bulk_update(created.values(), ['created_at', 'updated_at'])
+        product.objects.bulk_update(
+            [product(pk=pk, image_url=image_url) for pk, image_url in images.items()], ['image_url']
+        )
+        for legacy in batch:
+            product_map[legacy.pk] = matches[keys[legacy.pk]].pk
+    return product_map
+
+
+def merge_orders(legacy_order, legacy_item, order, order_item, product, product_map, batch_size):
+    places = order_item._meta.get_field('price_at_purchase').decimal_places
+    for batch in chunks(legacy_order.objects.all(), batch_size):
+        lines = defaultdict(list)
+        for item in legacy_item.objects.filter(order_id__in=[legacy.pk for legacy in batch]).order_by('pk'):
+            lines[item.order_id].append(item)
+        products = product.objects.in_bulk({product_map[item.product_id] for items in lines.values() for item in items})
+
+        orders = []
+        for legacy in batch:
+            status, payment_status = STATUSES.get(legacy.status, (legacy.status, 'Pending'))
+            orders.append(order(
+                user=None, customer_name=legacy.customer_name, email=legacy.email, phone=legacy.phone,
+                address=legacy.address, total_amount=legacy.total_amount, status=status,
+                payment_status=payment_status,
+            ))
+        order.objects.bulk_create(orders)
+
+        items = {}
+        for new, legacy in zip(orders, batch):
+            items[new.pk] = [
+                order_item(
+                    order=new, product=products[product_map[item.product_id]],
+                    product_name=products[product_map[item.product_id]].name,
+                    product_sku=products[product_map[item.product_id]].sku or '',
+                    quantity=item.quantity, price_at_purchase=item.price_at_purchase,
+                )
+                for item in lines[legacy.pk]
+            ]
+        order_item.objects.bulk_create([item for order_items in items.values() for item in order_items])
+
+        for new, legacy in zip(orders, batch):
+            new.created_at = new.updated_at = legacy.created_at
+            new.summary = order_summary(items[new.pk], places)
+        order.objects.bulk_update(orders, ['created_at', 'updated_at', 'summary'])
+
+
+def merge_legacy_tables(apps, batch_size=BATCH_SIZE):
+    category_map = merge_categories(apps.get_model('api', 'Category'), apps.get_model('products', 'Category'))
+    product_map = merge_products(
+        apps.get_model('api', 'Product'), apps.get_model('products', 'Product'), category_map, batch_size
+    )
+    merge_orders(
+        apps.get_model('api', 'Order'), apps.get_model('api', 'OrderItem'),
+        apps.get_model('orders', 'Order'), apps.get_model('orders', 'OrderItem'),
+        apps.get_model('products', 'Product'), product_map, batch_size,
+    )
+
+
+def merge(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        # Rebuilding products_product dropped the search index triggers (see
+        # products.search); the merged products must reach the index too
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'products_product_fts'")
+            if cursor.fetchone() is not None:
+                for sql in SQLITE_TRIGGERS:
+                    cursor.execute(sql)
+    merge_legacy_tables(apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+        ('orders', '0004_guest_orders'),
+        ('products', '0007_unified_catalog'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge, migrations.RunPython.noop),
+    ]
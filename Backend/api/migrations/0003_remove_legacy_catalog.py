@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:36
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_merge_legacy_catalog'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='product',
+            name='category',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='order',
+        ),
+        migrations.RemoveField(
+            model_name='orderitem',
+            name='product',
+        ),
+        migrations.DeleteModel(
+            name='Category',
+        ),
+        migrations.DeleteModel(
+            name='Order',
+        ),
+        migrations.DeleteModel(
+            name='OrderItem',
+        ),
+        migrations.DeleteModel(
+            name='Product',
+        ),
+    ]
@@ -1,5 +1,12 @@
 from rest_framework import serializers
-from .models import Product, Category, Order, OrderItem, ContactMessage
+from orders.models import Order
+from orders.serializers import OrderItemsSnapshotField
+from orders.services import place_order
+from products.models import Category, Product
+from .models import ContactMessage
+
+# The legacy catalog and guest-order API, over the unified products and orders
+# models (see api.legacy for how the old tables were merged into them)
 
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
@@ -8,52 +15,46 @@ class CategorySerializer(serializers.ModelSerializer):
 
 class ProductSerializer(serializers.ModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
+    stock_quantity = serializers.IntegerField(source='stock', read_only=True)
 
     class Meta:
         model = Product
         fields = ['id', 'name', 'description', 'price', 'category', 'category_name', 'stock_quantity', 'image_url', 'is_active', 'created_at']
 
-class OrderItemSerializer(serializers.ModelSerializer):
-    product_name = serializers.CharField(source='product.name', read_only=True)
+class LegacyOrderItemsField(OrderItemsSnapshotField):
+    """ The order lines in the legacy shape: no line ids. """
+    FIELDS = ('product', 'product_name', 'quantity', 'price_at_purchase')
 
-    class Meta:
-        model = OrderItem
-        fields = ['product', 'product_name', 'quantity', 'price_at_purchase']
+    def to_representation(self, order):
+        return [{key: line[key] for key in self.FIELDS} for line in super().to_representation(order)]
 
 class OrderSerializer(serializers.ModelSerializer):
-    items = OrderItemSerializer(many=True, read_only=True)
+    items = LegacyOrderItemsField()
 
     class Meta:
         model = Order
         fields = ['id', 'customer_name', 'email', 'phone', 'address', 'total_amount', 'status', 'created_at', 'items']
 
 class OrderCreateSerializer(serializers.ModelSerializer):
-    items = serializers.ListField(child=serializers.DictField(), write_only=True)
+    """
+    Guest checkout, placed like any other order: stock is checked and decremented
+    under row locks (see orders.services.place_order).
+    Example Input: {"customer_name": "...", "email": "...", "phone": "...", "address": "...",
+                    "items": [{"product_id": 1, "quantity": 2}]}
+    """
+    class OrderItemInputSerializer(serializers.Serializer):
+        product_id = serializers.IntegerField()
+        quantity = serializers.IntegerField(min_value=1)
+
+    items = OrderItemInputSerializer(many=True, write_only=True, allow_empty=False)
 
     class Meta:
         model = Order
         fields = ['customer_name', 'email', 'phone', 'address', 'items']
+        extra_kwargs = {field: {'required': True, 'allow_blank': False} for field in fields[:-1]}
 
     def create(self, validated_data):
-        items_data = validated_data.pop('items')
-        order = Order.objects.create(**validated_data)
-        
-        total_amount = 0
-        for item_data in items_data:
-            product = Product.objects.get(id=item_data['product_id'])
-            item_total = product.price * item_data['quantity']
-            total_amount += item_total
-            
-            OrderItem.objects.create(
-                order=order,
-                product=product,
-                quantity=item_data['quantity'],
-                price_at_purchase=product.price
-            )
-        
-        order.total_amount = total_amount
-        order.save()
-        return order
+        return place_order(None, validated_data.pop('items'), **validated_data)
 
 class ContactMessageSerializer(serializers.ModelSerializer):
     class Meta:
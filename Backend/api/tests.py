@@ -1,3 +1,144 @@
-from django.test import TestCase
+from decimal import Decimal
 
-# Create your tests here.
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APIRequestFactory
+from orders.models import Order
+from orders.services import build_order_summary, place_order
+from products.cache import bump_generation
+from products.models import Category, Product
+from .views import ProductListView, OrderCreateView, OrderDetailView
+
+
+class LegacyApiQueryBudgetTests(TestCase):
+    """ The legacy catalog and guest-order views are exercised directly: their
+    /api/products/ and /api/orders/ routes are shadowed by the products and orders apps. """
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+
+    def create_products(self, count):
+        category = Category.objects.for_name(f"Category {Category.objects.count()}")
+        products = Product.objects.bulk_create([
+            Product(category=category, name=f"Product {i}", description="", price='2.00', stock=5)
+            for i in range(count)
+        ])
+        bump_generation(Product)
+        return products
+
+    def test_product_list_query_count_is_constant(self):
+        self.create_products(1)
+        with self.assertNumQueries(2):
+            ProductListView.as_view()(self.factory.get('/api/products/'))
+
+        self.create_products(20)
+        with self.assertNumQueries(2):
+            response = ProductListView.as_view()(self.factory.get('/api/products/'))
+        self.assertIn('category_name', response.data['results'][0])
+
+    def test_product_search_reads_the_index(self):
+        products = self.create_products(3)
+        Product.objects.filter(pk=products[1].pk).update(name="Surgical gloves")
+        with self.assertNumQueries(2) as queries:
+            response = ProductListView.as_view()(self.factory.get('/api/products/', {'search': 'surg'}))
+        self.assertEqual([p['name'] for p in response.data['results']], ["Surgical gloves"])
+        self.assertNotIn('LIKE', queries.captured_queries[-1]['sql'])
+
+    def test_order_detail_reads_the_summary(self):
+        items = [{'product_id': product.pk, 'quantity': 1} for product in self.create_products(10)]
+        order = place_order(None, items, customer_name="Guest", email="guest@example.com", phone="1",
+                            address="Street")
+        with self.assertNumQueries(1):
+            response = OrderDetailView.as_view()(self.factory.get(f'/api/orders/{order.pk}/'), pk=order.pk)
+        self.assertEqual(len(response.data['items']), 10)
+        self.assertEqual(set(response.data['items'][0]), {'product', 'product_name', 'quantity', 'price_at_purchase'})
+
+
+class GuestCheckoutTests(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.product = Product.objects.create(name="Mask", description="", price='3.50', stock=4)
+
+    def checkout(self, quantity):
+        request = self.factory.post('/api/orders/', {
+            'customer_name': "Guest", 'email': "guest@example.com", 'phone': "555", 'address': "Street 1",
+            'items': [{'product_id': self.product.pk, 'quantity': quantity}],
+        }, format='json')
+        return OrderCreateView.as_view()(request)
+
+    def test_guest_order_decrements_stock(self):
+        response = self.checkout(3)
+        self.assertEqual(response.status_code, 201)
+        order = Order.objects.get()
+        self.assertIsNone(order.user)
+        self.assertEqual((order.customer_name, order.total_amount), ("Guest", Decimal('10.50')))
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 1)
+
+    def test_guest_order_is_refused_beyond_stock(self):
+        response = self.checkout(5)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Order.objects.exists())
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 4)
+
+
+class MergeLegacyCatalogMigrationTests(TransactionTestCase):
+    before = [('api', '0001_initial'), ('products', '0007_unified_catalog'), ('orders', '0004_guest_orders')]
+    after = [('api', '0002_merge_legacy_catalog')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_legacy_rows_are_merged(self):
+        apps = self.migrate(self.before)
+        Category = apps.get_model('products', 'Category')
+        Product = apps.get_model('products', 'Product')
+        surgical = Category.objects.create(name="Surgical", slug="surgical")
+        gloves = Product.objects.create(name="Gloves", category=surgical, description="", price='4.00', stock=7)
+
+        LegacyCategory = apps.get_model('api', 'Category')
+        LegacyProduct = apps.get_model('api', 'Product')
+        legacy_surgical = LegacyCategory.objects.create(name="Surgical", slug="surgical")
+        legacy_pharma = LegacyCategory.objects.create(name="Pharma", slug="pharma")
+        legacy_gloves = LegacyProduct.objects.create(
+            category=legacy_surgical, name="Gloves", description="", price='5.00', stock_quantity=1,
+            image_url='https://example.com/gloves.png',
+        )
+        legacy_syrup = LegacyProduct.objects.create(
+            category=legacy_pharma, name="Syrup", description="Cough", price='8.00', stock_quantity=3,
+            is_active=False,
+        )
+        order = apps.get_model('api', 'Order').objects.create(
+            customer_name="Guest", email="guest@example.com", phone="1", address="Street",
+            total_amount='21.00', status='Paid',
+        )
+        OrderItem = apps.get_model('api', 'OrderItem')
+        OrderItem.objects.create(order=order, product=legacy_gloves, quantity=1, price_at_purchase='5.00')
+        OrderItem.objects.create(order=order, product=legacy_syrup, quantity=2, price_at_purchase='8.00')
+
+        apps = self.migrate(self.after)
+        Product = apps.get_model('products', 'Product')
+        gloves = Product.objects.get(pk=gloves.pk)
+        self.assertEqual((gloves.price, gloves.stock, gloves.image_url),
+                         (Decimal('4.00'), 7, 'https://example.com/gloves.png'))
+        syrup = Product.objects.get(name="Syrup")
+        self.assertEqual((syrup.category.name, syrup.stock, syrup.is_active), ("Pharma", 3, False))
+        self.assertEqual(Product.objects.count(), 2)
+
+        merged = apps.get_model('orders', 'Order').objects.get()
+        self.assertIsNone(merged.user_id)
+        self.assertEqual((merged.customer_name, merged.status, merged.payment_status), ("Guest", 'Processing', 'Paid'))
+        self.assertEqual(merged.summary['total_quantity'], 3)
+        # The migration's frozen snapshot matches what the app builds today
+        self.assertEqual(merged.summary, build_order_summary(merged.items.order_by('pk')))
+        self.assertEqual(
+            sorted(merged.items.values_list('product_id', 'quantity')), sorted([(gloves.pk, 1), (syrup.pk, 2)])
+        )
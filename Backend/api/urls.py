@@ -1,4 +1,5 @@
 from django.urls import path
+from core.async_views import read_route
 from .views import (
     ProductListView, ProductDetailView,
     CategoryListView,
@@ -7,9 +8,9 @@ from .views import (
 )
 
 urlpatterns = [
-    path('products/', ProductListView.as_view(), name='product-list'),
-    path('products/<int:pk>/', ProductDetailView.as_view(), name='product-detail'),
-    path('categories/', CategoryListView.as_view(), name='category-list'),
+    path('products/', read_route('api.products', ProductListView), name='product-list'),
+    path('products/<int:pk>/', read_route('api.product', ProductDetailView), name='product-detail'),
+    path('categories/', read_route('api.categories', CategoryListView), name='category-list'),
     path('orders/', OrderCreateView.as_view(), name='order-create'),
     path('orders/<int:pk>/', OrderDetailView.as_view(), name='order-detail'),
     path('contact/', ContactCreateView.as_view(), name='contact-create'),
@@ -1,33 +1,42 @@
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import generics
-from .models import Product, Category, Order, ContactMessage
+from core.eager_loading import EagerLoadingMixin
+from orders.models import Order
+from products.cache import CatalogCacheMixin
+from products.models import Category, Product
+from products.search import ProductSearchFilter
+from .models import ContactMessage
 from .serializers import (
     ProductSerializer, CategorySerializer, OrderSerializer, 
     OrderCreateSerializer, ContactMessageSerializer
 )
 
 # Product APIs
-class ProductListView(generics.ListAPIView):
-    queryset = Product.objects.filter(is_active=True)
+class ProductListView(CatalogCacheMixin, EagerLoadingMixin, generics.ListAPIView):
+    cache_models = ('products.Product', 'products.Category')
+    queryset = Product.objects.filter(is_active=True).order_by('-created_at', '-id')
     serializer_class = ProductSerializer
+    filter_backends = [DjangoFilterBackend, ProductSearchFilter]
     filterset_fields = ['category']
-    search_fields = ['name', 'description']
 
-class ProductDetailView(generics.RetrieveAPIView):
+class ProductDetailView(CatalogCacheMixin, EagerLoadingMixin, generics.RetrieveAPIView):
+    cache_models = ('products.Product', 'products.Category')
     queryset = Product.objects.filter(is_active=True)
     serializer_class = ProductSerializer
 
 # Category APIs
-class CategoryListView(generics.ListAPIView):
+class CategoryListView(CatalogCacheMixin, generics.ListAPIView):
+    cache_models = ('products.Category',)
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
 
-# Order APIs
+# Order APIs: guest checkouts
 class OrderCreateView(generics.CreateAPIView):
-    queryset = Order.objects.all()
+    queryset = Order.objects.filter(user__isnull=True)
     serializer_class = OrderCreateSerializer
 
-class OrderDetailView(generics.RetrieveAPIView):
-    queryset = Order.objects.all()
+class OrderDetailView(EagerLoadingMixin, generics.RetrieveAPIView):
+    queryset = Order.objects.filter(user__isnull=True)
     serializer_class = OrderSerializer
 
 # Contact API
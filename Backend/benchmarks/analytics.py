@@ -0,0 +1,129 @@
+"""
+Latency of sales reports read from the rollups against the same aggregates over the orders.
+
+Seeds about --items order items (core.seeding, a year of orders), rebuilds the rollups
+(timed), then answers reports for ranges of 1 to 365 days both ways --repeat times:
+`analytics.reports.sales_report` and the aggregates it replaces, grouped straight
+from orders_order / orders_orderitem with SUM(price_at_purchase * quantity). Both
+must agree. Also times the per-order rollup write that checkout adds on commit.
+
+    python -m benchmarks.analytics --items 5000000 --repeat 20
+"""
+import argparse
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from . import common
+
+common.setup()
+
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum  # noqa: E402
+from django.db.models.functions import TruncDate  # noqa: E402
+
+from analytics.reports import sales_report, totals  # noqa: E402
+from analytics.rollups import apply_deltas, new_deltas, order_deltas, rebuild, start_of  # noqa: E402
+from core import seeding  # noqa: E402
+from orders.models import Order, OrderItem  # noqa: E402
+from products.models import Category, Product  # noqa: E402
+
+SPANS = (1, 7, 30, 365)
+REVENUE = Sum(ExpressionWrapper(F('price_at_purchase') * F('quantity'),
+                                output_field=DecimalField(max_digits=16, decimal_places=2)))
+
+
+def raw_report(start, end, granularity='day', top=10):
+    """ What sales_report answers, aggregated from the orders on every call. """
+    orders = Order.objects.filter(created_at__gte=start_of(start), created_at__lt=start_of(end + timedelta(days=1)))
+    items = OrderItem.objects.filter(order__in=orders.values('pk'))
+    sums = {'placed': Count('id'), 'sales': Sum('total_amount')}
+    units = dict(items.values('order__status').annotate(sold=Sum('quantity')).values_list('order__status', 'sold'))
+    rows = {status: {} for status, _label in Order.STATUS_CHOICES}
+    rows.update((row['status'], {**row, 'sold': units.get(row['status'])})
+                for row in orders.values('status').annotate(**sums).order_by())
+    series = orders.annotate(period=TruncDate('created_at')).values('period').annotate(**sums).order_by('period')
+    units_by_day = dict(items.annotate(period=TruncDate('order__created_at')).values('period').annotate(
+        sold=Sum('quantity')).values_list('period', 'sold'))
+
+    def top_sellers(field, model):
+        ranked = list(items.filter(**{f'{field}__isnull': False}).values(field).annotate(
+            placed=Count('order', distinct=True), sold=Sum('quantity'), sales=REVENUE,
+        ).order_by('-sales', field)[:top])
+        names = dict(model.objects.filter(pk__in=[row[field] for row in ranked]).values_list('pk', 'name'))
+        return [{'id': row[field], 'name': names.get(row[field], ''), **totals(row)} for row in ranked]
+
+    return {
+        'totals': totals({name: sum(row.get(name) or 0 for row in rows.values()) for name in sums.keys() | {'sold'}}),
+        'by_status': {status: totals(row) for status, row in rows.items()},
+        'series': [{'period': row['period'], **totals({**row, 'sold': units_by_day.get(row['period'])})}
+                   for row in series],
+        'top_products': top_sellers('product', Product),
+        'top_categories': top_sellers('product__category', Category),
+    }
+
+
+def timed(func, repeat, *args):
+    latencies = []
+    for _ in range(repeat):
+        with common.stopwatch() as timing:
+            result = func(*args)
+        latencies.append(timing['elapsed'])
+    return result, common.latency_summary(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--items', type=int, default=5_000_000)
+    parser.add_argument('--products', type=int, default=20_000)
+    parser.add_argument('--customers', type=int, default=50_000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--writes', type=int, default=2000, help="Rollup writes timed, one synthetic order each.")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    lines, weights = seeding.LINES
+    orders = round(args.items * sum(weights) / sum(count * weight for count, weight in zip(lines, weights)))
+    with common.scratch_database():
+        plan = seeding.Plan(seed=args.seed, admins=1, authorities=0, distributors=0, customers=args.customers,
+                            categories=50, products=args.products, orders=orders, documents=0)
+        with common.stopwatch() as timing:
+            seeding.seed(plan)
+        seeded = {'orders': orders, 'items': OrderItem.objects.count(), 'seconds': round(timing['elapsed'], 1)}
+        results = {'seeded': seeded}
+        with common.stopwatch() as timing:
+            written = rebuild()
+        results['rebuild'] = {'seconds': round(timing['elapsed'], 2),
+                              **{model._meta.model_name: rows for model, rows in written.items()}}
+
+        end = seeding.UNTIL.date() - timedelta(days=1)
+        for span in SPANS:
+            start = end - timedelta(days=span - 1)
+            rolled_up, rollup_latency = timed(sales_report, args.repeat, start, end)
+            raw, raw_latency = timed(raw_report, max(1, args.repeat // 5), start, end)
+            for key in raw:
+                assert raw[key] == rolled_up[key], (span, key, raw[key], rolled_up[key])
+            results[f'report_{span}d'] = {
+                'orders': rolled_up['totals']['orders'],
+                'rollups': rollup_latency,
+                'raw_aggregate': raw_latency,
+                'speedup_p50': round(raw_latency['p50_ms'] / max(rollup_latency['p50_ms'], 0.001), 1),
+            }
+
+        rng = random.Random(args.seed)
+        products = list(Product.objects.values_list('pk', 'category_id', 'price')[:1000])
+        latencies = []
+        for _ in range(args.writes):
+            ordered = rng.sample(products, rng.randint(1, 4))
+            order_lines = [(pk, category_id, rng.randint(1, 3), price) for pk, category_id, price in ordered]
+            deltas = order_deltas(new_deltas(), start_of(end), 'Pending',
+                                  sum((line[2] * line[3] for line in order_lines), Decimal(0)), order_lines)
+            with common.stopwatch() as timing:
+                apply_deltas(deltas)
+            latencies.append(timing['elapsed'])
+        results['rollup_write_per_order'] = common.latency_summary(latencies)
+
+    common.report('analytics', {'args': vars(args), **results})
+
+
+if __name__ == '__main__':
+    main()
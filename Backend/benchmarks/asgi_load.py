@@ -0,0 +1,220 @@
+"""
+Read throughput under an ASGI server: DRF views versus the async read views.
+
+Starts the project under an ASGI server (uvicorn, hypercorn or daphne, whichever is
+installed) as a subprocess on a scratch database, once with ASYNC_READ_ROUTES empty
+(every request runs a sync DRF view through sync_to_async) and once with '*'. For
+each --concurrency, that many keep-alive connections replay a mix of catalog, order
+history and review-queue reads for --duration seconds. Reports req/s, errors and
+latency per mode and concurrency. The load generator shares the machine with the
+server, so compare the modes with each other rather than with production numbers.
+
+    python -m benchmarks.asgi_load --concurrency 50 100 250 500 --duration 10
+"""
+import argparse
+import asyncio
+import importlib.util
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+from . import common
+
+common.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+
+from accounts.serializers import CustomTokenObtainPairSerializer  # noqa: E402
+from compliance.models import Compliance  # noqa: E402
+from orders.models import Order, OrderItem  # noqa: E402
+from orders.services import build_order_summary  # noqa: E402
+from products.catalog import category_ids  # noqa: E402
+from products.models import Category, Product  # noqa: E402
+
+User = get_user_model()
+HOST = '127.0.0.1'
+SERVERS = {
+    'uvicorn': ['-m', 'uvicorn', 'core.asgi:application', '--host', HOST, '--port', '{port}',
+                '--log-level', 'warning', '--no-access-log'],
+    'hypercorn': ['-m', 'hypercorn', 'core.asgi:application', '--bind', f'{HOST}:{{port}}'],
+    'daphne': ['-m', 'daphne', '-b', HOST, '-p', '{port}', 'core.asgi:application'],
+}
+MODES = {'sync': '', 'async': '*'}
+
+
+def seed(products, customers, orders_per_customer):
+    categories = category_ids(Category, [f"Category {i}" for i in range(20)])
+    catalog = Product.objects.bulk_create([
+        Product(name=f"Product {i}", category_id=categories[f"Category {i % 20}"], description="Benchmark product",
+                price='9.99', stock=i % 50)
+        for i in range(products)
+    ])
+
+    customer_tokens = []
+    for c in range(customers):
+        customer = User.objects.create_user(email=f'customer-{c}@bench.local', password=None)
+        customer_tokens.append(str(CustomTokenObtainPairSerializer.get_token(customer).access_token))
+        for o in range(orders_per_customer):
+            order = Order.objects.create(user=customer, total_amount='19.98')
+            picked = [catalog[(c * orders_per_customer + o + i) % products] for i in range(2)]
+            items = OrderItem.objects.bulk_create([
+                OrderItem(order=order, product=product, product_name=product.name, quantity=2,
+                          price_at_purchase=product.price)
+                for product in picked
+            ])
+            order.summary = build_order_summary(items)
+            order.save(update_fields=['summary'])
+
+    distributor = User.objects.create_user(email='distributor@bench.local', password=None, role='Distributor')
+    Compliance.objects.bulk_create([
+        Compliance(product=catalog[i % products], uploaded_by=distributor,
+                   document_file=f'compliance_docs/doc-{i}.pdf', processing_status='Done')
+        for i in range(200)
+    ])
+    authority = User.objects.create_user(email='authority@bench.local', password=None, role='Authority')
+    authority_token = str(CustomTokenObtainPairSerializer.get_token(authority).access_token)
+
+    product_ids = [product.pk for product in catalog]
+    return [
+        # (weight, path, bearer tokens to pick from)
+        (30, lambda: '/api/products/', [None]),
+        (30, lambda: f'/api/products/{random.choice(product_ids)}/', [None]),
+        (10, lambda: '/api/categories/', [None]),
+        (25, lambda: '/api/orders/', customer_tokens),
+        (5, lambda: '/api/compliance/pending/', [authority_token]),
+    ]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+def start_server(server, database_name, async_routes, stateless):
+    port = free_port()
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{database_name}', ASYNC_READ_ROUTES=async_routes,
+               JWT_STATELESS='1' if stateless else '', DJANGO_SETTINGS_MODULE='core.settings')
+    command = [sys.executable] + [part.format(port=port) for part in SERVERS[server]]
+    process = subprocess.Popen(command, env=env, cwd=settings.BASE_DIR)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{server} exited with status {process.returncode}")
+        try:
+            socket.create_connection((HOST, port), timeout=1).close()
+            return process, port
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"{server} did not start listening on port {port}")
+
+
+async def read_response(reader):
+    head = await reader.readuntil(b'\r\n\r\n')
+    status = int(head.split(b' ', 2)[1])
+    headers = dict(
+        line.split(b':', 1) for line in head.split(b'\r\n')[1:] if b':' in line
+    )
+    headers = {name.strip().lower(): value.strip() for name, value in headers.items()}
+    if b'content-length' in headers:
+        await reader.readexactly(int(headers[b'content-length']))
+    elif headers.get(b'transfer-encoding', b'').lower() == b'chunked':
+        while True:
+            size = int((await reader.readuntil(b'\r\n')).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if not size:
+                break
+    return status, headers.get(b'connection', b'').lower() != b'close'
+
+
+async def client(port, mix, weights, deadline, latencies, errors):
+    reader = writer = None
+    while time.monotonic() < deadline:
+        (_weight, path, tokens), = random.choices(mix, weights)
+        token = random.choice(tokens)
+        request = f'GET {path()} HTTP/1.1\r\nHost: {HOST}\r\n'
+        if token:
+            request += f'Authorization: Bearer {token}\r\n'
+        start = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(HOST, port)
+            writer.write((request + '\r\n').encode())
+            status, keep_alive = await asyncio.wait_for(read_response(reader), timeout=60)
+        except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError, ValueError):
+            errors[0] += 1
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+            continue
+        latencies.append(time.perf_counter() - start)
+        errors[0] += status != 200
+        if not keep_alive:
+            writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def load(port, mix, concurrency, duration):
+    weights = [weight for weight, _path, _tokens in mix]
+    latencies, errors = [], [0]
+    start = time.perf_counter()
+    deadline = time.monotonic() + duration
+    await asyncio.gather(*(client(port, mix, weights, deadline, latencies, errors) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        'req_per_sec': round(len(latencies) / elapsed, 1),
+        'errors': errors[0],
+        'latency': common.latency_summary(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--server', choices=sorted(SERVERS), help="default: the first one installed")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[50, 100, 250, 500])
+    parser.add_argument('--duration', type=float, default=10, help="seconds per concurrency level")
+    parser.add_argument('--warmup', type=float, default=2)
+    parser.add_argument('--modes', nargs='+', choices=sorted(MODES), default=['sync', 'async'])
+    parser.add_argument('--products', type=int, default=2000)
+    parser.add_argument('--customers', type=int, default=50)
+    parser.add_argument('--orders-per-customer', type=int, default=20)
+    parser.add_argument('--stateless', action='store_true', help="run the server with JWT_STATELESS=1")
+    args = parser.parse_args()
+
+    installed = [name for name in sorted(SERVERS) if importlib.util.find_spec(name)]
+    server = args.server or (installed[0] if installed else None)
+    if server not in installed:
+        common.report('asgi_load', {'skipped': f"no ASGI server installed (tried {', '.join(sorted(SERVERS))})"})
+        return
+
+    random.seed(0)
+    with common.scratch_database() as db:
+        if db.vendor != 'sqlite':
+            raise SystemExit("asgi_load hands the server a scratch SQLite file; run it without DATABASE_URL")
+        mix = seed(args.products, args.customers, args.orders_per_customer)
+        results = {}
+        for mode in args.modes:
+            process, port = start_server(server, db.settings_dict['NAME'], MODES[mode], args.stateless)
+            try:
+                results[mode] = {}
+                asyncio.run(load(port, mix, min(args.concurrency), args.warmup))
+                for concurrency in args.concurrency:
+                    results[mode][concurrency] = asyncio.run(load(port, mix, concurrency, args.duration))
+            finally:
+                process.terminate()
+                process.wait()
+        common.report('asgi_load', {
+            'server': server, 'database': db.vendor, 'stateless_auth': args.stateless,
+            'duration_s': args.duration, 'results': results,
+        })
+
+
+if __name__ == '__main__':
+    main()
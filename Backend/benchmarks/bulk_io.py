@@ -0,0 +1,90 @@
+"""
+Rows/sec of the bulk product import and export pipeline.
+
+Writes a synthetic distributor price list (CSV and JSON Lines), imports it into an
+empty catalog (all inserts), imports it again (all upserts of existing SKUs), then
+streams the catalog back out in both formats.
+
+    python -m benchmarks.bulk_io --rows 200000 --chunk-size 2000
+
+Pass --trace-memory to also report peak Python heap per phase (slower).
+"""
+import argparse
+import os
+import random
+import tempfile
+import tracemalloc
+from contextlib import contextmanager
+
+from . import common
+
+common.setup()
+
+from products import bulk  # noqa: E402
+
+WORDS = "sterile latex nitrile surgical oral tablet capsule syringe gauze mask vial kit".split()
+
+
+def write_price_list(path, fmt, rows, rng):
+    with open(path, 'w', newline='') as stream:
+        if fmt == 'csv':
+            stream.write(','.join(bulk.IMPORT_FIELDS[:6]) + '\n')
+        for i in range(rows):
+            values = [
+                f"SKU-{i:07d}", ' '.join(rng.choices(WORDS, k=3)).title(), rng.choice(['Pharma', 'Surgical']),
+                ' '.join(rng.choices(WORDS, k=12)), f"{rng.randint(100, 99999) / 100:.2f}", str(rng.randint(0, 500)),
+            ]
+            if fmt == 'csv':
+                stream.write(','.join(values) + '\n')
+            else:
+                stream.write('{"sku": "%s", "name": "%s", "category": "%s", "description": "%s", '
+                             '"price": "%s", "stock": %s}\n' % tuple(values))
+
+
+@contextmanager
+def measured(trace_memory):
+    stats = {}
+    if trace_memory:
+        tracemalloc.start()
+    with common.stopwatch() as timing:
+        yield stats
+    stats['seconds'] = round(timing['elapsed'], 3)
+    if trace_memory:
+        stats['peak_heap_mb'] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--chunk-size', type=int, default=bulk.DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--trace-memory', action='store_true')
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix='bench-bulk-')
+    with common.scratch_database() as db:
+        from products.models import Product
+
+        results = {}
+        for fmt in bulk.FORMATS:
+            path = os.path.join(tmpdir, f'prices.{fmt}')
+            write_price_list(path, fmt, args.rows, random.Random(3))
+            Product.objects.all().delete()
+            for phase in ('insert', 'upsert'):
+                with measured(args.trace_memory) as stats, open(path, 'rb') as stream:
+                    report = bulk.import_products(stream, fmt, args.chunk_size)
+                assert report['imported'] == args.rows, report['errors'][:5]
+                results[f'import_{fmt}_{phase}'] = {'rows_per_sec': round(args.rows / stats['seconds'], 1), **stats}
+
+            with measured(args.trace_memory) as stats, open(os.devnull, 'w') as sink:
+                sink.writelines(bulk.export_products(fmt, args.chunk_size))
+            results[f'export_{fmt}'] = {'rows_per_sec': round(args.rows / stats['seconds'], 1), **stats}
+            os.remove(path)
+        os.rmdir(tmpdir)
+        common.report('bulk_io', {
+            'database': db.vendor, 'rows': args.rows, 'chunk_size': args.chunk_size, 'results': results,
+        })
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Catalog read throughput with and without the read-through cache.
+
+Replays a skewed mix of catalog requests (popular filters and searches repeat far
+more often than rare ones) against /api/products/ and /api/products/<pk>/, with a
+sprinkle of product writes that invalidate the cache, and reports latency plus the
+cache's own hit ratio / saved serialization time.
+
+    python -m benchmarks.catalog_cache --requests 5000 --write-every 500
+"""
+import argparse
+import random
+import time
+from contextlib import nullcontext
+from decimal import Decimal
+from unittest import mock
+
+from . import common
+
+common.setup()
+
+from rest_framework.test import APIClient  # noqa: E402
+
+from products.cache import CatalogCacheMixin, get_cache, get_metrics  # noqa: E402
+from products.catalog import category_ids  # noqa: E402
+from products.models import Category, Product  # noqa: E402
+
+CATEGORIES = ['Pharma', 'Surgical', 'Imports', 'Wellness', 'Diagnostics']
+
+
+def seed(count, rng):
+    categories = category_ids(Category, CATEGORIES)
+    Product.objects.bulk_create([
+        Product(
+            name=f"Product {i}",
+            category_id=categories[rng.choice(CATEGORIES)],
+            description="Synthetic catalog entry",
+            price=Decimal(rng.randint(100, 100000)) / 100,
+        )
+        for i in range(count)
+    ])
+    return list(Product.objects.values_list('id', flat=True))
+
+
+def request_mix(rng, product_ids, total):
+    """ Zipf-like popularity: low ranks are requested most often. """
+    def popular(items):
+        return items[min(int(rng.paretovariate(1.2)) - 1, len(items) - 1)]
+
+    pages = [{}] + [{'category': c} for c in CATEGORIES] + [{'page': p} for p in range(2, 20)]
+    pages += [{'category': c, 'min_price': 10, 'max_price': 500} for c in CATEGORIES]
+    for _ in range(total):
+        if rng.random() < 0.4:
+            yield f'/api/products/{popular(product_ids)}/', {}
+        else:
+            yield '/api/products/', popular(pages)
+
+
+def run(client, mix, product_ids, write_every, rng):
+    latencies = []
+    for index, (url, params) in enumerate(mix, start=1):
+        if write_every and index % write_every == 0:
+            product = Product.objects.get(pk=rng.choice(product_ids))
+            product.stock += 1
+            product.save()
+        start = time.perf_counter()
+        response = client.get(url, params)
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.content
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--products', type=int, default=2000)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--write-every', type=int, default=500)
+    args = parser.parse_args()
+
+    with common.scratch_database():
+        product_ids = seed(args.products, random.Random(1))
+        client = APIClient()
+        results = {}
+
+        uncached = lambda self, handler, request, *a, **kw: handler(request, *a, **kw)  # noqa: E731
+        for mode in ('uncached', 'cached'):
+            get_cache().clear()
+            rng = random.Random(2)
+            mix = list(request_mix(rng, product_ids, args.requests))
+            patch = mock.patch.object(CatalogCacheMixin, 'cached_response', uncached) if mode == 'uncached' else nullcontext()
+            with patch, common.stopwatch() as timing:
+                latencies = run(client, mix, product_ids, args.write_every, rng)
+            results[mode] = {
+                'requests_per_sec': round(len(latencies) / timing['elapsed'], 1),
+                'latency': common.latency_summary(latencies),
+            }
+        results['cached']['cache'] = get_metrics()
+        common.report('catalog_cache', {'products': args.products, **results})
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+Category + price filters: a free-text category column versus the indexed category FK.
+
+Seeds --products products over --categories categories, then copies them into an
+unindexed table keyed by a category label, the way the api app used to store its
+catalog next to products. For a few (category, price range) filters, times the page
+of the newest 20 matches plus its COUNT against both, and reports the query plans.
+
+    python -m benchmarks.catalog_filters --products 200000 --categories 50
+"""
+import argparse
+import random
+import time
+from decimal import Decimal
+
+from . import common
+
+common.setup()
+
+from django.db import connection  # noqa: E402
+
+from products.catalog import category_ids  # noqa: E402
+from products.models import Category, Product  # noqa: E402
+
+BATCH = 5000
+PAGE = 20
+LEGACY_TABLE = 'bench_legacy_product'
+FILTERS = [(0, '0', '50'), (1, '10', '20'), (7, '90', '100'), (None, '5', '6')]
+
+
+def seed(count, categories, rng):
+    names = [f"Category {i}" for i in range(categories)]
+    ids = category_ids(Category, names)
+    for offset in range(0, count, BATCH):
+        Product.objects.bulk_create([
+            Product(name=f"Product {i}", category_id=ids[rng.choice(names)], description="",
+                    price=Decimal(rng.randint(100, 10000)) / 100)
+            for i in range(offset, min(offset + BATCH, count))
+        ])
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TABLE {LEGACY_TABLE} AS SELECT p.id, p.name, p.price, p.created_at, c.name AS category_label "
+            "FROM products_product p LEFT JOIN products_category c ON c.id = p.category_id"
+        )
+    return names
+
+
+def legacy_queries(category, low, high):
+    where = f"FROM {LEGACY_TABLE} WHERE category_label = %s AND price >= %s AND price <= %s"
+    params = [category, low, high]
+    return [
+        (f"SELECT COUNT(*) {where}", params),
+        (f"SELECT id, name, price {where} ORDER BY created_at DESC, id DESC LIMIT {PAGE}", params),
+    ]
+
+
+def indexed_queries(category, low, high):
+    queryset = Product.objects.filter(category__name=category, price__gte=low, price__lte=high)
+    page = queryset.order_by('-created_at', '-id').values('id', 'name', 'price')[:PAGE]
+    return [queryset, page]
+
+
+def run_legacy(queries):
+    with connection.cursor() as cursor:
+        for sql, params in queries:
+            cursor.execute(sql, params)
+            cursor.fetchall()
+
+
+def run_indexed(queries):
+    queryset, page = queries
+    queryset.all().count()
+    list(page.all())
+
+
+def plan(sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute(connection.ops.explain_query_prefix() + ' ' + sql, params)
+        return [' '.join(str(column) for column in row) for row in cursor.fetchall()]
+
+
+def timed(run, queries, repeat):
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run(queries)
+        latencies.append(time.perf_counter() - start)
+    return common.latency_summary(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--products', type=int, default=200000)
+    parser.add_argument('--categories', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with common.scratch_database() as db:
+        names = seed(args.products, args.categories, random.Random(3))
+        results = []
+        for index, low, high in FILTERS:
+            category = names[index % len(names)] if index is not None else "No such category"
+            legacy = legacy_queries(category, low, high)
+            indexed = indexed_queries(category, low, high)
+            results.append({
+                'category': category, 'price': [low, high],
+                'matches': indexed[0].count(),
+                'label_column': timed(run_legacy, legacy, args.repeat),
+                'category_fk': timed(run_indexed, indexed, args.repeat),
+                'plans': {
+                    'label_column': plan(*legacy[1]),
+                    'category_fk': plan(*indexed[1].query.sql_with_params()),
+                },
+            })
+        common.report('catalog_filters', {
+            'database': db.vendor, 'products': args.products, 'categories': args.categories, 'results': results,
+        })
+
+
+if __name__ == '__main__':
+    main()
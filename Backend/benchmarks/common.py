@@ -0,0 +1,126 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Every benchmark runs against a throwaway copy of the schema so it never touches
+the development database. Run them from the Backend directory, e.g.:
+
+    python -m benchmarks.order_placement --threads 16
+"""
+import json
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+
+import django
+
+
+def setup():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+    django.setup()
+
+
+@contextmanager
+def scratch_database():
+    """
+    Creates (and afterwards destroys) a test database with all migrations applied.
+    SQLite gets a file-backed database so that worker threads share it.
+    """
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    tmpdir = None
+    settings_dict = connection.settings_dict
+    if connection.vendor == 'sqlite':
+        tmpdir = tempfile.mkdtemp(prefix='bench-')
+        settings_dict.setdefault('TEST', {})['NAME'] = os.path.join(tmpdir, 'bench.sqlite3')
+        # Take the write lock up front so concurrent writers queue instead of failing
+        settings_dict.setdefault('OPTIONS', {}).update({'transaction_mode': 'IMMEDIATE', 'timeout': 30})
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+        if tmpdir:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+@contextmanager
+def live_server():
+    """
+    Serves the project over real HTTP from a background thread (one thread per
+    request) and yields its base URL. Use inside `scratch_database()`.
+    """
+    from django.test.testcases import LiveServerThread
+
+    server = LiveServerThread('localhost', static_handler=lambda handler: handler)
+    server.daemon = True
+    server.start()
+    server.is_ready.wait()
+    if server.error:
+        raise server.error
+    try:
+        yield f'http://localhost:{server.port}'
+    finally:
+        server.terminate()
+
+
+def peak_rss_mb(reset=False):
+    """
+    Peak resident set size of this process in MB (Linux). With reset=True the
+    kernel's high-water mark is reset first, so the next call measures from now.
+    """
+    if reset:
+        try:
+            with open('/proc/self/clear_refs', 'w') as clear_refs:
+                clear_refs.write('5')
+        except OSError:
+            pass
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    import resource
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers (0 for an empty list)."""
+    if not values:
+        return 0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def latency_summary(latencies):
+    """Summarises a list of latencies in seconds as milliseconds."""
+    return {
+        'count': len(latencies),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'max_ms': round(max(latencies, default=0) * 1000, 3),
+    }
+
+
+@contextmanager
+def stopwatch():
+    """Yields a dict whose 'elapsed' key holds the wall time once the block exits."""
+    timing = {}
+    start = time.perf_counter()
+    try:
+        yield timing
+    finally:
+        timing['elapsed'] = time.perf_counter() - start
+
+
+def report(name, results):
+    print(json.dumps({'benchmark': name, **results}, indent=2, default=str))
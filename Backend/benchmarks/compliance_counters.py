@@ -0,0 +1,118 @@
+"""
+"Verified products only" catalog listing: maintained counters versus a subquery.
+
+Seeds --documents compliance documents over --products products (about one in
+--approved-every approved), rebuilds the counters with `reconcile`, then pages
+through GET /api/products/?verified=true using the indexed `authority_verified`
+flag, and again with the filter swapped for an EXISTS subquery over
+compliance_docs. The catalog cache is bypassed. Also reports the cost the counters
+add to single-document approvals.
+
+    python -m benchmarks.compliance_counters --documents 1000000 --products 20000
+"""
+import argparse
+import random
+import time
+from contextlib import nullcontext
+from unittest import mock
+
+from . import common
+
+common.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db.models import Exists, OuterRef  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from compliance.counters import reconcile  # noqa: E402
+from compliance.models import Compliance  # noqa: E402
+from products.cache import CatalogCacheMixin  # noqa: E402
+from products.models import Product  # noqa: E402
+from products.views import ProductFilter  # noqa: E402
+
+User = get_user_model()
+BATCH = 5000
+
+
+def seed(args, rng):
+    uploader = User.objects.create_user(email='distributor@bench.local', password=None)
+    for offset in range(0, args.products, BATCH):
+        Product.objects.bulk_create([
+            Product(name=f"Product {i}", description="", price='1.00')
+            for i in range(offset, min(offset + BATCH, args.products))
+        ])
+    product_ids = list(Product.objects.values_list('id', flat=True))
+    # bulk_create bypasses the signals that maintain the counters; reconcile catches up
+    for offset in range(0, args.documents, BATCH):
+        Compliance.objects.bulk_create([
+            Compliance(product_id=rng.choice(product_ids), uploaded_by=uploader,
+                       document_file=f'compliance_docs/doc-{i}.pdf', processing_status='Done',
+                       approval_status='Approved' if rng.randrange(args.approved_every) == 0 else 'Pending')
+            for i in range(offset, min(offset + BATCH, args.documents))
+        ])
+
+
+def subquery_filter(queryset, value):
+    approved = Exists(Compliance.objects.filter(product=OuterRef('pk'), approval_status='Approved'))
+    return queryset.filter(approved if value else ~approved)
+
+
+def list_pages(client, pages):
+    latencies, seen = [], 0
+    for page in range(1, pages + 1):
+        start = time.perf_counter()
+        response = client.get('/api/products/', {'verified': 'true', 'page': page})
+        latencies.append(time.perf_counter() - start)
+        if response.status_code == 404:
+            break
+        assert response.status_code == 200, response.content
+        seen += len(response.data['results'])
+    return latencies, seen
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--documents', type=int, default=1000000)
+    parser.add_argument('--products', type=int, default=20000)
+    parser.add_argument('--approved-every', type=int, default=200)
+    parser.add_argument('--pages', type=int, default=50)
+    parser.add_argument('--approvals', type=int, default=200)
+    args = parser.parse_args()
+
+    with common.scratch_database() as db:
+        rng = random.Random(13)
+        seed(args, rng)
+        with common.stopwatch() as timing:
+            reconcile()
+        results = {'reconcile_seconds': round(timing['elapsed'], 3)}
+
+        client = APIClient()
+        uncached = lambda self, handler, request, *a, **kw: handler(request, *a, **kw)  # noqa: E731
+        counts = {}
+        for mode in ('counters', 'subquery'):
+            patch = (mock.patch.object(ProductFilter.base_filters['verified'], 'filter', subquery_filter)
+                     if mode == 'subquery' else nullcontext())
+            with mock.patch.object(CatalogCacheMixin, 'cached_response', uncached), patch:
+                latencies, counts[mode] = list_pages(client, args.pages)
+            results[mode] = {'pages': len(latencies), 'latency': common.latency_summary(latencies)}
+        assert counts['counters'] == counts['subquery'], counts
+
+        client.force_authenticate(User.objects.create_user(email='authority@bench.local', password=None, role='Authority'))
+        pending = list(Compliance.objects.filter(approval_status='Pending').values_list('id', flat=True)[:args.approvals])
+        latencies = []
+        for document_id in pending:
+            start = time.perf_counter()
+            response = client.put(f'/api/compliance/{document_id}/approve/', {'approval_status': 'Approved'}, format='json')
+            latencies.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.content
+        results['approve_with_counters'] = {'latency': common.latency_summary(latencies)}
+        assert reconcile() == 0, "counters drifted"
+
+        common.report('compliance_counters', {
+            'database': db.vendor, 'documents': args.documents, 'products': args.products,
+            'verified_products': Product.objects.filter(authority_verified=True).count(), 'results': results,
+        })
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""
+Concurrent compliance document downloads: throughput and CPU time.
+
+--clients threads each download large synthetic PDFs from
+GET /api/compliance/<pk>/download/ on a live server: whole files, the same files
+fetched as 4 ranges, and whole files with X-Accel-Redirect offload (only Django's
+share of the work; the web server would send the bytes). CPU is this process's
+user+system time, so for the in-process server it includes the client.
+
+    python -m benchmarks.compliance_download --clients 100 --size-mb 20
+
+The bundled live server has no `wsgi.file_wrapper` sendfile support; to measure
+zero-copy sending, run the project under gunicorn and pass --base-url, with
+--document-ids of existing documents and --token of an Authority user.
+"""
+import argparse
+import hashlib
+import http.client
+import os
+import resource
+import shutil
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+from . import common
+
+common.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.core.files.base import File  # noqa: E402
+from django.test import override_settings  # noqa: E402
+from rest_framework_simplejwt.tokens import AccessToken  # noqa: E402
+
+from compliance.models import Compliance  # noqa: E402
+from products.models import Product  # noqa: E402
+
+User = get_user_model()
+MB = 2**20
+
+
+def cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def fetch(url, token, path, headers=None):
+    """ GETs `path`, discarding the body into a reused buffer; returns (status, bytes). """
+    connection = http.client.HTTPConnection(url.hostname, url.port, timeout=600)
+    connection.request('GET', path, headers={'Authorization': f'Bearer {token}', **(headers or {})})
+    response = connection.getresponse()
+    buffer, received = bytearray(MB), 0
+    while True:
+        count = response.readinto(buffer)
+        if not count:
+            break
+        received += count
+    connection.close()
+    return response.status, received
+
+
+def seed_documents(count, size_mb, media_root):
+    uploader = User.objects.create_user(email='distributor@bench.local', password=None)
+    product = Product.objects.create(name="Dossier product", description="", price='1.00')
+    ids = []
+    for i in range(count):
+        path = os.path.join(media_root, f'seed-{i}.pdf')
+        hasher = hashlib.sha256()
+        with open(path, 'wb') as source:
+            for _ in range(size_mb):
+                block = os.urandom(MB)
+                hasher.update(block)
+                source.write(block)
+        with open(path, 'rb') as source:
+            document = Compliance(product=product, uploaded_by=uploader, content_hash=hasher.hexdigest(),
+                                  file_size=size_mb * MB, processing_status='Done')
+            document.document_file.save(f'dossier-{i}.pdf', File(source), save=True)
+        os.remove(path)
+        ids.append(document.pk)
+    return ids
+
+
+def run(base_url, token, document_ids, args, mode):
+    url = urlsplit(base_url)
+    latencies, transferred, errors, lock = [], [0], [0], threading.Lock()
+
+    def client(index):
+        path = f'/api/compliance/{document_ids[index % len(document_ids)]}/download/'
+        start = time.perf_counter()
+        if mode == 'ranges':
+            size = args.size_mb * MB
+            parts = [fetch(url, token, path, {'Range': f'bytes={i * size // 4}-{(i + 1) * size // 4 - 1}'})
+                     for i in range(4)]
+            ok, received = all(status == 206 for status, _ in parts), sum(count for _, count in parts)
+        else:
+            status, received = fetch(url, token, path)
+            ok = status == 200
+        with lock:
+            latencies.append(time.perf_counter() - start)
+            transferred[0] += received
+            errors[0] += not ok
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(args.clients)]
+    cpu_before = cpu_seconds()
+    with common.stopwatch() as timing:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    cpu = cpu_seconds() - cpu_before
+    return {
+        'errors': errors[0],
+        'transferred_mb': round(transferred[0] / MB, 1),
+        'throughput_mb_per_sec': round(transferred[0] / MB / timing['elapsed'], 1),
+        'cpu_seconds': round(cpu, 3),
+        'cpu_seconds_per_gb': round(cpu / max(transferred[0] / 2**30, 1e-9), 3) if transferred[0] else None,
+        'latency': common.latency_summary(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--clients', type=int, default=100)
+    parser.add_argument('--files', type=int, default=10)
+    parser.add_argument('--size-mb', type=int, default=20)
+    parser.add_argument('--base-url', help="Benchmark an already running server instead.")
+    parser.add_argument('--document-ids', type=int, nargs='+')
+    parser.add_argument('--token')
+    args = parser.parse_args()
+
+    if args.base_url:
+        common.report('compliance_download', {
+            'server': args.base_url, 'clients': args.clients,
+            'results': {'whole_files': run(args.base_url, args.token, args.document_ids, args, 'whole')},
+        })
+        return
+
+    media_root = tempfile.mkdtemp(prefix='bench-media-')
+    with common.scratch_database() as db, override_settings(MEDIA_ROOT=media_root), common.live_server() as base_url:
+        document_ids = seed_documents(args.files, args.size_mb, media_root)
+        token = str(AccessToken.for_user(User.objects.create_user(
+            email='authority@bench.local', password=None, role='Authority'
+        )))
+        results = {
+            'whole_files': run(base_url, token, document_ids, args, 'whole'),
+            'ranges': run(base_url, token, document_ids, args, 'ranges'),
+        }
+        with override_settings(COMPLIANCE_DOWNLOAD_OFFLOAD='x-accel'):
+            results['x_accel_offload'] = run(base_url, token, document_ids, args, 'whole')
+        common.report('compliance_download', {
+            'database': db.vendor, 'clients': args.clients, 'files': args.files, 'size_mb': args.size_mb,
+            'results': results,
+        })
+    shutil.rmtree(media_root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Clearing a compliance review backlog: bulk review versus one PUT per document.
+
+Seeds --documents pending documents spread over --products products and approves
+all of them, first with PUT /api/compliance/<pk>/approve/ per document (what the
+review page does today), then with POST /api/compliance/review/ carrying
+--batch ids per request. Reports wall time, requests and queries.
+
+    python -m benchmarks.compliance_review --documents 10000 --batch 10000
+"""
+import argparse
+
+from . import common
+
+common.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from compliance.models import Compliance  # noqa: E402
+from products.models import Product  # noqa: E402
+
+User = get_user_model()
+BATCH = 5000
+
+
+def seed(documents, products):
+    uploader = User.objects.create_user(email='distributor@bench.local', password=None)
+    product_ids = [product.pk for product in Product.objects.bulk_create([
+        Product(name=f"Product {i}", description="", price='1.00') for i in range(products)
+    ])]
+    for offset in range(0, documents, BATCH):
+        Compliance.objects.bulk_create([
+            Compliance(product_id=product_ids[i % products], uploaded_by=uploader,
+                       document_file=f'compliance_docs/doc-{i}.pdf', processing_status='Done')
+            for i in range(offset, min(offset + BATCH, documents))
+        ])
+
+
+def reset():
+    Compliance.objects.update(approval_status='Pending', approved_by=None, approved_at=None)
+    Product.objects.update(compliance_status='Pending', authority_verified=False)
+
+
+def per_row(client, ids, args):
+    for document_id in ids:
+        response = client.put(f'/api/compliance/{document_id}/approve/', {'approval_status': 'Approved'}, format='json')
+        assert response.status_code == 200, response.content
+    return len(ids)
+
+
+def bulk(client, ids, args):
+    requests = 0
+    for start in range(0, len(ids), args.batch):
+        response = client.post('/api/compliance/review/', {
+            'decision': 'Approved', 'ids': ids[start:start + args.batch],
+        }, format='json')
+        assert response.status_code == 200 and response.data['updated'] == len(ids[start:start + args.batch])
+        requests += 1
+    return requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--documents', type=int, default=10000)
+    parser.add_argument('--products', type=int, default=500)
+    parser.add_argument('--batch', type=int, default=10000)
+    args = parser.parse_args()
+
+    with common.scratch_database() as db:
+        seed(args.documents, args.products)
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(email='authority@bench.local', password=None, role='Authority'))
+        ids = list(Compliance.objects.order_by('id').values_list('id', flat=True))
+
+        results = {}
+        for name, strategy in (('per_row', per_row), ('bulk', bulk)):
+            reset()
+            with CaptureQueriesContext(connection) as queries, common.stopwatch() as timing:
+                requests = strategy(client, ids, args)
+            assert not Compliance.objects.filter(approval_status='Pending').exists()
+            assert Product.objects.filter(authority_verified=True).count() == min(args.products, args.documents)
+            results[name] = {
+                'seconds': round(timing['elapsed'], 3),
+                'documents_per_sec': round(len(ids) / timing['elapsed'], 1),
+                'requests': requests,
+                'queries': len(queries.captured_queries),
+            }
+        common.report('compliance_review', {'database': db.vendor, 'documents': args.documents, 'results': results})
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+"""
+Concurrent compliance document uploads over real HTTP: request latency and peak RSS.
+
+Clients stream large synthetic PDFs to POST /api/compliance/upload/ on a live
+server. The streaming pipeline (hash while writing to disk, process in the
+background) is compared with the previous behaviour: Django's default upload
+handlers and post-processing done inside the request. The background queue is
+drained afterwards and timed separately.
+
+    python -m benchmarks.compliance_upload --clients 8 --size-mb 50
+"""
+import argparse
+import http.client
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from unittest import mock
+from urllib.parse import urlsplit
+
+from . import common
+
+common.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.test import override_settings  # noqa: E402
+from rest_framework_simplejwt.tokens import AccessToken  # noqa: E402
+
+from compliance.processing import claim_jobs, process_document, run_job  # noqa: E402
+from compliance.uploads import HashingUploadMixin  # noqa: E402
+from products.models import Product  # noqa: E402
+
+User = get_user_model()
+BLOCK = 2**20
+
+
+def pdf_chunks(size, seed):
+    """ A unique (per seed) PDF-ish body of `size` bytes, generated lazily. """
+    header = b'%PDF-1.4\n%' + seed.encode() + b'\n'
+    page = os.urandom(BLOCK - 64) + b'\nobj << /Type /Page >>\n'
+    yield header
+    remaining = size - len(header)
+    while remaining > 0:
+        chunk = page[:remaining]
+        remaining -= len(chunk)
+        yield chunk
+
+
+def upload(base_url, token, product_id, size, seed):
+    boundary = uuid.uuid4().hex
+    preamble = (
+        f'--{boundary}\r\nContent-Disposition: form-data; name="product"\r\n\r\n{product_id}\r\n'
+        f'--{boundary}\r\nContent-Disposition: form-data; name="document_file"; filename="dossier-{seed}.pdf"\r\n'
+        'Content-Type: application/pdf\r\n\r\n'
+    ).encode()
+    epilogue = f'\r\n--{boundary}--\r\n'.encode()
+
+    def body():
+        yield preamble
+        yield from pdf_chunks(size, seed)
+        yield epilogue
+
+    url = urlsplit(base_url)
+    connection = http.client.HTTPConnection(url.hostname, url.port, timeout=600)
+    connection.request('POST', '/api/compliance/upload/', body=body(), headers={
+        'Authorization': f'Bearer {token}',
+        'Content-Type': f'multipart/form-data; boundary={boundary}',
+        'Content-Length': str(len(preamble) + size + len(epilogue)),
+    })
+    response = connection.getresponse()
+    response.read()
+    connection.close()
+    assert response.status == 201, response.status
+
+
+def run_clients(base_url, token, product_id, args, mode):
+    latencies, lock = [], threading.Lock()
+
+    def client(index):
+        for upload_index in range(args.uploads_per_client):
+            start = time.perf_counter()
+            upload(base_url, token, product_id, args.size_mb * BLOCK, f'{mode}-{index}-{upload_index}')
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(args.clients)]
+    common.peak_rss_mb(reset=True)
+    with common.stopwatch() as timing:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    megabytes = args.clients * args.uploads_per_client * args.size_mb
+    return {
+        'uploads': len(latencies),
+        'throughput_mb_per_sec': round(megabytes / timing['elapsed'], 1),
+        'peak_rss_mb': common.peak_rss_mb(),
+        'latency': common.latency_summary(latencies),
+    }
+
+
+def drain_queue():
+    with common.stopwatch() as timing:
+        processed = 0
+        while True:
+            job_ids = claim_jobs('bench', limit=10)
+            if not job_ids:
+                break
+            processed += sum(run_job(job_id) for job_id in job_ids)
+    return {'processed': processed, 'seconds': round(timing['elapsed'], 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--uploads-per-client', type=int, default=1)
+    parser.add_argument('--size-mb', type=int, default=50)
+    args = parser.parse_args()
+
+    media_root = tempfile.mkdtemp(prefix='bench-media-')
+    with common.scratch_database() as db, override_settings(MEDIA_ROOT=media_root), common.live_server() as base_url:
+        uploader = User.objects.create_user(email='distributor@bench.local', password=None)
+        token = str(AccessToken.for_user(uploader))
+        product = Product.objects.create(name="Dossier product", description="", price='1.00')
+        results = {'streaming': run_clients(base_url, token, product.pk, args, 'streaming')}
+        results['streaming']['background_processing'] = drain_queue()
+
+        legacy_handlers = lambda self, request, *a, **kw: super(HashingUploadMixin, self).initialize_request(request, *a, **kw)  # noqa: E731
+        with mock.patch.object(HashingUploadMixin, 'initialize_request', legacy_handlers), \
+                mock.patch('compliance.views.enqueue', process_document):
+            results['inline'] = run_clients(base_url, token, product.pk, args, 'inline')
+
+        common.report('compliance_upload', {
+            'database': db.vendor,
+            'clients': args.clients,
+            'file_size_mb': args.size_mb,
+            'max_upload_mb': settings.COMPLIANCE_UPLOAD_MAX_SIZE // BLOCK,
+            'results': results,
+        })
+    shutil.rmtree(media_root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
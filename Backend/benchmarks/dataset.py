@@ -0,0 +1,57 @@
+"""
+Deterministic synthetic dataset for the benchmark suite (benchmarks/suite.py).
+
+`seed(scale, seed)` generates SIZES times `scale` rows with `core.seeding` (what
+`manage.py seed` runs), document files included so downloads serve real bytes, and
+collects the ids the scenarios pick their requests from. The same scale and seed
+give the same rows, so runs on different commits compare like with like.
+"""
+from collections import defaultdict
+
+from accounts.models import User
+from compliance.models import Compliance
+from core import seeding
+from orders.models import Order
+from products.cache import bump_generation
+from products.models import Category, Product
+
+PASSWORD = 'bench-password'
+# Rows at scale 1
+SIZES = {
+    'admins': 2, 'authorities': 10, 'distributors': 40, 'customers': 400,
+    'categories': 25, 'products': 5000, 'orders': 10000, 'documents': 3000,
+}
+
+
+class Dataset:
+    """ What was seeded, for the scenarios to pick their request targets from. """
+
+    def __init__(self, scale, seed):
+        self.scale, self.seed = scale, seed
+        self.users = defaultdict(list)   # role: [User]
+        self.orders = defaultdict(list)  # customer id: [order ids]
+        for user in User.objects.order_by('pk'):
+            self.users[user.role].append(user)
+        for user_id, order_id in Order.objects.order_by('pk').values_list('user_id', 'pk'):
+            self.orders[user_id].append(order_id)
+        self.categories = list(Category.objects.order_by('pk').values_list('name', flat=True))
+        self.products, self.skus = map(list, zip(*Product.objects.order_by('pk').values_list('pk', 'sku')))
+        self.documents = list(Compliance.objects.order_by('pk').values_list('pk', flat=True))
+        self.words = seeding.ADJECTIVES + seeding.NOUNS
+
+    def counts(self):
+        return {
+            **{role: len(users) for role, users in self.users.items()},
+            'categories': len(self.categories), 'products': len(self.products),
+            'orders': sum(map(len, self.orders.values())), 'documents': len(self.documents),
+        }
+
+
+def seed(scale=1.0, seed=0):
+    """ Seeds an empty database and returns the `Dataset`; the files go to MEDIA_ROOT. """
+    counts = {name: max(1, round(count * scale)) for name, count in SIZES.items()}
+    seeding.seed(seeding.Plan(seed=seed, files=True, password=PASSWORD, **counts))
+    # Enough that the checkout scenario measures ordering, not running out
+    Product.objects.update(stock=1_000_000)
+    bump_generation(Product)
+    return Dataset(scale, seed)
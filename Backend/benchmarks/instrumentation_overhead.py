@@ -0,0 +1,142 @@
+"""
+Request latency with the instrumentation middleware off, sampling, and profiling every request.
+
+Replays a mix of catalog, order history and review-queue reads through the Django
+test client (in process, so the middleware's cost isn't lost in network noise) in
+three modes: INSTRUMENTATION off (middleware and query wrapper removed), on with
+--sample-rate, and on with every request profiled. Each round draws one request
+sequence and replays it in every mode, in an order that rotates between rounds so
+drift and warm-up affect the modes equally. Reports mean / p50 / p95 per mode and the overhead
+of each relative to off.
+
+    python -m benchmarks.instrumentation_overhead --requests 500 --rounds 10
+"""
+import argparse
+import random
+import statistics
+import time
+
+from . import common
+
+common.setup()
+
+from django.db import connection  # noqa: E402
+from django.test import override_settings  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from accounts.models import User  # noqa: E402
+from accounts.serializers import CustomTokenObtainPairSerializer  # noqa: E402
+from compliance.models import Compliance  # noqa: E402
+from core import instrumentation  # noqa: E402
+from orders.models import Order, OrderItem  # noqa: E402
+from orders.services import build_order_summary  # noqa: E402
+from products.cache import get_cache  # noqa: E402
+from products.catalog import category_ids  # noqa: E402
+from products.models import Category, Product  # noqa: E402
+
+
+def seed(products):
+    categories = category_ids(Category, [f"Category {i}" for i in range(10)])
+    catalog = Product.objects.bulk_create([
+        Product(name=f"Product {i}", category_id=categories[f"Category {i % 10}"], description="Benchmark product",
+                price='9.99', stock=50)
+        for i in range(products)
+    ])
+    customer = User.objects.create_user(email='customer@bench.local', password=None)
+    for o in range(40):
+        order = Order.objects.create(user=customer, total_amount='19.98')
+        items = OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=product, product_name=product.name, quantity=2,
+                      price_at_purchase=product.price)
+            for product in catalog[o:o + 2]
+        ])
+        order.summary = build_order_summary(items)
+        order.save(update_fields=['summary'])
+    authority = User.objects.create_user(email='authority@bench.local', password=None, role='Authority')
+    Compliance.objects.bulk_create([
+        Compliance(product=catalog[i % products], uploaded_by=customer, document_file=f'compliance_docs/doc-{i}.pdf')
+        for i in range(100)
+    ])
+
+    def bearer(user):
+        return {'Authorization': f'Bearer {CustomTokenObtainPairSerializer.get_token(user).access_token}'}
+    product_ids = [product.pk for product in catalog]
+    return [
+        # (weight, path, headers)
+        (30, lambda: '/api/products/', {}),
+        (30, lambda: f'/api/products/{random.choice(product_ids)}/', {}),
+        (30, lambda: '/api/orders/', bearer(customer)),
+        (10, lambda: '/api/compliance/pending/', bearer(authority)),
+    ]
+
+
+def modes(sample_rate):
+    """ {mode: settings overrides} """
+    return {
+        'off': {'INSTRUMENTATION': False},
+        'sampled': {'INSTRUMENTATION': True, 'INSTRUMENTATION_SAMPLE_RATE': sample_rate},
+        'every_request': {'INSTRUMENTATION': True, 'INSTRUMENTATION_SAMPLE_RATE': 1},
+    }
+
+
+def run(client, overrides, sequence, latencies):
+    wrappers = connection.execute_wrappers
+    recorder = instrumentation.record_query in wrappers
+    if not overrides['INSTRUMENTATION'] and recorder:
+        wrappers.remove(instrumentation.record_query)
+    # Each mode starts from a cold catalog cache, or the first would warm it for the others
+    get_cache().clear()
+    try:
+        with override_settings(**overrides):
+            for path, headers in sequence:
+                start = time.perf_counter()
+                response = client.get(path, headers=headers)
+                latencies.append(time.perf_counter() - start)
+                assert response.status_code == 200, response.content
+    finally:
+        if recorder and instrumentation.record_query not in wrappers:
+            wrappers.append(instrumentation.record_query)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=500, help="requests per mode and round")
+    parser.add_argument('--rounds', type=int, default=10)
+    parser.add_argument('--products', type=int, default=1000)
+    parser.add_argument('--sample-rate', type=float, default=0.01)
+    args = parser.parse_args()
+
+    random.seed(0)
+    with common.scratch_database() as db:
+        mix = seed(args.products)
+        weights = [weight for weight, _path, _headers in mix]
+        configs = modes(args.sample_rate)
+        # One client per mode: the middleware chain is built on a client's first request
+        clients = {mode: APIClient() for mode in configs}
+        latencies = {mode: [] for mode in configs}
+        for rounds, requests in ((1, 50), (args.rounds, args.requests)):
+            for index in range(rounds):
+                sequence = [(path(), headers) for _weight, path, headers in random.choices(mix, weights, k=requests)]
+                order = list(configs)[index % len(configs):] + list(configs)[:index % len(configs)]
+                for mode in order:
+                    run(clients[mode], configs[mode], sequence, latencies[mode] if requests == args.requests else [])
+
+        results = {}
+        baseline = statistics.fmean(latencies['off'])
+        baseline_p50 = common.percentile(latencies['off'], 50)
+        for mode, values in latencies.items():
+            mean = statistics.fmean(values)
+            results[mode] = {
+                'mean_ms': round(mean * 1000, 4),
+                **common.latency_summary(values),
+                'overhead_mean_pct': round((mean / baseline - 1) * 100, 2),
+                'overhead_p50_pct': round((common.percentile(values, 50) / baseline_p50 - 1) * 100, 2),
+            }
+        common.report('instrumentation_overhead', {
+            'database': db.vendor, 'sample_rate': args.sample_rate, 'requests': args.requests * args.rounds,
+            'results': results,
+        })
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""
+Login throughput per password hasher.
+
+For each hasher in --hashers, creates --users accounts hashed with it and has
+--clients threads POST /api/accounts/login/ on a live server --logins times in
+total, with the sign-in rate limits lifted. Reports logins/sec and latency, plus
+the latency of catalog reads (GET /api/products/) issued alongside by one more
+thread, to show how much the logins starve other requests.
+
+    python -m benchmarks.login_throughput --hashers pbkdf2 scrypt argon2 --clients 8
+"""
+import argparse
+import http.client
+import json
+import threading
+import time
+from unittest import mock
+from urllib.parse import urlsplit
+
+from . import common
+
+common.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.contrib.auth.hashers import make_password  # noqa: E402
+from django.test import override_settings  # noqa: E402
+from django.utils.module_loading import import_string  # noqa: E402
+from rest_framework.throttling import SimpleRateThrottle  # noqa: E402
+
+from products.models import Product  # noqa: E402
+
+User = get_user_model()
+PASSWORD = 'correct horse battery'
+
+
+def available(hasher_path):
+    hasher = import_string(hasher_path)()
+    try:
+        if hasher.library:
+            hasher._load_library()
+    except ValueError:  # the optional library isn't installed
+        return False
+    return True
+
+
+def post(url, path, payload):
+    connection = http.client.HTTPConnection(url.hostname, url.port, timeout=120)
+    connection.request('POST', path, json.dumps(payload), {'Content-Type': 'application/json'})
+    response = connection.getresponse()
+    response.read()
+    connection.close()
+    return response.status
+
+
+def get(url, path):
+    connection = http.client.HTTPConnection(url.hostname, url.port, timeout=120)
+    connection.request('GET', path)
+    response = connection.getresponse()
+    response.read()
+    connection.close()
+    return response.status
+
+
+def run(base_url, emails, args):
+    url = urlsplit(base_url)
+    remaining, lock = [args.logins], threading.Lock()
+    logins, reads, errors = [], [], [0]
+    done = threading.Event()
+
+    def login(index):
+        while True:
+            with lock:
+                if not remaining[0]:
+                    return
+                remaining[0] -= 1
+                n = remaining[0]
+            start = time.perf_counter()
+            status = post(url, '/api/accounts/login/', {'email': emails[(index + n) % len(emails)], 'password': PASSWORD})
+            with lock:
+                logins.append(time.perf_counter() - start)
+                errors[0] += status != 200
+
+    def browse():
+        while not done.is_set():
+            start = time.perf_counter()
+            get(url, '/api/products/')
+            reads.append(time.perf_counter() - start)
+
+    reader = threading.Thread(target=browse)
+    threads = [threading.Thread(target=login, args=(i,)) for i in range(args.clients)]
+    reader.start()
+    with common.stopwatch() as timing:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    done.set()
+    reader.join()
+    return {
+        'logins_per_sec': round(len(logins) / timing['elapsed'], 2),
+        'errors': errors[0],
+        'login_latency': common.latency_summary(logins),
+        'catalog_read_latency': common.latency_summary(reads),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--hashers', nargs='+', default=['pbkdf2', 'scrypt', 'argon2'],
+                        choices=sorted(settings.PASSWORD_HASHER_CLASSES))
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--clients', type=int, default=8)
+    args = parser.parse_args()
+
+    unlimited = {'login_ip': None, 'login_account': None, 'register_ip': None}
+    with common.scratch_database() as db, common.live_server() as base_url, \
+            mock.patch.object(SimpleRateThrottle, 'THROTTLE_RATES', unlimited):
+        Product.objects.bulk_create([
+            Product(name=f"Product {i}", description="", price='1.00') for i in range(50)
+        ])
+        results = {}
+        for name in args.hashers:
+            path = settings.PASSWORD_HASHER_CLASSES[name]
+            if not available(path):
+                results[name] = {'skipped': "hasher library not installed"}
+                continue
+            with override_settings(PASSWORD_HASHERS=[path]):
+                encoded = make_password(PASSWORD)
+                emails = [f'{name}-{i}@bench.local' for i in range(args.users)]
+                User.objects.bulk_create([User(email=email, password=encoded) for email in emails])
+                results[name] = run(base_url, emails, args)
+        common.report('login_throughput', {
+            'database': db.vendor, 'clients': args.clients, 'hash_workers': settings.PASSWORD_HASH_WORKERS,
+            'results': results,
+        })
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Order history page latency: stored summaries versus joining items and products.
+
+Grows the orders table through each requested size and times GET /api/orders/
+for one customer, once rendering lines from `Order.summary` (the shipped path) and
+once through the previous nested item serializer that joins products.
+
+    python -m benchmarks.order_history --sizes 10000 100000 1000000
+"""
+import argparse
+import random
+import time
+from decimal import Decimal
+from unittest import mock
+
+from . import common
+
+common.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from rest_framework import serializers  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from orders.models import Order, OrderItem  # noqa: E402
+from orders.serializers import OrderSerializer  # noqa: E402
+from orders.views import OrderListCreateView  # noqa: E402
+from products.models import Product  # noqa: E402
+
+User = get_user_model()
+BATCH = 5000
+
+
+class JoinedOrderItemSerializer(serializers.ModelSerializer):
+    product_name = serializers.ReadOnlyField(source='product.name')
+
+    class Meta:
+        model = OrderItem
+        fields = ['id', 'product', 'product_name', 'quantity', 'price_at_purchase']
+
+
+class JoinedOrderSerializer(OrderSerializer):
+    items = JoinedOrderItemSerializer(many=True, read_only=True)
+
+
+def grow(target, users, products, rng):
+    """Adds orders (three lines each) until the table holds `target` rows."""
+    while (current := Order.objects.count()) < target:
+        batch = min(BATCH, target - current)
+        orders = []
+        for _ in range(batch):
+            picked = rng.sample(products, 3)
+            lines = [
+                {'id': None, 'product': p.id, 'product_name': p.name, 'quantity': 1, 'price_at_purchase': str(p.price)}
+                for p in picked
+            ]
+            orders.append(Order(
+                user=rng.choice(users),
+                total_amount=sum(p.price for p in picked),
+                summary={'item_count': 3, 'total_quantity': 3, 'lines': lines},
+            ))
+        orders = Order.objects.bulk_create(orders)
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product_id=line['product'], product_name=line['product_name'],
+                      quantity=1, price_at_purchase=Decimal(line['price_at_purchase']))
+            for order in orders for line in order.summary['lines']
+        ])
+
+
+def time_history(client, repeat):
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get('/api/orders/')
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.content
+    with CaptureQueriesContext(connection) as ctx:
+        client.get('/api/orders/')
+    return {'queries': len(ctx.captured_queries), **common.latency_summary(latencies)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    with common.scratch_database():
+        products = Product.objects.bulk_create([
+            Product(name=f"Product {i}", description="", price=Decimal('4.50'), stock=0)
+            for i in range(200)
+        ])
+        users = User.objects.bulk_create([User(email=f"customer{i}@bench.local") for i in range(args.users)])
+        client = APIClient()
+        client.force_authenticate(users[0])
+
+        results = []
+        for size in sorted(args.sizes):
+            grow(size, users, products, rng)
+            summary = time_history(client, args.repeat)
+            with mock.patch.object(OrderListCreateView, 'get_serializer_class', lambda view: JoinedOrderSerializer):
+                joined = time_history(client, args.repeat)
+            results.append({'orders': size, 'summary': summary, 'joined': joined})
+
+        common.report('order_history', {'users': args.users, 'results': results})
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+"""
+Concurrency benchmark for POST /api/orders/.
+
+Many threads place randomly ordered multi-line carts over a small, shared set of
+products. The run is repeated with the legacy per-line placement loop and with the
+batched, lock-ordered engine in `orders.services.place_order`, reporting orders/sec,
+latency percentiles, lock failures (deadlocks / lock timeouts) and oversold stock.
+
+    python -m benchmarks.order_placement --threads 16 --orders-per-thread 25 --lines 10
+
+SQLite serialises all writers, so run it with DATABASE_URL pointing at Postgres to
+see row-lock behaviour.
+"""
+import argparse
+import random
+import threading
+import time
+from contextlib import nullcontext
+from decimal import Decimal
+from unittest import mock
+
+from . import common
+
+common.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connection, connections, transaction, DatabaseError  # noqa: E402
+from django.db.models import Sum  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from rest_framework import serializers  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from orders.models import Order, OrderItem  # noqa: E402
+from products.models import Product  # noqa: E402
+
+User = get_user_model()
+
+
+def legacy_place_order(user, items_data):
+    """The original per-line implementation: one lock, save and insert per line."""
+    with transaction.atomic():
+        order = Order.objects.create(user=user, total_amount=0)
+        total_amount = 0
+        for item_data in items_data:
+            requested_qty = item_data['quantity']
+            product = Product.objects.select_for_update().get(id=item_data['product_id'])
+            if product.stock < requested_qty:
+                raise serializers.ValidationError({
+                    f"Product {product.name}": f"Not enough stock. Requested {requested_qty}, Available {product.stock}"
+                })
+            product.stock -= requested_qty
+            product.save()
+            OrderItem.objects.create(order=order, product=product, quantity=requested_qty, price_at_purchase=product.price)
+            total_amount += product.price * requested_qty
+        order.total_amount = total_amount
+        order.save()
+    return order
+
+
+ENGINES = {
+    'legacy': legacy_place_order,
+    'batched': None,  # the shipped engine, used unpatched
+}
+
+
+def seed(num_products, stock, num_users):
+    Product.objects.bulk_create([
+        Product(name=f"Product {i}", description="", price=Decimal('9.99'), stock=stock)
+        for i in range(num_products)
+    ])
+    for i in range(num_users):
+        User.objects.create_user(email=f"buyer{i}@bench.local", password=None)
+
+
+def reset(stock):
+    OrderItem.objects.all().delete()
+    Order.objects.all().delete()
+    Product.objects.update(stock=stock)
+
+
+def random_cart(rng, product_ids, lines):
+    chosen = rng.sample(product_ids, min(lines, len(product_ids)))
+    return [{"product": product_id, "quantity": rng.randint(1, 3)} for product_id in chosen]
+
+
+def worker(user, product_ids, args, seed_value, results, lock):
+    rng = random.Random(seed_value)
+    client = APIClient()
+    client.force_authenticate(user)
+    latencies, outcomes = [], {'created': 0, 'rejected': 0, 'lock_errors': 0}
+    try:
+        for _ in range(args.orders_per_thread):
+            start = time.perf_counter()
+            try:
+                response = client.post('/api/orders/', {"items": random_cart(rng, product_ids, args.lines)}, format='json')
+                outcomes['created' if response.status_code == 201 else 'rejected'] += 1
+            except DatabaseError:
+                outcomes['lock_errors'] += 1
+            latencies.append(time.perf_counter() - start)
+    finally:
+        connections.close_all()
+    with lock:
+        results['latencies'].extend(latencies)
+        for key, value in outcomes.items():
+            results[key] += value
+
+
+def oversold_products(initial_stock):
+    sold = dict(
+        OrderItem.objects.values_list('product').annotate(total=Sum('quantity')).values_list('product', 'total')
+    )
+    return [
+        product_id for product_id, stock in Product.objects.values_list('id', 'stock')
+        if sold.get(product_id, 0) + stock != initial_stock or stock < 0
+    ]
+
+
+def queries_per_order(product_ids, lines):
+    user = User.objects.first()
+    client = APIClient()
+    client.force_authenticate(user)
+    items = [{"product": product_id, "quantity": 1} for product_id in product_ids[:lines]]
+    with CaptureQueriesContext(connection) as ctx:
+        client.post('/api/orders/', {"items": items}, format='json')
+    return len(ctx.captured_queries)
+
+
+def run_engine(engine, args, product_ids, users):
+    reset(args.stock)
+    patch = mock.patch('orders.serializers.place_order', engine) if engine else nullcontext()
+    results = {'latencies': [], 'created': 0, 'rejected': 0, 'lock_errors': 0}
+    lock = threading.Lock()
+    with patch:
+        query_count = queries_per_order(product_ids, args.lines)
+        reset(args.stock)
+        threads = [
+            threading.Thread(target=worker, args=(users[i % len(users)], product_ids, args, i, results, lock))
+            for i in range(args.threads)
+        ]
+        with common.stopwatch() as timing:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+    return {
+        'orders_per_sec': round(results['created'] / timing['elapsed'], 2),
+        'created': results['created'],
+        'rejected_out_of_stock': results['rejected'],
+        'lock_errors': results['lock_errors'],
+        'oversold_products': len(oversold_products(args.stock)),
+        'queries_per_order': query_count,
+        'latency': common.latency_summary(results['latencies']),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--orders-per-thread', type=int, default=25)
+    parser.add_argument('--lines', type=int, default=10)
+    parser.add_argument('--products', type=int, default=40)
+    parser.add_argument('--stock', type=int, default=100000)
+    args = parser.parse_args()
+
+    with common.scratch_database() as db:
+        seed(args.products, args.stock, args.threads)
+        product_ids = list(Product.objects.values_list('id', flat=True))
+        users = list(User.objects.all())
+        common.report('order_placement', {
+            'database': db.vendor,
+            'threads': args.threads,
+            'lines_per_order': args.lines,
+            'engines': {name: run_engine(engine, args, product_ids, users) for name, engine in ENGINES.items()},
+        })
+
+
+if __name__ == '__main__':
+    main()
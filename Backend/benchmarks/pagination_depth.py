@@ -0,0 +1,84 @@
+"""
+Latency of GET /api/products/ by page depth: page numbers versus keyset cursors.
+
+Page-number requests pay for COUNT(*) plus OFFSET n, so they slow down linearly with
+depth; cursor requests seek through the (created_at, id) index and should stay flat.
+
+    python -m benchmarks.pagination_depth --products 200000 --depths 1 10 100 1000 10000
+"""
+import argparse
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from . import common
+
+common.setup()
+
+from django.utils import timezone  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from core.pagination import KeysetPagination  # noqa: E402
+from products.models import Product  # noqa: E402
+
+BATCH = 5000
+PAGE_SIZE = 10
+
+
+def seed(count):
+    start = timezone.now() - timedelta(days=365)
+    for offset in range(0, count, BATCH):
+        products = Product.objects.bulk_create([
+            Product(name=f"Product {i}", description="", price=Decimal('1.00'))
+            for i in range(offset, min(offset + BATCH, count))
+        ])
+        # auto_now_add stamps every row with "now"; spread them out like real traffic
+        for product in products:
+            product.created_at = start + timedelta(seconds=product.id)
+        Product.objects.bulk_update(products, ['created_at'])
+
+
+def cursor_for_page(page):
+    """The cursor a client would hold after walking to `page` (set up untimed)."""
+    if page == 1:
+        return '/api/products/?pagination=cursor'
+    last = Product.objects.order_by('-created_at', '-id')[(page - 1) * PAGE_SIZE - 1]
+    paginator = KeysetPagination(PAGE_SIZE)
+    paginator.base_url = 'http://testserver/api/products/'
+    paginator.ordering = ('-created_at', '-id')
+    return paginator.encode_cursor(last, reverse=False)
+
+
+def time_requests(client, url, repeat):
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(url)
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.content
+    return common.latency_summary(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--products', type=int, default=200000)
+    parser.add_argument('--depths', type=int, nargs='+', default=[1, 10, 100, 1000, 10000])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with common.scratch_database():
+        seed(args.products)
+        client = APIClient()
+        max_page = args.products // PAGE_SIZE
+        results = []
+        for depth in [d for d in args.depths if d <= max_page]:
+            results.append({
+                'page': depth,
+                'page_number': time_requests(client, f'/api/products/?page={depth}', args.repeat),
+                'cursor': time_requests(client, cursor_for_page(depth), args.repeat),
+            })
+        common.report('pagination_depth', {'products': args.products, 'results': results})
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Product search latency: the full-text index versus `icontains` table scans.
+
+Builds a synthetic catalog from a small pharmaceutical vocabulary and times
+GET /api/products/?search=... with the database's search backend, then the same
+queries through the `icontains` fallback.
+
+    python -m benchmarks.product_search --products 500000
+"""
+import argparse
+import random
+import time
+from decimal import Decimal
+from unittest import mock
+
+from . import common
+
+common.setup()
+
+from rest_framework.test import APIClient  # noqa: E402
+
+from products.models import Product  # noqa: E402
+from products.search import LikeSearchBackend  # noqa: E402
+
+BATCH = 5000
+WORDS = (
+    "paracetamol ibuprofen amoxicillin insulin syringe gloves mask bandage catheter saline "
+    "tablet capsule injection ointment sterile latex nitrile surgical oral topical pediatric "
+    "adult extended release coated chewable vial ampoule strip kit monitor glucose pressure "
+    "thermometer gauze suture scalpel forceps antiseptic vitamin supplement syrup drops spray"
+).split()
+QUERIES = ['paracetamol', 'sur', 'sterile gloves', 'insulin pen', 'zzz-no-match', 'vitamin syrup pediatric']
+
+
+def seed(count, rng):
+    # A long tail of brand/compound names keeps most terms selective, like a real catalog
+    tail = [''.join(rng.choices('abcdefghijklmnopqrstuvwxyz', k=rng.randint(5, 10))) for _ in range(20000)]
+    for offset in range(0, count, BATCH):
+        Product.objects.bulk_create([
+            Product(
+                name=' '.join(rng.choices(WORDS, k=1) + rng.choices(tail, k=2)).title(),
+                description=' '.join(rng.choices(WORDS, k=3) + rng.choices(tail, k=27)),
+                price=Decimal('1.00'),
+            )
+            for _ in range(min(BATCH, count - offset))
+        ])
+
+
+def time_query(client, query, repeat):
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get('/api/products/', {'search': query})
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.content
+    return {'matches': response.data['count'], **common.latency_summary(latencies)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--products', type=int, default=500000)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    with common.scratch_database() as db:
+        seed(args.products, random.Random(7))
+        client = APIClient()
+        results = []
+        for query in QUERIES:
+            indexed = time_query(client, query, args.repeat)
+            with mock.patch('products.search.get_search_backend', lambda connection: LikeSearchBackend()):
+                scan = time_query(client, query, args.repeat)
+            results.append({'query': query, 'full_text': indexed, 'icontains': scan})
+        common.report('product_search', {'database': db.vendor, 'products': args.products, 'results': results})
+
+
+if __name__ == '__main__':
+    main()
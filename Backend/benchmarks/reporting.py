@@ -0,0 +1,104 @@
+"""
+Runtime and peak RSS of the admin reporting commands against the scripts they replaced.
+
+Seeds --users customers (plus --products and --orders for the multi-model dumps),
+then times the database overview and the user dump both ways: as `db_overview` and
+`dump_models` do it (statistics estimates, tuples streamed in chunks, one buffered
+write per chunk) and as show_db_orm.py and dump_users.py did (COUNT(*) per model,
+every User instantiated, one write per line). Finally dumps users, orders and order
+items with --parallel 1 and N.
+
+    python -m benchmarks.reporting --users 1000000 --orders 200000 --parallel 3
+
+The legacy variants run last: Python keeps the memory they grow into, which would
+otherwise raise the floor under the new variants' measurements.
+"""
+import argparse
+import os
+import resource
+import shutil
+import tempfile
+
+from . import common
+
+common.setup()
+
+from django.apps import apps  # noqa: E402
+
+from core import reporting, seeding  # noqa: E402
+
+
+def legacy_overview():
+    # What show_db_orm.py did for every model
+    for model in reporting.project_models():
+        if model.objects.count():
+            for obj in model.objects.all()[:3]:
+                str({key: value for key, value in obj.__dict__.items() if not key.startswith('_')})
+
+
+def legacy_dump(path):
+    # What dump_users.py did
+    User = apps.get_model('accounts.User')
+    with open(path, 'w', encoding='utf-8') as stream:
+        stream.write(f"Total Users: {User.objects.count()}\n\n")
+        for user in User.objects.all():
+            stream.write(f"User: {user.__dict__.get('email')}\n")
+            stream.write(f"Role: {user.__dict__.get('role')}\n")
+            stream.write(f"Password Hash: {user.password}\n")
+            stream.write("-" * 50 + "\n")
+
+
+def measure(func, *args):
+    common.peak_rss_mb(reset=True)
+    with common.stopwatch() as timing:
+        func(*args)
+    return {'seconds': round(timing['elapsed'], 3), 'peak_rss_mb': common.peak_rss_mb()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=1_000_000)
+    parser.add_argument('--products', type=int, default=10_000)
+    parser.add_argument('--orders', type=int, default=200_000)
+    parser.add_argument('--chunk-size', type=int, default=reporting.DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--parallel', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix='bench-reporting-')
+    with common.scratch_database():
+        plan = seeding.Plan(
+            seed=args.seed, admins=1, authorities=1, distributors=1, customers=args.users,
+            categories=1 if args.products else 0, products=args.products, orders=args.orders, documents=0,
+        )
+        with common.stopwatch() as timing:
+            seeding.seed(plan)
+        results = {'seeded': {'users': args.users + 3, 'orders': args.orders, 'seconds': round(timing['elapsed'], 1)}}
+        labels = [model._meta.label for model in reporting.project_models()]
+        path = os.path.join(tmpdir, 'users')
+
+        results['overview_estimated'] = measure(lambda: [reporting.overview(label) for label in labels])
+        results['overview_exact'] = measure(lambda: [reporting.overview(label, exact=True) for label in labels])
+        for fmt in reporting.FORMATS:
+            results[f'dump_users_{fmt}'] = measure(reporting.dump, 'accounts.User', fmt, path, args.chunk_size)
+
+        dumps = [(label, 'csv', os.path.join(tmpdir, label), args.chunk_size)
+                 for label in ('accounts.User', 'orders.Order', 'orders.OrderItem')]
+        for workers in sorted({1, args.parallel}):
+            before = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+            stats = measure(reporting.run_in_parallel, reporting.dump, dumps, workers)
+            if workers > 1:
+                # Largest child; ru_maxrss never goes down, so only meaningful if it grew
+                stats['peak_child_rss_mb'] = round(max(before, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+                                                   / 1024, 1)
+            results[f'dump_three_models_parallel_{workers}'] = stats
+
+        results['legacy_overview'] = measure(legacy_overview)
+        results['legacy_dump_users'] = measure(legacy_dump, path)
+
+    shutil.rmtree(tmpdir, ignore_errors=True)
+    common.report('reporting', {'args': vars(args), **results})
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+"""
+Interrupted large uploads: resumable chunked protocol versus single-shot multipart.
+
+A live server receives the same file through both protocols while the client drops
+the connection at random (each chunk-sized stretch of transfer fails with
+probability --drop-rate). A single-shot multipart upload has to start over after
+every drop; the chunked upload only resends the chunk that was in flight, with
+--parallel chunks in flight at once.
+
+    python -m benchmarks.resumable_upload --size-mb 200 --chunk-mb 8 --parallel 4 --drop-rate 0.05
+"""
+import argparse
+import hashlib
+import http.client
+import itertools
+import json
+import logging
+import os
+import queue
+import random
+import shutil
+import tempfile
+import threading
+import uuid
+from urllib.parse import urlsplit
+
+from . import common
+
+common.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.test import override_settings  # noqa: E402
+from rest_framework_simplejwt.tokens import AccessToken  # noqa: E402
+
+from products.models import Product  # noqa: E402
+
+User = get_user_model()
+MB = 2**20
+
+
+class Client:
+    def __init__(self, base_url, token):
+        url = urlsplit(base_url)
+        self.host, self.port, self.token = url.hostname, url.port, token
+        self.bytes_sent = 0
+        self.lock = threading.Lock()
+
+    def request(self, method, path, pieces=(), length=0, headers=None, drop_after=None):
+        """
+        Sends `pieces` (an iterable of bytes) as the body. With `drop_after`, the
+        connection is closed once that many body bytes were sent; returns None then.
+        """
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=600)
+        connection.putrequest(method, path)
+        for name, value in {'Authorization': f'Bearer {self.token}', 'Content-Length': str(length), **(headers or {})}.items():
+            connection.putheader(name, value)
+        connection.endheaders()
+        sent = 0
+        try:
+            for piece in pieces:
+                if drop_after is not None and sent + len(piece) > drop_after:
+                    connection.send(piece[:drop_after - sent])
+                    sent = drop_after
+                    return None
+                connection.send(piece)
+                sent += len(piece)
+            response = connection.getresponse()
+            return response.status, response.read()
+        finally:
+            with self.lock:
+                self.bytes_sent += sent
+            connection.close()
+
+
+def read_slices(path, start, end, size=MB):
+    with open(path, 'rb') as source:
+        source.seek(start)
+        while start < end:
+            data = source.read(min(size, end - start))
+            start += len(data)
+            yield data
+
+
+def failure_point(rng, length, span, drop_rate):
+    """ Where the connection drops while sending `length` bytes, or None. """
+    for offset in range(0, length, span):
+        if rng.random() < drop_rate:
+            return offset + min(span, length - offset) // 2
+    return None
+
+
+def single_shot(client, path, size, product_id, args, rng):
+    boundary = uuid.uuid4().hex
+    preamble = (
+        f'--{boundary}\r\nContent-Disposition: form-data; name="product"\r\n\r\n{product_id}\r\n'
+        f'--{boundary}\r\nContent-Disposition: form-data; name="document_file"; filename="single.pdf"\r\n'
+        'Content-Type: application/pdf\r\n\r\n'
+    ).encode()
+    epilogue = f'\r\n--{boundary}--\r\n'.encode()
+    length = len(preamble) + size + len(epilogue)
+    attempts = 0
+    while True:
+        attempts += 1
+        pieces = itertools.chain([preamble], read_slices(path, 0, size), [epilogue])
+        result = client.request('POST', '/api/compliance/upload/', pieces, length, {
+            'Content-Type': f'multipart/form-data; boundary={boundary}',
+        }, drop_after=failure_point(rng, length, args.chunk_mb * MB, args.drop_rate))
+        if result is not None:
+            assert result[0] == 201, result
+            return attempts
+
+
+def chunked(client, path, size, product_id, args, rng):
+    status, body = client.request('POST', '/api/compliance/uploads/', [payload := json.dumps({
+        'product': product_id, 'file_name': 'chunked.pdf', 'file_size': size, 'chunk_size': args.chunk_mb * MB,
+    }).encode()], len(payload), {'Content-Type': 'application/json'})
+    assert status == 201, body
+    session = json.loads(body)
+    pending = queue.Queue()
+    for index in range(session['chunk_count']):
+        pending.put(index)
+    attempts, lock = [0], threading.Lock()
+
+    def worker(seed):
+        worker_rng = random.Random(seed)
+        while True:
+            try:
+                index = pending.get_nowait()
+            except queue.Empty:
+                return
+            start = index * session['chunk_size']
+            end = min(start + session['chunk_size'], size)
+            digest = hashlib.sha256(b''.join(read_slices(path, start, end))).hexdigest()
+            drop = end - start if worker_rng.random() >= args.drop_rate else (end - start) // 2
+            result = client.request(
+                'PUT', f"/api/compliance/uploads/{session['id']}/chunks/{index}/", read_slices(path, start, end),
+                end - start, {'Content-Type': 'application/octet-stream', 'X-Chunk-SHA256': digest},
+                drop_after=None if drop == end - start else drop,
+            )
+            with lock:
+                attempts[0] += 1
+            if result is None or result[0] != 200:
+                pending.put(index)  # resume: resend only this chunk
+
+    threads = [threading.Thread(target=worker, args=(rng.random(),)) for _ in range(args.parallel)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    status, body = client.request('POST', f"/api/compliance/uploads/{session['id']}/finalize/")
+    assert status == 201, body
+    return attempts[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--size-mb', type=int, default=200)
+    parser.add_argument('--chunk-mb', type=int, default=8)
+    parser.add_argument('--parallel', type=int, default=4)
+    parser.add_argument('--drop-rate', type=float, default=0.05)
+    args = parser.parse_args()
+    # Every simulated drop is a 400 on the server; don't log each one
+    logging.getLogger('django.request').setLevel(logging.ERROR)
+
+    workdir = tempfile.mkdtemp(prefix='bench-resumable-')
+    path = os.path.join(workdir, 'dossier.pdf')
+    with open(path, 'wb') as source:
+        for _ in range(args.size_mb):
+            source.write(os.urandom(MB))
+    size = args.size_mb * MB
+
+    media_root = os.path.join(workdir, 'media')
+    with common.scratch_database() as db, override_settings(MEDIA_ROOT=media_root), common.live_server() as base_url:
+        user = User.objects.create_user(email='distributor@bench.local', password=None)
+        product = Product.objects.create(name="Dossier product", description="", price='1.00')
+        results = {}
+        for name, protocol in (('single_shot_multipart', single_shot), ('chunked_resumable', chunked)):
+            client = Client(base_url, str(AccessToken.for_user(user)))
+            # Same file twice would be deduplicated; that's fine, both still transfer it
+            with common.stopwatch() as timing:
+                attempts = protocol(client, path, size, product.pk, args, random.Random(11))
+            results[name] = {
+                'seconds': round(timing['elapsed'], 3),
+                'throughput_mb_per_sec': round(args.size_mb / timing['elapsed'], 1),
+                'requests': attempts,
+                'transferred_mb': round(client.bytes_sent / MB, 1),
+            }
+        common.report('resumable_upload', {
+            'database': db.vendor, 'size_mb': args.size_mb, 'chunk_mb': args.chunk_mb,
+            'parallel': args.parallel, 'drop_rate': args.drop_rate, 'results': results,
+        })
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
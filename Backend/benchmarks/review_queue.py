@@ -0,0 +1,145 @@
+"""
+Concurrent reviewers working the compliance queue: shared list versus leased claims.
+
+--reviewers threads drain --documents pending documents on a live server. With the
+shared list every reviewer reads GET /api/compliance/pending/ and approves the top
+page, as the review page does today, so reviewers race for the same documents.
+With claims every reviewer leases --batch documents at a time from
+POST /api/compliance/claim/ and approves those. Reports the latency of fetching
+work, and the duplicate-review rate: approvals of documents someone already
+reviewed, as a share of all approvals.
+
+    python -m benchmarks.review_queue --reviewers 20 --documents 2000 --batch 10
+"""
+import argparse
+import http.client
+import json
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+from . import common
+
+common.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from rest_framework_simplejwt.tokens import AccessToken  # noqa: E402
+
+from compliance.models import Compliance  # noqa: E402
+from products.models import Product  # noqa: E402
+
+User = get_user_model()
+BATCH = 5000
+
+
+def seed(documents, products):
+    uploader = User.objects.create_user(email='distributor@bench.local', password=None)
+    product_ids = [product.pk for product in Product.objects.bulk_create([
+        Product(name=f"Product {i}", description="", price='1.00', stock=i % 97)
+        for i in range(products)
+    ])]
+    for offset in range(0, documents, BATCH):
+        Compliance.objects.bulk_create([
+            Compliance(product_id=product_ids[i % products], uploaded_by=uploader,
+                       document_file=f'compliance_docs/doc-{i}.pdf', processing_status='Done')
+            for i in range(offset, min(offset + BATCH, documents))
+        ])
+
+
+def reset():
+    Compliance.objects.update(approval_status='Pending', approved_by=None, approved_at=None,
+                              claimed_by=None, claimed_until=None)
+
+
+class Reviewer:
+    def __init__(self, base_url, user):
+        url = urlsplit(base_url)
+        self.connection = http.client.HTTPConnection(url.hostname, url.port, timeout=120)
+        self.token = str(AccessToken.for_user(user))
+
+    def request(self, method, path, payload=None):
+        body = json.dumps(payload).encode() if payload is not None else None
+        headers = {'Authorization': f'Bearer {self.token}', 'Content-Type': 'application/json'}
+        try:
+            self.connection.request(method, path, body, headers)
+            response = self.connection.getresponse()
+        except (http.client.HTTPException, OSError):
+            # The live server closes idle keep-alive connections
+            self.connection.close()
+            self.connection.request(method, path, body, headers)
+            response = self.connection.getresponse()
+        return response.status, json.loads(response.read() or b'null')
+
+    def fetch_work(self, mode, batch):
+        if mode == 'shared_list':
+            status, body = self.request('GET', '/api/compliance/pending/')
+            assert status == 200, body
+            return [document['id'] for document in body['results']][:batch]
+        status, body = self.request('POST', '/api/compliance/claim/', {'count': batch})
+        assert status == 200, body
+        return [document['id'] for document in body]
+
+
+def run(base_url, users, mode, args):
+    fetch_latencies, approvals, lock = [], Counter(), threading.Lock()
+
+    def work(user):
+        reviewer = Reviewer(base_url, user)
+        while True:
+            start = time.perf_counter()
+            ids = reviewer.fetch_work(mode, args.batch)
+            elapsed = time.perf_counter() - start
+            with lock:
+                fetch_latencies.append(elapsed)
+            if not ids:
+                return
+            for document_id in ids:
+                time.sleep(args.review_ms / 1000)  # reading the document
+                status, body = reviewer.request('PUT', f'/api/compliance/{document_id}/approve/', {'approval_status': 'Approved'})
+                if status == 200:
+                    with lock:
+                        approvals[document_id] += 1
+
+    threads = [threading.Thread(target=work, args=(user,)) for user in users]
+    with common.stopwatch() as timing:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    total = sum(approvals.values())
+    duplicates = total - len(approvals)
+    return {
+        'seconds': round(timing['elapsed'], 3),
+        'documents_reviewed': len(approvals),
+        'approvals': total,
+        'duplicate_review_rate': round(duplicates / total, 4) if total else 0,
+        'fetch_work_latency': common.latency_summary(fetch_latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--reviewers', type=int, default=20)
+    parser.add_argument('--documents', type=int, default=2000)
+    parser.add_argument('--products', type=int, default=500)
+    parser.add_argument('--batch', type=int, default=10)
+    parser.add_argument('--review-ms', type=float, default=5)
+    args = parser.parse_args()
+
+    with common.scratch_database() as db, common.live_server() as base_url:
+        seed(args.documents, args.products)
+        users = [User.objects.create_user(email=f'authority{i}@bench.local', password=None, role='Authority')
+                 for i in range(args.reviewers)]
+        results = {}
+        for mode in ('shared_list', 'claims'):
+            reset()
+            results[mode] = run(base_url, users, mode, args)
+            assert not Compliance.objects.filter(approval_status='Pending').exists()
+        common.report('review_queue', {
+            'database': db.vendor, 'reviewers': args.reviewers, 'documents': args.documents, 'results': results,
+        })
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""
+Serialize + render time per 1,000 rows: ModelSerializer versus compiled serializer.
+
+For ProductSerializer, OrderSerializer and ComplianceSerializer, loads --rows rows
+and times, --repeat times each, the three stages of a list response: fetching
+(model instances with the view's eager loading, or `.values()` rows), serializing
+(the ModelSerializer, or the compiled field converters) and rendering
+(JSONRenderer, or FastJSONRenderer, which uses orjson when it is installed).
+Reports the best time per 1,000 rows for each stage and checks that both paths
+produce the same bytes.
+
+    python -m benchmarks.serialization --rows 1000 --repeat 20
+"""
+import argparse
+import time
+from decimal import Decimal
+
+from . import common
+
+common.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+
+from compliance.models import Compliance  # noqa: E402
+from compliance.serializers import ComplianceSerializer  # noqa: E402
+from core import renderers  # noqa: E402
+from core.compiled import compile_serializer  # noqa: E402
+from core.eager_loading import eager_load  # noqa: E402
+from orders.models import Order, OrderItem  # noqa: E402
+from orders.serializers import OrderSerializer  # noqa: E402
+from orders.services import build_order_summary  # noqa: E402
+from products.catalog import category_ids  # noqa: E402
+from products.models import Category, Product  # noqa: E402
+from products.serializers import ProductSerializer  # noqa: E402
+
+User = get_user_model()
+BATCH = 5000
+
+
+def seed(rows):
+    now = timezone.now()
+    categories = category_ids(Category, [f"Category {i}" for i in range(20)])
+    products = []
+    for offset in range(0, rows, BATCH):
+        products += Product.objects.bulk_create([
+            Product(name=f"Product {i}", sku=f'SKU-{i}', category_id=categories[f"Category {i % 20}"],
+                    description="A product used to benchmark serialization.", price=Decimal(i % 500) + Decimal('0.99'),
+                    stock=i % 50, compliance_approved_at=now if i % 3 == 0 else None)
+            for i in range(offset, min(offset + BATCH, rows))
+        ])
+
+    customer = User.objects.create_user(email='customer@bench.local', password=None)
+    orders = Order.objects.bulk_create([Order(user=customer, total_amount='0') for _ in range(rows)])
+    items = OrderItem.objects.bulk_create([
+        OrderItem(order=order, product=products[(i + line) % rows], product_name=products[(i + line) % rows].name,
+                  quantity=line + 1, price_at_purchase=products[(i + line) % rows].price)
+        for i, order in enumerate(orders) for line in range(3)
+    ], batch_size=BATCH)
+    for i, order in enumerate(orders):
+        lines = items[i * 3:i * 3 + 3]
+        order.summary = build_order_summary(lines)
+        order.total_amount = sum(item.price_at_purchase * item.quantity for item in lines)
+    Order.objects.bulk_update(orders, ['summary', 'total_amount'], batch_size=BATCH)
+
+    uploader = User.objects.create_user(email='distributor@bench.local', password=None, role='Distributor')
+    Compliance.objects.bulk_create([
+        Compliance(product=products[i], uploaded_by=uploader, document_file=f'compliance_docs/doc-{i}.pdf',
+                   content_hash=f'{i:064x}', file_size=1024 * i, page_count=i % 30, processing_status='Done')
+        for i in range(rows)
+    ], batch_size=BATCH)
+
+
+def best_of(repeat, func):
+    """ (best wall time, last result) of `repeat` calls. """
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def measure(serializer_class, queryset, rows, repeat):
+    request = APIRequestFactory().get('/')
+    context = {'request': request}
+    per_1k = 1000 / rows
+
+    def stages(fetch, serialize, renderer):
+        fetch_s, loaded = best_of(repeat, fetch)
+        serialize_s, data = best_of(repeat, lambda: serialize(loaded))
+        render_s, body = best_of(repeat, lambda: renderer.render(data))
+        return body, {
+            'fetch_ms': round(fetch_s * per_1k * 1000, 3),
+            'serialize_ms': round(serialize_s * per_1k * 1000, 3),
+            'render_ms': round(render_s * per_1k * 1000, 3),
+            'serialize_render_ms': round((serialize_s + render_s) * per_1k * 1000, 3),
+            'total_ms': round((fetch_s + serialize_s + render_s) * per_1k * 1000, 3),
+        }
+
+    baseline_body, baseline = stages(
+        lambda: list(eager_load(queryset.all(), serializer_class)),
+        lambda instances: serializer_class(instances, many=True, context=context).data,
+        JSONRenderer(),
+    )
+    compiled = compile_serializer(serializer_class, context)
+    if compiled is None:
+        return {'serializer': baseline, 'compiled': None}
+    compiled_body, compiled_stages = stages(
+        lambda: list(compiled.rows(queryset)),
+        compiled.represent,
+        renderers.FastJSONRenderer(),
+    )
+    return {
+        'serializer': baseline,
+        'compiled': compiled_stages,
+        'speedup': round(baseline['serialize_render_ms'] / max(compiled_stages['serialize_render_ms'], 1e-9), 2),
+        'identical': compiled_body == baseline_body,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with common.scratch_database() as db:
+        seed(args.rows)
+        results = {
+            'ProductSerializer': measure(ProductSerializer, Product.objects.order_by('-created_at', '-id'),
+                                         args.rows, args.repeat),
+            'OrderSerializer': measure(OrderSerializer, Order.objects.order_by('-created_at', '-id'),
+                                       args.rows, args.repeat),
+            'ComplianceSerializer': measure(ComplianceSerializer, Compliance.objects.order_by('created_at', 'id'),
+                                            args.rows, args.repeat),
+        }
+        common.report('serialization', {
+            'database': db.vendor, 'rows': args.rows, 'orjson': renderers.orjson is not None, 'results': results,
+        })
+
+
+if __name__ == '__main__':
+    main()
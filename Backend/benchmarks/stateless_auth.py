@@ -0,0 +1,96 @@
+"""
+Authenticated request throughput: stateless JWT authentication versus loading the user.
+
+Replays --requests GETs of /api/orders/ (as a customer with --orders orders) and
+/api/compliance/pending/ (as an Authority reviewer) with real Bearer tokens, once
+through simplejwt's JWTAuthentication, which loads the user row on every request,
+and once through accounts.authentication.StatelessJWTAuthentication. Reports
+requests/sec, latency and queries per request.
+
+    python -m benchmarks.stateless_auth --requests 2000
+"""
+import argparse
+import time
+from decimal import Decimal
+from unittest import mock
+
+from . import common
+
+common.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.core.cache import caches  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+from rest_framework.views import APIView  # noqa: E402
+from rest_framework_simplejwt.authentication import JWTAuthentication  # noqa: E402
+
+from accounts.authentication import StatelessJWTAuthentication  # noqa: E402
+from accounts.serializers import CustomTokenObtainPairSerializer  # noqa: E402
+from compliance.models import Compliance  # noqa: E402
+from orders.models import Order  # noqa: E402
+from products.models import Product  # noqa: E402
+
+User = get_user_model()
+ENDPOINTS = {'orders': '/api/orders/', 'compliance_pending': '/api/compliance/pending/'}
+
+
+def client_for(user):
+    client = APIClient()
+    token = CustomTokenObtainPairSerializer.get_token(user).access_token
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+def seed(orders):
+    customer = User.objects.create_user(email='customer@bench.local', password=None)
+    authority = User.objects.create_user(email='authority@bench.local', password=None, role='Authority')
+    Order.objects.bulk_create([
+        Order(user=customer, total_amount=Decimal('9.00'), summary={'item_count': 0, 'total_quantity': 0, 'lines': []})
+        for _ in range(orders)
+    ])
+    product = Product.objects.create(name="Product", description="", price='1.00')
+    Compliance.objects.bulk_create([
+        Compliance(product=product, uploaded_by=customer, document_file=f'compliance_docs/doc-{i}.pdf')
+        for i in range(50)
+    ])
+    return {'orders': client_for(customer), 'compliance_pending': client_for(authority)}
+
+
+def run(client, path, requests):
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = client.get(path)
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.content
+    with CaptureQueriesContext(connection) as queries:
+        client.get(path)
+    return {
+        'requests_per_sec': round(len(latencies) / sum(latencies), 1),
+        'queries_per_request': len(queries.captured_queries),
+        'latency': common.latency_summary(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--orders', type=int, default=30)
+    args = parser.parse_args()
+
+    with common.scratch_database() as db:
+        clients = seed(args.orders)
+        results = {}
+        for name, authentication in (('load_user', JWTAuthentication), ('stateless', StatelessJWTAuthentication)):
+            caches['auth'].clear()
+            with mock.patch.object(APIView, 'authentication_classes', [authentication]):
+                results[name] = {
+                    endpoint: run(clients[endpoint], path, args.requests) for endpoint, path in ENDPOINTS.items()
+                }
+        common.report('stateless_auth', {'database': db.vendor, 'requests': args.requests, 'results': results})
+
+
+if __name__ == '__main__':
+    main()
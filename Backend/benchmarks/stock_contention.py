@@ -0,0 +1,128 @@
+"""
+Checkout contention on a single best-selling SKU: one stock row versus stock shards.
+
+1, 8 and 64 concurrent buyers repeatedly POST single-product orders for the same
+product until it sells out. Each round runs with the stock on the product row
+(every checkout locks it) and split across `--shards` shard rows, and checks that
+exactly the initial stock was sold: no overselling, no lost units.
+
+    python -m benchmarks.stock_contention --buyers 1 8 64 --stock 2000 --shards 16
+
+SQLite serialises all writers, so run it with DATABASE_URL pointing at Postgres to
+see the shards spread row locks.
+"""
+import argparse
+import threading
+import time
+from decimal import Decimal
+
+from . import common
+
+common.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connections, DatabaseError  # noqa: E402
+from django.db.models import Sum  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from orders.models import Order, OrderItem  # noqa: E402
+from products.inventory import set_shards  # noqa: E402
+from products.models import Product, StockShard  # noqa: E402
+
+User = get_user_model()
+
+
+def buyer(user, product_id, quantity, results, lock):
+    client = APIClient()
+    client.force_authenticate(user)
+    latencies, outcomes = [], {'created': 0, 'lock_errors': 0}
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                response = client.post(
+                    '/api/orders/', {"items": [{"product": product_id, "quantity": quantity}]}, format='json'
+                )
+            except DatabaseError:
+                outcomes['lock_errors'] += 1
+                continue
+            finally:
+                latencies.append(time.perf_counter() - start)
+            if response.status_code != 201:
+                break  # sold out
+            outcomes['created'] += 1
+    finally:
+        connections.close_all()
+    with lock:
+        results['latencies'].extend(latencies)
+        for key, value in outcomes.items():
+            results[key] += value
+
+
+def remaining_stock(product):
+    product.refresh_from_db()
+    if product.stock_shards:
+        return StockShard.objects.filter(product=product).aggregate(total=Sum('quantity'))['total']
+    return product.stock
+
+
+def run_round(product, users, buyers, shards, args):
+    OrderItem.objects.all().delete()
+    Order.objects.all().delete()
+    Product.objects.filter(pk=product.pk).update(stock=args.stock, stock_shards=0)
+    StockShard.objects.all().delete()
+    product.refresh_from_db()
+    if shards:
+        product = set_shards(product, shards)
+
+    results = {'latencies': [], 'created': 0, 'lock_errors': 0}
+    lock = threading.Lock()
+    threads = [
+        threading.Thread(target=buyer, args=(users[i], product.pk, args.quantity, results, lock))
+        for i in range(buyers)
+    ]
+    with common.stopwatch() as timing:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    sold = OrderItem.objects.aggregate(total=Sum('quantity'))['total'] or 0
+    remaining = remaining_stock(product)
+    return {
+        'orders_per_sec': round(results['created'] / timing['elapsed'], 2),
+        'orders': results['created'],
+        'sold': sold,
+        'remaining': remaining,
+        'oversold': sold > args.stock or remaining < 0,
+        'units_lost': args.stock - sold - remaining,
+        'lock_errors': results['lock_errors'],
+        'latency': common.latency_summary(results['latencies']),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--buyers', type=int, nargs='+', default=[1, 8, 64])
+    parser.add_argument('--stock', type=int, default=2000)
+    parser.add_argument('--quantity', type=int, default=1)
+    parser.add_argument('--shards', type=int, default=16)
+    args = parser.parse_args()
+
+    with common.scratch_database() as db:
+        product = Product.objects.create(name="Best seller", description="", price=Decimal('9.99'))
+        users = [User.objects.create_user(email=f"buyer{i}@bench.local", password=None) for i in range(max(args.buyers))]
+        rounds = []
+        for buyers in args.buyers:
+            rounds.append({
+                'buyers': buyers,
+                'single_row': run_round(product, users, buyers, 0, args),
+                f'{args.shards}_shards': run_round(product, users, buyers, args.shards, args),
+            })
+        common.report('stock_contention', {
+            'database': db.vendor, 'stock': args.stock, 'quantity': args.quantity, 'rounds': rounds,
+        })
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,598 @@
+"""
+End-to-end load scenarios over every API route, reported as JSON for comparison across commits.
+
+Seeds benchmarks.dataset at --scale from --seed, then runs three traffic mixes, each
+as --concurrency simulated clients with their own seeded random sequence:
+
+* browse: anonymous catalog reads (filters, search, deep pages, cursors, details),
+  with some sign-ups, sign-ins, contact messages and operators polling metrics;
+* checkout: a spike of customers reserving stock, placing orders and reading their
+  order history;
+* review: distributors uploading documents (plain and resumable), authorities
+  working the review queue, admins importing, exporting and editing the catalog and
+  reading sales analytics.
+
+Requests go through the Django test client in process, or with --live over HTTP to
+a server thread. Every request is profiled (INSTRUMENTATION_SAMPLE_RATE=1) and its
+query count read back from the Server-Timing header (INSTRUMENTATION_SERVER_TIMING
+on); that costs a few percent of latency, the same for every commit. Throttles are
+lifted so the load isn't refused.
+
+Reports per scenario the throughput and, per route and method, p50/p95/p99 latency,
+mean queries and status codes. Statuses a request doesn't expect count as errors.
+Also lists routes no scenario reached and routes shadowed by an earlier pattern.
+--baseline compares latencies and throughput with an earlier --output file.
+
+    python -m benchmarks.suite --scale 1 --requests 2000 --output before.json
+    python -m benchmarks.suite --scale 1 --requests 2000 --baseline before.json --live --concurrency 8
+"""
+import argparse
+import hashlib
+import http.client
+import json
+import platform
+import random
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from contextlib import nullcontext
+from datetime import timedelta
+from unittest import mock
+from urllib.parse import urlencode, urlsplit
+
+from . import common
+
+common.setup()
+
+import django  # noqa: E402
+from django.core.files.uploadedfile import SimpleUploadedFile  # noqa: E402
+from django.test import Client, override_settings  # noqa: E402
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart  # noqa: E402
+from django.urls import Resolver404, URLPattern, get_resolver, resolve  # noqa: E402
+from rest_framework.throttling import SimpleRateThrottle  # noqa: E402
+from rest_framework_simplejwt.tokens import AccessToken  # noqa: E402
+
+from accounts.serializers import CustomTokenObtainPairSerializer  # noqa: E402
+from core import seeding  # noqa: E402
+from products.cache import get_cache  # noqa: E402
+from . import dataset as datasets  # noqa: E402
+
+METRICS_TOKEN = 'bench-scrape'
+CHUNK_SIZE = 256 * 1024
+SKIPPED_ROUTES = ('admin/', '^media/')
+_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+class ClientDriver:
+    """ Sends requests through the Django test client: the app's own cost, no sockets. """
+
+    def __init__(self):
+        self.local = threading.local()
+
+    def send(self, method, path, body, headers):
+        client = getattr(self.local, 'client', None)
+        if client is None:
+            client = self.local.client = Client(raise_request_exception=False)
+        headers = dict(headers)
+        content_type = headers.pop('Content-Type', 'application/octet-stream')
+        response = client.generic(method, path, body, content_type, headers=headers)
+        content = b''.join(response.streaming_content) if response.streaming else response.content
+        response.close()
+        return response.status_code, response.headers, content
+
+
+class HttpDriver:
+    """ Sends requests over HTTP, one keep-alive connection per client thread. """
+
+    def __init__(self, base_url):
+        parts = urlsplit(base_url)
+        self.host, self.port = parts.hostname, parts.port
+        self.local = threading.local()
+
+    def send(self, method, path, body, headers):
+        for attempt in (1, 2):
+            connection = getattr(self.local, 'connection', None)
+            if connection is None:
+                connection = self.local.connection = http.client.HTTPConnection(self.host, self.port, timeout=120)
+            try:
+                connection.request(method, path, body, headers)
+                response = connection.getresponse()
+                return response.status, response.headers, response.read()
+            except (http.client.HTTPException, ConnectionError):
+                # The server closed the idle connection: reconnect once
+                connection.close()
+                self.local.connection = None
+                if attempt == 2:
+                    raise
+
+
+class Recorder:
+    """ Latencies, query counts and statuses per (method, route) for one scenario. """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.queries = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.errors = Counter()
+        self.error_samples = []
+
+    def record(self, method, route, status, seconds, queries, expected, content):
+        key = f'{method} {route}'
+        with self.lock:
+            self.latencies[key].append(seconds)
+            if queries is not None:
+                self.queries[key].append(queries)
+            self.statuses[key][status] += 1
+            if not expected:
+                self.errors[key] += 1
+                if len(self.error_samples) < 10:
+                    self.error_samples.append({
+                        'request': key, 'status': status, 'body': content[:300].decode(errors='replace'),
+                    })
+
+    def requests(self):
+        return sum(map(len, self.latencies.values()))
+
+    def summary(self):
+        routes = {}
+        for key in sorted(self.latencies):
+            queries = self.queries[key]
+            routes[key] = {
+                **common.latency_summary(self.latencies[key]),
+                'mean_queries': round(sum(queries) / len(queries), 2) if queries else None,
+                'max_queries': max(queries, default=None),
+                'statuses': {str(status): count for status, count in sorted(self.statuses[key].items())},
+                'errors': self.errors[key],
+            }
+        return routes
+
+
+def route_of(path):
+    try:
+        return resolve(urlsplit(path).path).route
+    except Resolver404:
+        return '<unmatched>'
+
+
+def local_path(url):
+    """ The path and query of a pagination link, which the API renders absolute. """
+    parts = urlsplit(url)
+    return f'{parts.path}?{parts.query}' if parts.query else parts.path
+
+
+class Session:
+    """ One simulated client: builds requests, sends them through the driver and records them. """
+
+    def __init__(self, driver, recorder, dataset, tokens, rng, name):
+        self.driver, self.recorder, self.dataset, self.tokens = driver, recorder, dataset, tokens
+        self.rng, self.name = rng, name
+        self.sequence = self.sent = 0
+
+    def unique(self, prefix):
+        self.sequence += 1
+        return f'{prefix}-{self.name}-{self.sequence}'
+
+    def user(self, role):
+        return self.rng.choice(self.dataset.users[role])
+
+    def call(self, method, path, expect=(200,), user=None, token=None, json_body=None, form=None, body=b'',
+             headers=None):
+        """ Sends one request; returns its status and decoded JSON body (None if it isn't JSON). """
+        headers = dict(headers or {})
+        if user is not None:
+            token = self.tokens[user.pk]
+        if token is not None:
+            headers['Authorization'] = f'Bearer {token}'
+        if json_body is not None:
+            body, headers['Content-Type'] = json.dumps(json_body).encode(), 'application/json'
+        elif form is not None:
+            body, headers['Content-Type'] = encode_multipart(BOUNDARY, form), MULTIPART_CONTENT
+
+        started = time.perf_counter()
+        status, response_headers, content = self.driver.send(method, path, body, headers)
+        elapsed = time.perf_counter() - started
+        self.sent += 1
+
+        match = _QUERIES.search(response_headers.get('Server-Timing', ''))
+        self.recorder.record(method, route_of(path), status, elapsed, int(match.group(1)) if match else None,
+                             status in expect, content)
+        if (response_headers.get('Content-Type') or '').startswith('application/json'):
+            return status, json.loads(content or b'null')
+        return status, None
+
+
+# Browse: anonymous catalog traffic
+
+def catalog_page(session):
+    rng, dataset = session.rng, session.dataset
+    low = rng.randint(1, 400)
+    params = rng.choice([
+        {},
+        {'category': rng.choice(dataset.categories)},
+        {'min_price': low, 'max_price': low + rng.randint(5, 100)},
+        {'category': rng.choice(dataset.categories), 'min_price': low, 'max_price': low + 100},
+        {'verified': 'true'},
+        {'search': rng.choice(dataset.words)},
+        {'search': rng.choice(dataset.words)[:4], 'category': rng.choice(dataset.categories)},
+        {'page': rng.randint(2, 50)},
+    ])
+    session.call('GET', '/api/products/' + (f'?{urlencode(params)}' if params else ''), expect=(200, 404))
+
+
+def catalog_cursor_walk(session):
+    status, page = session.call('GET', '/api/products/?pagination=cursor')
+    for _ in range(session.rng.randint(1, 5)):
+        if status != 200 or not page.get('next'):
+            break
+        status, page = session.call('GET', local_path(page['next']))
+
+
+def product_detail(session):
+    session.call('GET', f'/api/products/{session.rng.choice(session.dataset.products)}/')
+
+
+def categories(session):
+    session.call('GET', '/api/categories/')
+
+
+def sign_in(session):
+    user = session.user(session.rng.choice(['Customer', 'Customer', 'Distributor', 'Authority']))
+    status, tokens = session.call('POST', '/api/accounts/login/',
+                                  json_body={'email': user.email, 'password': datasets.PASSWORD})
+    if status != 200:
+        return
+    session.call('GET', '/api/accounts/profile/', token=tokens['access'])
+    if session.rng.random() < 0.5:
+        session.call('POST', '/api/accounts/login/refresh/', json_body={'refresh': tokens['refresh']})
+
+
+def register(session):
+    session.call('POST', '/api/accounts/register/', expect=(201,), json_body={
+        'email': session.unique('visitor') + '@bench.local', 'password': datasets.PASSWORD, 'role': 'Customer',
+    })
+
+
+def contact(session):
+    session.call('POST', '/api/contact/', expect=(201,), json_body={
+        'name': "Bench Visitor", 'email': session.unique('contact') + '@bench.local',
+        'department': session.rng.choice(['Pharma', 'Surgical', 'Imports', 'Other']),
+        'message': "Do you ship bulk orders to clinics?",
+    })
+
+
+def operations(session):
+    session.call('GET', '/api/products/cache-metrics/', user=session.user('Admin'))
+    session.call('GET', '/metrics', headers={'Authorization': f'Bearer {METRICS_TOKEN}'})
+
+
+# Checkout: customers buying
+
+def order_lines(session, count):
+    products = session.rng.sample(session.dataset.products, count)
+    return [{'product': product, 'quantity': session.rng.randint(1, 3)} for product in products]
+
+
+def place_order(session):
+    session.call('POST', '/api/orders/', expect=(201,), user=session.user('Customer'),
+                 json_body={'items': order_lines(session, session.rng.randint(1, 3))})
+
+
+def reserve_and_checkout(session):
+    customer = session.user('Customer')
+    lines = order_lines(session, session.rng.randint(1, 2))
+    for line in lines:
+        status, reservation = session.call('POST', '/api/products/reservations/', expect=(201,), user=customer,
+                                           json_body=line)
+        if status == 201:
+            line['reservation'] = reservation['id']
+            session.call('GET', f'/api/products/reservations/{reservation["id"]}/', user=customer)
+    session.call('POST', '/api/orders/', expect=(201,), user=customer, json_body={'items': lines})
+
+
+def abandon_cart(session):
+    customer = session.user('Customer')
+    status, reservation = session.call('POST', '/api/products/reservations/', expect=(201,), user=customer,
+                                       json_body=order_lines(session, 1)[0])
+    if status == 201:
+        session.call('DELETE', f'/api/products/reservations/{reservation["id"]}/', expect=(204,), user=customer)
+
+
+def order_history(session):
+    orders = session.dataset.orders
+    customer = session.rng.choice([user for user in session.dataset.users['Customer'] if user.pk in orders])
+    query = session.rng.choice(['', '?pagination=cursor', '?page=2'])
+    session.call('GET', f'/api/orders/{query}', expect=(200, 404), user=customer)
+    session.call('GET', f'/api/orders/{session.rng.choice(orders[customer.pk])}/', user=customer)
+
+
+# Review: documents in, decisions out, catalog upkeep
+
+def document(session, size):
+    return SimpleUploadedFile(session.unique('dossier') + '.pdf', b'%PDF-1.4\n' + session.rng.randbytes(size))
+
+
+def upload(session):
+    distributor = session.user('Distributor')
+    status, created = session.call('POST', '/api/compliance/upload/', expect=(201,), user=distributor, form={
+        'product': session.rng.choice(session.dataset.products),
+        'document_file': document(session, session.rng.randint(8, 256) * 1024),
+    })
+    return created['id'] if status == 201 else None
+
+
+def resumable_upload(session):
+    distributor = session.user('Distributor')
+    content = document(session, session.rng.randint(CHUNK_SIZE, 3 * CHUNK_SIZE)).read()
+    started = {
+        'product': session.rng.choice(session.dataset.products), 'file_name': session.unique('scan') + '.pdf',
+        'file_size': len(content), 'chunk_size': CHUNK_SIZE,
+    }
+    status, upload_session = session.call('POST', '/api/compliance/uploads/', expect=(201,), user=distributor,
+                                          json_body=started)
+    if status != 201:
+        return
+    path = f'/api/compliance/uploads/{upload_session["id"]}/'
+    for index in range(upload_session['chunk_count']):
+        chunk = content[index * CHUNK_SIZE:(index + 1) * CHUNK_SIZE]
+        session.call('PUT', f'{path}chunks/{index}/', user=distributor, body=chunk, headers={
+            'Content-Type': 'application/octet-stream', 'X-Chunk-SHA256': hashlib.sha256(chunk).hexdigest(),
+        })
+    session.call('GET', path, user=distributor)
+    session.call('POST', f'{path}finalize/', expect=(201,), user=distributor)
+
+
+def remove_document(session):
+    # Only documents this client uploaded, so concurrent clients never race for one
+    document_id = upload(session)
+    if document_id is not None:
+        session.call('DELETE', f'/api/compliance/{document_id}/', expect=(204,), user=session.user('Admin'))
+
+
+def pending_queue(session):
+    authority = session.user('Authority')
+    status, page = session.call('GET', '/api/compliance/pending/?pagination=cursor', user=authority)
+    for _ in range(session.rng.randint(0, 3)):
+        if status != 200 or not page.get('next'):
+            break
+        status, page = session.call('GET', local_path(page['next']), user=authority)
+
+
+def claim_and_review(session):
+    authority = session.user('Authority')
+    status, claimed = session.call('POST', '/api/compliance/claim/', user=authority, json_body={'count': 5})
+    for document in (claimed if status == 200 else [])[:session.rng.randint(1, 3)]:
+        session.call('GET', f'/api/compliance/{document["id"]}/download/', user=authority)
+        session.call('PUT', f'/api/compliance/{document["id"]}/approve/', user=authority,
+                     json_body={'approval_status': session.rng.choice(['Approved', 'Approved', 'Rejected'])})
+    session.call('DELETE', '/api/compliance/claim/', user=authority)
+
+
+def bulk_review(session):
+    authority = session.user('Authority')
+    status, page = session.call('GET', '/api/compliance/pending/?pagination=cursor', user=authority)
+    ids = [document['id'] for document in page['results']] if status == 200 else []
+    if ids:
+        session.call('POST', '/api/compliance/review/', user=authority, json_body={
+            'decision': session.rng.choice(['Approved', 'Rejected']), 'ids': session.rng.sample(ids, min(len(ids), 5)),
+        })
+
+
+def download(session):
+    headers = {'Range': 'bytes=0-4095'} if session.rng.random() < 0.3 else None
+    session.call('GET', f'/api/compliance/{session.rng.choice(session.dataset.documents)}/download/',
+                 expect=(200, 206), user=session.user('Authority'), headers=headers)
+
+
+def catalog_upkeep(session):
+    admin = session.user('Admin')
+    status, product = session.call('POST', '/api/products/', expect=(201,), user=admin, json_body={
+        'name': session.unique('New product'), 'description': "Added by the benchmark",
+        'category': session.rng.choice(session.dataset.categories), 'price': '12.50', 'stock': 100,
+    })
+    if status != 201:
+        return
+    path = f'/api/products/{product["id"]}/'
+    session.call('PATCH', path, user=admin, json_body={'price': '11.00'})
+    session.call('PUT', path, user=admin, json_body={**product, 'price': '10.00', 'stock': 90})
+    session.call('DELETE', path, expect=(204,), user=admin)
+
+
+def catalog_import(session):
+    rows = ['sku,name,category,description,price,stock']
+    for sku in session.rng.sample(session.dataset.skus, min(50, len(session.dataset.skus))):
+        rows.append(f'{sku},Imported {sku},{session.rng.choice(session.dataset.categories)},Re-imported,'
+                    f'{session.rng.randint(100, 9999) / 100},1000000')
+    session.call('POST', '/api/products/import/', user=session.user('Admin'),
+                 form={'file': SimpleUploadedFile('products.csv', '\n'.join(rows).encode())})
+
+
+def catalog_export(session):
+    session.call('GET', f'/api/products/export/?output={session.rng.choice(["csv", "jsonl"])}',
+                 user=session.user('Admin'))
+
+
+def sales_dashboard(session):
+    # Seeded orders end at seeding.UNTIL
+    end = seeding.UNTIL.date() - timedelta(days=session.rng.randint(1, 180))
+    span = session.rng.choice([1, 7, 30, 90, 365])
+    query = urlencode({'start': end - timedelta(days=span - 1), 'end': end,
+                       'granularity': 'hour' if span <= 7 else 'day'})
+    session.call('GET', f'/api/analytics/?{query}', user=session.user('Admin'))
+
+
+SCENARIOS = {
+    'browse': [
+        (30, catalog_page), (10, catalog_cursor_walk), (30, product_detail), (8, categories),
+        (8, sign_in), (4, register), (4, contact), (1, operations),
+    ],
+    'checkout': [
+        (35, place_order), (15, reserve_and_checkout), (10, abandon_cart), (30, order_history), (10, product_detail),
+    ],
+    'review': [
+        (20, pending_queue), (20, claim_and_review), (8, bulk_review), (15, download), (12, upload),
+        (5, resumable_upload), (5, remove_document), (8, catalog_upkeep), (4, catalog_import), (3, catalog_export),
+        (3, sales_dashboard),
+    ],
+}
+
+
+def run_scenario(name, driver, dataset, tokens, requests, concurrency, seed):
+    """ Runs the scenario's mix on `concurrency` clients until each sent its share of `requests`. """
+    recorder = Recorder()
+    weights = [weight for weight, _action in SCENARIOS[name]]
+    actions = [action for _weight, action in SCENARIOS[name]]
+    share = -(-requests // concurrency)
+    failures = []
+
+    def client(index):
+        session = Session(driver, recorder, dataset, tokens, random.Random(f'{seed}-{name}-{index}'), f'{name}{index}')
+        try:
+            while session.sent < share:
+                session.rng.choices(actions, weights)[0](session)
+        except Exception as exc:  # Raised once the other clients are done
+            failures.append(exc)
+
+    threads = [threading.Thread(target=client, args=(index,)) for index in range(concurrency)]
+    with common.stopwatch() as timing:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    if failures:
+        raise failures[0]
+    count = recorder.requests()
+    return {
+        'requests': count,
+        'elapsed_s': round(timing['elapsed'], 3),
+        'throughput_rps': round(count / timing['elapsed'], 1),
+        'errors': sum(recorder.errors.values()),
+        'error_samples': recorder.error_samples,
+        'routes': recorder.summary(),
+    }
+
+
+def url_patterns(patterns=None, prefix=''):
+    """ (route, view) for every pattern of the URLconf outside SKIPPED_ROUTES. """
+    for pattern in get_resolver().url_patterns if patterns is None else patterns:
+        route = prefix + str(pattern.pattern)
+        if route.startswith(SKIPPED_ROUTES):
+            continue
+        if isinstance(pattern, URLPattern):
+            yield route, pattern.lookup_str
+        else:
+            yield from url_patterns(pattern.url_patterns, route)
+
+
+def coverage(results):
+    """ Routes no scenario requested, and patterns an earlier pattern hides. """
+    requested = {key.split(' ', 1)[1] for scenario in results.values() for key in scenario['routes']}
+    uncovered, shadowed = [], []
+    for route, view in url_patterns():
+        sample = re.sub(r'<uuid:\w+>', str(uuid.UUID(int=0)), re.sub(r'<(int:)?\w+>', '1', route))
+        match = resolve('/' + sample)
+        if match._func_path != view:
+            shadowed.append({'route': route, 'view': view, 'served_by': match._func_path})
+        elif route not in requested:
+            uncovered.append(route)
+    return {'uncovered': uncovered, 'shadowed': shadowed}
+
+
+def change(new, old):
+    return round((new / old - 1) * 100, 1) if old else None
+
+
+def compare(results, baseline):
+    """ Percent changes against a previous run's output, for the scenarios and routes both have. """
+    comparison = {}
+    for name, scenario in results.items():
+        before = baseline.get('scenarios', {}).get(name)
+        if before is None:
+            continue
+        routes = {
+            key: {
+                'p50_change_pct': change(route['p50_ms'], before['routes'][key]['p50_ms']),
+                'p95_change_pct': change(route['p95_ms'], before['routes'][key]['p95_ms']),
+            }
+            for key, route in scenario['routes'].items() if key in before['routes']
+        }
+        comparison[name] = {
+            'baseline_commit': baseline.get('commit'),
+            'throughput_change_pct': change(scenario['throughput_rps'], before['throughput_rps']),
+            'routes': routes,
+        }
+    return comparison
+
+
+def git(*args):
+    try:
+        return subprocess.run(['git', *args], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--scale', type=float, default=1.0, help="dataset size relative to benchmarks.dataset.SIZES")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--requests', type=int, default=2000, help="requests per scenario")
+    parser.add_argument('--scenarios', nargs='+', choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument('--live', action='store_true', help="over HTTP to a live server thread")
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--output', help="also write the report to this file")
+    parser.add_argument('--baseline', help="a previous --output to compare with")
+    args = parser.parse_args()
+
+    media_root = tempfile.mkdtemp(prefix='bench-media-')
+    unlimited = {'login_ip': None, 'login_account': None, 'register_ip': None}
+    try:
+        with common.scratch_database() as db, \
+                override_settings(MEDIA_ROOT=media_root, INSTRUMENTATION_SAMPLE_RATE=1,
+                                  INSTRUMENTATION_SERVER_TIMING=True, METRICS_TOKEN=METRICS_TOKEN), \
+                mock.patch.object(SimpleRateThrottle, 'THROTTLE_RATES', unlimited), \
+                mock.patch.object(AccessToken, 'lifetime', timedelta(days=1)):
+            with common.stopwatch() as seeding:
+                dataset = datasets.seed(args.scale, args.seed)
+            tokens = {
+                user.pk: str(CustomTokenObtainPairSerializer.get_token(user).access_token)
+                for users in dataset.users.values() for user in users
+            }
+            with common.live_server() if args.live else nullcontext() as base_url:
+                driver = HttpDriver(base_url) if args.live else ClientDriver()
+                results = {}
+                for name in args.scenarios:
+                    get_cache().clear()
+                    results[name] = run_scenario(name, driver, dataset, tokens, args.requests, args.concurrency,
+                                                 args.seed)
+
+            report = {
+                'commit': git('rev-parse', 'HEAD'),
+                'dirty': bool(git('status', '--porcelain', '--untracked-files=no')),
+                'config': {
+                    'database': db.vendor, 'driver': 'live' if args.live else 'in_process',
+                    'concurrency': args.concurrency, 'requests': args.requests, 'scale': args.scale, 'seed': args.seed,
+                    'python': platform.python_version(), 'django': django.get_version(),
+                },
+                'dataset': {**dataset.counts(), 'seed_s': round(seeding['elapsed'], 2)},
+                'scenarios': results,
+                'coverage': coverage(results) if set(args.scenarios) == set(SCENARIOS) else None,
+            }
+            if args.baseline:
+                with open(args.baseline) as handle:
+                    report['comparison'] = compare(results, json.load(handle))
+    finally:
+        shutil.rmtree(media_root, ignore_errors=True)
+
+    common.report('suite', report)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump({'benchmark': 'suite', **report}, handle, indent=2, default=str)
+
+
+if __name__ == '__main__':
+    main()
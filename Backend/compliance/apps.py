@@ -3,3 +3,11 @@ from django.apps import AppConfig
 
 class ComplianceConfig(AppConfig):
     name = 'compliance'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+        from .counters import count_on_delete, count_on_save
+        from .models import Compliance
+
+        post_save.connect(count_on_save, sender=Compliance)
+        post_delete.connect(count_on_delete, sender=Compliance)
@@ -0,0 +1,153 @@
+"""
+Per-product compliance counters.
+
+Every product keeps how many of its documents are pending, approved and rejected,
+and when one was last approved. Document writes adjust them by deltas in the same
+transaction (one UPDATE however many products are involved), and the product's
+`compliance_status` / `authority_verified` are derived from the counters, so
+"verified products only" is an indexed column lookup instead of a subquery over
+compliance_docs.
+
+Writes that bypass model signals (`QuerySet.update`, `bulk_create`) must call
+`apply_deltas` themselves; `reconcile` recomputes everything from the documents with
+one grouped query and repairs any drift.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import BooleanField, Case, Count, ExpressionWrapper, F, Max, Q, Value, When
+from django.db.models.functions import Greatest
+
+from products.cache import bump_generation
+from products.models import Product
+from .models import Compliance
+
+COUNTERS = {
+    'Pending': 'compliance_pending',
+    'Approved': 'compliance_approved',
+    'Rejected': 'compliance_rejected',
+}
+BATCH_SIZE = 1000
+
+
+def derived_flags():
+    """ UPDATE expressions that derive the status flags from the counters. """
+    return {
+        'authority_verified': ExpressionWrapper(Q(compliance_approved__gt=0), output_field=BooleanField()),
+        'compliance_status': Case(
+            When(compliance_approved__gt=0, then=Value('Approved')),
+            When(compliance_pending__gt=0, then=Value('Pending')),
+            When(compliance_rejected__gt=0, then=Value('Rejected')),
+            default=Value('Pending'),
+        ),
+        'compliance_approved_at': Case(
+            When(compliance_approved=0, then=Value(None)), default=F('compliance_approved_at'),
+        ),
+    }
+
+
+def document_deltas(deltas, before=None, after=None):
+    """
+    Adds the counter changes for one document moving from `before` to `after`, each a
+    (product_id, approval_status) pair or None, to `deltas` ({product_id: {status: n}}).
+    """
+    if before == after:
+        return deltas
+    if before is not None:
+        deltas[before[0]][before[1]] -= 1
+    if after is not None:
+        deltas[after[0]][after[1]] += 1
+    return deltas
+
+
+def new_deltas():
+    return defaultdict(lambda: defaultdict(int))
+
+
+def apply_deltas(deltas, approved_at=None):
+    """
+    Applies {product_id: {status: delta}} to the counters, then re-derives the flags
+    of those products. `approved_at` is the time of any approvals among the deltas.
+    """
+    deltas = {pk: changes for pk, changes in deltas.items() if any(changes.values())}
+    if not deltas:
+        return
+    updates = {}
+    for status, field in COUNTERS.items():
+        whens = [When(pk=pk, then=Value(changes[status])) for pk, changes in deltas.items() if changes.get(status)]
+        if whens:
+            # Clamped: a write that bypassed the counters must not make the next one fail
+            updates[field] = Greatest(F(field) + Case(*whens, default=Value(0)), Value(0))
+    approvals = [pk for pk, changes in deltas.items() if changes.get('Approved', 0) > 0]
+    if approved_at is not None and approvals:
+        updates['compliance_approved_at'] = Case(
+            When(Q(pk__in=approvals) & (Q(compliance_approved_at__isnull=True) | Q(compliance_approved_at__lt=approved_at)),
+                 then=Value(approved_at)),
+            default=F('compliance_approved_at'),
+        )
+    with transaction.atomic():
+        products = Product.objects.filter(pk__in=deltas)
+        products.update(**updates)
+        # A second statement: SET expressions all see the row as it was before the UPDATE
+        products.update(**derived_flags())
+    # Catalog pages show these fields; the UPDATE bypasses model signals
+    bump_generation(Product)
+
+
+def reconcile(batch_size=BATCH_SIZE, product_model=Product, compliance_model=Compliance):
+    """
+    Recomputes every product's counters from its documents with one grouped query and
+    writes back the ones that drifted. Returns the number of products corrected.
+    """
+    totals = compliance_model.objects.order_by().values('product').annotate(
+        pending=Count('id', filter=Q(approval_status='Pending')),
+        approved=Count('id', filter=Q(approval_status='Approved')),
+        rejected=Count('id', filter=Q(approval_status='Rejected')),
+        approved_at=Max('approved_at', filter=Q(approval_status='Approved')),
+    ).values_list('product', 'pending', 'approved', 'rejected', 'approved_at')
+    fields = [*COUNTERS.values(), 'compliance_approved_at']
+    corrected = 0
+
+    def flush(batch):
+        products = product_model.objects.filter(pk__in=batch).only('pk', *fields)
+        stale = []
+        for product in products:
+            values = batch[product.pk]
+            if tuple(getattr(product, field) for field in fields) != values:
+                for field, value in zip(fields, values):
+                    setattr(product, field, value)
+                stale.append(product)
+        product_model.objects.bulk_update(stale, fields)
+        return len(stale)
+
+    with transaction.atomic():
+        batch = {}
+        for product_id, *values in totals.iterator(chunk_size=batch_size):
+            batch[product_id] = tuple(values)
+            if len(batch) == batch_size:
+                corrected += flush(batch)
+                batch = {}
+        corrected += flush(batch)
+        corrected += product_model.objects.exclude(
+            pk__in=compliance_model.objects.values('product')
+        ).exclude(
+            compliance_pending=0, compliance_approved=0, compliance_rejected=0, compliance_approved_at=None
+        ).update(**{field: 0 for field in COUNTERS.values()}, compliance_approved_at=None)
+        product_model.objects.update(**derived_flags())
+    bump_generation(Product)
+    return corrected
+
+
+def count_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    after = (instance.product_id, instance.approval_status)
+    before = None if created else instance._counted
+    apply_deltas(document_deltas(new_deltas(), before, after),
+                 approved_at=instance.approved_at if instance.approval_status == 'Approved' else None)
+    instance._counted = after
+
+
+def count_on_delete(sender, instance, **kwargs):
+    counted = instance._counted or (instance.product_id, instance.approval_status)
+    apply_deltas(document_deltas(new_deltas(), counted))
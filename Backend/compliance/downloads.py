@@ -0,0 +1,125 @@
+"""
+Serving stored compliance documents.
+
+`serve_document` answers conditional (`If-None-Match`) and `Range` requests with a
+strong ETag derived from the document's content hash. By default Django streams
+the file with `FileResponse`; WSGI servers that provide `wsgi.file_wrapper`
+(gunicorn, uWSGI) then hand it to the kernel with `sendfile()`, including ranges.
+With COMPLIANCE_DOWNLOAD_OFFLOAD the front web server sends the file instead:
+
+* 'x-accel': nginx, via `X-Accel-Redirect: <COMPLIANCE_DOWNLOAD_ACCEL_PREFIX><name>`
+  (point an `internal` location at MEDIA_ROOT)
+* 'x-sendfile': Apache mod_xsendfile / lighttpd, via `X-Sendfile: <absolute path>`
+"""
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils.http import content_disposition_header
+
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class FileRange:
+    """
+    File-like view of `length` bytes of `file` starting at `start`. It keeps
+    `fileno()`, so a server's `wsgi.file_wrapper` can still `sendfile()` it: they send
+    Content-Length bytes from the file's current offset.
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file, self.remaining, self.name = file, length, file.name
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def tell(self):
+        return self.file.tell()
+
+    def seek(self, *args):
+        return self.file.seek(*args)
+
+    def close(self):
+        self.file.close()
+
+
+def etag_for(compliance):
+    return f'"{compliance.content_hash}"' if compliance.content_hash else None
+
+
+def parse_range(header, size):
+    """
+    Returns (start, end) inclusive for a single `bytes=` range, None to serve the
+    whole file (no header, or several ranges), or False if it can't be satisfied.
+    """
+    match = RANGE.match(header.replace(' ', '')) if header else None
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:  # suffix: the last N bytes
+        length = int(last)
+        return (max(size - length, 0), size - 1) if length and size else False
+    start, end = int(first), int(last) if last else size - 1
+    if start >= size or end < start:
+        return False
+    return start, min(end, size - 1)
+
+
+def offload_response(compliance, path, content_type):
+    mode = settings.COMPLIANCE_DOWNLOAD_OFFLOAD
+    response = HttpResponse(content_type=content_type)
+    if mode == 'x-accel':
+        response['X-Accel-Redirect'] = settings.COMPLIANCE_DOWNLOAD_ACCEL_PREFIX + compliance.document_file.name
+    else:
+        response['X-Sendfile'] = path
+    del response['Content-Length']
+    return response
+
+
+def serve_document(request, compliance):
+    path = compliance.document_file.path
+    name = os.path.basename(compliance.document_file.name)
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    etag = etag_for(compliance)
+
+    if etag and etag in [tag.strip() for tag in request.headers.get('If-None-Match', '').split(',')]:
+        response = HttpResponse(status=304)
+    elif settings.COMPLIANCE_DOWNLOAD_OFFLOAD:
+        # The web server handles Range itself
+        response = offload_response(compliance, path, content_type)
+    else:
+        size = os.path.getsize(path)
+        requested = parse_range(request.headers.get('Range'), size)
+        if_range = request.headers.get('If-Range')
+        if if_range and if_range != etag:
+            requested = None  # the client's copy is stale: send the whole file
+        if requested is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+        elif requested:
+            start, end = requested
+            response = FileResponse(FileRange(open(path, 'rb'), start, end - start + 1), status=206,
+                                    content_type=content_type)
+            response['Content-Length'] = str(end - start + 1)
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        else:
+            response = FileResponse(open(path, 'rb'), content_type=content_type)
+
+    response['Content-Disposition'] = content_disposition_header(False, name)
+    response['Accept-Ranges'] = 'bytes'
+    response['Cache-Control'] = 'private, no-cache'
+    if etag:
+        response['ETag'] = etag
+    return response
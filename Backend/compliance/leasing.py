@@ -0,0 +1,54 @@
+"""
+Leasing rows to concurrent workers.
+
+`claim` hands each row of a queryset to at most one owner for a limited time.
+On databases with `SELECT ... FOR UPDATE SKIP LOCKED` (PostgreSQL, MySQL 8) workers
+skip rows another worker is claiming instead of queueing behind it. Elsewhere
+(SQLite) candidates are claimed with a conditional UPDATE that re-checks the
+queryset's conditions, so two workers can never both win the same row.
+"""
+from datetime import timedelta
+
+from django.db import connections, transaction
+from django.utils import timezone
+
+FALLBACK_ROUNDS = 3
+
+
+def claim(queryset, owner, limit=1, lease_seconds=300, owner_field='locked_by', until_field='locked_until', **updates):
+    """
+    Leases up to `limit` rows of `queryset` (which must only match claimable rows,
+    in claim order) to `owner` and applies `updates` to them. Returns the claimed pks.
+    """
+    updates.update({owner_field: owner, until_field: timezone.now() + timedelta(seconds=lease_seconds)})
+    model = queryset.model
+    connection = connections[queryset.db]
+
+    if connection.features.has_select_for_update_skip_locked:
+        # Only lock the claimed rows, not rows of tables joined for ordering
+        of = ('self',) if connection.features.has_select_for_update_of else ()
+        with transaction.atomic(using=queryset.db):
+            pks = list(queryset.select_for_update(skip_locked=True, of=of).values_list('pk', flat=True)[:limit])
+            if pks:
+                model._default_manager.using(queryset.db).filter(pk__in=pks).update(**updates)
+        return pks
+
+    pks = []
+    manager = model._default_manager.using(queryset.db)
+    for _ in range(FALLBACK_ROUNDS):
+        wanted = limit - len(pks)
+        candidates = list(queryset.values_list('pk', flat=True)[:wanted])
+        if not candidates:
+            break
+        # One UPDATE re-checks the queryset's conditions for every candidate; some may
+        # have been taken by another worker since the SELECT. Ours carry our lease.
+        won = queryset.filter(pk__in=candidates).update(**updates)
+        if won < len(candidates):
+            mine = set(manager.filter(
+                pk__in=candidates, **{owner_field: owner, until_field: updates[until_field]}
+            ).values_list('pk', flat=True))
+            candidates = [pk for pk in candidates if pk in mine]
+        pks += candidates
+        if won == wanted:
+            break
+    return pks
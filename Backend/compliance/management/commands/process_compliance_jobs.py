@@ -0,0 +1,50 @@
+import os
+import socket
+import threading
+import time
+from django.core.management.base import BaseCommand
+from django.db import connections
+from compliance.processing import claim_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = "Runs a pool of workers that post-process uploaded compliance documents from the job queue."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--poll-interval', type=float, default=2.0, help="Seconds to sleep when the queue is empty.")
+        parser.add_argument('--once', action='store_true', help="Exit once the queue is drained.")
+
+    def handle(self, *args, **options):
+        self.counts = {'done': 0, 'failed': 0}
+        self.lock = threading.Lock()
+        threads = [
+            threading.Thread(target=self.work, args=(f"{socket.gethostname()}:{os.getpid()}:{i}", options), daemon=True)
+            for i in range(options['workers'])
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                thread.join()
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {self.counts['done']} document(s), {self.counts['failed']} failed."
+        ))
+
+    def work(self, name, options):
+        try:
+            while True:
+                job_ids = claim_jobs(name)
+                if not job_ids:
+                    if options['once']:
+                        return
+                    time.sleep(options['poll_interval'])
+                    continue
+                for job_id in job_ids:
+                    outcome = 'done' if run_job(job_id) else 'failed'
+                    with self.lock:
+                        self.counts[outcome] += 1
+        finally:
+            connections.close_all()
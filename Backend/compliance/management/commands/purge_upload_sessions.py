@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from compliance.resumable import purge_expired
+
+
+class Command(BaseCommand):
+    help = "Deletes resumable upload sessions that expired before being finalized, with their partial files."
+
+    def handle(self, *args, **options):
+        purged = purge_expired()
+        self.stdout.write(self.style.SUCCESS(f"Purged {purged} expired upload session(s)."))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from compliance.counters import BATCH_SIZE, reconcile
+
+
+class Command(BaseCommand):
+    help = "Recomputes every product's compliance counters and status flags from its documents."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        corrected = reconcile(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Corrected the counters of {corrected} product(s)."))
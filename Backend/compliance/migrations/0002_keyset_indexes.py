@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('compliance', '0001_initial'),
+        ('products', '0003_keyset_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='compliance',
+            index=models.Index(fields=['approval_status', 'created_at', 'id'], name='compliance_status_created_idx'),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:59
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def enqueue_existing_documents(apps, schema_editor):
+    Compliance = apps.get_model('compliance', 'Compliance')
+    ComplianceJob = apps.get_model('compliance', 'ComplianceJob')
+    ids = Compliance.objects.values_list('id', flat=True).iterator(chunk_size=2000)
+    batch = []
+    for compliance_id in ids:
+        batch.append(ComplianceJob(compliance_id=compliance_id))
+        if len(batch) == 2000:
+            ComplianceJob.objects.bulk_create(batch)
+            batch = []
+    ComplianceJob.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('compliance', '0002_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='compliance',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='compliance',
+            name='extracted_text',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='compliance',
+            name='file_size',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='compliance',
+            name='page_count',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='compliance',
+            name='processing_status',
+            field=models.CharField(choices=[('Queued', 'Queued'), ('Processing', 'Processing'), ('Done', 'Done'), ('Failed', 'Failed')], default='Queued', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='ComplianceJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('Queued', 'Queued'), ('Running', 'Running'), ('Done', 'Done'), ('Failed', 'Failed')], default='Queued', max_length=20)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now)),
+                ('locked_by', models.CharField(blank=True, max_length=100)),
+                ('locked_until', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('compliance', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='jobs', to='compliance.compliance')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'run_after', 'id'], name='compliancejob_claim_idx')],
+            },
+        ),
+        migrations.RunPython(enqueue_existing_documents, migrations.RunPython.noop),
+    ]
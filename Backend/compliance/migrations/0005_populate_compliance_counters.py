@@ -0,0 +1,20 @@
+from django.db import migrations
+
+
+def populate_counters(apps, schema_editor):
+    from compliance.counters import reconcile
+
+    reconcile(product_model=apps.get_model('products', 'Product'),
+              compliance_model=apps.get_model('compliance', 'Compliance'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('compliance', '0004_resumable_uploads'),
+        ('products', '0006_compliance_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('compliance', '0006_review_queue_leases'),
+        ('products', '0008_category_created_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='compliance',
+            index=models.Index(condition=models.Q(('approval_status', 'Pending')), fields=['created_at', 'id'], name='compliance_pending_created_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='compliance',
+            name='compliance_status_created_idx',
+        ),
+    ]
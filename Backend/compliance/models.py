@@ -1,5 +1,7 @@
+import uuid
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 from products.models import Product
 
 class Compliance(models.Model):
@@ -8,6 +10,12 @@ class Compliance(models.Model):
         ('Approved', 'Approved'),
         ('Rejected', 'Rejected'),
     )
+    PROCESSING_CHOICES = (
+        ('Queued', 'Queued'),
+        ('Processing', 'Processing'),
+        ('Done', 'Done'),
+        ('Failed', 'Failed'),
+    )
 
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='compliance_docs')
     document_file = models.FileField(upload_to='compliance_docs/')
@@ -17,5 +25,115 @@ class Compliance(models.Model):
     approved_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Filled while streaming the upload; identical files share one stored copy
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)
+    file_size = models.PositiveBigIntegerField(null=True, blank=True)
+    # Filled in the background by `process_compliance_jobs`
+    processing_status = models.CharField(max_length=20, choices=PROCESSING_CHOICES, default='Queued')
+    page_count = models.PositiveIntegerField(null=True, blank=True)
+    extracted_text = models.TextField(blank=True)
+    # Review queue lease (see compliance.queue): who is reviewing the document, until when
+    claimed_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='claimed_docs')
+    claimed_until = models.DateTimeField(null=True, blank=True)
+
+    _counted = None
+
+    class Meta:
+        indexes = [
+            # The review queue only ever reads pending documents, a shrinking share of the table
+            models.Index(
+                fields=['created_at', 'id'], condition=models.Q(approval_status='Pending'),
+                name='compliance_pending_created_idx',
+            ),
+        ]
+
     def __str__(self):
         return f"Document for {self.product.name} ({self.approval_status})"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # What the document counted towards when loaded, see compliance.counters
+        loaded = instance.__dict__
+        if 'product_id' in loaded and 'approval_status' in loaded:
+            instance._counted = (loaded['product_id'], loaded['approval_status'])
+        return instance
+
+
+class ComplianceJob(models.Model):
+    """
+    A unit of background work on a compliance document, stored in the database so
+    queued work survives restarts. Workers lease jobs (see compliance.leasing); a
+    lease that runs out without the job finishing makes it claimable again.
+    """
+    STATUS_CHOICES = (
+        ('Queued', 'Queued'),
+        ('Running', 'Running'),
+        ('Done', 'Done'),
+        ('Failed', 'Failed'),
+    )
+
+    compliance = models.ForeignKey(Compliance, on_delete=models.CASCADE, related_name='jobs')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Queued')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_after', 'id'], name='compliancejob_claim_idx'),
+        ]
+
+    def __str__(self):
+        return f"Job #{self.id} for document {self.compliance_id} ({self.status})"
+
+
+class UploadSession(models.Model):
+    """
+    A resumable upload: chunks are written straight into a preallocated part file
+    (in any order, possibly in parallel) and the `Compliance` record is only created
+    when the session is finalized.
+    """
+    STATUS_CHOICES = (
+        ('Open', 'Open'),
+        ('Complete', 'Complete'),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='upload_sessions')
+    uploaded_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='upload_sessions')
+    file_name = models.CharField(max_length=255)
+    file_size = models.PositiveBigIntegerField()
+    chunk_size = models.PositiveIntegerField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Open')
+    compliance = models.OneToOneField(Compliance, on_delete=models.SET_NULL, null=True, blank=True, related_name='upload_session')
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    @property
+    def chunk_count(self):
+        return max(1, -(-self.file_size // self.chunk_size))
+
+    def chunk_length(self, index):
+        return min(self.chunk_size, self.file_size - index * self.chunk_size)
+
+    def __str__(self):
+        return f"Upload {self.id} of {self.file_name} ({self.status})"
+
+
+class UploadChunk(models.Model):
+    session = models.ForeignKey(UploadSession, on_delete=models.CASCADE, related_name='chunks')
+    index = models.PositiveIntegerField()
+    sha256 = models.CharField(max_length=64)
+    received_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['session', 'index'], name='uploadchunk_session_index_uniq'),
+        ]
+
+    def __str__(self):
+        return f"Chunk {self.index} of upload {self.session_id}"
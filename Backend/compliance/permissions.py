@@ -13,3 +13,13 @@ class IsAdminUser(permissions.BasePermission):
     """
     def has_permission(self, request, view):
         return bool(request.user and request.user.is_authenticated and request.user.role == 'Admin')
+
+class CanDownloadDocument(permissions.BasePermission):
+    """
+    Allows reading a document to Authority reviewers, Admins and its uploader.
+    """
+    def has_permission(self, request, view):
+        return bool(request.user and request.user.is_authenticated)
+
+    def has_object_permission(self, request, view, obj):
+        return request.user.role in ('Authority', 'Admin') or obj.uploaded_by_id == request.user.id
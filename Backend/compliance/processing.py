@@ -0,0 +1,158 @@
+"""
+Background post-processing of uploaded compliance documents.
+
+Uploads only store the file and enqueue a `ComplianceJob`; `process_compliance_jobs`
+workers then fill in the page count and the extracted text. PDF text extraction uses `pypdf` when it is installed; without it the
+page count is estimated from the PDF's page objects and no text is extracted.
+Results are written to every document sharing the same content hash.
+"""
+import hashlib
+import re
+import traceback
+from datetime import timedelta
+
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .leasing import claim
+from .models import Compliance, ComplianceJob
+
+try:
+    import pypdf
+except ImportError:  # optional dependency
+    pypdf = None
+
+MAX_ATTEMPTS = 3
+LEASE_SECONDS = 300
+MAX_TEXT_LENGTH = 200000
+CHUNK_SIZE = 2**20
+PAGE_OBJECT = re.compile(rb'/Type\s*/Page(?![a-zA-Z])')
+
+
+def enqueue(compliance):
+    return ComplianceJob.objects.create(compliance=compliance)
+
+
+def duplicate_of(content_hash):
+    """ The stored document a new upload with this content can share, if any. """
+    if not content_hash:
+        return None
+    return Compliance.objects.filter(content_hash=content_hash).exclude(
+        processing_status='Failed'
+    ).order_by('id').first()
+
+
+def shared_fields(original):
+    """
+    Fields pointing a new document at `original`'s stored file. If that one is still
+    being processed, the worker fills in every document with the hash when it finishes.
+    """
+    return {
+        'document_file': original.document_file.name,
+        'processing_status': original.processing_status,
+        'page_count': original.page_count,
+        'extracted_text': original.extracted_text,
+    }
+
+
+def file_digest(field_file):
+    hasher, size = hashlib.sha256(), 0
+    with field_file.open('rb') as stream:
+        for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+            hasher.update(chunk)
+            size += len(chunk)
+    return hasher.hexdigest(), size
+
+
+def count_pdf_pages(field_file):
+    count, tail = 0, b''
+    with field_file.open('rb') as stream:
+        for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+            data = tail + chunk
+            matches = list(PAGE_OBJECT.finditer(data))
+            # Keep the unmatched end of the chunk: a marker may straddle two chunks
+            cut = max(matches[-1].end() if matches else 0, len(data) - 32)
+            count += len(matches)
+            tail = data[cut:]
+    return count
+
+
+def extract(field_file):
+    """ Returns (page count, text) for a stored document. """
+    name = field_file.name.lower()
+    if name.endswith('.pdf'):
+        if pypdf is None:
+            return count_pdf_pages(field_file), ''
+        with field_file.open('rb') as stream:
+            reader = pypdf.PdfReader(stream)
+            parts, length = [], 0
+            for page in reader.pages:
+                if length >= MAX_TEXT_LENGTH:
+                    break
+                text = page.extract_text() or ''
+                parts.append(text)
+                length += len(text)
+            return len(reader.pages), '\n'.join(parts)[:MAX_TEXT_LENGTH]
+    if name.endswith('.txt'):
+        with field_file.open('rb') as stream:
+            return 1, stream.read(MAX_TEXT_LENGTH).decode('utf-8', errors='replace')
+    return None, ''
+
+
+def process_document(compliance):
+    if not compliance.content_hash:
+        compliance.content_hash, compliance.file_size = file_digest(compliance.document_file)
+        Compliance.objects.filter(pk=compliance.pk).update(
+            content_hash=compliance.content_hash, file_size=compliance.file_size
+        )
+    page_count, text = extract(compliance.document_file)
+    Compliance.objects.filter(content_hash=compliance.content_hash).update(
+        processing_status='Done', page_count=page_count, extracted_text=text
+    )
+
+
+def sharing_status(compliance):
+    """
+    The document and the unprocessed duplicates created with its status (see
+    `shared_fields`), which only its job moves along.
+    """
+    sharing = Q(pk=compliance.pk)
+    if compliance.content_hash:
+        sharing |= Q(content_hash=compliance.content_hash) & ~Q(processing_status='Done')
+    return Compliance.objects.filter(sharing)
+
+
+def run_job(job_id):
+    job = ComplianceJob.objects.select_related('compliance').get(pk=job_id)
+    sharing_status(job.compliance).update(processing_status='Processing')
+    try:
+        process_document(job.compliance)
+    except Exception:
+        failed = job.attempts >= MAX_ATTEMPTS
+        ComplianceJob.objects.filter(pk=job.pk).update(
+            status='Failed' if failed else 'Queued',
+            # Back off before retrying: 1, 4, 9 ... minutes
+            run_after=timezone.now() + timedelta(minutes=job.attempts ** 2),
+            locked_by='',
+            locked_until=None,
+            last_error=traceback.format_exc()[-5000:],
+        )
+        sharing_status(job.compliance).update(processing_status='Failed' if failed else 'Queued')
+        return False
+    ComplianceJob.objects.filter(pk=job.pk).update(status='Done', locked_by='', locked_until=None, last_error='')
+    return True
+
+
+def claimable_jobs():
+    """
+    Queued jobs that are due, plus running jobs whose worker's lease ran out (it
+    crashed). A job that keeps killing its worker is given up after MAX_ATTEMPTS.
+    """
+    now = timezone.now()
+    return ComplianceJob.objects.filter(
+        status__in=['Queued', 'Running'], run_after__lte=now, attempts__lt=MAX_ATTEMPTS
+    ).exclude(status='Running', locked_until__gt=now).order_by('run_after', 'id')
+
+
+def claim_jobs(worker, limit=1):
+    return claim(claimable_jobs(), worker, limit, LEASE_SECONDS, status='Running', attempts=F('attempts') + 1)
@@ -0,0 +1,51 @@
+"""
+The compliance review queue.
+
+Authority reviewers claim pending documents in priority order: the value of the
+stock waiting on them (product price x stock) first, oldest first within that. A
+claim leases the documents to the reviewer for COMPLIANCE_REVIEW_LEASE seconds (see
+compliance.leasing), so concurrent reviewers get disjoint documents; other reviewers
+can't review a leased document until the lease runs out. Reviewing a document ends
+its lease.
+"""
+from django.conf import settings
+from django.db.models import DecimalField, ExpressionWrapper, F, Q
+from django.utils import timezone
+
+from .leasing import claim
+from .models import Compliance
+
+MAX_CLAIM = 100
+
+PRIORITY = ExpressionWrapper(F('product__price') * F('product__stock'), output_field=DecimalField())
+
+
+def unleased(reviewer=None, now=None):
+    """ Condition for documents nobody holds a lease on (or `reviewer` holds it). """
+    now = now or timezone.now()
+    condition = Q(claimed_until__isnull=True) | Q(claimed_until__lte=now)
+    if reviewer is not None:
+        condition |= Q(claimed_by=reviewer)
+    return condition
+
+
+def claimable():
+    return Compliance.objects.filter(unleased(), approval_status='Pending').order_by(
+        PRIORITY.desc(), 'created_at', 'id'
+    )
+
+
+def claim_next(reviewer, count, lease_seconds=None):
+    """ Leases the next `count` documents of the queue to `reviewer`; returns their ids in queue order. """
+    return claim(
+        claimable(), reviewer, limit=min(count, MAX_CLAIM),
+        lease_seconds=lease_seconds or settings.COMPLIANCE_REVIEW_LEASE,
+        owner_field='claimed_by', until_field='claimed_until',
+    )
+
+
+def release(reviewer):
+    """ Gives up every lease `reviewer` holds on pending documents. Returns how many. """
+    return Compliance.objects.filter(claimed_by=reviewer, claimed_until__isnull=False, approval_status='Pending').update(
+        claimed_by=None, claimed_until=None
+    )
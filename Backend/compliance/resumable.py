@@ -0,0 +1,201 @@
+"""
+Resumable, chunked uploads of compliance documents.
+
+    POST /api/compliance/uploads/                      -> session (id, chunk_size, chunk_count)
+    PUT  /api/compliance/uploads/<id>/chunks/<index>/   raw bytes, X-Chunk-SHA256 header
+    GET  /api/compliance/uploads/<id>/                  -> which chunks the server already has
+    POST /api/compliance/uploads/<id>/finalize/         -> the created Compliance record
+                                                           (optional "sha256" of the whole file)
+
+Each chunk is staged and verified, then copied into the session's preallocated part
+file at its own offset (`os.pwrite`) under the session's row lock, so chunks can
+arrive in any order and in parallel, and a dropped connection only costs the chunk
+in flight. Finalizing hashes the assembled file and atomically renames it into
+`compliance_docs/`; only then is the document created. Expired sessions take no
+more chunks and are removed by `purge_expired`.
+"""
+import hashlib
+import os
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from .models import Compliance, UploadChunk, UploadSession
+from .processing import duplicate_of, enqueue, shared_fields
+
+PARTS_DIR = 'compliance_uploads'
+DOCS_DIR = 'compliance_docs'
+READ_SIZE = 2**20
+
+
+class ChunkError(Exception):
+    pass
+
+
+def part_path(session):
+    # Under MEDIA_ROOT so finalizing is a same-filesystem rename
+    return os.path.join(settings.MEDIA_ROOT, PARTS_DIR, f'{session.pk}.part')
+
+
+def create_session(user, product, file_name, file_size, chunk_size=None):
+    session = UploadSession.objects.create(
+        product=product,
+        uploaded_by=user,
+        file_name=os.path.basename(file_name),
+        file_size=file_size,
+        chunk_size=chunk_size or settings.COMPLIANCE_UPLOAD_CHUNK_SIZE,
+        expires_at=timezone.now() + timedelta(seconds=settings.COMPLIANCE_UPLOAD_SESSION_TTL),
+    )
+    path = part_path(session)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as part:
+        part.truncate(file_size)
+    return session
+
+
+def _pwrite(fd, data, offset):
+    if hasattr(os, 'pwrite'):
+        return os.pwrite(fd, data, offset)
+    os.lseek(fd, offset, os.SEEK_SET)  # Windows: this fd is private to the request
+    return os.write(fd, data)
+
+
+def _check_open(session):
+    if session.status != 'Open':
+        raise ChunkError("Upload is already finalized.")
+    if session.expires_at <= timezone.now():
+        raise ChunkError("Upload session has expired.")
+
+
+def _stage(session, index, stream, expected_sha256):
+    """ Reads chunk `index` into a temporary file, verifying its length and SHA-256. """
+    length = session.chunk_length(index)
+    hasher, received = hashlib.sha256(), 0
+    staged = tempfile.SpooledTemporaryFile(
+        max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE, dir=os.path.dirname(part_path(session)),
+    )
+    try:
+        while received < length:
+            data = stream.read(min(READ_SIZE, length - received))
+            if not data:
+                break
+            hasher.update(data)
+            staged.write(data)
+            received += len(data)
+        if received != length or stream.read(1):
+            raise ChunkError(f"Chunk {index} must be exactly {length} bytes.")
+        digest = hasher.hexdigest()
+        if digest != expected_sha256.lower():
+            raise ChunkError(f"Chunk {index} checksum mismatch, got {digest}.")
+    except BaseException:
+        staged.close()
+        raise
+    staged.seek(0)
+    return staged, digest
+
+
+def write_chunk(session, index, stream, expected_sha256):
+    """
+    Streams one chunk from `stream` into the part file at its offset. The chunk is
+    staged and its length and SHA-256 verified first, so a bad (re-)send never
+    touches the part file or the chunks already received. Re-sending a chunk
+    overwrites it.
+    """
+    _check_open(session)
+    if not 0 <= index < session.chunk_count:
+        raise ChunkError(f"Chunk index must be between 0 and {session.chunk_count - 1}.")
+    if not expected_sha256:
+        raise ChunkError("X-Chunk-SHA256 header is required.")
+
+    staged, digest = _stage(session, index, stream, expected_sha256)
+    with staged, transaction.atomic():
+        # Only the copy is serialized: finalize and purge_expired replace or remove the part file under this lock
+        session = UploadSession.objects.select_for_update().filter(pk=session.pk).first()
+        if session is None:
+            raise ChunkError("Upload session has expired.")
+        _check_open(session)
+        offset = index * session.chunk_size
+        fd = os.open(part_path(session), os.O_WRONLY | getattr(os, 'O_BINARY', 0))
+        try:
+            for data in iter(lambda: staged.read(READ_SIZE), b''):
+                _pwrite(fd, data, offset)
+                offset += len(data)
+        finally:
+            os.close(fd)
+        UploadChunk.objects.update_or_create(session=session, index=index, defaults={'sha256': digest})
+
+
+def received_chunks(session):
+    return sorted(session.chunks.values_list('index', flat=True))
+
+
+def finalize(session, expected_sha256=None):
+    """
+    Verifies every chunk arrived (and, when the client sends it, the SHA-256 of the
+    whole file), moves the file into `compliance_docs/` and creates the Compliance
+    record (reusing the stored copy of an identical document). Finalizing twice
+    returns the same document.
+    """
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().get(pk=session.pk)
+        if session.status == 'Complete':
+            return session.compliance
+        if session.expires_at <= timezone.now():
+            raise serializers.ValidationError({"detail": "Upload session has expired."})
+
+        missing = sorted(set(range(session.chunk_count)) - set(received_chunks(session)))
+        if missing:
+            raise serializers.ValidationError({"chunks": f"Missing chunks: {missing[:50]}"})
+
+        path = part_path(session)
+        hasher = hashlib.sha256()
+        with open(path, 'rb') as part:
+            for data in iter(lambda: part.read(READ_SIZE), b''):
+                hasher.update(data)
+        content_hash = hasher.hexdigest()
+        if expected_sha256 and content_hash != expected_sha256.lower():
+            raise serializers.ValidationError({"sha256": f"File checksum mismatch, got {content_hash}."})
+
+        fields = {
+            'product': session.product,
+            'uploaded_by': session.uploaded_by,
+            'content_hash': content_hash,
+            'file_size': session.file_size,
+        }
+        original = duplicate_of(content_hash)
+        if original is not None:
+            os.remove(path)
+            compliance = Compliance.objects.create(**fields, **shared_fields(original))
+        else:
+            name = default_storage.get_available_name(os.path.join(DOCS_DIR, session.file_name))
+            os.makedirs(os.path.dirname(default_storage.path(name)), exist_ok=True)
+            os.replace(path, default_storage.path(name))
+            compliance = Compliance.objects.create(**fields, document_file=name)
+            enqueue(compliance)
+
+        session.status = 'Complete'
+        session.compliance = compliance
+        session.save(update_fields=['status', 'compliance'])
+        session.chunks.all().delete()
+    return compliance
+
+
+def purge_expired(now=None):
+    """ Deletes open sessions past their expiry and their part files. """
+    with transaction.atomic():
+        # Locked, so that a chunk being written to one finishes first (and the next is refused)
+        expired = list(UploadSession.objects.select_for_update().filter(
+            status='Open', expires_at__lte=now or timezone.now(),
+        ))
+        for session in expired:
+            try:
+                os.remove(part_path(session))
+            except FileNotFoundError:
+                pass
+        UploadSession.objects.filter(pk__in=[session.pk for session in expired]).delete()
+    return len(expired)
@@ -0,0 +1,83 @@
+"""
+Approving and rejecting compliance documents, one at a time or in bulk.
+
+Every decision is stamped with a single UPDATE per batch of ids, guarded by
+`approval_status = 'Pending'` so a document reviewed concurrently by someone else
+is reported instead of overwritten, and the products' compliance counters are
+adjusted in the same transaction (see compliance.counters).
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .counters import apply_deltas, document_deltas, new_deltas
+from .models import Compliance
+from .queue import unleased
+
+DECISIONS = ('Approved', 'Rejected')
+BATCH_SIZE = 1000
+
+
+def review_pending(reviewer, decision, queryset):
+    """
+    Applies `decision` to the pending documents in `queryset` (which must be small
+    enough for one statement, see `review_ids`) that aren't leased to another
+    reviewer. Returns {id: product_id} of the documents that were updated.
+    """
+    with transaction.atomic():
+        pending = dict(
+            queryset.filter(unleased(reviewer), approval_status='Pending')
+            .select_for_update().values_list('id', 'product_id')
+        )
+        if pending:
+            now = timezone.now()
+            Compliance.objects.filter(id__in=pending, approval_status='Pending').update(
+                approval_status=decision, approved_by=reviewer, approved_at=now, claimed_by=None, claimed_until=None
+            )
+            deltas = new_deltas()
+            for product_id in pending.values():
+                document_deltas(deltas, (product_id, 'Pending'), (product_id, decision))
+            apply_deltas(deltas, approved_at=now if decision == 'Approved' else None)
+    return pending
+
+
+def review_ids(reviewer, decision, ids):
+    """
+    Reviews documents by id, in batches of BATCH_SIZE. Returns the outcome per id:
+    'updated', 'not_pending' (already reviewed), 'claimed' (leased to another
+    reviewer) or 'not_found'.
+    """
+    outcomes = {}
+    ids = list(dict.fromkeys(ids))
+    with transaction.atomic():
+        for start in range(0, len(ids), BATCH_SIZE):
+            batch = ids[start:start + BATCH_SIZE]
+            updated = review_pending(reviewer, decision, Compliance.objects.filter(id__in=batch))
+            existing = {} if len(updated) == len(batch) else dict(
+                Compliance.objects.filter(id__in=batch).values_list('id', 'approval_status')
+            )
+            for document_id in batch:
+                if document_id in updated:
+                    outcomes[document_id] = 'updated'
+                elif document_id not in existing:
+                    outcomes[document_id] = 'not_found'
+                else:
+                    outcomes[document_id] = 'claimed' if existing[document_id] == 'Pending' else 'not_pending'
+    return outcomes
+
+
+def review_matching(reviewer, decision, queryset):
+    """
+    Reviews every pending document matching `queryset` that isn't leased to another
+    reviewer, committing batch by batch so a large match never holds its row locks
+    for the whole run. Returns the updated ids.
+    """
+    updated = []
+    while True:
+        batch = list(
+            queryset.filter(unleased(reviewer), approval_status='Pending')
+            .order_by('id').values_list('id', flat=True)[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        updated += review_pending(reviewer, decision, Compliance.objects.filter(id__in=batch))
+    return updated
@@ -1,22 +1,86 @@
+import copy
 from rest_framework import serializers
-from .models import Compliance
+from django.conf import settings
+from .models import Compliance, UploadSession
+from .queue import MAX_CLAIM
+from .review import DECISIONS
 from products.models import Product
 
 class ComplianceSerializer(serializers.ModelSerializer):
     class Meta:
         model = Compliance
-        fields = '__all__'
+        # extracted_text is only used for searching, it can be hundreds of KB
+        exclude = ('extracted_text',)
         read_only_fields = (
             'uploaded_by', 
             'approval_status', 
             'approved_by', 
             'approved_at', 
             'created_at',
+            'content_hash',
+            'file_size',
+            'processing_status',
+            'page_count',
+            'claimed_by',
+            'claimed_until',
         )
 
     def to_internal_value(self, data):
         # We handle multipart formData nesting where simple values get turned into lists
         if hasattr(data, '_mutable'):
-            data = data.copy()
+            # Shallow: uploads are streamed to temp files, which can't be deep-copied
+            data = copy.copy(data)
         
         return super().to_internal_value(data)
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    chunk_size = serializers.IntegerField(required=False, min_value=256 * 1024, max_value=64 * 2**20)
+    chunk_count = serializers.IntegerField(read_only=True)
+    received_chunks = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UploadSession
+        fields = ['id', 'product', 'file_name', 'file_size', 'chunk_size', 'chunk_count', 'received_chunks',
+                  'status', 'compliance', 'expires_at']
+        read_only_fields = ['status', 'compliance', 'expires_at']
+
+    def validate_file_size(self, value):
+        if not 0 < value <= settings.COMPLIANCE_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(
+                f"Must be between 1 byte and {settings.COMPLIANCE_UPLOAD_MAX_SIZE // 2**20} MB."
+            )
+        return value
+
+    def get_received_chunks(self, session):
+        return sorted(chunk.index for chunk in session.chunks.all())
+
+
+class BulkReviewSerializer(serializers.Serializer):
+    """
+    Either `ids` or `filter` (with at least one criterion) selects the documents;
+    only pending ones are reviewed.
+    Example Input: {"decision": "Approved", "ids": [4, 8, 15]}
+                   {"decision": "Rejected", "filter": {"product": 3}}
+    """
+    class ReviewFilterSerializer(serializers.Serializer):
+        product = serializers.IntegerField(required=False)
+        uploaded_by = serializers.IntegerField(required=False)
+        created_before = serializers.DateTimeField(required=False)
+
+    decision = serializers.ChoiceField(choices=DECISIONS)
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False, max_length=10000)
+    filter = ReviewFilterSerializer(required=False)
+
+    def validate(self, attrs):
+        if ('ids' in attrs) == ('filter' in attrs):
+            raise serializers.ValidationError("Provide either ids or filter.")
+        if 'filter' in attrs and not attrs['filter']:
+            # An empty filter would review the whole queue
+            raise serializers.ValidationError({'filter': "Give at least one of product, uploaded_by, created_before."})
+        return attrs
+
+
+class ClaimSerializer(serializers.Serializer):
+    """ Example Input: {"count": 10} """
+    count = serializers.IntegerField(min_value=1, max_value=MAX_CLAIM, default=10)
@@ -1,3 +1,472 @@
-from django.test import TestCase
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from accounts.models import User
+from core.query_plans import QueryPlanTestMixin, analyze
+from products.models import Category, Product
+from .counters import reconcile
+from .models import Compliance, ComplianceJob, UploadSession
+from .queue import claimable
+from .processing import MAX_ATTEMPTS, claim_jobs, run_job
+from .resumable import purge_expired
 
-# Create your tests here.
+
+class CompliancePendingQueryBudgetTests(TestCase):
+
+    def setUp(self):
+        self.authority = User.objects.create_user(email='authority@example.com', password='pass12345', role='Authority')
+        self.client = APIClient()
+        self.client.force_authenticate(self.authority)
+
+    def create_documents(self, count):
+        uploader = User.objects.create_user(email=f'uploader{Compliance.objects.count()}@example.com', password='pass12345')
+        for i in range(count):
+            product = Product.objects.create(name=f"Product {i}", category=Category.objects.for_name("Test"), description="", price='1.00')
+            Compliance.objects.create(
+                product=product,
+                uploaded_by=uploader,
+                document_file=ContentFile(b'%PDF-1.4', name='doc.pdf').name,
+            )
+
+    def test_pending_list_query_count_is_constant(self):
+        self.create_documents(1)
+        with self.assertNumQueries(2):
+            self.client.get('/api/compliance/pending/')
+
+        self.create_documents(15)
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/compliance/pending/')
+        self.assertEqual(len(response.data['results']), 10)
+
+    def test_compiled_pending_list_is_byte_identical(self):
+        self.create_documents(12)
+        Compliance.objects.filter(pk__in=Compliance.objects.order_by('id').values('id')[:3]).update(
+            claimed_by=self.authority, claimed_until=timezone.now(), file_size=2**40, page_count=3,
+            document_file='compliance_docs/r\u00e9sum\u00e9 (1).pdf',
+        )
+        for path in ('/api/compliance/pending/', '/api/compliance/pending/?page=2',
+                     '/api/compliance/pending/?pagination=cursor'):
+            with self.subTest(path=path):
+                with override_settings(COMPILED_SERIALIZERS=True):
+                    compiled = self.client.get(path)
+                expected = self.client.get(path)
+                self.assertEqual(compiled.status_code, 200)
+                self.assertEqual(compiled.content, expected.content)
+
+
+class ComplianceUploadPipelineTests(TestCase):
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(email='distributor@example.com', password='pass12345'))
+        self.products = [
+            Product.objects.create(name=f"Product {i}", category=Category.objects.for_name("Test"), description="", price='1.00') for i in range(2)
+        ]
+        self.pdf = b'%PDF-1.4\n1 0 obj << /Type /Pages >>\n2 0 obj << /Type /Page >>\n3 0 obj << /Type/Page >>\n'
+
+    def upload(self, product, content):
+        return self.client.post('/api/compliance/upload/', {
+            'product': product.pk, 'document_file': SimpleUploadedFile('dossier.pdf', content),
+        }, format='multipart')
+
+    def test_identical_uploads_share_one_file_and_job(self):
+        first = self.upload(self.products[0], self.pdf)
+        second = self.upload(self.products[1], self.pdf)
+        self.assertEqual(first.status_code, 201, first.data)
+        self.assertEqual(first.data['content_hash'], hashlib.sha256(self.pdf).hexdigest())
+        self.assertEqual(first.data['processing_status'], 'Queued')
+        self.assertEqual(second.data['document_file'], first.data['document_file'])
+        self.assertEqual(ComplianceJob.objects.count(), 1)
+
+        for job_id in claim_jobs('test-worker', limit=5):
+            self.assertTrue(run_job(job_id))
+        self.assertEqual(claim_jobs('test-worker'), [])
+        self.assertEqual(
+            list(Compliance.objects.values_list('processing_status', 'page_count', 'file_size')),
+            [('Done', 2, len(self.pdf))] * 2,
+        )
+
+    def test_failed_job_fails_the_duplicates(self):
+        self.upload(self.products[0], self.pdf)
+        self.upload(self.products[1], self.pdf)
+        ComplianceJob.objects.update(attempts=MAX_ATTEMPTS - 1)
+        with mock.patch('compliance.processing.extract', side_effect=OSError):
+            self.assertFalse(run_job(claim_jobs('test-worker')[0]))
+        self.assertEqual(list(Compliance.objects.values_list('processing_status', flat=True)), ['Failed'] * 2)
+
+    def test_oversized_upload_is_rejected(self):
+        with override_settings(COMPLIANCE_UPLOAD_MAX_SIZE=16):
+            response = self.upload(self.products[0], self.pdf)
+        self.assertEqual(response.status_code, 413)
+        self.assertFalse(Compliance.objects.exists())
+
+
+class ResumableUploadTests(TestCase):
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(email='distributor@example.com', password='pass12345'))
+        self.product = Product.objects.create(name="Product", category=Category.objects.for_name("Test"), description="", price='1.00')
+        self.content = os.urandom(600 * 1024)
+
+    def put_chunk(self, session, index, data=None):
+        start = index * session['chunk_size']
+        data = self.content[start:start + session['chunk_size']] if data is None else data
+        return self.client.put(
+            f"/api/compliance/uploads/{session['id']}/chunks/{index}/", data,
+            content_type='application/octet-stream', HTTP_X_CHUNK_SHA256=hashlib.sha256(data).hexdigest(),
+        )
+
+    def test_interrupted_upload_resumes_and_finalizes(self):
+        session = self.client.post('/api/compliance/uploads/', {
+            'product': self.product.pk, 'file_name': 'dossier.pdf', 'file_size': len(self.content), 'chunk_size': 256 * 1024,
+        }).data
+        self.assertEqual(session['chunk_count'], 3)
+
+        self.assertEqual(self.put_chunk(session, 2).status_code, 200)
+        self.assertEqual(self.put_chunk(session, 0).status_code, 200)
+        # A truncated chunk (dropped connection) is rejected and not recorded
+        self.assertEqual(self.put_chunk(session, 1, self.content[:1000]).status_code, 400)
+        self.assertEqual(self.client.get(f"/api/compliance/uploads/{session['id']}/").data['received_chunks'], [0, 2])
+        self.assertEqual(self.client.post(f"/api/compliance/uploads/{session['id']}/finalize/").status_code, 400)
+        self.assertFalse(Compliance.objects.exists())
+
+        self.assertEqual(self.put_chunk(session, 1).status_code, 200)
+        response = self.client.post(f"/api/compliance/uploads/{session['id']}/finalize/")
+        self.assertEqual(response.status_code, 201, response.data)
+        document = Compliance.objects.get()
+        self.assertEqual(document.content_hash, hashlib.sha256(self.content).hexdigest())
+        with document.document_file.open('rb') as stored:
+            self.assertEqual(stored.read(), self.content)
+        self.assertEqual(ComplianceJob.objects.count(), 1)
+
+    def test_chunk_checksum_is_verified(self):
+        session = self.client.post('/api/compliance/uploads/', {
+            'product': self.product.pk, 'file_name': 'dossier.pdf', 'file_size': len(self.content),
+        }).data
+        response = self.client.put(
+            f"/api/compliance/uploads/{session['id']}/chunks/0/", self.content,
+            content_type='application/octet-stream', HTTP_X_CHUNK_SHA256='0' * 64,
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('checksum', response.data['detail'])
+
+    def test_rejected_resend_keeps_the_received_chunk(self):
+        session = self.client.post('/api/compliance/uploads/', {
+            'product': self.product.pk, 'file_name': 'dossier.pdf', 'file_size': len(self.content), 'chunk_size': 256 * 1024,
+        }).data
+        for index in range(3):
+            self.assertEqual(self.put_chunk(session, index).status_code, 200)
+        response = self.client.put(
+            f"/api/compliance/uploads/{session['id']}/chunks/0/", os.urandom(256 * 1024),
+            content_type='application/octet-stream', HTTP_X_CHUNK_SHA256='0' * 64,
+        )
+        self.assertEqual(response.status_code, 400)
+
+        finalize = f"/api/compliance/uploads/{session['id']}/finalize/"
+        self.assertEqual(self.client.post(finalize, {'sha256': '0' * 64}).status_code, 400)
+        response = self.client.post(finalize, {'sha256': hashlib.sha256(self.content).hexdigest()})
+        self.assertEqual(response.status_code, 201, response.data)
+        with Compliance.objects.get().document_file.open('rb') as stored:
+            self.assertEqual(stored.read(), self.content)
+
+    def test_expired_session_takes_no_chunks(self):
+        session = self.client.post('/api/compliance/uploads/', {
+            'product': self.product.pk, 'file_name': 'dossier.pdf', 'file_size': len(self.content), 'chunk_size': 256 * 1024,
+        }).data
+        UploadSession.objects.filter(pk=session['id']).update(expires_at=timezone.now() - timedelta(hours=1))
+        response = self.put_chunk(session, 0)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('expired', response.data['detail'])
+        self.assertEqual(self.client.get(f"/api/compliance/uploads/{session['id']}/").data['received_chunks'], [])
+
+        self.assertEqual(purge_expired(), 1)
+        self.assertEqual(self.put_chunk(session, 0).status_code, 404)
+
+
+class ComplianceDownloadTests(TestCase):
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.content = os.urandom(10000)
+        uploader = User.objects.create_user(email='distributor@example.com', password='pass12345')
+        product = Product.objects.create(name="Product", category=Category.objects.for_name("Test"), description="", price='1.00')
+        self.document = Compliance.objects.create(
+            product=product, uploaded_by=uploader, document_file=ContentFile(self.content, name='dossier.pdf'),
+            content_hash=hashlib.sha256(self.content).hexdigest(),
+        )
+        self.url = f'/api/compliance/{self.document.pk}/download/'
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(
+            email='authority@example.com', password='pass12345', role='Authority'
+        ))
+
+    def test_full_and_partial_downloads(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertEqual(response['ETag'], f'"{self.document.content_hash}"')
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 100-199/10000')
+        self.assertEqual(b''.join(response.streaming_content), self.content[100:200])
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-50')
+        self.assertEqual(b''.join(response.streaming_content), self.content[-50:])
+        self.assertEqual(self.client.get(self.url, HTTP_RANGE='bytes=20000-').status_code, 416)
+        # A stale If-Range gets the whole file
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_revalidation_and_offload(self):
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=f'"{self.document.content_hash}"')
+        self.assertEqual(response.status_code, 304)
+
+        with override_settings(COMPLIANCE_DOWNLOAD_OFFLOAD='x-accel'):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.document.document_file.name}')
+        self.assertEqual(response.content, b'')
+
+    def test_other_customers_cannot_download(self):
+        self.client.force_authenticate(User.objects.create_user(email='other@example.com', password='pass12345'))
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+
+class BulkReviewTests(TestCase):
+
+    def setUp(self):
+        self.authority = User.objects.create_user(email='authority@example.com', password='pass12345', role='Authority')
+        self.client = APIClient()
+        self.client.force_authenticate(self.authority)
+        uploader = User.objects.create_user(email='distributor@example.com', password='pass12345')
+        self.products = [
+            Product.objects.create(name=f"Product {i}", category=Category.objects.for_name("Test"), description="", price='1.00') for i in range(2)
+        ]
+        self.documents = [
+            Compliance.objects.create(product=product, uploaded_by=uploader, document_file='compliance_docs/doc.pdf')
+            for product in self.products for _ in range(2)
+        ]
+
+    def test_bulk_approve_reports_per_id_outcomes(self):
+        self.documents[1].approval_status = 'Rejected'
+        self.documents[1].save()
+        ids = [self.documents[0].pk, self.documents[1].pk, 999999]
+        response = self.client.post('/api/compliance/review/', {'decision': 'Approved', 'ids': ids}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['updated'], 1)
+        self.assertEqual(
+            [result['outcome'] for result in response.data['results']], ['updated', 'not_pending', 'not_found']
+        )
+
+        document = Compliance.objects.get(pk=self.documents[0].pk)
+        self.assertEqual((document.approval_status, document.approved_by), ('Approved', self.authority))
+        self.products[0].refresh_from_db()
+        self.assertEqual((self.products[0].compliance_status, self.products[0].authority_verified), ('Approved', True))
+
+    def test_bulk_reject_by_filter(self):
+        response = self.client.post('/api/compliance/review/', {
+            'decision': 'Rejected', 'filter': {'product': self.products[1].pk},
+        }, format='json')
+        self.assertEqual(response.data['updated'], 2)
+        self.products[1].refresh_from_db()
+        self.assertEqual((self.products[1].compliance_status, self.products[1].authority_verified), ('Rejected', False))
+        self.assertEqual(Compliance.objects.filter(approval_status='Pending').count(), 2)
+
+    def test_filter_needs_a_criterion(self):
+        response = self.client.post('/api/compliance/review/', {'decision': 'Approved', 'filter': {}}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('filter', response.data)
+        self.assertEqual(Compliance.objects.filter(approval_status='Pending').count(), 4)
+
+    def test_reviewed_documents_cannot_be_reviewed_again(self):
+        url = f'/api/compliance/{self.documents[0].pk}/approve/'
+        self.assertEqual(self.client.put(url, {'approval_status': 'Approved'}, format='json').status_code, 200)
+        response = self.client.put(url, {'approval_status': 'Rejected'}, format='json')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Compliance.objects.get(pk=self.documents[0].pk).approval_status, 'Approved')
+        self.products[0].refresh_from_db()
+        self.assertEqual((self.products[0].compliance_approved, self.products[0].compliance_rejected), (1, 0))
+
+    def test_ids_or_filter_is_required(self):
+        response = self.client.post('/api/compliance/review/', {'decision': 'Approved'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class ComplianceCounterTests(TestCase):
+
+    def setUp(self):
+        self.uploader = User.objects.create_user(email='distributor@example.com', password='pass12345')
+        self.product = Product.objects.create(name="Product", category=Category.objects.for_name("Test"), description="", price='1.00')
+        self.other = Product.objects.create(name="Other", category=Category.objects.for_name("Test"), description="", price='1.00')
+
+    def upload(self, product):
+        return Compliance.objects.create(product=product, uploaded_by=self.uploader, document_file='compliance_docs/doc.pdf')
+
+    def counters(self, product):
+        product.refresh_from_db()
+        return (product.compliance_pending, product.compliance_approved, product.compliance_rejected,
+                product.compliance_status, product.authority_verified)
+
+    def test_counters_follow_create_review_and_delete(self):
+        first, second = self.upload(self.product), self.upload(self.product)
+        self.assertEqual(self.counters(self.product), (2, 0, 0, 'Pending', False))
+
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(email='authority@example.com', password='pass12345', role='Authority'))
+        response = client.put(f'/api/compliance/{first.pk}/approve/', {'approval_status': 'Approved'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.counters(self.product), (1, 1, 0, 'Approved', True))
+        self.assertIsNotNone(self.product.compliance_approved_at)
+
+        client.post('/api/compliance/review/', {'decision': 'Rejected', 'ids': [second.pk]}, format='json')
+        self.assertEqual(self.counters(self.product), (0, 1, 1, 'Approved', True))
+
+        Compliance.objects.get(pk=first.pk).delete()
+        self.assertEqual(self.counters(self.product), (0, 0, 1, 'Rejected', False))
+        self.assertIsNone(self.product.compliance_approved_at)
+
+    def test_verified_filter(self):
+        document = self.upload(self.product)
+        self.upload(self.other)
+        document.approval_status = 'Approved'
+        document.save()
+        response = self.client.get('/api/products/', {'verified': 'true'})
+        self.assertEqual([product['id'] for product in response.data['results']], [self.product.pk])
+        response = self.client.get('/api/products/', {'verified': 'false'})
+        self.assertEqual([product['id'] for product in response.data['results']], [self.other.pk])
+
+    def test_reconcile_repairs_drift(self):
+        # bulk_create bypasses the signals that maintain the counters
+        Compliance.objects.bulk_create([
+            Compliance(product=self.product, uploaded_by=self.uploader, approval_status=status)
+            for status in ('Pending', 'Approved', 'Approved')
+        ])
+        Product.objects.filter(pk=self.other.pk).update(compliance_pending=5)
+        self.assertEqual(reconcile(), 2)
+        self.assertEqual(self.counters(self.product), (1, 2, 0, 'Approved', True))
+        self.assertEqual(self.counters(self.other), (0, 0, 0, 'Pending', False))
+        self.assertEqual(reconcile(), 0)
+
+
+class ReviewQueueTests(TestCase):
+
+    def setUp(self):
+        uploader = User.objects.create_user(email='distributor@example.com', password='pass12345')
+        self.reviewers = [
+            User.objects.create_user(email=f'authority{i}@example.com', password='pass12345', role='Authority')
+            for i in range(2)
+        ]
+        self.clients = []
+        for reviewer in self.reviewers:
+            client = APIClient()
+            client.force_authenticate(reviewer)
+            self.clients.append(client)
+        # Stock value 10, 1000 and 100: the queue serves the most valuable first
+        self.documents = [
+            Compliance.objects.create(
+                product=Product.objects.create(name=f"Product {i}", category=Category.objects.for_name("Test"), description="", price='1.00', stock=stock),
+                uploaded_by=uploader, document_file='compliance_docs/doc.pdf',
+            )
+            for i, stock in enumerate((10, 1000, 100))
+        ]
+
+    def claim(self, client, count):
+        response = client.post('/api/compliance/claim/', {'count': count}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        return [document['id'] for document in response.data]
+
+    def test_reviewers_claim_disjoint_documents_in_priority_order(self):
+        first = self.claim(self.clients[0], 2)
+        self.assertEqual(first, [self.documents[1].pk, self.documents[2].pk])
+        self.assertEqual(self.claim(self.clients[1], 2), [self.documents[0].pk])
+        self.assertEqual(self.claim(self.clients[1], 2), [])
+
+        response = self.clients[0].delete('/api/compliance/claim/')
+        self.assertEqual(response.data['released'], 2)
+        self.assertEqual(self.claim(self.clients[1], 5), first)
+
+    def test_expired_lease_can_be_claimed_again(self):
+        self.claim(self.clients[0], 3)
+        Compliance.objects.filter(pk=self.documents[1].pk).update(claimed_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self.claim(self.clients[1], 3), [self.documents[1].pk])
+
+    def test_leased_documents_are_reserved_for_their_reviewer(self):
+        self.claim(self.clients[0], 1)
+        leased = self.documents[1].pk
+        response = self.clients[1].put(f'/api/compliance/{leased}/approve/', {'approval_status': 'Approved'}, format='json')
+        self.assertEqual(response.status_code, 409)
+        response = self.clients[1].post('/api/compliance/review/', {'decision': 'Approved', 'ids': [leased]}, format='json')
+        self.assertEqual(response.data['results'], [{'id': leased, 'outcome': 'claimed'}])
+
+        response = self.clients[0].put(f'/api/compliance/{leased}/approve/', {'approval_status': 'Approved'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.data['claimed_until'])
+
+
+class ComplianceQueryPlanTests(QueryPlanTestMixin, TestCase):
+    """ The review and processing queues must seek to their work, not scan every document. """
+
+    @classmethod
+    def setUpTestData(cls):
+        uploader = User.objects.create_user(email='distributor@example.com', password='pass12345')
+        cls.reviewer = User.objects.create_user(email='authority@example.com', password='pass12345', role='Authority')
+        category = Category.objects.for_name("Test")
+        products = Product.objects.bulk_create([
+            Product(name=f"Product {i}", category=category, description="", price='1.00', stock=i)
+            for i in range(200)
+        ])
+        # Mostly reviewed already, as in a long-running deployment
+        documents = Compliance.objects.bulk_create([
+            Compliance(product=products[i % 200], uploaded_by=uploader, document_file='compliance_docs/doc.pdf',
+                       approval_status='Pending' if i % 20 == 0 else ('Approved', 'Rejected')[i % 2],
+                       processing_status='Done')
+            for i in range(5000)
+        ], batch_size=1000)
+        ComplianceJob.objects.bulk_create([
+            ComplianceJob(compliance=document, status='Queued' if i % 50 == 0 else 'Done')
+            for i, document in enumerate(documents)
+        ], batch_size=1000)
+        analyze()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.reviewer)
+
+    def test_pending_list_and_claim_use_the_partial_index(self):
+        first = self.assertNoFullScans(self.client.get, '/api/compliance/pending/', {'pagination': 'cursor'})
+        self.assertNoFullScans(self.client.get, first.data['next'])
+        self.assertNoFullScans(self.client.get, '/api/compliance/pending/')
+        response = self.assertNoFullScans(self.client.post, '/api/compliance/claim/', {'count': 5}, format='json')
+        self.assertEqual(len(response.data), 5)
+        self.assertUsesIndex(Compliance.objects.filter(approval_status='Pending').order_by('created_at', 'id')[:10],
+                             'compliance_pending_created_idx')
+        self.assertUsesIndex(claimable()[:10], 'compliance_pending_created_idx')
+
+    def test_job_claim_uses_index(self):
+        self.assertEqual(len(self.assertNoFullScans(claim_jobs, 'worker-1', limit=3)), 3)
@@ -0,0 +1,63 @@
+"""
+Streaming upload handling for compliance documents.
+
+Files are written to a temporary file chunk by chunk as the multipart body is
+parsed, with their SHA-256 computed on the way, so a request never holds a whole
+document in memory and never re-reads it to hash it.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.files.uploadhandler import SkipFile, TemporaryFileUploadHandler
+from rest_framework import status
+from rest_framework.response import Response
+
+
+class HashingFileUploadHandler(TemporaryFileUploadHandler):
+    """
+    Streams every uploaded file to disk, recording `sha256` and `size` on it.
+    Files larger than COMPLIANCE_UPLOAD_MAX_SIZE are dropped mid-stream and their
+    field names collected in `too_large`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.too_large = []
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.hasher = hashlib.sha256()
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.COMPLIANCE_UPLOAD_MAX_SIZE:
+            self.file.close()
+            self.too_large.append(self.field_name)
+            raise SkipFile()
+        self.hasher.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        file.sha256 = self.hasher.hexdigest()
+        return file
+
+
+class HashingUploadMixin:
+    """ For views accepting document uploads: streams and hashes files, rejects oversized ones. """
+
+    def initialize_request(self, request, *args, **kwargs):
+        request.upload_handlers = [HashingFileUploadHandler(request)]
+        return super().initialize_request(request, *args, **kwargs)
+
+    def create(self, request, *args, **kwargs):
+        request.data  # parse the body so the handler has seen every file
+        too_large = [name for handler in request.upload_handlers for name in getattr(handler, 'too_large', [])]
+        if too_large:
+            limit = settings.COMPLIANCE_UPLOAD_MAX_SIZE // 2**20
+            return Response(
+                {name: [f"File is larger than the {limit} MB limit."] for name in too_large},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            )
+        return super().create(request, *args, **kwargs)
@@ -1,14 +1,29 @@
 from django.urls import path
+from core.async_views import read_route
 from .views import (
     ComplianceUploadView, 
     CompliancePendingListView, 
     ComplianceApproveView, 
-    ComplianceDeleteView
+    ComplianceDeleteView,
+    ComplianceDownloadView,
+    ComplianceBulkReviewView,
+    ComplianceClaimView,
+    UploadSessionCreateView,
+    UploadSessionDetailView,
+    UploadChunkView,
+    UploadFinalizeView,
 )
 
 urlpatterns = [
     path('upload/', ComplianceUploadView.as_view(), name='compliance-upload'),
-    path('pending/', CompliancePendingListView.as_view(), name='compliance-pending'),
+    path('uploads/', UploadSessionCreateView.as_view(), name='compliance-upload-session'),
+    path('uploads/<uuid:pk>/', UploadSessionDetailView.as_view(), name='compliance-upload-session-detail'),
+    path('uploads/<uuid:pk>/chunks/<int:index>/', UploadChunkView.as_view(), name='compliance-upload-chunk'),
+    path('uploads/<uuid:pk>/finalize/', UploadFinalizeView.as_view(), name='compliance-upload-finalize'),
+    path('pending/', read_route('compliance.pending', CompliancePendingListView), name='compliance-pending'),
+    path('review/', ComplianceBulkReviewView.as_view(), name='compliance-bulk-review'),
+    path('claim/', ComplianceClaimView.as_view(), name='compliance-claim'),
     path('<int:pk>/approve/', ComplianceApproveView.as_view(), name='compliance-approve'),
+    path('<int:pk>/download/', ComplianceDownloadView.as_view(), name='compliance-download'),
     path('<int:pk>/', ComplianceDeleteView.as_view(), name='compliance-delete'),
 ]
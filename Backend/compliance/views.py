@@ -1,33 +1,139 @@
+import io
+import os
+from django.http import Http404
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import generics, permissions
-from django.utils import timezone
+from rest_framework.filters import SearchFilter
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.parsers import MultiPartParser, FormParser
-from .models import Compliance
-from .serializers import ComplianceSerializer
-from .permissions import IsAuthorityUser, IsAdminUser
+from core.compiled import CompiledListMixin
+from core.eager_loading import EagerLoadingMixin
+from .models import Compliance, UploadSession
+from .processing import duplicate_of, enqueue, shared_fields
+from . import resumable
+from .review import review_ids, review_matching, review_pending
+from .queue import claim_next, release
+from .serializers import BulkReviewSerializer, ClaimSerializer, ComplianceSerializer, UploadSessionSerializer
+from .downloads import serve_document
+from .permissions import IsAuthorityUser, IsAdminUser, CanDownloadDocument
+from .uploads import HashingUploadMixin
 
-class ComplianceUploadView(generics.CreateAPIView):
-    """ Allows any authenticated user to upload a compliance document. """
+class ComplianceUploadView(HashingUploadMixin, generics.CreateAPIView):
+    """
+    Allows any authenticated user to upload a compliance document. The file is
+    streamed to disk and hashed while the request is parsed; a file already stored
+    under the same hash is reused instead of saved again. Page count and text are
+    extracted afterwards by `process_compliance_jobs` (see `processing_status`).
+    """
     queryset = Compliance.objects.all()
     serializer_class = ComplianceSerializer
     permission_classes = [permissions.IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser]
 
     def perform_create(self, serializer):
-        serializer.save(uploaded_by=self.request.user)
+        upload = serializer.validated_data['document_file']
+        fields = {'uploaded_by': self.request.user, 'content_hash': getattr(upload, 'sha256', ''), 'file_size': upload.size}
+        original = duplicate_of(fields['content_hash'])
+        if original is None:
+            enqueue(serializer.save(**fields))
+        else:
+            serializer.save(**fields, **shared_fields(original))
 
-class CompliancePendingListView(generics.ListAPIView):
+
+class UploadSessionCreateView(generics.CreateAPIView):
+    """ Starts a resumable upload; the document is created on finalize (see compliance.resumable) """
+    serializer_class = UploadSessionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def perform_create(self, serializer):
+        serializer.instance = resumable.create_session(self.request.user, **serializer.validated_data)
+
+
+class UploadSessionDetailView(generics.RetrieveAPIView):
+    """ Lists the chunks already received, so an interrupted client knows what to resend """
+    serializer_class = UploadSessionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return UploadSession.objects.filter(uploaded_by=self.request.user).prefetch_related('chunks')
+
+
+class UploadChunkView(generics.GenericAPIView):
+    """ PUT the raw bytes of one chunk, with its SHA-256 in the X-Chunk-SHA256 header """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return UploadSession.objects.filter(uploaded_by=self.request.user)
+
+    def put(self, request, pk, index):
+        session = self.get_object()
+        try:
+            resumable.write_chunk(session, index, request.stream or io.BytesIO(), request.headers.get('X-Chunk-SHA256'))
+        except resumable.ChunkError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"index": index, "offset": index * session.chunk_size})
+
+
+class UploadFinalizeView(generics.GenericAPIView):
+    """ Assembles the uploaded chunks into a compliance document; an optional `sha256` of the whole file is checked """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return UploadSession.objects.filter(uploaded_by=self.request.user)
+
+    def post(self, request, pk):
+        compliance = resumable.finalize(self.get_object(), request.data.get('sha256'))
+        return Response(ComplianceSerializer(compliance).data, status=status.HTTP_201_CREATED)
+
+
+class CompliancePendingListView(CompiledListMixin, EagerLoadingMixin, generics.ListAPIView):
     """ Authority only: List all pending documents """
     serializer_class = ComplianceSerializer
     permission_classes = [IsAuthorityUser]
+    # Oldest documents first, so cursor pagination walks the queue in order
+    keyset_ordering = ('created_at', 'id')
+    # Not extracted_text: icontains would read whole documents
+    filter_backends = [DjangoFilterBackend, SearchFilter]
+    search_fields = ['product__name']
 
     def get_queryset(self):
-        return Compliance.objects.filter(approval_status='Pending')
+        return Compliance.objects.filter(approval_status='Pending').order_by('created_at', 'id')
+
+
+class ComplianceClaimView(generics.GenericAPIView):
+    """
+    Authority only: POST leases the next `count` documents of the review queue to the
+    caller (see compliance.queue); DELETE gives up the caller's leases.
+    """
+    serializer_class = ClaimSerializer
+    permission_classes = [IsAuthorityUser]
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = claim_next(request.user, serializer.validated_data['count'])
+        documents = Compliance.objects.in_bulk(ids)
+        return Response(ComplianceSerializer([documents[pk] for pk in ids], many=True).data)
+
+    def delete(self, request):
+        return Response({"released": release(request.user)})
+
+
+class ComplianceDownloadView(generics.GenericAPIView):
+    """ Streams the document file, with Range and ETag support (see compliance.downloads) """
+    queryset = Compliance.objects.all()
+    permission_classes = [CanDownloadDocument]
+
+    def get(self, request, *args, **kwargs):
+        compliance = self.get_object()
+        if not compliance.document_file or not os.path.exists(compliance.document_file.path):
+            raise Http404("The document file is missing.")
+        return serve_document(request, compliance)
 
 
 class ComplianceApproveView(generics.UpdateAPIView):
-    """ Authority only: Approve or reject a document """
+    """ Authority only: Approve or reject a pending document """
     queryset = Compliance.objects.all()
     serializer_class = ComplianceSerializer
     permission_classes = [IsAuthorityUser]
@@ -42,14 +148,53 @@ class ComplianceApproveView(generics.UpdateAPIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        instance.approval_status = new_status
-        instance.approved_by = request.user
-        instance.approved_at = timezone.now()
-        instance.save()
-        
+        # The same guarded UPDATE as bulk reviews: only a pending document changes
+        if not review_pending(request.user, new_status, Compliance.objects.filter(pk=instance.pk)):
+            instance.refresh_from_db()
+            if instance.approval_status != 'Pending':
+                return Response(
+                    {"detail": "This document has already been reviewed.", "approval_status": instance.approval_status},
+                    status=status.HTTP_409_CONFLICT
+                )
+            return Response(
+                {"detail": "This document is claimed by another reviewer.", "claimed_until": instance.claimed_until},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        instance.refresh_from_db()
         return Response(self.get_serializer(instance).data)
 
 
+class ComplianceBulkReviewView(generics.GenericAPIView):
+    """ Authority only: approve or reject many pending documents in one request """
+    serializer_class = BulkReviewSerializer
+    permission_classes = [IsAuthorityUser]
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        decision = serializer.validated_data['decision']
+
+        if 'ids' in serializer.validated_data:
+            outcomes = review_ids(request.user, decision, serializer.validated_data['ids'])
+        else:
+            criteria = serializer.validated_data['filter']
+            documents = Compliance.objects.all()
+            if 'product' in criteria:
+                documents = documents.filter(product_id=criteria['product'])
+            if 'uploaded_by' in criteria:
+                documents = documents.filter(uploaded_by_id=criteria['uploaded_by'])
+            if 'created_before' in criteria:
+                documents = documents.filter(created_at__lt=criteria['created_before'])
+            outcomes = dict.fromkeys(review_matching(request.user, decision, documents), 'updated')
+
+        return Response({
+            'decision': decision,
+            'updated': sum(outcome == 'updated' for outcome in outcomes.values()),
+            'results': [{'id': document_id, 'outcome': outcome} for document_id, outcome in outcomes.items()],
+        })
+
+
 class ComplianceDeleteView(generics.DestroyAPIView):
     """ Admin only: Delete a compliance record """
     queryset = Compliance.objects.all()
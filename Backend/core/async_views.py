@@ -0,0 +1,131 @@
+"""
+Async-native read endpoints.
+
+DRF views are synchronous, so under ASGI every request to one runs in a worker
+thread through `sync_to_async`, gaining nothing over WSGI. `read_route` can answer a
+route's GET / HEAD requests with `AsyncReadView` instead: it reuses the DRF view's
+configuration (content negotiation, queryset, filter backends, permissions,
+throttles, pagination, serializer and catalog cache) but awaits each database read
+through the async ORM (`acount`, `aget`, async iteration). Other methods still go to
+the DRF view. Routes opt in by name through ASYNC_READ_ROUTES.
+
+Only JSON renderers are served asynchronously: a request negotiating another one
+(the browsable API builds its forms with synchronous queries), or that turns out to
+need a synchronous query (a serializer field reading an unloaded relation, a filter
+validating against the database), is answered by the DRF view instead.
+"""
+import functools
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import SynchronousOnlyOperation, ValidationError
+from django.http import Http404
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from accounts.authentication import aauthenticate
+from products.cache import CatalogCacheMixin
+
+ITERATOR_CHUNK_SIZE = 2000
+
+
+class AsyncReadView:
+    """ Serves `list` / `retrieve` of the DRF generic view `view_class` asynchronously. """
+
+    def __init__(self, view_class, **initkwargs):
+        self.view_class, self.initkwargs = view_class, initkwargs
+        self.sync_view = sync_to_async(view_class.as_view(**initkwargs))
+        # For requests that already passed the throttles here, so they aren't counted twice
+        self.unthrottled_sync_view = sync_to_async(view_class.as_view(**{**initkwargs, 'throttle_classes': ()}))
+
+    async def __call__(self, request, *args, **kwargs):
+        view = self.view_class(**self.initkwargs)
+        view.args, view.kwargs, view.format_kwarg = args, kwargs, view.get_format_suffix(**kwargs)
+        view.headers = view.default_response_headers
+        view.request = Request(request, parsers=view.get_parsers(), authenticators=view.get_authenticators())
+
+        fallback = self.sync_view
+        try:
+            renderer, media_type = view.perform_content_negotiation(view.request)
+            if not isinstance(renderer, JSONRenderer):
+                return await fallback(request, *args, **kwargs)
+            view.request.accepted_renderer, view.request.accepted_media_type = renderer, media_type
+            # Set both so the Request never runs its (synchronous) authenticators itself
+            user_auth = await aauthenticate(request) if view.authentication_classes else None
+            view.request.user, view.request.auth = user_auth or (api_settings.UNAUTHENTICATED_USER(), None)
+            self.check_permissions(view)
+            view.check_throttles(view.request)
+            fallback = self.unthrottled_sync_view
+            lookup_url_kwarg = view.lookup_url_kwarg or view.lookup_field
+            handler = functools.partial(self.retrieve if lookup_url_kwarg in kwargs else self.list, view)
+            if isinstance(view, CatalogCacheMixin):
+                response = await view.acached_response(handler, view.request, *args, **kwargs)
+            else:
+                response = await handler(view.request, *args, **kwargs)
+        except SynchronousOnlyOperation:
+            return await fallback(request, *args, **kwargs)
+        except Exception as exc:
+            response = view.handle_exception(exc)
+        return view.finalize_response(view.request, response, *args, **kwargs)
+
+    def check_permissions(self, view, obj=None):
+        request = view.request
+        for permission in view.get_permissions():
+            if obj is None:
+                allowed = permission.has_permission(request, view)
+            else:
+                allowed = permission.has_object_permission(request, view, obj)
+            if not allowed:
+                if view.authentication_classes and not request.user.is_authenticated:
+                    raise exceptions.NotAuthenticated()
+                raise exceptions.PermissionDenied(
+                    detail=getattr(permission, 'message', None), code=getattr(permission, 'code', None)
+                )
+
+    async def list(self, view, request, *args, **kwargs):
+        queryset = view.filter_queryset(view.get_queryset())
+        paginator = view.paginator
+        page = None
+        if paginator is not None:
+            if hasattr(paginator, 'apaginate_queryset'):
+                page = await paginator.apaginate_queryset(queryset, request, view=view)
+            else:
+                page = await sync_to_async(paginator.paginate_queryset)(queryset, request, view=view)
+        if page is not None:
+            return paginator.get_paginated_response(view.get_serializer(page, many=True).data)
+        items = [item async for item in queryset.aiterator(chunk_size=ITERATOR_CHUNK_SIZE)]
+        return Response(view.get_serializer(items, many=True).data)
+
+    async def retrieve(self, view, request, *args, **kwargs):
+        queryset = view.filter_queryset(view.get_queryset())
+        lookup_url_kwarg = view.lookup_url_kwarg or view.lookup_field
+        try:
+            instance = await queryset.aget(**{view.lookup_field: kwargs[lookup_url_kwarg]})
+        except (queryset.model.DoesNotExist, TypeError, ValueError, ValidationError):
+            raise Http404
+        self.check_permissions(view, instance)
+        return Response(view.get_serializer(instance).data)
+
+
+def read_route(name, view_class, **initkwargs):
+    """
+    The view for a route served by the DRF generic view `view_class`: the DRF view
+    itself, or if `name` is in ASYNC_READ_ROUTES (or that is '*'), an async view that
+    answers GET / HEAD with AsyncReadView and hands other methods to the DRF view.
+    """
+    sync_view = view_class.as_view(**initkwargs)
+    if name not in settings.ASYNC_READ_ROUTES and '*' not in settings.ASYNC_READ_ROUTES:
+        return sync_view
+    reader = AsyncReadView(view_class, **initkwargs)
+
+    async def view(request, *args, **kwargs):
+        if request.method in ('GET', 'HEAD'):
+            return await reader(request, *args, **kwargs)
+        return await reader.sync_view(request, *args, **kwargs)
+
+    view.view_class = view_class
+    return csrf_exempt(view)
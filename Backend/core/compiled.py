@@ -0,0 +1,260 @@
+"""
+Compiled serializers for high-volume list endpoints.
+
+Rendering a page through a ModelSerializer builds a model instance per row, then
+dispatches `get_attribute` / `to_representation` per field, with DecimalField and
+DateTimeField formatting dominating. `compile_serializer` turns a read-only use of a
+serializer class into a flat plan instead: the columns to fetch with `.values()` and
+one precomputed converter per field (identity where the database value already is
+the representation), producing the same dicts, and so the same JSON, as the
+serializer would.
+
+Fields the plan doesn't know (nested serializers, method fields, properties) make
+the whole serializer `NotCompilable` unless they implement
+`compile_representation(context)`, returning the column they read and a converter.
+A converter may raise `Uncompiled` for a row it can't represent, and the page is
+then serialized the usual way.
+
+`CompiledListMixin` uses this for `list` when COMPILED_SERIALIZERS is on, rendering
+with `core.renderers.FastJSONRenderer`.
+"""
+import datetime
+import decimal
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.utils import timezone
+from rest_framework import fields as drf_fields
+from rest_framework import relations, serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .instrumentation import phase
+from .pagination import KeysetPagination
+from .renderers import FastJSONRenderer
+
+# Serializer fields whose to_representation is a no-op on what these model fields load
+NATIVE_TYPES = {
+    drf_fields.CharField.to_representation: {'CharField', 'TextField', 'EmailField', 'SlugField', 'URLField'},
+    drf_fields.IntegerField.to_representation: {
+        'AutoField', 'BigAutoField', 'SmallAutoField', 'IntegerField', 'BigIntegerField', 'SmallIntegerField',
+        'PositiveIntegerField', 'PositiveBigIntegerField', 'PositiveSmallIntegerField',
+    },
+    drf_fields.BooleanField.to_representation: {'BooleanField'},
+    drf_fields.ReadOnlyField.to_representation: None,  # any type
+}
+
+
+class NotCompilable(Exception):
+    """ The serializer reads something `.values()` can't provide. """
+
+
+class Uncompiled(Exception):
+    """ Raised by a converter for a row it can't represent. """
+
+
+def identity(value):
+    return value
+
+
+def _decimal_converter(field, context):
+    coerce_to_string = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+    if field.localize or field.normalize_output or not coerce_to_string or field.decimal_places is None:
+        return field.to_representation
+    exponent = decimal.Decimal('.1') ** field.decimal_places
+    decimal_context = decimal.getcontext().copy()
+    if field.max_digits is not None:
+        decimal_context.prec = field.max_digits
+    rounding = field.rounding
+
+    def convert(value):
+        if not isinstance(value, decimal.Decimal):
+            return field.to_representation(value)
+        return f'{value.quantize(exponent, rounding=rounding, context=decimal_context):f}'
+    return convert
+
+
+def _datetime_converter(field, context):
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if output_format is None or output_format.lower() != drf_fields.ISO_8601 or field_timezone is None:
+        return field.to_representation
+
+    def convert(value):
+        if not isinstance(value, datetime.datetime) or not timezone.is_aware(value):
+            return field.to_representation(value)
+        value = value.astimezone(field_timezone).isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return convert
+
+
+def _choice_converter(field, context):
+    choices = field.choice_strings_to_values
+
+    def convert(value):
+        if value == '' or not isinstance(value, str):
+            return field.to_representation(value)
+        return choices.get(value, value)
+    return convert
+
+
+def _file_converter(field, model_field, context):
+    if not getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL):
+        return lambda name: name or None
+    storage, request = model_field.storage, context.get('request')
+
+    def convert(name):
+        if not name:
+            return None
+        url = storage.url(name)
+        return request.build_absolute_uri(url) if request is not None else url
+    return convert
+
+
+def _model_field(model, attr):
+    """ The concrete model field `attr`, which `.values(attr)` reads directly. """
+    try:
+        model_field = model._meta.get_field(attr)
+    except FieldDoesNotExist:
+        raise NotCompilable(attr)
+    if not model_field.concrete or model_field.many_to_many:
+        raise NotCompilable(attr)
+    return model_field
+
+
+def _compile_field(field, model, context):
+    """
+    (column, converter, whether None skips the converter) for one serializer field.
+    For a concrete, non-file field the attribute a serializer reads is the column
+    value itself, so `field.to_representation` is always a correct converter; the
+    specialized ones only skip work.
+    """
+    if hasattr(field, 'compile_representation'):
+        column, convert = field.compile_representation(context)
+        return column, convert, False
+    if field.source == '*' or len(field.source_attrs) != 1 or isinstance(
+        field, (serializers.BaseSerializer, drf_fields.SerializerMethodField, drf_fields.ModelField,
+                drf_fields.FloatField)
+    ):
+        # Floats are left out to keep FastJSONRenderer byte-identical
+        raise NotCompilable(field.field_name)
+
+    column = field.source_attrs[0]
+    model_field = _model_field(model, column)
+    if isinstance(field, relations.PrimaryKeyRelatedField):
+        if field.pk_field is not None or not model_field.is_relation:
+            raise NotCompilable(field.field_name)
+        return column, identity, True
+    if model_field.is_relation or isinstance(field, relations.RelatedField):
+        raise NotCompilable(field.field_name)
+
+    representation = type(field).to_representation
+    if representation in NATIVE_TYPES and (
+        NATIVE_TYPES[representation] is None or model_field.get_internal_type() in NATIVE_TYPES[representation]
+    ):
+        return column, identity, True
+    if representation is drf_fields.BigIntegerField.to_representation and not getattr(
+        field, 'coerce_to_string', api_settings.COERCE_BIGINT_TO_STRING
+    ) and model_field.get_internal_type() in NATIVE_TYPES[drf_fields.IntegerField.to_representation]:
+        return column, identity, True
+    if representation is drf_fields.DecimalField.to_representation:
+        return column, _decimal_converter(field, context), True
+    if representation is drf_fields.DateTimeField.to_representation:
+        return column, _datetime_converter(field, context), True
+    if representation is drf_fields.ChoiceField.to_representation:
+        return column, _choice_converter(field, context), True
+    if isinstance(field, drf_fields.FileField):
+        if representation is not drf_fields.FileField.to_representation:
+            raise NotCompilable(field.field_name)
+        return column, _file_converter(field, model_field, context), True
+    return column, field.to_representation, True
+
+
+@lru_cache(maxsize=None)
+def _readable_fields(serializer_class):
+    return [field for field in serializer_class().fields.values() if not field.write_only]
+
+
+class CompiledSerializer:
+    """
+    The read side of `serializer_class`, from `.values()` rows. Raises NotCompilable
+    if a field can't be compiled.
+    """
+
+    def __init__(self, serializer_class, context=None):
+        context = context or {}
+        model = serializer_class.Meta.model
+        self.plan = []
+        for field in _readable_fields(serializer_class):
+            column, convert, skip_none = _compile_field(field, model, context)
+            self.plan.append((field.field_name, column, convert, skip_none))
+        self.columns = list(dict.fromkeys(column for _name, column, _convert, _skip in self.plan))
+
+    def rows(self, queryset, *extra_columns):
+        """ `queryset` as dicts of the columns the plan reads (plus `extra_columns`). """
+        columns = self.columns + [column for column in extra_columns if column not in self.columns]
+        return queryset.select_related(None).prefetch_related(None).values(*columns)
+
+    def to_representation(self, row):
+        ret = {}
+        for name, column, convert, skip_none in self.plan:
+            value = row[column]
+            ret[name] = None if skip_none and value is None else convert(value)
+        return ret
+
+    def represent(self, rows):
+        """ The representation of every row in `rows`; raises Uncompiled. """
+        return [self.to_representation(row) for row in rows]
+
+
+@lru_cache(maxsize=None)
+def is_compilable(serializer_class):
+    try:
+        CompiledSerializer(serializer_class)
+    except NotCompilable:
+        return False
+    return True
+
+
+def compile_serializer(serializer_class, context=None):
+    """ A CompiledSerializer for `serializer_class`, or None if it can't be compiled. """
+    if not (issubclass(serializer_class, serializers.ModelSerializer) and is_compilable(serializer_class)):
+        return None
+    return CompiledSerializer(serializer_class, context)
+
+
+class CompiledListMixin:
+    """
+    Generic view mixin: with COMPILED_SERIALIZERS on, `list` reads `.values()` rows
+    and represents them with the compiled serializer instead of instantiating models
+    and running the serializer, and JSON is rendered with FastJSONRenderer. The
+    response body is the same byte for byte.
+    """
+
+    def compiled_serializer(self):
+        if not settings.COMPILED_SERIALIZERS:
+            return None
+        return compile_serializer(self.get_serializer_class(), self.get_serializer_context())
+
+    def list(self, request, *args, **kwargs):
+        compiled = self.compiled_serializer()
+        if compiled is None:
+            return super().list(request, *args, **kwargs)
+        if type(request.accepted_renderer) is JSONRenderer:
+            # The compiled representation holds no floats, see core.renderers
+            request.accepted_renderer = FastJSONRenderer()
+        queryset = self.filter_queryset(self.get_queryset())
+        # Keyset pagination reads the cursor position from the rows
+        ordering = getattr(self, 'keyset_ordering', KeysetPagination.ordering)
+        rows = compiled.rows(queryset, *(field.lstrip('-') for field in ordering))
+        page = self.paginate_queryset(rows)
+        try:
+            with phase('serialize'):
+                data = compiled.represent(page if page is not None else rows)
+        except Uncompiled:
+            return super().list(request, *args, **kwargs)
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
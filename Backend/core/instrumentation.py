@@ -0,0 +1,350 @@
+"""
+Request instrumentation: latency, SQL and phase timings per route.
+
+`InstrumentationMiddleware` times every request into a per-route latency histogram.
+A sampled share of requests (INSTRUMENTATION_SAMPLE_RATE) is also profiled:
+
+* a connection `execute_wrapper` counts and times their SQL;
+* a statement run again within the same request counts as a duplicate, and one run
+  INSTRUMENTATION_N_PLUS_ONE times or more is reported as an N+1 signature (the
+  statement with its IN lists collapsed) and logged;
+* the time spent authenticating (`phase('auth')`, see accounts.authentication),
+  serializing (`serializer.data`, or a compiled serializer's rows, see core.compiled)
+  and rendering the response body is split out, each without its SQL (which counts
+  as `db`); what remains is `app`, the view's own Python.
+
+Profiled responses to admins (or to anyone with INSTRUMENTATION_SERVER_TIMING) carry
+a `Server-Timing` header, which browser dev tools show next to the request. Metrics
+are labeled with the standard HTTP methods, any other being counted as `other`, so
+clients can't add label series. Everything is exported in the Prometheus text format by
+`metrics_view` (/metrics). Metrics are kept per process, so scrape each worker.
+
+Unsampled requests cost two clock reads and a locked dict update; the wrapper on
+their queries only looks up a context variable. benchmarks/instrumentation_overhead.py
+measures the difference.
+"""
+import hmac
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import Http404, HttpResponse
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PHASES = ('db', 'auth', 'serialize', 'render', 'app')
+# Distinct N+1 statements kept per process, so a misbehaving route can't grow the export
+MAX_SIGNATURES = 200
+SIGNATURE_LENGTH = 300
+UNMATCHED = '<unmatched>'
+METHODS = frozenset(('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS', 'TRACE', 'CONNECT'))
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_IN_LIST = re.compile(r'\((?:%s, )+%s\)')
+_profile = ContextVar('instrumentation_profile', default=None)
+_serializer_data = serializers.BaseSerializer.data
+
+
+def signature(sql):
+    """ `sql` with IN lists collapsed, so the same query over different rows matches. """
+    return _IN_LIST.sub('(...)', sql)
+
+
+class Profile:
+    """ What one sampled request spent, filled in while it runs. """
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.statements = Counter()
+        self.phases = defaultdict(float)
+        self.active = set()
+
+    def query(self, sql, seconds):
+        self.queries += 1
+        self.db_seconds += seconds
+        self.statements[signature(sql)] += 1
+
+    def duplicates(self):
+        return sum(count - 1 for count in self.statements.values())
+
+    def repeated(self):
+        return [sql for sql, count in self.statements.items() if count >= settings.INSTRUMENTATION_N_PLUS_ONE]
+
+    def timings(self, total):
+        """ {phase: seconds}, `app` being the request's time outside the others. """
+        timings = {'db': self.db_seconds}
+        timings.update((name, self.phases[name]) for name in PHASES[1:-1])
+        timings['app'] = max(total - sum(timings.values()), 0.0)
+        return timings
+
+
+@contextmanager
+def phase(name):
+    """
+    Times the block as phase `name` of the current profiled request, excluding its
+    SQL. A block nested in the same phase (a serializer using another's `data`) is
+    already counted.
+    """
+    profile = _profile.get()
+    if profile is None or name in profile.active:
+        yield
+        return
+    started, db_before = time.perf_counter(), profile.db_seconds
+    profile.active.add(name)
+    try:
+        yield
+    finally:
+        profile.active.discard(name)
+        profile.phases[name] += time.perf_counter() - started - (profile.db_seconds - db_before)
+
+
+def record_query(execute, sql, params, many, context):
+    """ Connection execute wrapper: times the statement when its request is profiled. """
+    profile = _profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.query(sql, time.perf_counter() - started)
+
+
+def _add_recorder(sender=None, connection=None, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def install_query_recorder():
+    """
+    Puts `record_query` on every connection. It stays installed rather than being
+    wrapped around each request, because async views run their queries on other
+    threads' connections; the profile follows the request there as a context variable.
+    """
+    connection_created.connect(_add_recorder, dispatch_uid='core.instrumentation')
+    for connection in connections.all(initialized_only=True):
+        _add_recorder(connection=connection)
+
+
+def _timed_data(self):
+    with phase('serialize'):
+        return _serializer_data.fget(self)
+
+
+def install_serializer_timer():
+    """
+    Times `data` of every serializer (and list serializer), where `to_representation`
+    runs, as the `serialize` phase.
+    """
+    if serializers.BaseSerializer.data is _serializer_data:
+        serializers.BaseSerializer.data = property(_timed_data)
+
+
+class Registry:
+    """ The process's metrics. """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.requests = Counter()            # (route, method, status)
+            self.durations = {}                  # (route, method): [bucket counts..., +Inf], sum
+            self.sampled = Counter()             # route
+            self.queries = Counter()             # route
+            self.duplicates = Counter()          # route
+            self.phase_seconds = Counter()       # (route, phase)
+            self.n_plus_one = Counter()          # (route, statement)
+
+    def observe(self, route, method, status, seconds, profile=None, timings=None):
+        with self.lock:
+            self.requests[route, method, status] += 1
+            counts, total = self.durations.get((route, method)) or ([0] * (len(BUCKETS) + 1), 0.0)
+            for index, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    counts[index] += 1
+            counts[-1] += 1
+            self.durations[route, method] = counts, total + seconds
+            if profile is None:
+                return
+            self.sampled[route] += 1
+            self.queries[route] += profile.queries
+            self.duplicates[route] += profile.duplicates()
+            for name, value in timings.items():
+                self.phase_seconds[route, name] += value
+            for statement in profile.repeated():
+                key = route, statement[:SIGNATURE_LENGTH]
+                if key in self.n_plus_one or len(self.n_plus_one) < MAX_SIGNATURES:
+                    self.n_plus_one[key] += 1
+
+    def export(self):
+        """ The metrics in the Prometheus text exposition format. """
+        with self.lock:
+            lines = []
+            _family(lines, 'http_requests_total', 'counter', "Requests by route, method and status.", [
+                ({'route': route, 'method': method, 'status': status}, count)
+                for (route, method, status), count in sorted(self.requests.items())
+            ])
+            lines += ['# HELP http_request_duration_seconds Request latency by route and method.',
+                      '# TYPE http_request_duration_seconds histogram']
+            for (route, method), (counts, total) in sorted(self.durations.items()):
+                labels = {'route': route, 'method': method}
+                for bound, count in zip(BUCKETS + ('+Inf',), counts):
+                    lines.append(_sample('http_request_duration_seconds_bucket', {**labels, 'le': str(bound)}, count))
+                lines.append(_sample('http_request_duration_seconds_sum', labels, total))
+                lines.append(_sample('http_request_duration_seconds_count', labels, counts[-1]))
+            _family(lines, 'http_profiled_requests_total', 'counter', "Requests profiled by sampling.", [
+                ({'route': route}, count) for route, count in sorted(self.sampled.items())
+            ])
+            _family(lines, 'http_db_queries_total', 'counter', "SQL statements run by profiled requests.", [
+                ({'route': route}, count) for route, count in sorted(self.queries.items())
+            ])
+            _family(lines, 'http_db_duplicate_queries_total', 'counter',
+                    "Statements profiled requests ran more than once.", [
+                        ({'route': route}, count) for route, count in sorted(self.duplicates.items())
+                    ])
+            _family(lines, 'http_phase_seconds_total', 'counter',
+                    "Time profiled requests spent in SQL, authentication, serialization, rendering and the rest.", [
+                        ({'route': route, 'phase': name}, seconds)
+                        for (route, name), seconds in sorted(self.phase_seconds.items())
+                    ])
+            _family(lines, 'http_n_plus_one_total', 'counter',
+                    "Profiled requests that repeated a statement INSTRUMENTATION_N_PLUS_ONE times or more.", [
+                        ({'route': route, 'statement': statement}, count)
+                        for (route, statement), count in sorted(self.n_plus_one.items())
+                    ])
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _sample(name, labels, value):
+    rendered = ','.join(f'{key}="{_escape(label)}"' for key, label in labels.items())
+    return f'{name}{{{rendered}}} {value}'
+
+
+def _family(lines, name, kind, help_text, samples):
+    lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+    lines += [_sample(name, labels, value) for labels, value in samples]
+
+
+registry = Registry()
+
+
+def method_label(method):
+    return method if method in METHODS else 'other'
+
+
+def shows_server_timing(request):
+    """ Query counts and SQL time are for the team: admins, or everyone with the setting on. """
+    if settings.INSTRUMENTATION_SERVER_TIMING:
+        return True
+    # DRF sets the authenticated user on the request it wraps
+    user = request.__dict__.get('user')
+    return bool(user is not None and user.is_authenticated and getattr(user, 'role', None) == 'Admin')
+
+
+def server_timing(profile, timings, total):
+    entries = [f'db;dur={timings["db"] * 1000:.2f};desc="{profile.queries} queries"']
+    entries += [f'{name};dur={timings[name] * 1000:.2f}' for name in PHASES[1:]]
+    entries.append(f'total;dur={total * 1000:.2f}')
+    return ', '.join(entries)
+
+
+class InstrumentationMiddleware:
+    """
+    Times every request and profiles a sampled share of them, see the module
+    docstring. Remove it with INSTRUMENTATION=0.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.INSTRUMENTATION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        install_query_recorder()
+        install_serializer_timer()
+
+    def start(self):
+        rate = settings.INSTRUMENTATION_SAMPLE_RATE
+        profile = Profile() if rate >= 1 or (rate > 0 and random.random() < rate) else None
+        return profile, _profile.set(profile), time.perf_counter()
+
+    def finish(self, request, response, profile, started):
+        total = time.perf_counter() - started
+        match = request.resolver_match
+        route = match.route if match is not None else UNMATCHED
+        method = method_label(request.method)
+        if profile is None:
+            registry.observe(route, method, response.status_code, total)
+            return response
+        timings = profile.timings(total)
+        registry.observe(route, method, response.status_code, total, profile, timings)
+        for statement in profile.repeated():
+            logger.warning("%s %s ran %d times: %s", method, route, profile.statements[statement], statement)
+        if shows_server_timing(request):
+            response['Server-Timing'] = server_timing(profile, timings, total)
+        return response
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        profile, token, started = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            _profile.reset(token)
+        return self.finish(request, response, profile, started)
+
+    async def __acall__(self, request):
+        profile, token, started = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _profile.reset(token)
+        return self.finish(request, response, profile, started)
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook returns
+        profile = _profile.get()
+        if profile is not None:
+            started = time.perf_counter()
+
+            def rendered(response):
+                profile.phases['render'] += time.perf_counter() - started
+            response.add_post_render_callback(rendered)
+        return response
+
+
+def metrics_view(request):
+    """
+    The Prometheus scrape target. Requires `Authorization: Bearer <METRICS_TOKEN>`;
+    without a METRICS_TOKEN it is only served with DEBUG on.
+    """
+    token = settings.METRICS_TOKEN
+    if token:
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return HttpResponse(status=403)
+    elif not settings.DEBUG:
+        raise Http404
+    return HttpResponse(registry.export(), content_type=CONTENT_TYPE)
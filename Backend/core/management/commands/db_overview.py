@@ -0,0 +1,36 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from core import reporting
+
+
+class Command(BaseCommand):
+    help = (
+        "Row counts and sample rows for this project's models. Counts are the database's statistics "
+        "estimates unless --exact (or there are none yet), so large tables aren't scanned."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('models', nargs='*', help="app_label.ModelName; defaults to every project model.")
+        parser.add_argument('--exact', action='store_true', help="COUNT(*) every table.")
+        parser.add_argument('--samples', type=int, default=3)
+        parser.add_argument('--parallel', type=int, default=1, help="Models counted at once, one process each.")
+        parser.add_argument('--format', choices=['text', 'jsonl'], default='text')
+
+    def handle(self, *args, **options):
+        labels = options['models'] or [model._meta.label for model in reporting.project_models()]
+        try:
+            reports = reporting.run_in_parallel(
+                reporting.overview, [(label, options['exact'], options['samples']) for label in labels],
+                options['parallel'],
+            )
+        except (LookupError, ValueError) as exc:
+            raise CommandError(exc)
+
+        for report in reports:
+            if options['format'] == 'jsonl':
+                self.stdout.write(json.dumps(report, default=str))
+                continue
+            approximately = '~' if report['estimated'] else ''
+            self.stdout.write(f"{report['model']}: {approximately}{report['rows']} rows")
+            for sample in report['samples']:
+                self.stdout.write(f"    {sample}")
@@ -0,0 +1,177 @@
+"""
+Pagination used by every list endpoint.
+
+Page numbers remain the default for the existing UI. Passing `?pagination=cursor`
+(or following a `cursor` link) switches to keyset pagination on `(created_at, id)`,
+which seeks straight to the next page through an index instead of running
+`COUNT(*)` and `OFFSET n`, so page 500 costs the same as page 1.
+"""
+import base64
+import json
+
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    cursor_query_param = 'cursor'
+    page_size_query_param = None
+    invalid_cursor_message = 'Invalid cursor'
+    # Views may override with `keyset_ordering`, e.g. oldest first for review queues
+    ordering = ('-created_at', '-id')
+
+    def __init__(self, page_size):
+        self.page_size = page_size
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset, position, reverse = self.page_queryset(queryset, request, view)
+        return self.take_page(list(queryset), position, reverse)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        queryset, position, reverse = self.page_queryset(queryset, request, view)
+        return self.take_page([item async for item in queryset], position, reverse)
+
+    def page_queryset(self, queryset, request, view):
+        """ The page (plus one row, to tell whether there is a next one) as a lazy queryset. """
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.ordering = tuple(getattr(view, 'keyset_ordering', self.ordering))
+        position, reverse = self.decode_cursor(request)
+
+        ordering = self.ordering if not reverse else tuple(self.flip(field) for field in self.ordering)
+        if position is not None:
+            queryset = queryset.filter(self.seek(ordering, position))
+        return queryset.order_by(*ordering)[:self.page_size + 1], position, reverse
+
+    def take_page(self, results, position, reverse):
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    @staticmethod
+    def flip(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    @staticmethod
+    def seek(ordering, position):
+        """
+        (created_at, id) < (%s, %s) for descending ordering, > for ascending. The
+        redundant `created_at <= %s` bound lets the planner seek the index range
+        instead of scanning it from the start to evaluate the OR.
+        """
+        (first, second), (first_value, second_value) = ordering, position
+        first_name, second_name = first.lstrip('-'), second.lstrip('-')
+        first_op = 'lt' if first.startswith('-') else 'gt'
+        second_op = 'lt' if second.startswith('-') else 'gt'
+        return Q(**{f'{first_name}__{first_op}e': first_value}) & (
+            Q(**{f'{first_name}__{first_op}': first_value})
+            | Q(**{first_name: first_value, f'{second_name}__{second_op}': second_value})
+        )
+
+    def position_of(self, item):
+        names = [field.lstrip('-') for field in self.ordering]
+        if isinstance(item, dict):
+            return [item[name] for name in names]
+        return [getattr(item, name) for name in names]
+
+    def encode_cursor(self, item, reverse):
+        first, second = self.position_of(item)
+        payload = {'p': [first.isoformat(), second], 'r': reverse}
+        token = base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode()
+        url = remove_query_param(self.base_url, 'page')
+        return replace_query_param(url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode()).decode())
+            first, second = payload['p']
+            position = (parse_datetime(first), int(second))
+            reverse = bool(payload.get('r'))
+        except (TypeError, ValueError, KeyError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if position[0] is None:
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+
+class StandardPagination(PageNumberPagination):
+    """ Page numbers by default, keyset pagination on request. """
+    mode_query_param = 'pagination'
+
+    def __init__(self):
+        self.keyset = None
+
+    def wants_keyset(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or KeysetPagination.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.wants_keyset(request):
+            page_size = self.get_page_size(request)
+            if not page_size:
+                return None
+            self.keyset = KeysetPagination(page_size)
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """ paginate_queryset for async views: the same pages, read with the async ORM. """
+        if self.wants_keyset(request):
+            page_size = self.get_page_size(request)
+            if not page_size:
+                return None
+            self.keyset = KeysetPagination(page_size)
+            return await self.keyset.apaginate_queryset(queryset, request, view)
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        paginator = self.django_paginator_class(queryset, page_size)
+        # Counted up front, so the paginator doesn't run a synchronous COUNT(*)
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+        self.page.object_list = [item async for item in self.page.object_list]
+        self.request = request
+        return list(self.page)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,100 @@
+"""
+Query plan checks for the hot read paths.
+
+`full_scans(sql)` asks the database how it would run a statement (SQLite's
+`EXPLAIN QUERY PLAN`, PostgreSQL's `EXPLAIN`) and returns the tables it would read
+in full rather than through an index. `QueryPlanTestMixin` runs that over every
+SELECT an endpoint issues, so a filter or ordering that loses its index fails the
+test suite instead of a production page.
+
+A small table is cheaper to scan than to probe, so on PostgreSQL sequential scans
+are switched off while explaining: a Seq Scan that remains means no index applies.
+SQLite reports the plan it would use regardless of table size.
+"""
+import json
+import unittest
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+VENDORS = ('sqlite', 'postgresql')
+
+# SQLite plan rows that read something other than a stored table
+_SQLITE_SKIP = ('SCAN CONSTANT ROW', 'SCAN (subquery', 'SCAN subquery')
+
+
+def explain(sql, using=connection):
+    """ The plan for `sql` (with its parameters inlined) as text lines. """
+    with using.cursor() as cursor:
+        if using.vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+        if using.vendor == 'postgresql':
+            cursor.execute('SET enable_seqscan = off')
+            try:
+                cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+                plan = cursor.fetchone()[0]
+            finally:
+                cursor.execute('RESET enable_seqscan')
+            return [json.dumps(node) for node in _plan_nodes(plan if isinstance(plan, list) else json.loads(plan))]
+        raise NotImplementedError(f"No query plan check for {using.vendor}")
+
+
+def _plan_nodes(plan):
+    stack = [entry['Plan'] for entry in plan]
+    while stack:
+        node = stack.pop()
+        stack.extend(node.get('Plans', ()))
+        yield {key: value for key, value in node.items() if key != 'Plans'}
+
+
+def full_scans(sql, using=connection):
+    """ The tables `sql` would read row by row without an index. """
+    if using.vendor == 'postgresql':
+        nodes = [json.loads(line) for line in explain(sql, using)]
+        return [node['Relation Name'] for node in nodes if node['Node Type'] == 'Seq Scan']
+    scans = []
+    for line in explain(sql, using):
+        if line.startswith('SCAN ') and not line.startswith(_SQLITE_SKIP) and not (
+            ' USING ' in line or ' VIRTUAL TABLE ' in line
+        ):
+            scans.append(line.split()[1])
+    return scans
+
+
+def analyze(using=connection):
+    """ Refreshes the planner's table statistics, e.g. after seeding test data. """
+    with using.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+class QueryPlanTestMixin:
+    """
+    TestCase mixin: assert that the SELECTs a block runs all read through indexes.
+    The test case is skipped on databases `explain` doesn't support.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        if connection.vendor not in VENDORS:
+            raise unittest.SkipTest(f"No query plan check for {connection.vendor}")
+        super().setUpClass()
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan, f"{index_name} is not used by:\n  {queryset.query}\n{plan}")
+
+    def assertNoFullScans(self, func, *args, allowed=(), **kwargs):
+        """ Calls `func(*args, **kwargs)` and checks its queries; returns its result. """
+        with CaptureQueriesContext(connection) as captured:
+            result = func(*args, **kwargs)
+        selects = [query['sql'] for query in captured.captured_queries if query['sql'].lstrip().upper().startswith('SELECT')]
+        self.assertTrue(selects, "No SELECT was run")
+        problems = []
+        for sql in selects:
+            scanned = [table for table in full_scans(sql) if table not in allowed]
+            if scanned:
+                problems.append(f"{', '.join(scanned)} scanned by:\n  {sql}\n  " + '\n  '.join(explain(sql)))
+        if problems:
+            self.fail('Full table scans:\n' + '\n'.join(problems))
+        return result
@@ -0,0 +1,40 @@
+"""
+JSON rendering with orjson when it is installed.
+
+`FastJSONRenderer` produces the same bytes as DRF's JSONRenderer for compact output
+(no `indent`): orjson escapes strings the same way as `json.dumps(...,
+ensure_ascii=False)`, and anything orjson doesn't encode natively (Decimal, dates,
+lazy strings, ...) goes through DRF's encoder. Floats are the exception: exponent
+notation is spelled differently (1e16 rather than 1e+16) and NaN / Infinity become
+null instead of an error, so this is only used where the data holds no floats (see
+core.compiled). Falls back to JSONRenderer without orjson, for indented output, and
+for anything orjson refuses.
+"""
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # optional
+    orjson = None
+
+if orjson is not None:
+    ORJSON_OPTIONS = (
+        orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_SUBCLASS | orjson.OPT_PASSTHROUGH_DATACLASS
+    )
+
+
+class FastJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None or data is None or not self.compact or self.ensure_ascii
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            # Non-string keys, integers beyond 64 bits, ...
+            return super().render(data, accepted_media_type, renderer_context)
+        # As JSONRenderer: keep the output a strict JavaScript subset
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
@@ -0,0 +1,135 @@
+"""
+Whole-table reports for the `db_overview` and `dump_models` commands.
+
+Rows are read as tuples with `.values_list(...).iterator(chunk_size=...)` (a
+server-side cursor on PostgreSQL), never as model instances, and written as CSV or
+JSON Lines through a buffer flushed once per chunk, so memory stays flat however
+large the table. Where an estimate will do, row counts come from the planner's
+statistics (`approximate_count`): a catalog lookup instead of scanning the table.
+
+Models can be processed in parallel, each in a forked process that opens its own
+database connection; this needs a server or file-backed database, not SQLite's
+in-memory test database.
+"""
+import csv
+import io
+import json
+import multiprocessing
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection, connections
+
+FORMATS = ('csv', 'jsonl')
+DEFAULT_CHUNK_SIZE = 5000
+# Left out of dumps and samples unless asked for
+SENSITIVE_FIELDS = {'password'}
+
+
+def project_models():
+    """ The models of this project's own apps, as opposed to Django's and third parties'. """
+    base = str(settings.BASE_DIR)
+    return [
+        model for app_config in apps.get_app_configs() if app_config.path.startswith(base)
+        for model in app_config.get_models()
+    ]
+
+
+def approximate_count(model, using=connection):
+    """ The planner's estimate of the model's row count, or None without statistics. """
+    table = model._meta.db_table
+    with using.cursor() as cursor:
+        if using.vendor == 'postgresql':
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)",
+                           [using.ops.quote_name(table)])
+            row = cursor.fetchone()
+            # -1 (0 before PostgreSQL 14) until the table is first vacuumed or analyzed
+            return row[0] if row and row[0] > 0 else None
+        if using.vendor == 'sqlite':
+            # Filled by ANALYZE; the first number of each row is the table's row count
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+            if cursor.fetchone() is None:
+                return None
+            cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [table])
+            row = cursor.fetchone()
+            return int(row[0].split()[0]) if row else None
+    return None
+
+
+def count_rows(model, exact=False):
+    """ (rows, estimated): the statistics' estimate unless `exact` or there is none. """
+    if not exact:
+        estimate = approximate_count(model)
+        if estimate is not None:
+            return estimate, True
+    return model._default_manager.count(), False
+
+
+def dump_fields(model, include_sensitive=False):
+    return [
+        field.attname for field in model._meta.concrete_fields
+        if include_sensitive or field.name not in SENSITIVE_FIELDS
+    ]
+
+
+def stream_rows(model, fields, chunk_size=DEFAULT_CHUNK_SIZE):
+    return model._default_manager.order_by('pk').values_list(*fields).iterator(chunk_size=chunk_size)
+
+
+def write_rows(write, fields, rows, fmt, chunk_size=DEFAULT_CHUNK_SIZE):
+    """ Writes `rows` as CSV (with a header) or JSON Lines, one `write` per chunk; returns the row count. """
+    buffer = io.StringIO()
+    if fmt == 'csv':
+        writer = csv.writer(buffer)
+        writer.writerow(fields)
+        add = writer.writerow
+    else:
+        def add(row):
+            buffer.write(json.dumps(dict(zip(fields, row)), default=str))
+            buffer.write('\n')
+
+    count = 0
+    for count, row in enumerate(rows, start=1):
+        add(row)
+        if count % chunk_size == 0:
+            write(buffer.getvalue())
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        write(buffer.getvalue())
+    return count
+
+
+def overview(label, exact=False, samples=3):
+    """ A model's row count and first few rows, as a dict. """
+    model = apps.get_model(label)
+    rows, estimated = count_rows(model, exact)
+    fields = dump_fields(model)
+    first = model._default_manager.order_by('pk').values_list(*fields)[:samples]
+    return {
+        'model': label, 'table': model._meta.db_table, 'rows': rows, 'estimated': estimated,
+        'samples': [dict(zip(fields, row)) for row in first],
+    }
+
+
+def dump(label, fmt, path, chunk_size=DEFAULT_CHUNK_SIZE, include_sensitive=False):
+    """ Streams a model's table to `path`; returns (label, rows, seconds). """
+    model = apps.get_model(label)
+    fields = dump_fields(model, include_sensitive)
+    started = time.perf_counter()
+    with open(path, 'w', newline='', encoding='utf-8') as stream:
+        rows = write_rows(stream.write, fields, stream_rows(model, fields, chunk_size), fmt, chunk_size)
+    return label, rows, time.perf_counter() - started
+
+
+def run_in_parallel(func, arguments, workers):
+    """
+    [func(*args) for args in arguments], spread over up to `workers` forked processes.
+    Connections are closed first so that no child inherits one: each opens its own.
+    """
+    if workers <= 1 or len(arguments) <= 1:
+        return [func(*args) for args in arguments]
+    connections.close_all()
+    with multiprocessing.get_context('fork').Pool(min(workers, len(arguments))) as pool:
+        return pool.starmap(func, arguments)
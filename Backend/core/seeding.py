@@ -0,0 +1,336 @@
+"""
+Synthetic data at production scale, for `manage.py seed` and the benchmarks.
+
+Rows are generated in chunks of `batch_size`, each from its own `random.Random`
+seeded with (seed, table, chunk), and get explicit primary keys following the
+largest existing one. The same seed and batch size therefore give the same rows
+however many processes insert them, and chunks can reference other tables' rows (an
+order's customer and products) by id without reading them back.
+
+Columns are drawn a chunk at a time (`Random.choices(..., k=n)`) from skewed
+distributions: recent days busier than old ones and daytime busier than night, a
+few customers and products accounting for most orders and documents, log-normal
+prices, small quantities.
+
+Writes are bulk INSERTs, which send no model signals; what their receivers would
+have done is done once at the end instead (compliance counters through
+`reconcile`, which also bumps the catalog cache generation, and the sales rollups
+through `analytics.rollups.rebuild`). The product search index is dropped while
+loading and rebuilt afterwards rather than maintained row by row, and the tables
+are analyzed for the planner.
+
+On PostgreSQL chunks can be inserted by several forked processes, each opening its
+own connection. SQLite allows a single writer, so it always uses one.
+"""
+import hashlib
+import multiprocessing
+import os
+import random
+import time
+from array import array
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+from django.db.models import Max
+
+from accounts.models import User
+from analytics.rollups import rebuild as rebuild_rollups
+from compliance.counters import reconcile
+from compliance.models import Compliance
+from orders.models import Order, OrderItem
+from orders.services import build_order_summaries
+from products.catalog import category_ids
+from products.models import Category, Product
+from products.search import get_search_backend
+from .query_plans import analyze
+
+BATCH_SIZE = 5000
+PASSWORD = 'seed-password'
+UNTIL = datetime(2026, 1, 1, tzinfo=timezone.utc)
+DEFAULTS = {
+    'admins': 5, 'authorities': 50, 'distributors': 500, 'customers': 50000,
+    'categories': 50, 'products': 100000, 'orders': 1000000, 'documents': 200000,
+}
+ROLES = [('Admin', 'admins'), ('Authority', 'authorities'), ('Distributor', 'distributors'), ('Customer', 'customers')]
+TABLES = ('users', 'products', 'orders', 'documents')
+
+ADJECTIVES = ['sterile', 'nitrile', 'surgical', 'paediatric', 'oral', 'topical', 'digital', 'disposable']
+NOUNS = ['glove', 'mask', 'syringe', 'bandage', 'thermometer', 'tablet', 'syrup', 'catheter', 'gauze']
+FORMS = ['pack of 10', 'pack of 100', 'single unit', 'hospital grade', 'travel size']
+# Share of activity per hour of the day (UTC)
+HOURLY = [1, 1, 1, 1, 1, 2, 3, 5, 7, 8, 8, 8, 7, 7, 8, 8, 8, 7, 6, 6, 5, 4, 3, 2]
+STOCK = ([0, 5, 20, 100, 500, 2000], [5, 10, 25, 35, 20, 5])
+LINES = ([1, 2, 3, 4], [50, 25, 15, 10])
+QUANTITIES = ([1, 2, 3, 4, 5, 10], [55, 20, 10, 6, 5, 4])
+ORDER_STATUSES = (['Delivered', 'Shipped', 'Processing', 'Pending', 'Cancelled'], [70, 8, 7, 10, 5])
+PAYMENT = {'Delivered': 'Paid', 'Shipped': 'Paid', 'Processing': 'Paid', 'Pending': 'Pending', 'Cancelled': 'Failed'}
+REVIEW = (['Pending', 'Approved', 'Rejected'], [30, 55, 15])
+FILE_KB = ([4, 16, 64, 256], [40, 35, 20, 5])
+
+_plan = None  # The running plan, inherited by forked workers
+
+
+class Plan:
+    """ What to generate, and the id ranges and shared columns it is generated into. """
+
+    def __init__(self, seed=0, batch_size=BATCH_SIZE, until=UNTIL, days=365, files=False, password=PASSWORD,
+                 **counts):
+        unknown = counts.keys() - DEFAULTS.keys()
+        if unknown:
+            raise TypeError(f"Unknown counts: {', '.join(sorted(unknown))}")
+        self.seed, self.batch_size, self.until, self.days = seed, batch_size, until, days
+        self.files, self.password = files, password
+        self.counts = {**DEFAULTS, **counts}
+        self.counts['users'] = sum(self.counts[name] for _role, name in ROLES)
+        needs = {'orders': ('customers', 'products'), 'documents': ('distributors', 'authorities', 'products')}
+        for table, required in needs.items():
+            missing = [name for name in required if self.counts[table] and not self.counts[name]]
+            if missing:
+                raise ValueError(f"Generating {table} needs at least one of each of: {', '.join(missing)}")
+
+    def rng(self, table, start):
+        return random.Random(f'{self.seed}:{table}:{start}')
+
+    def prepare(self):
+        """ Reads the id bases and draws the columns chunks share; run before any chunk. """
+        self.base = {
+            model: (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+            for model in (User, Product, Order, OrderItem, Compliance)
+        }
+        self.roles, first = {}, self.base[User]
+        for role, name in ROLES:
+            self.roles[role] = range(first, first + self.counts[name])
+            first += self.counts[name]
+        self.password_hash = make_password(self.password)
+
+        names = [f"Category {i}" for i in range(self.counts['categories'])]
+        ids = category_ids(Category, names)
+        self.categories = [ids[name] for name in names]
+
+        rng = self.rng('columns', 0)
+        # Median price 11.00, a long tail of expensive products
+        self.prices = array('q', (max(50, round(rng.lognormvariate(7.0, 1.0))) for _ in range(self.counts['products'])))
+        self.lines = bytes(rng.choices(*LINES, k=self.counts['orders']))
+        # First item id of every orders chunk
+        self.item_ids, next_id = {}, self.base[OrderItem]
+        for start in range(0, self.counts['orders'], self.batch_size):
+            self.item_ids[start] = next_id
+            next_id += sum(self.lines[start:start + self.batch_size])
+
+    def timestamps(self, rng, count):
+        """ `count` times in the `days` before `until`, busier recently and by day. """
+        days = [self.days * rng.random() ** 2 for _ in range(count)]
+        hours = rng.choices(range(24), HOURLY, k=count)
+        return [
+            self.until - timedelta(days=int(day) + 1) + timedelta(hours=hour, seconds=rng.randrange(3600))
+            for day, hour in zip(days, hours)
+        ]
+
+    def skewed(self, rng, ids, count, power):
+        """ `count` picks from `ids`, the first ones far more often. """
+        return [ids[int(len(ids) * rng.random() ** power)] for _ in range(count)]
+
+    def product_ids(self):
+        return range(self.base[Product], self.base[Product] + self.counts['products'])
+
+
+def product_name(index):
+    return f"{ADJECTIVES[index % len(ADJECTIVES)].title()} {NOUNS[index // len(ADJECTIVES) % len(NOUNS)]} {index + 1}"
+
+
+def generate_users(plan, rng, start, count):
+    joined = plan.timestamps(rng, count)
+    users, first = [], plan.base[User]
+    for offset, date_joined in zip(range(start, start + count), joined):
+        pk = first + offset
+        role = next(role for role, ids in plan.roles.items() if pk in ids)
+        users.append(User(
+            id=pk, email=f'{role.lower()}-{pk}@seed.local', password=plan.password_hash, role=role,
+            is_staff=role == 'Admin', date_joined=date_joined,
+        ))
+    User.objects.bulk_create(users)
+    return {'users': count}
+
+
+def generate_products(plan, rng, start, count):
+    created = plan.timestamps(rng, count)
+    categories = plan.skewed(rng, plan.categories, count, 2)
+    stock = rng.choices(*STOCK, k=count)
+    forms = rng.choices(FORMS, k=count)
+    products = []
+    for index, created_at, category_id, quantity, form in zip(range(start, start + count), created, categories,
+                                                              stock, forms):
+        pk = plan.base[Product] + index
+        products.append(Product(
+            id=pk, sku=f'SEED-{pk:08d}', name=product_name(index), category_id=category_id,
+            description=f"{product_name(index).rsplit(' ', 1)[0]}, {form}",
+            price=Decimal(plan.prices[index]).scaleb(-2), stock=quantity,
+            created_at=created_at, updated_at=created_at,
+        ))
+    Product.objects.bulk_create(products)
+    return {'products': count}
+
+
+def generate_orders(plan, rng, start, count):
+    lines = plan.lines[start:start + count]
+    created = plan.timestamps(rng, count)
+    customers = plan.skewed(rng, plan.roles['Customer'], count, 2)
+    statuses = rng.choices(*ORDER_STATUSES, k=count)
+    quantities = iter(rng.choices(*QUANTITIES, k=sum(lines)))
+    products = plan.product_ids()
+    lines_by_order, item_id = {}, plan.item_ids[start]
+    for index, line_count, created_at, customer, status in zip(range(start, start + count), lines, created,
+                                                             customers, statuses):
+        # Counted by the rollup rebuild that ends the seed
+        order = Order(id=plan.base[Order] + index, user_id=customer, status=status, payment_status=PAYMENT[status],
+                      rolled_up=True, created_at=created_at, updated_at=created_at)
+        lines_of_order = []
+        # Distinct products per order, popular ones first
+        for product in dict.fromkeys(plan.skewed(rng, products, line_count, 3)):
+            position = product - plan.base[Product]
+            lines_of_order.append(OrderItem(
+                id=item_id, order=order, product_id=product, product_name=product_name(position),
+                product_sku=f'SEED-{product:08d}', quantity=next(quantities),
+                price_at_purchase=Decimal(plan.prices[position]).scaleb(-2),
+            ))
+            item_id += 1
+        order.total_amount = sum(item.price_at_purchase * item.quantity for item in lines_of_order)
+        lines_by_order[order] = lines_of_order
+    for order, summary in build_order_summaries(lines_by_order).items():
+        order.summary = summary
+    items = [item for lines_of_order in lines_by_order.values() for item in lines_of_order]
+    Order.objects.bulk_create(list(lines_by_order))
+    OrderItem.objects.bulk_create(items)
+    return {'orders': count, 'order items': len(items)}
+
+
+def generate_documents(plan, rng, start, count):
+    created = plan.timestamps(rng, count)
+    products = plan.skewed(rng, plan.product_ids(), count, 2)
+    uploaders = rng.choices(plan.roles['Distributor'], k=count)
+    statuses = rng.choices(*REVIEW, k=count)
+    reviewers = rng.choices(plan.roles['Authority'], k=count)
+    delays = rng.choices(range(1, 96), k=count)
+    pages = rng.choices(range(1, 40), k=count)
+    # Separate stream, so the rows don't depend on --files
+    content_rng, sizes = plan.rng('files', start), rng.choices(*FILE_KB, k=count)
+    documents = []
+    for index, created_at, product, uploader, status, reviewer, delay, page_count, size in zip(
+        range(start, start + count), created, products, uploaders, statuses, reviewers, delays, pages, sizes
+    ):
+        pk = plan.base[Compliance] + index
+        document = Compliance(
+            id=pk, product_id=product, uploaded_by_id=uploader, document_file=f'compliance_docs/seed-{pk}.pdf',
+            approval_status=status, created_at=created_at, processing_status='Done', page_count=page_count,
+        )
+        if status != 'Pending':
+            document.approved_by_id, document.approved_at = reviewer, created_at + timedelta(hours=delay)
+        if plan.files:
+            content = b'%PDF-1.4\n' + content_rng.randbytes(size * 1024)
+            with open(os.path.join(settings.MEDIA_ROOT, document.document_file.name), 'wb') as handle:
+                handle.write(content)
+            document.content_hash, document.file_size = hashlib.sha256(content).hexdigest(), len(content)
+        documents.append(document)
+    Compliance.objects.bulk_create(documents)
+    return {'documents': count}
+
+
+GENERATORS = {
+    'users': generate_users,
+    'products': generate_products,
+    'orders': generate_orders,
+    'documents': generate_documents,
+}
+
+
+def run_chunk(task):
+    table, start, count = task
+    with transaction.atomic():
+        return GENERATORS[table](_plan, _plan.rng(table, start), start, count)
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """ Lets bulk_create keep the created_at / updated_at values it is given. """
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+@contextmanager
+def search_index_suspended(using=connection):
+    backend = get_search_backend(using)
+    with using.cursor() as cursor:
+        backend.uninstall(cursor)
+    try:
+        yield
+    finally:
+        # Recreating the index builds it from the table
+        with using.cursor() as cursor:
+            backend.install(cursor)
+
+
+def reset_sequences(using=connection):
+    """ Moves the id sequences past the explicit ids (SQLite's AUTOINCREMENT follows by itself). """
+    statements = using.ops.sequence_reset_sql(no_style(), [User, Product, Order, OrderItem, Compliance])
+    with using.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def seed(plan, workers=1, progress=None):
+    """
+    Generates `plan` into the default database. Returns {table: (rows, seconds)}, rows
+    being a Counter by kind (orders write 'orders' and 'order items').
+    `progress(table, rows, seconds)` is called after every chunk.
+    """
+    global _plan
+    if connection.vendor == 'sqlite':
+        workers = 1
+    if plan.files:
+        os.makedirs(os.path.join(settings.MEDIA_ROOT, 'compliance_docs'), exist_ok=True)
+    plan.prepare()
+    _plan, stats = plan, {}
+    try:
+        with explicit_timestamps(User, Product, Order, Compliance), search_index_suspended():
+            for table in TABLES:
+                total = plan.counts[table]
+                starts = range(0, total, plan.batch_size)
+                tasks = [(table, start, min(plan.batch_size, total - start)) for start in starts]
+                rows, started = Counter(), time.perf_counter()
+                if workers > 1 and len(tasks) > 1:
+                    # Each process opens its own connection: none may be inherited open
+                    connections.close_all()
+                    with multiprocessing.get_context('fork').Pool(workers) as pool:
+                        for done in pool.imap_unordered(run_chunk, tasks):
+                            rows.update(done)
+                            if progress:
+                                progress(table, rows, time.perf_counter() - started)
+                else:
+                    for task in tasks:
+                        rows.update(run_chunk(task))
+                        if progress:
+                            progress(table, rows, time.perf_counter() - started)
+                stats[table] = rows, time.perf_counter() - started
+        reset_sequences()
+        reconcile()
+        rebuild_rollups()
+        analyze()
+    finally:
+        _plan = None
+    return stats
@@ -50,12 +50,15 @@ INSTALLED_APPS = [
     'products',
     'orders',
     'compliance',
+    'analytics',
+    'core',
 ]
 
 AUTH_USER_MODEL = 'accounts.User'
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware', # CORS first
+    'core.instrumentation.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -98,6 +101,64 @@ DATABASES = {
 }
 
 
+# Caches
+# The catalog cache defaults to a per-process LRU; point it at a shared backend when
+# running several workers, e.g. CATALOG_CACHE_BACKEND=redis with
+# CATALOG_CACHE_LOCATION=redis://127.0.0.1:6379/1, or =file with a directory path.
+
+CATALOG_CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'catalog': {
+        'BACKEND': CATALOG_CACHE_BACKENDS[os.getenv('CATALOG_CACHE_BACKEND', 'locmem')],
+        'LOCATION': os.getenv('CATALOG_CACHE_LOCATION', 'catalog'),
+        'OPTIONS': {'MAX_ENTRIES': int(os.getenv('CATALOG_CACHE_MAX_ENTRIES', '5000'))},
+    },
+    # Per-process on purpose: users' role / active flag for StatelessJWTAuthentication
+    'auth': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'auth',
+        'OPTIONS': {'MAX_ENTRIES': 50000},
+    },
+}
+
+CATALOG_CACHE_TIMEOUT = int(os.getenv('CATALOG_CACHE_TIMEOUT', '300'))
+
+# Read endpoints answered by async views under ASGI (see core.async_views), by route
+# name, e.g. ASYNC_READ_ROUTES=products.list,orders.list, or '*' for all of them:
+# products.list, products.detail, orders.list, orders.detail, compliance.pending,
+# api.products, api.product, api.categories
+ASYNC_READ_ROUTES = [name.strip() for name in os.getenv('ASYNC_READ_ROUTES', '').split(',') if name.strip()]
+
+# COMPILED_SERIALIZERS=1 serves the product, order and pending-document lists from
+# `.values()` rows through precompiled field converters, rendered with orjson when it
+# is installed (see core.compiled); the JSON is byte-identical either way
+COMPILED_SERIALIZERS = os.getenv('COMPILED_SERIALIZERS', '0') == '1'
+
+# Request instrumentation (see core.instrumentation): every request is timed per
+# route; INSTRUMENTATION_SAMPLE_RATE of them also get SQL accounting, N+1 detection
+# and a Server-Timing header (sent to admins only, or to everyone with
+# INSTRUMENTATION_SERVER_TIMING, which DEBUG turns on). /metrics serves the
+# Prometheus export to `Authorization: Bearer $METRICS_TOKEN` (to anyone with DEBUG
+# and no token set).
+INSTRUMENTATION = os.getenv('INSTRUMENTATION', '1') == '1'
+INSTRUMENTATION_SAMPLE_RATE = float(os.getenv('INSTRUMENTATION_SAMPLE_RATE', '0.01'))
+INSTRUMENTATION_SERVER_TIMING = os.getenv('INSTRUMENTATION_SERVER_TIMING', '1' if DEBUG else '0') == '1'
+# A statement run this many times in one request is reported as an N+1 query
+INSTRUMENTATION_N_PLUS_ONE = int(os.getenv('INSTRUMENTATION_N_PLUS_ONE', '5'))
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Seconds a cart's stock reservation holds stock before `compact_stock` releases it
+STOCK_RESERVATION_TTL = int(os.getenv('STOCK_RESERVATION_TTL', '900'))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -116,6 +177,26 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing: PASSWORD_HASHER picks how new and rehashed passwords are stored
+# ('argon2' needs the argon2-cffi package); the others stay listed so existing
+# hashes keep verifying and are upgraded on the next login (accounts.backends).
+PASSWORD_HASHER_CLASSES = {
+    'pbkdf2': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'argon2': 'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'scrypt': 'django.contrib.auth.hashers.ScryptPasswordHasher',
+    'pbkdf2_sha1': 'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+}
+PASSWORD_HASHER = os.getenv('PASSWORD_HASHER', 'pbkdf2')
+PASSWORD_HASHERS = [PASSWORD_HASHER_CLASSES[PASSWORD_HASHER]] + [
+    path for name, path in PASSWORD_HASHER_CLASSES.items() if name != PASSWORD_HASHER
+]
+
+AUTHENTICATION_BACKENDS = ['accounts.backends.PooledHashingBackend']
+# Threads that hash passwords (see accounts.hashing), and how many more requests may
+# wait for one before getting a 503
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', str(os.cpu_count() or 1)))
+PASSWORD_HASH_QUEUE = int(os.getenv('PASSWORD_HASH_QUEUE', '32'))
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.0/topics/i18n/
@@ -138,6 +219,18 @@ STATIC_URL = 'static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Compliance uploads are streamed to disk; anything larger is rejected with 413
+COMPLIANCE_UPLOAD_MAX_SIZE = int(os.getenv('COMPLIANCE_UPLOAD_MAX_SIZE', str(200 * 2**20)))
+# Resumable uploads: default chunk size and how long an unfinished upload is kept
+COMPLIANCE_UPLOAD_CHUNK_SIZE = int(os.getenv('COMPLIANCE_UPLOAD_CHUNK_SIZE', str(8 * 2**20)))
+COMPLIANCE_UPLOAD_SESSION_TTL = int(os.getenv('COMPLIANCE_UPLOAD_SESSION_TTL', str(24 * 3600)))
+# Seconds a document claimed from the review queue stays reserved for its reviewer
+COMPLIANCE_REVIEW_LEASE = int(os.getenv('COMPLIANCE_REVIEW_LEASE', '900'))
+# Let the front web server send downloaded documents: '' (Django streams them),
+# 'x-accel' (nginx, internal location at the prefix below) or 'x-sendfile'
+COMPLIANCE_DOWNLOAD_OFFLOAD = os.getenv('COMPLIANCE_DOWNLOAD_OFFLOAD', '')
+COMPLIANCE_DOWNLOAD_ACCEL_PREFIX = os.getenv('COMPLIANCE_DOWNLOAD_ACCEL_PREFIX', '/protected-media/')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
@@ -147,11 +240,28 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 CORS_ALLOW_ALL_ORIGINS = True # For development/demo. Restrict in production.
 
 # --- REST Framework Configuration ---
+# JWT_STATELESS=1 authenticates from the token's claims without loading the user row
+# (see accounts.authentication); role changes and deactivations then take effect
+# within STATELESS_AUTH_RECHECK seconds.
+JWT_STATELESS = os.getenv('JWT_STATELESS', '0') == '1'
+STATELESS_AUTH_RECHECK = int(os.getenv('STATELESS_AUTH_RECHECK', '30'))
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.StatelessJWTAuthentication' if JWT_STATELESS
+        else 'accounts.authentication.JWTAuthentication',
     ),
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.StandardPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
+    # Proxies in front of the app: throttles take the client address from that many
+    # X-Forwarded-For entries, and from REMOTE_ADDR alone with 0 (a header the client
+    # sets would otherwise pick its own throttle bucket)
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', '0')),
+    # Sign-in and registration limits, see accounts.throttling
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': os.getenv('LOGIN_IP_RATE', '30/min'),
+        'login_account': os.getenv('LOGIN_ACCOUNT_RATE', '10/min'),
+        'register_ip': os.getenv('REGISTER_IP_RATE', '10/min'),
+    },
 }
@@ -0,0 +1,216 @@
+import csv
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import tempfile
+
+from django.core.management import CommandError, call_command
+from django.db.models import Count, Sum
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from accounts.serializers import CustomTokenObtainPairSerializer
+from compliance.models import Compliance
+from orders.models import Order, OrderItem
+from products.models import Product
+from products.search import search_products
+from .instrumentation import registry
+
+COUNTS = {'admins': 1, 'authorities': 2, 'distributors': 3, 'customers': 20, 'categories': 4,
+          'products': 60, 'orders': 150, 'documents': 40}
+
+
+class SeedTests(TestCase):
+    def seed(self, **options):
+        stdout = io.StringIO()
+        call_command('seed', **{**COUNTS, 'batch_size': 25, **options}, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_rows_are_consistent(self):
+        output = self.seed()
+        self.assertIn("rows/s", output)
+        self.assertEqual(
+            dict(User.objects.values_list('role').annotate(count=Count('id'))),
+            {'Admin': 1, 'Authority': 2, 'Distributor': 3, 'Customer': 20},
+        )
+        self.assertEqual((Product.objects.count(), Order.objects.count(), Compliance.objects.count()), (60, 150, 40))
+
+        for order in Order.objects.prefetch_related('items'):
+            items = list(order.items.all())
+            self.assertEqual(order.user.role, 'Customer')
+            self.assertEqual(order.total_amount, sum(item.price_at_purchase * item.quantity for item in items))
+            self.assertEqual(order.summary['item_count'], len(items))
+            self.assertEqual([line['id'] for line in order.summary['lines']], [item.pk for item in items])
+
+        pending = Compliance.objects.filter(approval_status='Pending').count()
+        self.assertEqual(Product.objects.aggregate(total=Sum('compliance_pending'))['total'], pending)
+        self.assertFalse(Compliance.objects.exclude(approval_status='Pending').filter(approved_by=None).exists())
+        # The search index was rebuilt after loading
+        self.assertTrue(search_products(Product.objects.all(), "sterile").exists())
+
+    def test_same_seed_generates_the_same_rows(self):
+        def rows():
+            products = Product.objects.values_list('name', 'price', 'stock', 'category__name', 'created_at')
+            orders = Order.objects.values_list('total_amount', 'status', 'created_at', 'summary__item_count')
+            documents = Compliance.objects.values_list('approval_status', 'created_at', 'approved_at')
+            return [list(rows.order_by('pk')) for rows in (products, orders, documents)]
+        self.seed(seed=3)
+        first = rows()
+        Compliance.objects.all().delete()
+        OrderItem.objects.all().delete()
+        Order.objects.all().delete()
+        Product.objects.all().delete()
+
+        self.seed(seed=3)
+        self.assertEqual(rows(), first)
+        self.seed(seed=4)
+        self.assertNotEqual(rows()[0][60:], first[0])
+
+    def test_files_are_written(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        with override_settings(MEDIA_ROOT=media):
+            self.seed(documents=3, files=True)
+            for document in Compliance.objects.all():
+                with open(os.path.join(media, document.document_file.name), 'rb') as handle:
+                    content = handle.read()
+                self.assertEqual((document.file_size, document.content_hash),
+                                 (len(content), hashlib.sha256(content).hexdigest()))
+
+    def test_orders_need_customers(self):
+        with self.assertRaises(CommandError):
+            self.seed(customers=0)
+        self.assertFalse(User.objects.exists())
+
+    def test_ids_follow_existing_rows(self):
+        self.seed()
+        self.seed()
+        self.assertEqual(Order.objects.count(), 300)
+        user = User.objects.create_user(email='new@example.com', password=None)
+        self.assertEqual(user.pk, User.objects.exclude(pk=user.pk).order_by('-pk')[0].pk + 1)
+
+
+class ReportingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        call_command('seed', **{**COUNTS, 'orders': 30, 'documents': 5}, stdout=io.StringIO())
+
+    def call(self, name, *args, **options):
+        stdout = io.StringIO()
+        call_command(name, *args, **options, stdout=stdout, stderr=io.StringIO())
+        return stdout.getvalue()
+
+    def test_dumps_users_without_password_hashes(self):
+        rows = list(csv.DictReader(io.StringIO(self.call('dump_models', chunk_size=7))))
+        emails = User.objects.order_by('pk').values_list('email', flat=True)
+        self.assertEqual([row['email'] for row in rows], list(emails))
+        self.assertNotIn('password', rows[0])
+
+        lines = self.call('dump_models', 'accounts.User', format='jsonl', include_sensitive=True).splitlines()
+        self.assertEqual(len(lines), User.objects.count())
+        self.assertEqual(json.loads(lines[0])['password'], User.objects.order_by('pk')[0].password)
+
+    def test_dumps_several_models_to_a_directory(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.call('dump_models', 'orders.Order', 'orders.OrderItem', output_dir=directory, format='jsonl')
+        with open(os.path.join(directory, 'orders.Order.jsonl')) as stream:
+            orders = [json.loads(line) for line in stream]
+        ids = Order.objects.order_by('pk').values_list('pk', flat=True)
+        self.assertEqual([order['id'] for order in orders], list(ids))
+        self.assertEqual(orders[0]['summary'], Order.objects.order_by('pk')[0].summary)
+        with open(os.path.join(directory, 'orders.OrderItem.jsonl')) as stream:
+            self.assertEqual(len(stream.readlines()), OrderItem.objects.count())
+
+        with self.assertRaises(CommandError):
+            self.call('dump_models', 'orders.Order', 'orders.OrderItem')
+        with self.assertRaises(CommandError):
+            self.call('dump_models', 'orders.Nothing')
+
+    def test_overview_estimates_counts_from_statistics(self):
+        # Seeding ends with ANALYZE; the statistics aren't updated by the delete
+        Order.objects.filter(pk__in=Order.objects.values('pk')[:10]).delete()
+        output = self.call('db_overview', 'accounts.User', 'orders.Order', samples=1)
+        self.assertIn("accounts.User: ~26 rows\n", output)
+        self.assertIn("orders.Order: ~30 rows\n", output)
+        self.assertNotIn("pbkdf2", output)
+        output = self.call('db_overview', 'orders.Order', exact=True, format='jsonl')
+        reports = [json.loads(line) for line in output.splitlines()]
+        self.assertEqual([(report['rows'], report['estimated'], len(report['samples'])) for report in reports],
+                         [(20, False, 3)])
+
+
+@override_settings(INSTRUMENTATION_SAMPLE_RATE=1, INSTRUMENTATION_SERVER_TIMING=False, METRICS_TOKEN='scrape-me')
+class InstrumentationTests(TestCase):
+    """ Order history through the instrumentation middleware and the /metrics export. """
+
+    def setUp(self):
+        registry.reset()
+        self.user = User.objects.create_user(email='buyer@example.com', password='pass12345')
+        token = CustomTokenObtainPairSerializer.get_token(self.user).access_token
+        self.client = APIClient(headers={'Authorization': f'Bearer {token}'})
+        product = Product.objects.create(name="Lamp", description="", price='5.00', stock=10)
+        for _ in range(6):
+            # Legacy orders without a summary: each one reads its items
+            order = Order.objects.create(user=self.user, total_amount=5)
+            OrderItem.objects.create(order=order, product=product, product_name=product.name, quantity=1,
+                                     price_at_purchase=product.price)
+
+    def metrics(self):
+        response = APIClient().get('/metrics', headers={'Authorization': 'Bearer scrape-me'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        return response.content.decode()
+
+    def test_profiled_request_reports_phases_and_n_plus_one(self):
+        User.objects.filter(pk=self.user.pk).update(role='Admin')
+        with self.assertLogs('core.instrumentation', 'WARNING') as logs:
+            response = self.client.get(reverse('order-list-create'))
+        self.assertEqual(response.status_code, 200)
+        timing = response['Server-Timing']
+        # user, count, page, then the items of each of the 6 orders
+        self.assertIn('desc="9 queries"', timing)
+        for phase in ('db;dur=', 'auth;dur=', 'serialize;dur=', 'render;dur=', 'app;dur=', 'total;dur='):
+            self.assertIn(phase, timing)
+        # The orders' items are read while serializing, but their SQL counts as db
+        self.assertGreater(float(re.search(r'serialize;dur=([\d.]+)', timing).group(1)), 0)
+        self.assertIn('orders_orderitem', logs.output[0])
+
+        metrics = self.metrics()
+        self.assertIn('http_requests_total{route="api/orders/",method="GET",status="200"} 1', metrics)
+        self.assertIn('http_request_duration_seconds_count{route="api/orders/",method="GET"} 1', metrics)
+        self.assertIn('http_db_queries_total{route="api/orders/"} 9', metrics)
+        self.assertIn('http_db_duplicate_queries_total{route="api/orders/"} 5', metrics)
+        self.assertIn('http_n_plus_one_total{route="api/orders/",statement="SELECT', metrics)
+        for phase in ('auth', 'serialize'):
+            self.assertIn(f'http_phase_seconds_total{{route="api/orders/",phase="{phase}"}}', metrics)
+
+    def test_unsampled_requests_are_only_timed(self):
+        with self.settings(INSTRUMENTATION_SAMPLE_RATE=0):
+            response = self.client.get(f'/api/orders/{Order.objects.first().pk}/')
+            self.client.get('/api/nowhere/')
+        self.assertNotIn('Server-Timing', response)
+        metrics = self.metrics()
+        self.assertIn('http_requests_total{route="api/orders/<int:pk>/",method="GET",status="200"} 1', metrics)
+        self.assertIn('http_requests_total{route="<unmatched>",method="GET",status="404"} 1', metrics)
+        self.assertNotIn('http_db_queries_total{', metrics)
+
+    def test_server_timing_is_for_admins_and_methods_are_bounded(self):
+        self.assertNotIn('Server-Timing', self.client.get(reverse('order-list-create')))
+        with self.settings(INSTRUMENTATION_SERVER_TIMING=True):
+            self.assertIn('Server-Timing', self.client.get(reverse('order-list-create')))
+        for method in ('BREW', 'X-1', 'X-2'):
+            self.client.generic(method, reverse('order-list-create'))
+        metrics = self.metrics()
+        self.assertIn('http_requests_total{route="api/orders/",method="other",status="405"} 3', metrics)
+        self.assertNotIn('BREW', metrics)
+
+    def test_metrics_require_the_token(self):
+        self.assertEqual(APIClient().get('/metrics').status_code, 403)
+        with self.settings(METRICS_TOKEN='', DEBUG=False):
+            self.assertEqual(APIClient().get('/metrics').status_code, 404)
@@ -1,3 +1,14 @@
 from django.contrib import admin
+from .models import Order, OrderItem
 
-# Register your models here.
+class OrderItemInline(admin.TabularInline):
+    model = OrderItem
+    extra = 0
+    raw_id_fields = ('product',)
+
+@admin.register(Order)
+class OrderAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'customer_name', 'email', 'total_amount', 'status', 'created_at')
+    list_filter = ('status', 'payment_status', 'created_at')
+    raw_id_fields = ('user',)
+    inlines = [OrderItemInline]
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from orders.models import Order, OrderItem
+from orders.services import build_order_summary
+
+
+class Command(BaseCommand):
+    help = "Snapshots product names/SKUs on order items and stores per-order summaries, streaming orders in chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--all', action='store_true', help="Rebuild every summary, not only missing ones.")
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        orders = Order.objects.order_by('pk')
+        if not options['all']:
+            orders = orders.filter(summary={})
+
+        last_pk, done = 0, 0
+        while True:
+            chunk = list(orders.filter(pk__gt=last_pk).only('pk')[:chunk_size])
+            if not chunk:
+                break
+            last_pk = chunk[-1].pk
+            self.backfill(chunk)
+            done += len(chunk)
+            self.stdout.write(f"Backfilled {done} orders (up to #{last_pk})")
+
+        self.stdout.write(self.style.SUCCESS(f"Done, {done} orders backfilled."))
+
+    def backfill(self, orders):
+        items_by_order = {order.pk: [] for order in orders}
+        items = OrderItem.objects.filter(order__in=orders).select_related('product').order_by('pk')
+        stale_items = []
+        for item in items:
+            if not item.product_name and item.product is not None:
+                item.product_name = item.product.name
+                item.product_sku = item.product.sku or ''
+                stale_items.append(item)
+            items_by_order[item.order_id].append(item)
+
+        for order in orders:
+            order.summary = build_order_summary(items_by_order[order.pk])
+
+        with transaction.atomic():
+            OrderItem.objects.bulk_update(stale_items, ['product_name', 'product_sku'])
+            Order.objects.bulk_update(orders, ['summary'])
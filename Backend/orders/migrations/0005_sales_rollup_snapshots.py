@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0004_guest_orders'),
+        ('products', '0008_category_created_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='rolled_up',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='category',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='products.category'),
+        ),
+    ]
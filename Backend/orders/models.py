@@ -1,6 +1,6 @@
 from django.db import models
 from django.conf import settings
-from products.models import Product
+from products.models import Category, Product
 
 class Order(models.Model):
     STATUS_CHOICES = (
@@ -17,22 +17,51 @@ class Order(models.Model):
         ('Failed', 'Failed'),
     )
 
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='orders')
+    # None for guest checkouts, which carry the contact details below instead
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='orders', null=True, blank=True
+    )
+    customer_name = models.CharField(max_length=255, blank=True)
+    email = models.EmailField(blank=True)
+    phone = models.CharField(max_length=20, blank=True)
+    address = models.TextField(blank=True)
     total_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Pending')
     payment_status = models.CharField(max_length=20, choices=PAYMENT_STATUS_CHOICES, default='Pending')
+    # Snapshot of the order lines taken at purchase, so history reads need no joins
+    summary = models.JSONField(default=dict, blank=True)
+    # Counted in the sales rollups (see analytics.rollups)
+    rolled_up = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    _rolled_up = None
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='order_user_created_idx'),
+        ]
+
     def __str__(self):
-        return f"Order #{self.id} - {self.user.email}"
+        return f"Order #{self.id} - {self.user.email if self.user_id else self.customer_name or self.email}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The status the order is counted under in the sales rollups, see analytics.rollups
+        instance._rolled_up = instance.__dict__.get('status') if instance.__dict__.get('rolled_up') else None
+        return instance
 
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='items')
     product = models.ForeignKey(Product, on_delete=models.SET_NULL, null=True, related_name='order_items')
+    # What the customer bought, as it was named and categorized at purchase time
+    product_name = models.CharField(max_length=255, blank=True)
+    product_sku = models.CharField(max_length=64, blank=True)
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
     quantity = models.PositiveIntegerField(default=1)
     price_at_purchase = models.DecimalField(max_digits=10, decimal_places=2)
 
     def __str__(self):
-        product_name = self.product.name if self.product else "Unknown Product"
+        product_name = self.product_name or "Unknown Product"
         return f"{self.quantity}x {product_name} in Order #{self.order.id}"
@@ -1,18 +1,40 @@
 from rest_framework import serializers
-from django.db import transaction
+from core.compiled import Uncompiled
 from .models import Order, OrderItem
 from products.models import Product
+from .services import place_order
 
 class OrderItemSerializer(serializers.ModelSerializer):
-    product_name = serializers.ReadOnlyField(source='product.name')
-
     class Meta:
         model = OrderItem
         fields = ['id', 'product', 'product_name', 'quantity', 'price_at_purchase']
-        read_only_fields = ['price_at_purchase']
+        read_only_fields = ['product_name', 'price_at_purchase']
+
+class OrderItemsSnapshotField(serializers.Field):
+    """
+    Renders the order lines from the summary stored on the order, falling back to
+    reading the items for orders created before summaries existed.
+    """
+    def __init__(self, **kwargs):
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, order):
+        if order.summary:
+            return order.summary['lines']
+        return OrderItemSerializer(order.items.all(), many=True).data
+
+    def compile_representation(self, context):
+        """ For core.compiled: the lines straight from the summary column. """
+        def convert(summary):
+            if not summary:
+                raise Uncompiled()
+            return summary['lines']
+        return 'summary', convert
 
 class OrderSerializer(serializers.ModelSerializer):
-    items = OrderItemSerializer(many=True, read_only=True)
+    items = OrderItemsSnapshotField()
     
     class Meta:
         model = Order
@@ -22,54 +44,31 @@ class OrderSerializer(serializers.ModelSerializer):
 class OrderCreateSerializer(serializers.Serializer):
     """
     Accepts a list of product IDs and quantities to create an order transactionally.
-    Example Input: [{"product": 1, "quantity": 2}, {"product": 3, "quantity": 1}]
+    Example Input: [{"product": 1, "quantity": 2}, {"product": 3, "quantity": 1, "reservation": 7}]
+    A line may reference a stock reservation held by the cart (see products.inventory).
     """
     class OrderItemInputSerializer(serializers.Serializer):
-        product = serializers.PrimaryKeyRelatedField(queryset=Product.objects.all())
+        product = serializers.IntegerField(source='product_id')
         quantity = serializers.IntegerField(min_value=1)
+        reservation = serializers.IntegerField(source='reservation_id', required=False)
 
     items = OrderItemInputSerializer(many=True)
 
-    def create(self, validated_data):
-        items_data = validated_data.pop('items')
-        user = self.context['request'].user
-        
-        # 1. Start an atomic database transaction
-        with transaction.atomic():
-            order = Order.objects.create(user=user, total_amount=0)
-            total_amount = 0
-            
-            for item_data in items_data:
-                product_instance = item_data['product']
-                requested_qty = item_data['quantity']
-                
-                # 2. Lock the row to prevent race conditions from concurrent orders
-                product = Product.objects.select_for_update().get(id=product_instance.id)
-                
-                # 3. Validate stock capacity
-                if product.stock < requested_qty:
-                    raise serializers.ValidationError({
-                        f"Product {product.name}": f"Not enough stock. Requested {requested_qty}, Available {product.stock}"
-                    })
-                
-                # 4. Deduct stock and save
-                product.stock -= requested_qty
-                product.save()
-
-                # 5. Create the order item
-                price = product.price
-                OrderItem.objects.create(
-                    order=order,
-                    product=product,
-                    quantity=requested_qty,
-                    price_at_purchase=price
-                )
-                
-                # Update tally
-                total_amount += (price * requested_qty)
+    def validate_items(self, items):
+        # Resolve every referenced product in one query instead of one per line
+        product_ids = {item['product_id'] for item in items}
+        active = dict(Product.objects.filter(id__in=product_ids).values_list('id', 'is_active'))
+        errors = [
+            {} if active.get(item['product_id']) else {
+                'product': [serializers.PrimaryKeyRelatedField.default_error_messages['does_not_exist'].format(
+                    pk_value=item['product_id']
+                ) if item['product_id'] not in active else f"Product {item['product_id']} is not available."]
+            }
+            for item in items
+        ]
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return items
 
-            # finalize order
-            order.total_amount = total_amount
-            order.save()
-
-        return order
+    def create(self, validated_data):
+        return place_order(self.context['request'].user, validated_data.pop('items'))
@@ -0,0 +1,145 @@
+from collections import OrderedDict
+
+from django.db import transaction
+from rest_framework import serializers
+
+from analytics.rollups import apply_on_commit, new_deltas, order_deltas
+from products.cache import bump_generation
+from products.inventory import commit_reservations, deduct_stock, not_enough_stock, take_from_shards
+from products.models import Product
+from .models import Order, OrderItem
+
+
+def merge_order_lines(items_data):
+    """
+    Collapses the requested lines into {product_id: quantity}, summing duplicate
+    products so each product row is locked and decremented exactly once.
+    """
+    quantities = OrderedDict()
+    for item_data in items_data:
+        product_id = item_data['product_id']
+        quantities[product_id] = quantities.get(product_id, 0) + item_data['quantity']
+    return quantities
+
+
+def build_order_summary(items):
+    """ The per-order snapshot rendered by `OrderSerializer` in place of a join. """
+    from .serializers import OrderItemSerializer
+
+    return _summary([dict(line) for line in OrderItemSerializer(items, many=True).data])
+
+
+def build_order_summaries(items_by_order):
+    """
+    {order: summary} for many orders at once: one serializer renders all their lines,
+    instead of one being built per order.
+    """
+    from .serializers import OrderItemSerializer
+
+    lines = iter(OrderItemSerializer([item for items in items_by_order.values() for item in items], many=True).data)
+    return {
+        order: _summary([dict(next(lines)) for _item in items]) for order, items in items_by_order.items()
+    }
+
+
+def _summary(lines):
+    return {
+        'item_count': len(lines),
+        'total_quantity': sum(line['quantity'] for line in lines),
+        'lines': lines,
+    }
+
+
+def place_order(user, items_data, **contact):
+    """
+    Places an order with a constant number of queries for unsharded products,
+    regardless of line count:
+
+    1. one `SELECT ... FOR UPDATE` locking every referenced unsharded product, ordered
+       by id so concurrent carts always acquire row locks in the same order (no deadlocks)
+    2. one conditional `UPDATE ... WHERE stock >= qty` decrementing all those lines
+    3. one INSERT for the order and one bulk INSERT for its items, snapshotting the
+       product name, SKU and category, then one UPDATE storing the order summary
+
+    Once the transaction commits, the order is added to the sales rollups (see
+    `analytics.rollups`).
+
+    Products with sharded stock are read without a lock and decremented shard by shard
+    (see `products.inventory`), and lines carrying a `reservation_id` commit stock that
+    was already taken when the cart reserved it.
+
+    Guest checkouts pass `user=None` and the contact details (customer_name, email,
+    phone, address) as keyword arguments; they can't hold reservations.
+    """
+    quantities = merge_order_lines(items_data)
+    product_ids = sorted(quantities)
+    reserved_lines = [item_data for item_data in items_data if item_data.get('reservation_id')]
+    to_take = merge_order_lines(item_data for item_data in items_data if not item_data.get('reservation_id'))
+    if reserved_lines and user is None:
+        raise serializers.ValidationError({"items": "Guest orders can't use stock reservations."})
+
+    with transaction.atomic():
+        products = {
+            product.id: product
+            for product in Product.objects.select_for_update().filter(
+                id__in=sorted(to_take), stock_shards=0
+            ).order_by('id')
+        }
+        unlocked = [product_id for product_id in product_ids if product_id not in products]
+        if unlocked:
+            products.update(Product.objects.in_bulk(unlocked))
+
+        missing = [product_id for product_id in product_ids if product_id not in products]
+        if missing:
+            raise serializers.ValidationError({
+                "items": f"Products no longer exist: {', '.join(str(product_id) for product_id in missing)}"
+            })
+        inactive = [product_id for product_id in product_ids if not products[product_id].is_active]
+        if inactive:
+            raise serializers.ValidationError({
+                "items": f"Products are not available: {', '.join(str(product_id) for product_id in inactive)}"
+            })
+
+        # Validate stock capacity against the locked rows
+        unsharded = {
+            product_id: quantity for product_id, quantity in to_take.items() if not products[product_id].stock_shards
+        }
+        for product_id in sorted(unsharded):
+            product = products[product_id]
+            if product.stock < unsharded[product_id]:
+                raise not_enough_stock(product, unsharded[product_id], product.stock)
+
+        if unsharded:
+            deduct_stock(unsharded)
+            # Catalog pages show stock; the bulk UPDATE bypasses model signals
+            bump_generation(Product)
+        for product_id in sorted(set(to_take) - set(unsharded)):
+            take_from_shards(products[product_id], to_take[product_id])
+        if reserved_lines:
+            commit_reservations(user, reserved_lines)
+
+        total_amount = sum(products[product_id].price * quantities[product_id] for product_id in product_ids)
+        order = Order.objects.create(user=user, total_amount=total_amount, rolled_up=True, **contact)
+        items = OrderItem.objects.bulk_create([
+            OrderItem(
+                order=order,
+                product=products[product_id],
+                product_name=products[product_id].name,
+                product_sku=products[product_id].sku or '',
+                category_id=products[product_id].category_id,
+                quantity=quantities[product_id],
+                price_at_purchase=products[product_id].price,
+            )
+            for product_id in quantities
+        ])
+        order.summary = build_order_summary(items)
+        order.save(update_fields=['summary'])
+
+        lines = [
+            (product_id, products[product_id].category_id, quantities[product_id], products[product_id].price)
+            for product_id in quantities
+        ]
+        apply_on_commit(order_deltas(new_deltas(), order.created_at, order.status, total_amount, lines))
+        order._rolled_up = order.status
+
+    return order
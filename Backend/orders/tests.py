@@ -1,3 +1,183 @@
-from django.test import TestCase
+from io import StringIO
+from unittest import mock
+from asgiref.sync import sync_to_async
+from django.core.management import call_command
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework.throttling import SimpleRateThrottle, UserRateThrottle
+from accounts.models import User
+from accounts.serializers import CustomTokenObtainPairSerializer
+from core.async_views import read_route
+from core.query_plans import QueryPlanTestMixin, analyze
+from products.models import Category, Product
+from .models import Order, OrderItem
+from .services import build_order_summary
+from .views import OrderListCreateView
 
-# Create your tests here.
+
+class OrderQueryBudgetTests(TestCase):
+    """ Reading orders must cost a fixed number of queries, whatever the page holds. """
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='buyer@example.com', password='pass12345')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_orders(self, orders, items_per_order, summarize=True):
+        category = Category.objects.for_name("Test")
+        products = Product.objects.bulk_create([
+            Product(name=f"Product {i}", category=category, description="", price='5.00', stock=100)
+            for i in range(items_per_order)
+        ])
+        for _ in range(orders):
+            order = Order.objects.create(user=self.user, total_amount=0)
+            items = OrderItem.objects.bulk_create([
+                OrderItem(order=order, product=product, product_name=product.name if summarize else '',
+                          quantity=1, price_at_purchase=product.price)
+                for product in products
+            ])
+            if summarize:
+                order.summary = build_order_summary(items)
+                order.save(update_fields=['summary'])
+        return order
+
+    def test_order_list_query_count_is_constant(self):
+        self.create_orders(orders=1, items_per_order=1)
+        # count, orders page: lines come from the stored summary
+        with self.assertNumQueries(2):
+            self.client.get(reverse('order-list-create'))
+
+        self.create_orders(orders=10, items_per_order=10)
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('order-list-create'))
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertEqual(response.data['results'][0]['items'][0]['product_name'], 'Product 0')
+
+    def test_order_detail_query_count_is_constant(self):
+        order = self.create_orders(orders=1, items_per_order=10)
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/orders/{order.pk}/')
+        self.assertEqual(len(response.data['items']), 10)
+
+    def test_compiled_list_is_byte_identical(self):
+        self.create_orders(orders=12, items_per_order=3)
+        for path in ('/api/orders/', '/api/orders/?page=2', '/api/orders/?pagination=cursor'):
+            with self.subTest(path=path):
+                with override_settings(COMPILED_SERIALIZERS=True):
+                    compiled = self.client.get(path)
+                self.assertEqual(compiled.content, self.client.get(path).content)
+
+        # Orders without a summary: the page is serialized the usual way
+        self.create_orders(orders=1, items_per_order=2, summarize=False)
+        with override_settings(COMPILED_SERIALIZERS=True):
+            compiled = self.client.get('/api/orders/')
+        self.assertEqual(len(compiled.data['results'][0]['items']), 2)
+        self.assertEqual(compiled.content, self.client.get('/api/orders/').content)
+
+    def test_backfill_snapshots_legacy_orders(self):
+        order = self.create_orders(orders=1, items_per_order=3, summarize=False)
+        call_command('backfill_order_summaries', chunk_size=1, stdout=StringIO())
+
+        order.refresh_from_db()
+        self.assertEqual(order.summary['item_count'], 3)
+        self.assertEqual([line['product_name'] for line in order.summary['lines']], ['Product 0', 'Product 1', 'Product 2'])
+
+
+@override_settings(ASYNC_READ_ROUTES=['orders.list'])
+class AsyncOrderReadTests(TestCase):
+    """ Order history through the async read view, authenticated with a bearer token. """
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='buyer@example.com', password='pass12345')
+        token = CustomTokenObtainPairSerializer.get_token(self.user).access_token
+        self.headers = {'Authorization': f'Bearer {token}'}
+        self.view = read_route('orders.list', OrderListCreateView)
+        product = Product.objects.create(name="Lamp", category=Category.objects.for_name("Test"), description="", price='5.00', stock=10)
+        for summarize in (True, False):
+            order = Order.objects.create(user=self.user, total_amount=5)
+            items = [OrderItem.objects.create(order=order, product=product, product_name=product.name,
+                                              quantity=1, price_at_purchase=product.price)]
+            if summarize:
+                order.summary = build_order_summary(items)
+                order.save(update_fields=['summary'])
+        self.sync_client = APIClient()
+        self.sync_client.force_authenticate(self.user)
+
+    async def fetch(self, headers=None):
+        response = await self.view(AsyncRequestFactory().get(reverse('order-list-create'), headers=headers))
+        response.render()
+        return response
+
+    async def test_matches_sync_view(self):
+        # One legacy order without a summary: its items are read lazily
+        expected = await sync_to_async(self.sync_client.get)(reverse('order-list-create'))
+        response = await self.fetch(self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertJSONEqual(response.content, expected.json())
+
+    async def test_request_carries_the_token(self):
+        seen = set()
+
+        class View(OrderListCreateView):
+            def get_queryset(self):
+                seen.add((str(self.request.user.pk), self.request.auth['user_id']))
+                return super().get_queryset()
+
+        self.view = read_route('orders.list', View)
+        response = await self.fetch(self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(seen, {(str(self.user.pk),) * 2})
+
+    async def test_requires_authentication(self):
+        response = await self.fetch()
+        self.assertEqual(response.status_code, 401)
+
+    async def test_throttles_and_content_negotiation_apply(self):
+        class View(OrderListCreateView):
+            throttle_classes = [UserRateThrottle]
+
+        self.view = read_route('orders.list', View)
+        with mock.patch.object(SimpleRateThrottle, 'THROTTLE_RATES', {'user': '1/min'}):
+            self.assertEqual((await self.fetch(self.headers)).status_code, 200)
+            self.assertEqual((await self.fetch(self.headers)).status_code, 429)
+
+        self.view = read_route('orders.list', OrderListCreateView)
+        response = await self.fetch({**self.headers, 'Accept': 'application/xml'})
+        self.assertEqual(response.status_code, 406)
+        # The browsable API is rendered by the DRF view
+        response = await self.fetch({**self.headers, 'Accept': 'text/html'})
+        self.assertEqual((response.status_code, response['Content-Type']), (200, 'text/html; charset=utf-8'))
+
+
+class OrderQueryPlanTests(QueryPlanTestMixin, TestCase):
+    """ Order history reads one customer's orders through order_user_created_idx. """
+
+    @classmethod
+    def setUpTestData(cls):
+        customers = User.objects.bulk_create([User(email=f'customer-{i}@example.com') for i in range(50)])
+        orders = Order.objects.bulk_create([
+            Order(user=customers[i % 50] if i % 10 else None, customer_name='' if i % 10 else "Guest",
+                  total_amount='5.00', summary={'item_count': 0, 'total_quantity': 0, 'lines': []})
+            for i in range(5000)
+        ], batch_size=1000)
+        cls.customer, cls.order = customers[1], orders[1]
+        analyze()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.customer)
+
+    def get(self, path, params=None):
+        response = self.client.get(path, params or {})
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_history_pages_use_indexes(self):
+        self.assertNoFullScans(self.get, reverse('order-list-create'))
+        first = self.assertNoFullScans(self.get, reverse('order-list-create'), {'pagination': 'cursor', 'page_size': 20})
+        self.assertNoFullScans(self.get, first.data['next'])
+        self.assertNoFullScans(self.get, f'/api/orders/{self.order.pk}/')
+        self.assertUsesIndex(
+            Order.objects.filter(user=self.customer).order_by('-created_at', '-id')[:10], 'order_user_created_idx'
+        )
@@ -1,7 +1,8 @@
 from django.urls import path
+from core.async_views import read_route
 from .views import OrderListCreateView, OrderDetailView
 
 urlpatterns = [
-    path('', OrderListCreateView.as_view(), name='order-list-create'),
-    path('<int:pk>/', OrderDetailView.as_view(), name='order-detail'),
+    path('', read_route('orders.list', OrderListCreateView), name='order-list-create'),
+    path('<int:pk>/', read_route('orders.detail', OrderDetailView), name='order-detail'),
 ]
@@ -1,8 +1,10 @@
 from rest_framework import generics, permissions
+from core.compiled import CompiledListMixin
+from core.eager_loading import EagerLoadingMixin
 from .models import Order
 from .serializers import OrderSerializer, OrderCreateSerializer
 
-class OrderListCreateView(generics.ListCreateAPIView):
+class OrderListCreateView(CompiledListMixin, EagerLoadingMixin, generics.ListCreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_serializer_class(self):
@@ -12,9 +14,9 @@ class OrderListCreateView(generics.ListCreateAPIView):
 
     def get_queryset(self):
         # Users can only see their own orders
-        return Order.objects.filter(user=self.request.user).order_by('-created_at')
+        return Order.objects.filter(user=self.request.user).order_by('-created_at', '-id')
 
-class OrderDetailView(generics.RetrieveAPIView):
+class OrderDetailView(EagerLoadingMixin, generics.RetrieveAPIView):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = OrderSerializer
 
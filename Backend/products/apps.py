@@ -3,3 +3,25 @@ from django.apps import AppConfig
 
 class ProductsConfig(AppConfig):
     name = 'products'
+
+    def ready(self):
+        from django.db import connections
+        from django.db.migrations.recorder import MigrationRecorder
+        from django.db.models.signals import post_migrate
+        from .search import install_search_index
+
+        def ensure_search_index(sender, using, **kwargs):
+            # Migrations that rebuild the products table on SQLite drop its triggers
+            applied = MigrationRecorder(connections[using]).applied_migrations()
+            if ('products', '0004_product_search_index') in applied:
+                install_search_index(using)
+
+        post_migrate.connect(ensure_search_index, sender=self, weak=False)
+
+        from django.db.models.signals import post_delete, post_save
+        from .cache import bump_generation_on_write
+        from .models import Category, Product
+
+        for model in (Product, Category):
+            post_save.connect(bump_generation_on_write, sender=model)
+            post_delete.connect(bump_generation_on_write, sender=model)
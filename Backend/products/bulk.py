@@ -0,0 +1,169 @@
+"""
+Bulk product import / export as CSV or JSON Lines.
+
+Imports stream the file row by row, validate each row with the product serializer
+and upsert valid rows by SKU in chunks (`INSERT ... ON CONFLICT (sku) DO UPDATE`).
+An existing product only gets the columns its row gives (a price-only file leaves
+stock alone); compliance fields are maintained by reviews and never imported.
+Invalid rows are reported with their line number instead of aborting the file.
+Exports stream rows straight from a database cursor, so memory stays flat whatever
+the catalog size.
+"""
+import codecs
+import csv
+import io
+import json
+
+from django.db import transaction
+from rest_framework import serializers
+
+from .cache import bump_generation
+from .catalog import category_ids
+from .models import Category, Product
+from .serializers import ProductSerializer
+
+FORMATS = ('csv', 'jsonl')
+CONTENT_TYPES = {'csv': 'text/csv', 'jsonl': 'application/x-ndjson'}
+IMPORT_FIELDS = ['sku', 'name', 'category', 'description', 'price', 'stock']
+EXPORT_FIELDS = ['id'] + IMPORT_FIELDS
+# Categories travel by name
+EXPORT_COLUMNS = [field if field != 'category' else 'category__name' for field in EXPORT_FIELDS]
+DEFAULT_CHUNK_SIZE = 2000
+MAX_REPORTED_ERRORS = 1000
+
+
+class ProductImportSerializer(ProductSerializer):
+    """ One import row. SKU is the upsert key, so its uniqueness check is left to the upsert. """
+
+    class Meta(ProductSerializer.Meta):
+        fields = IMPORT_FIELDS
+        extra_kwargs = {'sku': {'required': True, 'allow_null': False, 'allow_blank': False, 'validators': []}}
+
+
+def format_for(name, default='csv'):
+    """ Picks the format from a file name's extension. """
+    extension = name.rsplit('.', 1)[-1].lower() if '.' in name else ''
+    return {'csv': 'csv', 'jsonl': 'jsonl', 'ndjson': 'jsonl'}.get(extension, default)
+
+
+def read_rows(stream, fmt):
+    """ Yields (line number, row dict) from a binary stream of CSV or JSON Lines. """
+    lines = codecs.iterdecode(stream, 'utf-8-sig')
+    if fmt == 'csv':
+        reader = csv.DictReader(lines)
+        for row in reader:
+            # Blank cells mean "not given", so optional columns fall back to their defaults
+            yield reader.line_num, {key: value for key, value in row.items() if value != ''}
+        return
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield line_number, row
+
+
+def upsert(rows):
+    """
+    Inserts new SKUs and updates existing ones with the fields of their rows, one
+    statement per set of given fields; a SKU's later rows win within a chunk.
+    `rows` are (line number, validated fields). Returns (imported SKUs, row errors).
+    """
+    # Their stock is spread over shards (see products.inventory.set_shards): rows
+    # setting it are rejected on their own, before rows of a SKU are merged
+    stocked = {fields['sku'] for _line_number, fields in rows if 'stock' in fields}
+    sharded = set(Product.objects.filter(sku__in=stocked, stock_shards__gt=0).values_list('sku', flat=True))
+    errors, by_sku = [], {}
+    for line_number, fields in rows:
+        if fields['sku'] in sharded and 'stock' in fields:
+            errors.append({'line': line_number, 'errors': {
+                'stock': ["Stock of a sharded product can't be imported; unshard it first."],
+            }})
+        else:
+            by_sku[fields['sku']] = {**by_sku.get(fields['sku'], {}), **fields}
+    accepted = by_sku.values()
+
+    # Categories travel by name; the missing ones are created here, in one INSERT
+    categories = category_ids(Category, {fields['category'] for fields in accepted if 'category' in fields})
+    groups = {}
+    for fields in accepted:
+        product = Product(**{name: value for name, value in fields.items() if name != 'category'})
+        if 'category' in fields:
+            product.category_id = categories[fields['category']]
+        groups.setdefault(frozenset(fields), []).append(product)
+
+    for given, products in groups.items():
+        Product.objects.bulk_create(
+            products,
+            update_conflicts=True,
+            unique_fields=['sku'],
+            update_fields=[field for field in IMPORT_FIELDS if field in given and field != 'sku'] + ['updated_at'],
+        )
+    return len(by_sku), errors
+
+
+def import_products(stream, fmt, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Imports products from `stream`, committing each chunk of valid rows separately.
+    Returns a report with row counts and the (first MAX_REPORTED_ERRORS) row errors.
+    """
+    validator = ProductImportSerializer()
+    report = {'rows': 0, 'imported': 0, 'error_count': 0, 'errors': []}
+    pending = []
+
+    def reject(line_number, errors):
+        report['error_count'] += 1
+        if len(report['errors']) < MAX_REPORTED_ERRORS:
+            report['errors'].append({'line': line_number, 'errors': errors})
+
+    def flush():
+        with transaction.atomic():
+            imported, errors = upsert(pending)
+        report['imported'] += imported
+        for error in errors:
+            reject(error['line'], error['errors'])
+        pending.clear()
+
+    for line_number, row in read_rows(stream, fmt):
+        report['rows'] += 1
+        try:
+            if not isinstance(row, dict):
+                raise serializers.ValidationError({'non_field_errors': ['Row is not a valid JSON object.']})
+            pending.append((line_number, validator.run_validation(row)))
+        except serializers.ValidationError as exc:
+            reject(line_number, exc.detail)
+            continue
+        if len(pending) >= chunk_size:
+            flush()
+    if pending:
+        flush()
+
+    if report['imported']:
+        # bulk_create bypasses the signals that invalidate the catalog cache
+        bump_generation(Product)
+    return report
+
+
+def export_products(fmt, chunk_size=DEFAULT_CHUNK_SIZE):
+    """ Yields the catalog as CSV or JSON Lines text, one chunk of rows at a time. """
+    rows = Product.objects.order_by('id').values_list(*EXPORT_COLUMNS).iterator(chunk_size=chunk_size)
+    buffer = io.StringIO()
+    if fmt == 'csv':
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_FIELDS)
+        write = writer.writerow
+    else:
+        def write(row):
+            buffer.write(json.dumps(dict(zip(EXPORT_FIELDS, row)), default=str))
+            buffer.write('\n')
+
+    for count, row in enumerate(rows, start=1):
+        write(row)
+        if count % chunk_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
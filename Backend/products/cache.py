@@ -0,0 +1,188 @@
+"""
+Read-through cache for the public catalog endpoints.
+
+Responses are cached by view, normalized query parameters and a generation number
+per model. Writes to a model bump its generation (`bump_generation`), which makes
+every cached page that depends on it unreachable in O(1) instead of hunting down keys;
+stale entries simply age out of the LRU / TTL. Cached pages carry a strong ETag so
+clients revalidating with `If-None-Match` get a bodiless 304.
+
+The backend is the `catalog` entry in `CACHES` (see settings: local-memory LRU by
+default, file-based or Redis for multi-worker deployments).
+"""
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+CACHE_ALIAS = 'catalog'
+METRIC_KEYS = ('hits', 'misses', 'not_modified', 'saved_us')
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def _generation_key(label):
+    return f'gen:{label}'
+
+
+def get_generations(labels):
+    cache = get_cache()
+    keys = [_generation_key(label) for label in labels]
+    found = cache.get_many(keys)
+    missing = {key: 1 for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        found.update(missing)
+    return [found[key] for key in keys]
+
+
+def _incr(cache, key, delta=1, timeout=None):
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        cache.add(key, 0, timeout=timeout)
+        return cache.incr(key, delta)
+
+
+def bump_generation_on_write(sender, **kwargs):
+    """ post_save / post_delete receiver for the cached catalog models. """
+    bump_generation(sender)
+
+
+def bump_generation(model):
+    """
+    Invalidates every cached page built from `model`. Bumped immediately and again on
+    commit, so a page re-cached from pre-commit data in between is discarded too.
+    """
+    key = _generation_key(model._meta.label)
+    _incr(get_cache(), key)
+    transaction.on_commit(lambda: _incr(get_cache(), key))
+
+
+def record(metric, amount=1):
+    _incr(get_cache(), f'metrics:{metric}', amount)
+
+
+def get_metrics():
+    values = get_cache().get_many([f'metrics:{key}' for key in METRIC_KEYS])
+    metrics = {key: values.get(f'metrics:{key}', 0) for key in METRIC_KEYS}
+    lookups = metrics['hits'] + metrics['misses']
+    return {
+        'hits': metrics['hits'],
+        'misses': metrics['misses'],
+        'not_modified': metrics['not_modified'],
+        'hit_ratio': round(metrics['hits'] / lookups, 4) if lookups else 0.0,
+        'saved_serialization_seconds': round(metrics['saved_us'] / 1e6, 6),
+    }
+
+
+def normalize_params(query_params):
+    """ Sorted, blank-free parameters; search text is case and whitespace insensitive. """
+    normalized = []
+    for key in sorted(query_params):
+        for value in sorted(query_params.getlist(key)):
+            if value == '':
+                continue
+            if key == 'search':
+                value = ' '.join(value.lower().split())
+            normalized.append((key, value))
+    return normalized
+
+
+def cache_key(request, view_name, labels, kwargs, variant=''):
+    generations = '.'.join(str(generation) for generation in get_generations(labels))
+    identity = json.dumps([
+        request.scheme, request.get_host(), view_name, sorted(kwargs.items()), normalize_params(request.query_params),
+        variant,
+    ])
+    return f'page:{view_name}:{generations}:{hashlib.sha1(identity.encode()).hexdigest()}'
+
+
+def etag_for(data):
+    body = json.dumps(data, cls=JSONEncoder, sort_keys=True, separators=(',', ':'))
+    return '"%s"' % hashlib.sha1(body.encode()).hexdigest()
+
+
+def etag_matches(request, etag):
+    header = request.headers.get('If-None-Match', '')
+    return header.strip() == '*' or etag in [tag.strip() for tag in header.split(',')]
+
+
+class CatalogCacheMixin:
+    """
+    Caches `list` / `retrieve` responses for generic views. `cache_models` lists the
+    models (app_label.ModelName) whose writes invalidate the cached pages; views that
+    answer some callers differently name the caller's variant in `cache_variant`.
+    """
+    cache_models = ('products.Product',)
+
+    def cache_variant(self, request):
+        return ''
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        key, entry = self.cache_lookup(request, kwargs)
+        if entry is None:
+            start = time.perf_counter()
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            entry = self.cache_store(key, response.data, start)
+        else:
+            response = Response(entry['data'])
+        return self.conditional_response(request, response, entry)
+
+    async def acached_response(self, handler, request, *args, **kwargs):
+        """
+        cached_response for async views (see core.async_views), with `handler` a
+        coroutine function. The cache calls stay synchronous: Django's async cache
+        methods only run the same calls in a worker thread.
+        """
+        key, entry = self.cache_lookup(request, kwargs)
+        if entry is None:
+            start = time.perf_counter()
+            response = await handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            entry = self.cache_store(key, response.data, start)
+        else:
+            response = Response(entry['data'])
+        return self.conditional_response(request, response, entry)
+
+    def cache_lookup(self, request, kwargs):
+        key = cache_key(request, self.__class__.__name__, self.cache_models, kwargs, self.cache_variant(request))
+        entry = get_cache().get(key)
+        if entry is not None:
+            record('hits')
+            record('saved_us', entry['cost_us'])
+        return key, entry
+
+    def cache_store(self, key, data, start):
+        entry = {
+            'data': data,
+            'etag': etag_for(data),
+            'cost_us': int((time.perf_counter() - start) * 1e6),
+        }
+        get_cache().set(key, entry, timeout=settings.CATALOG_CACHE_TIMEOUT)
+        record('misses')
+        return entry
+
+    def conditional_response(self, request, response, entry):
+        if etag_matches(request, entry['etag']):
+            record('not_modified')
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        response['ETag'] = entry['etag']
+        return response
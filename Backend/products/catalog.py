@@ -0,0 +1,49 @@
+"""
+Product categories by name.
+
+The API exposes a product's category as its name, so writes (the product
+serializer, bulk imports) resolve names to `Category` rows here, creating the
+missing ones in one bulk INSERT.
+"""
+from django.db import IntegrityError, transaction
+from django.utils.text import slugify
+
+SLUG_LENGTH = 240
+
+
+def unique_slugs(category_model, names):
+    """ {name: slug} for new categories, unique among themselves and existing rows. """
+    bases = {name: slugify(name)[:SLUG_LENGTH] or 'category' for name in names}
+    taken = set()
+    for base in set(bases.values()):
+        taken.update(category_model.objects.filter(slug__startswith=base).values_list('slug', flat=True))
+    slugs = {}
+    for name, base in bases.items():
+        slug, suffix = base, 1
+        while slug in taken:
+            suffix += 1
+            slug = f'{base}-{suffix}'
+        taken.add(slug)
+        slugs[name] = slug
+    return slugs
+
+
+def category_ids(category_model, names, attempts=3):
+    """ {name: id} for `names`, creating the categories that don't exist yet. """
+    names = {name for name in names if name}
+    found = dict(category_model.objects.filter(name__in=names).values_list('name', 'id'))
+    for _ in range(attempts):
+        missing = names - found.keys()
+        if not missing:
+            break
+        try:
+            with transaction.atomic():
+                category_model.objects.bulk_create([
+                    category_model(name=name, slug=slug)
+                    for name, slug in unique_slugs(category_model, sorted(missing)).items()
+                ])
+        except IntegrityError:
+            # A name or slug was taken concurrently: pick up what exists and retry the rest
+            pass
+        found.update(category_model.objects.filter(name__in=missing).values_list('name', 'id'))
+    return found
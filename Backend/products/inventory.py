@@ -0,0 +1,212 @@
+"""
+Stock accounting for checkout and cart reservations.
+
+A product's stock lives either in `Product.stock` (the default) or, for best sellers,
+split across `Product.stock_shards` `StockShard` rows. Sharded stock is taken with a
+conditional `UPDATE ... WHERE quantity >= n` on one randomly chosen shard, so
+concurrent checkouts of the same SKU contend on different rows instead of queueing
+behind a single `SELECT ... FOR UPDATE`. `Product.stock` of a sharded product is the
+shard total as of the last `compact_stock` run, which is what the catalog displays.
+
+Carts can hold stock for a while with a `StockReservation`: the stock is taken at
+reservation time, then either committed by checkout or given back on release/expiry.
+"""
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, PositiveIntegerField, Q, Sum, When
+from django.utils import timezone
+from rest_framework import serializers
+
+from .cache import bump_generation
+from .models import Product, StockReservation, StockShard
+
+
+def not_enough_stock(product, requested, available):
+    return serializers.ValidationError({
+        f"Product {product.name}": f"Not enough stock. Requested {requested}, Available {available}"
+    })
+
+
+def deduct_stock(quantities):
+    """
+    Deducts stock of unsharded products for every line in a single statement. The
+    per-row `stock >= qty` guard keeps the update safe even without a prior row lock.
+    """
+    in_stock = Q()
+    for product_id, quantity in quantities.items():
+        in_stock |= Q(id=product_id, stock__gte=quantity)
+    updated = Product.objects.filter(in_stock).update(
+        stock=Case(
+            *[When(id=product_id, then=F('stock') - quantity) for product_id, quantity in quantities.items()],
+            default=F('stock'),
+            output_field=PositiveIntegerField(),
+        ),
+        updated_at=timezone.now(),
+    )
+    if updated != len(quantities):
+        raise serializers.ValidationError({"items": "Stock changed while placing the order, please retry."})
+
+
+def take_from_shards(product, quantity):
+    """
+    Takes `quantity` from the shards of a sharded product and returns the allocations
+    ({shard index: quantity}). Tries each shard once, starting at a random one; only
+    when no single shard can cover the request are all shards locked and drained.
+    """
+    count = product.stock_shards
+    start = random.randrange(count)
+    for offset in range(count):
+        index = (start + offset) % count
+        taken = StockShard.objects.filter(product=product, index=index, quantity__gte=quantity).update(
+            quantity=F('quantity') - quantity
+        )
+        if taken:
+            return {str(index): quantity}
+
+    shards = list(StockShard.objects.select_for_update().filter(product=product).order_by('index'))
+    available = sum(shard.quantity for shard in shards)
+    if available < quantity:
+        raise not_enough_stock(product, quantity, available)
+    allocations, remaining = {}, quantity
+    for shard in shards:
+        take = min(shard.quantity, remaining)
+        if take:
+            shard.quantity -= take
+            allocations[str(shard.index)] = take
+            remaining -= take
+    StockShard.objects.bulk_update(shards, ['quantity'])
+    return allocations
+
+
+def return_to_shards(product_id, allocations):
+    return StockShard.objects.filter(product_id=product_id, index__in=[int(index) for index in allocations]).update(
+        quantity=F('quantity') + Case(
+            *[When(index=int(index), then=quantity) for index, quantity in allocations.items()],
+            default=0,
+            output_field=PositiveIntegerField(),
+        )
+    )
+
+
+def take_stock(product, quantity):
+    """ Takes stock of a single product, sharded or not; returns the shard allocations. """
+    if product.stock_shards:
+        return take_from_shards(product, quantity)
+    if Product.objects.filter(id=product.id, stock__gte=quantity).update(
+        stock=F('stock') - quantity, updated_at=timezone.now()
+    ) != 1:
+        product.refresh_from_db(fields=['stock'])
+        raise not_enough_stock(product, quantity, product.stock)
+    bump_generation(Product)
+    return {}
+
+
+def reserve(user, product, quantity, ttl=None):
+    """ Holds `quantity` of `product` for `user` until the reservation expires. """
+    ttl = settings.STOCK_RESERVATION_TTL if ttl is None else ttl
+    with transaction.atomic():
+        allocations = take_stock(product, quantity)
+        return StockReservation.objects.create(
+            product=product,
+            user=user,
+            quantity=quantity,
+            allocations=allocations,
+            expires_at=timezone.now() + timedelta(seconds=ttl),
+        )
+
+
+def commit_reservations(user, reservation_lines):
+    """
+    Marks the reservations referenced by checkout lines as committed, in one UPDATE.
+    Every reservation must belong to `user`, still be held and unexpired, and match
+    the line's product and quantity.
+    """
+    reservation_ids = [line['reservation_id'] for line in reservation_lines]
+    held = {
+        reservation.id: reservation
+        for reservation in StockReservation.objects.select_for_update().filter(
+            id__in=reservation_ids, user=user, status='Held', expires_at__gt=timezone.now()
+        )
+    }
+    if len(reservation_ids) != len(set(reservation_ids)):
+        raise serializers.ValidationError({"items": "Each reservation can only be checked out once."})
+    for line in reservation_lines:
+        reservation = held.get(line['reservation_id'])
+        if reservation is None:
+            raise serializers.ValidationError({"items": f"Reservation {line['reservation_id']} is no longer held."})
+        if (reservation.product_id, reservation.quantity) != (line['product_id'], line['quantity']):
+            raise serializers.ValidationError({
+                "items": f"Reservation {reservation.id} does not match product {line['product_id']} x {line['quantity']}."
+            })
+    StockReservation.objects.filter(id__in=held).update(status='Committed')
+
+
+def release(reservations):
+    """
+    Gives the stock of held reservations back. Each reservation is flipped from
+    `Held` with a conditional UPDATE first, so a reservation committed or released
+    concurrently is never returned twice. Returns the number released.
+    """
+    released = 0
+    for reservation in reservations:
+        with transaction.atomic():
+            if not StockReservation.objects.filter(id=reservation.id, status='Held').update(status='Released'):
+                continue
+            # Falls back to `Product.stock` if the product was unsharded meanwhile
+            if not (reservation.allocations and return_to_shards(reservation.product_id, reservation.allocations)):
+                Product.objects.filter(id=reservation.product_id).update(
+                    stock=F('stock') + reservation.quantity, updated_at=timezone.now()
+                )
+                bump_generation(Product)
+            released += 1
+    return released
+
+
+def release_expired(now=None):
+    expired = StockReservation.objects.filter(status='Held', expires_at__lte=now or timezone.now())
+    return release(list(expired.only('id', 'product_id', 'quantity', 'allocations')))
+
+
+def set_shards(product, count):
+    """
+    Redistributes a product's stock evenly over `count` shards (0 folds it back into
+    `Product.stock`). Locks the product and its shards while moving the stock.
+    """
+    with transaction.atomic():
+        product = Product.objects.select_for_update().get(pk=product.pk)
+        shards = list(StockShard.objects.select_for_update().filter(product=product))
+        total = sum(shard.quantity for shard in shards) if product.stock_shards else product.stock
+        StockShard.objects.filter(product=product).delete()
+        StockShard.objects.bulk_create([
+            StockShard(product=product, index=index, quantity=total // count + (index < total % count))
+            for index in range(count)
+        ])
+        Product.objects.filter(pk=product.pk).update(stock=total, stock_shards=count, updated_at=timezone.now())
+        bump_generation(Product)
+    product.refresh_from_db()
+    return product
+
+
+def compact():
+    """
+    Refreshes `Product.stock` of sharded products from their shards and rebalances
+    shards that drifted apart, so single-shard takes keep succeeding. Returns the
+    number of products touched.
+    """
+    totals = StockShard.objects.filter(product__stock_shards__gt=0).values('product').annotate(total=Sum('quantity'))
+    touched = 0
+    for row in totals:
+        with transaction.atomic():
+            shards = list(StockShard.objects.select_for_update().filter(product_id=row['product']).order_by('index'))
+            total = sum(shard.quantity for shard in shards)
+            for shard in shards:
+                shard.quantity = total // len(shards) + (shard.index < total % len(shards))
+            StockShard.objects.bulk_update(shards, ['quantity'])
+            Product.objects.filter(pk=row['product']).update(stock=total)
+        touched += 1
+    if touched:
+        bump_generation(Product)
+    return touched
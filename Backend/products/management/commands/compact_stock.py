@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from products.inventory import compact, release_expired
+
+
+class Command(BaseCommand):
+    help = "Releases expired stock reservations, then refreshes and rebalances sharded stock. Run periodically."
+
+    def handle(self, *args, **options):
+        released = release_expired()
+        compacted = compact()
+        self.stdout.write(self.style.SUCCESS(
+            f"Released {released} expired reservation(s), compacted {compacted} sharded product(s)."
+        ))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from products import bulk
+
+
+class Command(BaseCommand):
+    help = "Streams every product as CSV or JSON Lines to a file (or stdout) in constant memory."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', choices=bulk.FORMATS, default='csv')
+        parser.add_argument('--path', help="Defaults to stdout.")
+        parser.add_argument('--chunk-size', type=int, default=bulk.DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        chunks = bulk.export_products(options['output'], options['chunk_size'])
+        if not options['path']:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+        with open(options['path'], 'w', newline='') as stream:
+            stream.writelines(chunks)
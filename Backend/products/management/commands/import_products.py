@@ -0,0 +1,26 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from products import bulk
+
+
+class Command(BaseCommand):
+    help = "Upserts products by SKU from a CSV or JSON Lines file, reporting invalid rows without aborting."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--input', choices=bulk.FORMATS, help="Defaults to the file extension.")
+        parser.add_argument('--chunk-size', type=int, default=bulk.DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        fmt = options['input'] or bulk.format_for(options['path'])
+        try:
+            with open(options['path'], 'rb') as stream:
+                report = bulk.import_products(stream, fmt, options['chunk_size'])
+        except OSError as exc:
+            raise CommandError(exc)
+
+        for error in report['errors']:
+            self.stderr.write(f"line {error['line']}: {json.dumps(error['errors'])}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report['imported']} of {report['rows']} rows ({report['error_count']} invalid)."
+        ))
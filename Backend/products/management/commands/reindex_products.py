@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import connections
+from products.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Recreates the product full-text search index and rebuilds it from products_product."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        backend = get_search_backend(connection)
+        with connection.cursor() as cursor:
+            backend.install(cursor)
+            backend.rebuild(cursor)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt product search index ({backend.__class__.__name__})."))
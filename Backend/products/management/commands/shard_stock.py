@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+from products.inventory import set_shards
+from products.models import Product
+
+
+class Command(BaseCommand):
+    help = "Splits a product's stock across N shard rows so concurrent checkouts don't queue on one row (0 unshards)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('product_id', type=int)
+        parser.add_argument('--shards', type=int, default=16)
+
+    def handle(self, *args, **options):
+        if options['shards'] < 0:
+            raise CommandError("--shards must be 0 or more.")
+        try:
+            product = Product.objects.get(pk=options['product_id'])
+        except Product.DoesNotExist:
+            raise CommandError(f"Product {options['product_id']} does not exist.")
+        product = set_shards(product, options['shards'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{product.name}: {product.stock} in stock across {product.stock_shards} shard(s)."
+        ))
@@ -0,0 +1,24 @@
+from django.db import migrations
+
+
+def install(apps, schema_editor):
+    from products.search import get_search_backend
+    with schema_editor.connection.cursor() as cursor:
+        get_search_backend(schema_editor.connection).install(cursor)
+
+
+def uninstall(apps, schema_editor):
+    from products.search import get_search_backend
+    with schema_editor.connection.cursor() as cursor:
+        get_search_backend(schema_editor.connection).uninstall(cursor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
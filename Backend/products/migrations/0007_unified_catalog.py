@@ -0,0 +1,94 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils.text import slugify
+
+
+def link_categories(apps, schema_editor):
+    """ One Category per distinct category label, then one UPDATE per label. """
+    Category = apps.get_model('products', 'Category')
+    Product = apps.get_model('products', 'Product')
+    labels = sorted(Product.objects.exclude(category_label='').values_list('category_label', flat=True).distinct())
+    # The table is new: only the labels themselves can clash once slugified
+    taken = set()
+    categories = []
+    for label in labels:
+        base = slugify(label)[:240] or 'category'
+        slug, suffix = base, 1
+        while slug in taken:
+            suffix += 1
+            slug = f'{base}-{suffix}'
+        taken.add(slug)
+        categories.append(Category(name=label, slug=slug))
+    Category.objects.bulk_create(categories)
+    for label, category_id in Category.objects.values_list('name', 'id'):
+        Product.objects.filter(category_label=label).update(category=category_id)
+
+
+def unlink_categories(apps, schema_editor):
+    Category = apps.get_model('products', 'Category')
+    Product = apps.get_model('products', 'Product')
+    for category_id, name in Category.objects.values_list('id', 'name'):
+        Product.objects.filter(category=category_id).update(category_label=name[:100])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_compliance_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Category',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('slug', models.SlugField(max_length=255, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Categories',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='image_url',
+            field=models.URLField(blank=True, max_length=500, null=True),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='is_active',
+            field=models.BooleanField(default=True),
+        ),
+        # The free-text category becomes a foreign key to Category
+        migrations.RenameField(
+            model_name='product',
+            old_name='category',
+            new_name='category_label',
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='category',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='products', to='products.category'),
+        ),
+        migrations.RunPython(link_categories, unlink_categories),
+        migrations.RemoveField(
+            model_name='product',
+            name='category_label',
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['category', 'price'], name='product_category_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['price'], name='product_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_active', '-created_at', '-id'], name='product_active_created_idx'),
+        ),
+    ]
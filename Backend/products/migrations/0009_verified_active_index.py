@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_category_created_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_verified_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['authority_verified', 'is_active', '-created_at', '-id'], name='product_verified_active_idx'),
+        ),
+    ]
@@ -1,17 +1,110 @@
+from django.conf import settings
 from django.db import models
 
+
+class CategoryManager(models.Manager):
+
+    def for_name(self, name):
+        """ The category called `name`, created on first use. """
+        from .catalog import category_ids
+
+        return self.get(pk=category_ids(self.model, [name])[name])
+
+
+class Category(models.Model):
+    name = models.CharField(max_length=255, unique=True)
+    slug = models.SlugField(max_length=255, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = CategoryManager()
+
+    class Meta:
+        verbose_name_plural = "Categories"
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
 class Product(models.Model):
     name = models.CharField(max_length=255)
-    category = models.CharField(max_length=100)
+    sku = models.CharField(max_length=64, unique=True, null=True, blank=True)
+    # Indexed as the prefix of product_category_created_idx / product_category_price_idx
+    category = models.ForeignKey(
+        Category, on_delete=models.SET_NULL, null=True, blank=True, related_name='products', db_index=False
+    )
     description = models.TextField()
     price = models.DecimalField(max_digits=10, decimal_places=2)
     stock = models.PositiveIntegerField(default=0)
+    image_url = models.URLField(max_length=500, blank=True, null=True)
+    is_active = models.BooleanField(default=True)
+    # 0: `stock` is authoritative. N > 0: stock lives in N `StockShard` rows and
+    # `stock` is their total as of the last compaction (see products.inventory).
+    stock_shards = models.PositiveSmallIntegerField(default=0)
     
     compliance_status = models.CharField(max_length=50, default='Pending')
     authority_verified = models.BooleanField(default=False)
+    # Document counts behind the two flags above, kept up to date by compliance.counters
+    compliance_pending = models.PositiveIntegerField(default=0)
+    compliance_approved = models.PositiveIntegerField(default=0)
+    compliance_rejected = models.PositiveIntegerField(default=0)
+    compliance_approved_at = models.DateTimeField(null=True, blank=True)
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='product_created_idx'),
+            # ?verified=: customers only see active products
+            models.Index(
+                fields=['authority_verified', 'is_active', '-created_at', '-id'], name='product_verified_active_idx',
+            ),
+            # ?category=: the page in list order; with a price range: the matching rows
+            models.Index(fields=['category', '-created_at', '-id'], name='product_category_created_idx'),
+            models.Index(fields=['category', 'price'], name='product_category_price_idx'),
+            models.Index(fields=['price'], name='product_price_idx'),
+            models.Index(fields=['is_active', '-created_at', '-id'], name='product_active_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} - {self.category or 'Uncategorized'}"
+
+
+class StockShard(models.Model):
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='shards')
+    index = models.PositiveSmallIntegerField()
+    quantity = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'index'], name='stockshard_product_index_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id}#{self.index}: {self.quantity}"
+
+
+class StockReservation(models.Model):
+    STATUS_CHOICES = (
+        ('Held', 'Held'),
+        ('Committed', 'Committed'),
+        ('Released', 'Released'),
+    )
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='reservations')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='stock_reservations')
+    quantity = models.PositiveIntegerField()
+    # {shard index: quantity} taken from each shard; empty for unsharded products
+    allocations = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Held')
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'expires_at'], name='reservation_status_expiry_idx'),
+        ]
+
     def __str__(self):
-        return f"{self.name} - {self.category}"
+        return f"Reservation #{self.id} - {self.quantity} x {self.product_id} ({self.status})"
@@ -0,0 +1,155 @@
+"""
+Full-text search over product name and description, behind `?search=`.
+
+* SQLite: an external-content FTS5 table kept in sync with `products_product` by
+  triggers, so every write path (save, delete, bulk_create, update) is covered.
+* PostgreSQL: a GIN index over the same `to_tsvector(...)` expression used to query.
+* Anything else: `icontains` on each term.
+
+Every term is prefix-matched so the debounced search box finds products while the
+user is still typing, and results are ranked with name matches weighted highest.
+"""
+import re
+
+from django.db import connections
+from django.db.models import Q
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+FTS_TABLE = 'products_product_fts'
+PG_VECTOR = (
+    "to_tsvector('english', coalesce(products_product.name, '') || ' ' || "
+    "coalesce(products_product.description, ''))"
+)
+# Ranking only (not indexed): name matches outrank description matches
+PG_RANK_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(products_product.name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(products_product.description, '')), 'B')"
+)
+MAX_TERMS = 10
+
+
+def search_terms(query):
+    return re.findall(r'\w+', query.lower())[:MAX_TERMS]
+
+
+class SQLiteSearchBackend:
+    TRIGGERS = {
+        f'{FTS_TABLE}_ai': f"""
+            CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON products_product BEGIN
+                INSERT INTO {FTS_TABLE}(rowid, name, description) VALUES (new.id, new.name, new.description);
+            END""",
+        f'{FTS_TABLE}_ad': f"""
+            CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON products_product BEGIN
+                INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description)
+                VALUES ('delete', old.id, old.name, old.description);
+            END""",
+        f'{FTS_TABLE}_au': f"""
+            CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF name, description ON products_product BEGIN
+                INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description)
+                VALUES ('delete', old.id, old.name, old.description);
+                INSERT INTO {FTS_TABLE}(rowid, name, description) VALUES (new.id, new.name, new.description);
+            END""",
+    }
+
+    def install(self, cursor):
+        """ Idempotent: creates the index and its triggers if missing (SQLite drops
+        triggers whenever a migration rebuilds products_product). """
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+        created = cursor.fetchone() is None
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            "name, description, content='products_product', content_rowid='id', "
+            "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        for sql in self.TRIGGERS.values():
+            cursor.execute(sql)
+        if created:
+            self.rebuild(cursor)
+
+    def uninstall(self, cursor):
+        for name in self.TRIGGERS:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+        cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+    def rebuild(self, cursor):
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+    def search(self, queryset, terms):
+        match = ' '.join(f'"{term}"*' for term in terms)
+        return queryset.extra(
+            tables=[FTS_TABLE],
+            where=[f'{FTS_TABLE}.rowid = products_product.id', f'{FTS_TABLE} MATCH %s'],
+            params=[match],
+            select={'search_rank': f'bm25({FTS_TABLE}, 10.0, 1.0)'},
+        ).order_by('search_rank', '-created_at', '-id')
+
+
+class PostgresSearchBackend:
+    INDEX = 'products_product_search_idx'
+
+    def install(self, cursor):
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS {self.INDEX} ON products_product USING GIN ({PG_VECTOR})"
+        )
+
+    def uninstall(self, cursor):
+        cursor.execute(f"DROP INDEX IF EXISTS {self.INDEX}")
+
+    def rebuild(self, cursor):
+        cursor.execute(f"REINDEX INDEX {self.INDEX}")
+
+    def search(self, queryset, terms):
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        return queryset.extra(
+            where=[f"{PG_VECTOR} @@ to_tsquery('english', %s)"],
+            params=[tsquery],
+            select={'search_rank': f"ts_rank({PG_RANK_VECTOR}, to_tsquery('english', %s))"},
+            select_params=[tsquery],
+        ).order_by('-search_rank', '-created_at', '-id')
+
+
+class LikeSearchBackend:
+    """ Unindexed fallback for databases without a full-text engine. """
+
+    def install(self, cursor):
+        pass
+
+    uninstall = rebuild = install
+
+    def search(self, queryset, terms):
+        for term in terms:
+            queryset = queryset.filter(Q(name__icontains=term) | Q(description__icontains=term))
+        return queryset
+
+
+BACKENDS = {
+    'sqlite': SQLiteSearchBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+def get_search_backend(connection):
+    return BACKENDS.get(connection.vendor, LikeSearchBackend)()
+
+
+def search_products(queryset, query):
+    terms = search_terms(query)
+    if not terms:
+        return queryset
+    return get_search_backend(connections[queryset.db]).search(queryset, terms)
+
+
+def install_search_index(using='default'):
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        get_search_backend(connection).install(cursor)
+
+
+class ProductSearchFilter(filters.BaseFilterBackend):
+    """ `?search=` for `products.Product` querysets, ranked by relevance. """
+    search_param = api_settings.SEARCH_PARAM
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '')
+        return search_products(queryset, query)
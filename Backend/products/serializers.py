@@ -1,8 +1,61 @@
 from rest_framework import serializers
-from .models import Product
+from .models import Category, Product, StockReservation
+
+
+class CategoryNameField(serializers.RelatedField):
+    """
+    A product's category by name, as the API has always exposed it. Validation only
+    checks the name; `ProductSerializer` resolves it on save, creating a category
+    that doesn't exist yet, so a request that fails validation creates nothing.
+    """
+    default_error_messages = {
+        'invalid': 'Enter a category name.',
+    }
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('queryset', Category.objects.all())
+        super().__init__(**kwargs)
+
+    def to_representation(self, category):
+        return category.name
+
+    def to_internal_value(self, data):
+        if not isinstance(data, str) or not data.strip():
+            self.fail('invalid')
+        return data.strip()
+
+    def compile_representation(self, context):
+        """ For core.compiled: the name, joined in by `.values()`. """
+        return f'{self.source}__name', lambda name: name
+
 
 class ProductSerializer(serializers.ModelSerializer):
+    category = CategoryNameField()
+
     class Meta:
         model = Product
         fields = '__all__'
-        read_only_fields = ('created_at', 'updated_at')
+        read_only_fields = (
+            'created_at', 'updated_at', 'stock_shards', 'compliance_status', 'authority_verified',
+            'compliance_pending', 'compliance_approved', 'compliance_rejected', 'compliance_approved_at',
+        )
+
+    def create(self, validated_data):
+        return super().create(self.with_category(validated_data))
+
+    def update(self, instance, validated_data):
+        return super().update(instance, self.with_category(validated_data))
+
+    @staticmethod
+    def with_category(validated_data):
+        if validated_data.get('category') is not None:
+            validated_data['category'] = Category.objects.for_name(validated_data['category'])
+        return validated_data
+
+class StockReservationSerializer(serializers.ModelSerializer):
+    quantity = serializers.IntegerField(min_value=1)
+
+    class Meta:
+        model = StockReservation
+        fields = ['id', 'product', 'quantity', 'status', 'expires_at', 'created_at']
+        read_only_fields = ['status', 'expires_at', 'created_at']
@@ -1,3 +1,424 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from accounts.models import User
+from core.async_views import read_route
+from core.compiled import compile_serializer
+from core.query_plans import QueryPlanTestMixin, analyze
+from core.renderers import FastJSONRenderer
+from rest_framework.renderers import JSONRenderer
+from .cache import get_cache
+from .inventory import set_shards
+from .models import Category, Product, StockReservation, StockShard
+from .serializers import ProductSerializer
+from .views import ProductListCreateView, ProductRetrieveUpdateDestroyView
 
-# Create your tests here.
+
+class ProductQueryBudgetTests(TestCase):
+
+    def test_product_list_query_count_is_constant(self):
+        client = APIClient()
+        Product.objects.create(name="Single", category=Category.objects.for_name("Test"), description="", price='1.00', stock=1)
+        # count, page
+        with self.assertNumQueries(2):
+            client.get('/api/products/')
+
+        category = Category.objects.for_name("Test")
+        Product.objects.bulk_create([
+            Product(name=f"Product {i}", category=category, description="", price='1.00', stock=1)
+            for i in range(30)
+        ])
+        # bulk_create bypasses the signals that invalidate the catalog cache
+        get_cache().clear()
+        with self.assertNumQueries(2):
+            response = client.get('/api/products/')
+        self.assertEqual(len(response.data['results']), 10)
+
+
+class ProductCursorPaginationTests(TestCase):
+
+    def setUp(self):
+        get_cache().clear()
+
+    def test_cursor_walk_matches_page_numbers(self):
+        category = Category.objects.for_name("Test")
+        Product.objects.bulk_create([
+            Product(name=f"Product {i}", category=category, description="", price='1.00', stock=1)
+            for i in range(25)
+        ])
+        client = APIClient()
+        expected = [p['id'] for page in (1, 2, 3) for p in client.get('/api/products/', {'page': page}).data['results']]
+
+        seen, pages = [], []
+        url = '/api/products/?pagination=cursor'
+        while url:
+            with self.assertNumQueries(1):
+                response = client.get(url)
+            self.assertNotIn('count', response.data)
+            pages.append(response.data)
+            seen += [p['id'] for p in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(seen, expected)
+
+        previous = client.get(pages[-1]['previous']).data
+        self.assertEqual(previous['results'], pages[-2]['results'])
+
+    def test_invalid_cursor_is_not_found(self):
+        response = APIClient().get('/api/products/', {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, 404)
+
+
+class ProductSearchTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        Product.objects.create(name="Paracetamol 500mg", category=Category.objects.for_name("Pharma"), description="Pain relief tablets", price='1.00')
+        Product.objects.create(name="Surgical gloves", category=Category.objects.for_name("Surgical"), description="Latex free, for paracetamol-free wards", price='1.00')
+        self.syringe = Product.objects.create(name="Syringe", category=Category.objects.for_name("Surgical"), description="Single use", price='1.00')
+
+    def search(self, query):
+        return [p['name'] for p in self.client.get('/api/products/', {'search': query}).data['results']]
+
+    def test_prefix_match_ranks_name_hits_first(self):
+        self.assertEqual(self.search('parac'), ["Paracetamol 500mg", "Surgical gloves"])
+
+    def test_all_terms_must_match(self):
+        self.assertEqual(self.search('surgical latex'), ["Surgical gloves"])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.syringe.name = "Insulin pen"
+        self.syringe.save()
+        self.assertEqual(self.search('syringe'), [])
+        self.assertEqual(self.search('insulin'), ["Insulin pen"])
+
+        self.syringe.delete()
+        self.assertEqual(self.search('insulin'), [])
+
+
+class CatalogCacheTests(TestCase):
+
+    def setUp(self):
+        get_cache().clear()
+        self.client = APIClient()
+        self.product = Product.objects.create(name="Gauze", category=Category.objects.for_name("Surgical"), description="", price='3.00')
+
+    def test_repeat_reads_are_served_from_cache(self):
+        first = self.client.get('/api/products/', {'category': 'Surgical'})
+        with self.assertNumQueries(0):
+            second = self.client.get('/api/products/', {'category': 'Surgical', 'search': ''})
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(first['ETag'], second['ETag'])
+
+    def test_if_none_match_returns_not_modified(self):
+        etag = self.client.get(f'/api/products/{self.product.pk}/')['ETag']
+        response = self.client.get(f'/api/products/{self.product.pk}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_writes_invalidate_cached_pages(self):
+        self.client.get('/api/products/')
+        self.product.price = '4.00'
+        self.product.save()
+        self.assertEqual(self.client.get('/api/products/').data['results'][0]['price'], '4.00')
+
+
+class StockReservationTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='buyer@example.com', password='pass12345')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.product = Product.objects.create(name="Mask", category=Category.objects.for_name("Surgical"), description="", price='2.00', stock=10)
+
+    def shard_total(self):
+        return sum(StockShard.objects.filter(product=self.product).values_list('quantity', flat=True))
+
+    def test_sharded_checkout_never_oversells(self):
+        set_shards(self.product, 4)
+        self.assertEqual(sorted(StockShard.objects.values_list('quantity', flat=True)), [2, 2, 3, 3])
+
+        # 3 fits in a single shard, 6 needs draining several
+        for quantity in (3, 6):
+            response = self.client.post('/api/orders/', {'items': [{'product': self.product.pk, 'quantity': quantity}]}, format='json')
+            self.assertEqual(response.status_code, 201, response.data)
+        response = self.client.post('/api/orders/', {'items': [{'product': self.product.pk, 'quantity': 2}]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.shard_total(), 1)
+
+        call_command('compact_stock', stdout=StringIO())
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 1)
+
+    def test_reservation_is_committed_by_checkout(self):
+        set_shards(self.product, 2)
+        reservation = self.client.post('/api/products/reservations/', {'product': self.product.pk, 'quantity': 4}).data
+        self.assertEqual(self.shard_total(), 6)
+
+        items = [{'product': self.product.pk, 'quantity': 4, 'reservation': reservation['id']}]
+        response = self.client.post('/api/orders/', {'items': items}, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(self.shard_total(), 6)
+        self.assertEqual(StockReservation.objects.get().status, 'Committed')
+
+        # A committed reservation can't be checked out (or released) again
+        self.assertEqual(self.client.post('/api/orders/', {'items': items}, format='json').status_code, 400)
+        self.client.delete(f"/api/products/reservations/{reservation['id']}/")
+        self.assertEqual(self.shard_total(), 6)
+
+    def test_release_and_expiry_return_stock(self):
+        reservation = self.client.post('/api/products/reservations/', {'product': self.product.pk, 'quantity': 4}).data
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 6)
+        self.assertEqual(self.client.delete(f"/api/products/reservations/{reservation['id']}/").status_code, 204)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 10)
+
+        self.client.post('/api/products/reservations/', {'product': self.product.pk, 'quantity': 10})
+        StockReservation.objects.filter(status='Held').update(expires_at=timezone.now() - timedelta(seconds=1))
+        call_command('compact_stock', stdout=StringIO())
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 10)
+
+
+class ProductBulkTests(TestCase):
+
+    def setUp(self):
+        admin = User.objects.create_user(email='admin@example.com', password='pass12345', role='Admin')
+        self.client = APIClient()
+        self.client.force_authenticate(admin)
+        Product.objects.create(sku='GZ-1', name="Gauze", category=Category.objects.for_name("Surgical"), description="Old", price='3.00')
+
+    def test_import_upserts_by_sku_and_reports_bad_rows(self):
+        csv_file = SimpleUploadedFile('prices.csv', (
+            "sku,name,category,description,price,stock\n"
+            "GZ-1,Gauze,Surgical,Sterile 10x10,3.50,40\n"
+            "MK-1,Mask,Surgical,FFP2,1.20,\n"
+            "BAD-1,Broken,Surgical,No price,,5\n"
+        ).encode())
+        report = self.client.post('/api/products/import/', {'file': csv_file}).data
+        self.assertEqual((report['rows'], report['imported'], report['error_count']), (3, 2, 1))
+        self.assertEqual(report['errors'][0]['line'], 4)
+        self.assertIn('price', report['errors'][0]['errors'])
+
+        gauze = Product.objects.get(sku='GZ-1')
+        self.assertEqual((gauze.description, str(gauze.price), gauze.stock), ("Sterile 10x10", '3.50', 40))
+        self.assertEqual(Product.objects.get(sku='MK-1').stock, 0)
+
+    def test_import_only_updates_the_given_columns(self):
+        Product.objects.filter(sku='GZ-1').update(
+            stock=40, authority_verified=True, compliance_status='Approved', compliance_approved=1,
+        )
+        csv_file = SimpleUploadedFile('prices.csv', (
+            "sku,name,category,description,price\n"
+            "GZ-1,Gauze,Surgical,Sterile,3.75\n"
+        ).encode())
+        self.assertEqual(self.client.post('/api/products/import/', {'file': csv_file}).data['imported'], 1)
+        gauze = Product.objects.get(sku='GZ-1')
+        self.assertEqual(
+            (str(gauze.price), gauze.description, gauze.stock, gauze.authority_verified, gauze.compliance_status),
+            ('3.75', "Sterile", 40, True, 'Approved'),
+        )
+
+    def test_import_rejects_stock_of_sharded_products(self):
+        set_shards(Product.objects.get(sku='GZ-1'), 2)
+        jsonl = SimpleUploadedFile('stock.jsonl', (
+            b'{"sku": "GZ-1", "name": "Gauze", "category": "Surgical", "description": "Pad", "price": "3.00", "stock": 9}\n'
+            b'{"sku": "GZ-1", "name": "Gauze", "category": "Surgical", "description": "New", "price": "3.00"}\n'
+            b'{"sku": "MK-1", "name": "Mask", "category": "Surgical", "description": "FFP2", "price": "1.00", "stock": 5}\n'
+        ))
+        report = self.client.post('/api/products/import/', {'file': jsonl}).data
+        self.assertEqual((report['imported'], report['error_count']), (2, 1))
+        self.assertEqual((report['errors'][0]['line'], list(report['errors'][0]['errors'])), (1, ['stock']))
+        self.assertEqual(Product.objects.get(sku='GZ-1').description, "New")
+        self.assertEqual(Product.objects.get(sku='MK-1').stock, 5)
+
+    def test_export_round_trips_through_import(self):
+        response = self.client.get('/api/products/export/', {'output': 'jsonl'})
+        self.assertTrue(response.streaming)
+        body = b''.join(response.streaming_content)
+        Product.objects.update(description="Changed")
+
+        report = self.client.post('/api/products/import/', {'file': SimpleUploadedFile('export.jsonl', body)}).data
+        self.assertEqual(report['imported'], 1)
+        self.assertEqual(Product.objects.get().description, "Old")
+
+    def test_bulk_endpoints_are_admin_only(self):
+        self.client.force_authenticate(User.objects.create_user(email='buyer@example.com', password='pass12345'))
+        self.assertEqual(self.client.get('/api/products/export/').status_code, 403)
+
+
+class ProductCategoryTests(TestCase):
+
+    def setUp(self):
+        get_cache().clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(email='admin@example.com', password='pass12345', role='Admin'))
+
+    def create(self, name, category):
+        return self.client.post('/api/products/', {
+            'name': name, 'category': category, 'description': name, 'price': '1.00', 'stock': 1,
+        })
+
+    def test_categories_are_created_by_name_once(self):
+        self.assertEqual(self.create("Gauze", "Surgical").data['category'], "Surgical")
+        self.assertEqual(self.create("Mask", "Surgical").status_code, 201)
+        self.create("Syrup", "Pharma")
+        self.assertEqual(list(Category.objects.values_list('name', 'slug')), [("Pharma", 'pharma'), ("Surgical", 'surgical')])
+
+        names = [product['name'] for product in self.client.get('/api/products/', {'category': 'Surgical'}).data['results']]
+        self.assertEqual(sorted(names), ["Gauze", "Mask"])
+
+    def test_invalid_product_creates_no_category(self):
+        response = self.client.post('/api/products/', {
+            'name': "Gauze", 'category': "Orphan", 'description': "x", 'price': 'free',
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Category.objects.filter(name="Orphan").exists())
+
+    def test_inactive_products_are_only_shown_to_admins(self):
+        product_id = self.create("Syrup", "Pharma").data['id']
+        Product.objects.filter(pk=product_id).update(is_active=False)
+        get_cache().clear()
+        self.assertEqual(self.client.get('/api/products/').data['count'], 1)
+        self.assertEqual(self.client.get(f'/api/products/{product_id}/').status_code, 200)
+
+        customer = APIClient()
+        customer.force_authenticate(User.objects.create_user(email='buyer@example.com', password='pass12345'))
+        self.assertEqual(customer.get('/api/products/').data['count'], 0)
+        self.assertEqual(customer.get(f'/api/products/{product_id}/').status_code, 404)
+        response = customer.post('/api/orders/', {'items': [{'product': product_id, 'quantity': 1}]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('not available', str(response.data))
+
+    def test_deleting_a_category_keeps_its_products(self):
+        product_id = self.create("Gauze", "Surgical").data['id']
+        Category.objects.all().delete()
+        self.assertIsNone(self.client.get(f'/api/products/{product_id}/').data['category'])
+
+
+@override_settings(ASYNC_READ_ROUTES=['*'])
+class AsyncReadRouteTests(TestCase):
+    """ The async read views must answer exactly like the DRF views they mirror. """
+
+    def setUp(self):
+        get_cache().clear()
+        parity = {'Even': Category.objects.for_name("Even"), 'Odd': Category.objects.for_name("Odd")}
+        Product.objects.bulk_create([
+            Product(name=f"Product {i}", category=parity["Even" if i % 2 else "Odd"], description="", price=f'{i}.00')
+            for i in range(25)
+        ])
+        self.factory = AsyncRequestFactory()
+
+    async def fetch(self, view, path, params=None, **kwargs):
+        response = await view(self.factory.get(path, params or {}), **kwargs)
+        response.render()
+        return response
+
+    async def test_list_matches_sync_view(self):
+        view = read_route('products.list', ProductListCreateView)
+        for params in ({}, {'page': 3}, {'category': 'Even', 'min_price': 5}, {'pagination': 'cursor'}, {'page': 9}):
+            get_cache().clear()
+            expected = await self.async_client.get('/api/products/', params)
+            get_cache().clear()
+            response = await self.fetch(view, '/api/products/', params)
+            self.assertEqual(response.status_code, expected.status_code, params)
+            self.assertJSONEqual(response.content, expected.json())
+
+    async def test_detail_and_missing_product(self):
+        view = read_route('products.detail', ProductRetrieveUpdateDestroyView)
+        product = await Product.objects.order_by('id').afirst()
+        response = await self.fetch(view, f'/api/products/{product.pk}/', pk=product.pk)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['name'], product.name)
+        response = await self.fetch(view, '/api/products/999999/', pk=999999)
+        self.assertEqual(response.status_code, 404)
+
+    async def test_writes_still_go_to_the_sync_view(self):
+        view = read_route('products.list', ProductListCreateView)
+        response = await view(self.factory.post('/api/products/', {}, content_type='application/json'))
+        response.render()
+        self.assertEqual(response.status_code, 401)
+
+
+class CompiledSerializerTests(TestCase):
+    """ The compiled list path must produce the same bytes as the serializer. """
+
+    def setUp(self):
+        now = timezone.now()
+        category = Category.objects.for_name("Test")
+        Product.objects.bulk_create([
+            Product(name=f"Lamp {i} \u00e9\u2028\U0001f4a1", sku=f'SKU-{i}' if i % 2 else None, category=category,
+                    description='Quote " backslash \\ tab \t', price=['0.50', '19.99', '1000.00'][i % 3],
+                    stock=i, authority_verified=i % 4 == 0, compliance_approved=i % 3,
+                    compliance_approved_at=now - timedelta(days=i, microseconds=i) if i % 4 == 0 else None)
+            for i in range(25)
+        ])
+        self.client = APIClient()
+
+    def get(self, path, compiled):
+        get_cache().clear()
+        with override_settings(COMPILED_SERIALIZERS=compiled):
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(type(response.accepted_renderer) is FastJSONRenderer, compiled)
+        return response.content
+
+    def test_list_matches_serializer_byte_for_byte(self):
+        for path in ('/api/products/', '/api/products/?page=3', '/api/products/?pagination=cursor',
+                     '/api/products/?search=lamp&verified=true', '/api/products/?min_price=1&page_size=100'):
+            with self.subTest(path=path):
+                self.assertEqual(self.get(path, compiled=True), self.get(path, compiled=False))
+
+    def test_compiled_rows_match_serializer(self):
+        compiled = compile_serializer(ProductSerializer)
+        self.assertIsNotNone(compiled)
+        queryset = Product.objects.order_by('id')
+        expected = ProductSerializer(queryset, many=True).data
+        data = compiled.represent(compiled.rows(queryset))
+        self.assertEqual(data, expected)
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(expected))
+
+
+class ProductQueryPlanTests(QueryPlanTestMixin, TestCase):
+    """ Every catalog filter must be answered through an index, not a table scan. """
+
+    @classmethod
+    def setUpTestData(cls):
+        categories = [Category.objects.for_name(f"Category {i}") for i in range(25)]
+        cls.products = Product.objects.bulk_create([
+            Product(name=f"Product {i}", sku=f'SKU-{i}', category=categories[i % 25], description="Synthetic",
+                    price=f'{i % 400}.{i % 100:02d}', stock=i % 30, authority_verified=i % 7 == 0,
+                    is_active=i % 11 != 0)
+            for i in range(5000)
+        ], batch_size=1000)
+        analyze()
+
+    def setUp(self):
+        get_cache().clear()
+        self.client = APIClient()
+
+    def get(self, path, params=None):
+        response = self.client.get(path, params or {})
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_list_filters_use_indexes(self):
+        for params in ({}, {'category': 'Category 3'}, {'category': 'Category 3', 'min_price': 10, 'max_price': 90},
+                       {'min_price': 100, 'max_price': 120}, {'verified': 'true'}, {'is_active': 'false'},
+                       {'search': 'product'}, {'page': 40}):
+            with self.subTest(params=params):
+                self.assertNoFullScans(self.get, '/api/products/', params)
+
+    def test_cursor_pages_and_detail_use_indexes(self):
+        first = self.assertNoFullScans(self.get, '/api/products/', {'pagination': 'cursor', 'category': 'Category 4'})
+        self.assertNoFullScans(self.get, first.data['next'])
+        self.assertNoFullScans(self.get, f'/api/products/{self.products[123].pk}/')
+
+    def test_category_page_is_read_in_list_order(self):
+        in_category = Product.objects.filter(category__name="Category 3")
+        self.assertUsesIndex(in_category.order_by('-created_at', '-id')[:10], 'product_category_created_idx')
+        self.assertUsesIndex(in_category.filter(price__gte=10, price__lte=20), 'product_category_price_idx')
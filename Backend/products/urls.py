@@ -1,7 +1,16 @@
 from django.urls import path
-from .views import ProductListCreateView, ProductRetrieveUpdateDestroyView
+from core.async_views import read_route
+from .views import (
+    ProductListCreateView, ProductRetrieveUpdateDestroyView, CatalogCacheMetricsView,
+    ProductImportView, ProductExportView, StockReservationCreateView, StockReservationDetailView,
+)
 
 urlpatterns = [
-    path('', ProductListCreateView.as_view(), name='product-list-create'),
-    path('<int:pk>/', ProductRetrieveUpdateDestroyView.as_view(), name='product-detail'),
+    path('', read_route('products.list', ProductListCreateView), name='product-list-create'),
+    path('<int:pk>/', read_route('products.detail', ProductRetrieveUpdateDestroyView), name='product-detail'),
+    path('cache-metrics/', CatalogCacheMetricsView.as_view(), name='catalog-cache-metrics'),
+    path('import/', ProductImportView.as_view(), name='product-import'),
+    path('export/', ProductExportView.as_view(), name='product-export'),
+    path('reservations/', StockReservationCreateView.as_view(), name='stock-reservation-create'),
+    path('reservations/<int:pk>/', StockReservationDetailView.as_view(), name='stock-reservation-detail'),
 ]
@@ -1,25 +1,112 @@
-from rest_framework import generics
+from django.http import StreamingHttpResponse
+from rest_framework import generics, permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from django_filters import rest_framework as filters
-from .models import Product
-from .serializers import ProductSerializer
+from core.compiled import CompiledListMixin
+from core.eager_loading import EagerLoadingMixin
+from compliance.permissions import IsAdminUser
+from . import bulk
+from .cache import CatalogCacheMixin, get_metrics
+from .inventory import release, reserve
+from .models import Product, StockReservation
+from .serializers import ProductSerializer, StockReservationSerializer
 from .permissions import IsAdminOrReadOnly
+from .search import ProductSearchFilter
 
 class ProductFilter(filters.FilterSet):
+    # By name, as the API shows categories; served by product_category_price_idx
+    category = filters.CharFilter(field_name="category__name")
     min_price = filters.NumberFilter(field_name="price", lookup_expr='gte')
     max_price = filters.NumberFilter(field_name="price", lookup_expr='lte')
+    # Maintained by compliance.counters, indexed with the default ordering
+    verified = filters.BooleanFilter(field_name="authority_verified")
 
     class Meta:
         model = Product
-        fields = ['category', 'min_price', 'max_price']
+        fields = ['category', 'min_price', 'max_price', 'verified', 'is_active']
 
-class ProductListCreateView(generics.ListCreateAPIView):
-    queryset = Product.objects.all().order_by('-created_at')
+class ActiveProductsMixin:
+    """ Only admins see (and can edit) deactivated products, e.g. the merged legacy ones """
+
+    def is_admin(self):
+        user = self.request.user
+        return bool(user and user.is_authenticated and user.role == 'Admin')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        return queryset if self.is_admin() else queryset.filter(is_active=True)
+
+    def cache_variant(self, request):
+        return 'admin' if self.is_admin() else ''
+
+class ProductListCreateView(ActiveProductsMixin, CatalogCacheMixin, CompiledListMixin, EagerLoadingMixin,
+                            generics.ListCreateAPIView):
+    cache_models = ('products.Product', 'products.Category')
+    queryset = Product.objects.all().order_by('-created_at', '-id')
     serializer_class = ProductSerializer
     permission_classes = [IsAdminOrReadOnly]
+    filter_backends = [filters.DjangoFilterBackend, ProductSearchFilter]
     filterset_class = ProductFilter
-    search_fields = ['name', 'description']
 
-class ProductRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+class ProductRetrieveUpdateDestroyView(ActiveProductsMixin, CatalogCacheMixin, EagerLoadingMixin,
+                                       generics.RetrieveUpdateDestroyAPIView):
+    cache_models = ('products.Product', 'products.Category')
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
     permission_classes = [IsAdminOrReadOnly]
+
+class CatalogCacheMetricsView(APIView):
+    """ Admin only: hit ratio and serialization time saved by the catalog cache """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(get_metrics())
+
+class ProductImportView(APIView):
+    """
+    Admin only: upserts products by SKU from an uploaded CSV / JSONL `file`.
+    Returns a per-row error report; valid rows are imported even if others fail.
+    """
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"file": ["No file was submitted."]}, status=status.HTTP_400_BAD_REQUEST)
+        fmt = request.query_params.get('input') or bulk.format_for(upload.name)
+        if fmt not in bulk.FORMATS:
+            return Response({"input": [f"Expected one of: {', '.join(bulk.FORMATS)}."]}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(bulk.import_products(upload, fmt))
+
+class ProductExportView(APIView):
+    """ Admin only: streams the whole catalog as CSV (default) or `?output=jsonl` """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        fmt = request.query_params.get('output', 'csv')
+        if fmt not in bulk.FORMATS:
+            return Response({"output": [f"Expected one of: {', '.join(bulk.FORMATS)}."]}, status=status.HTTP_400_BAD_REQUEST)
+        response = StreamingHttpResponse(bulk.export_products(fmt), content_type=bulk.CONTENT_TYPES[fmt])
+        response['Content-Disposition'] = f'attachment; filename="products.{fmt}"'
+        return response
+
+class StockReservationCreateView(generics.CreateAPIView):
+    """ Holds stock for the current user's cart until checkout or expiry """
+    serializer_class = StockReservationSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def perform_create(self, serializer):
+        data = serializer.validated_data
+        serializer.instance = reserve(self.request.user, data['product'], data['quantity'])
+
+class StockReservationDetailView(generics.RetrieveDestroyAPIView):
+    """ DELETE releases a held reservation (e.g. the line was removed from the cart) """
+    serializer_class = StockReservationSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return StockReservation.objects.filter(user=self.request.user)
+
+    def perform_destroy(self, instance):
+        release([instance])